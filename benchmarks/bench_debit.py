@@ -0,0 +1,233 @@
+"""Benchmark: débit et latence du récepteur face à un ESP8266 simulé (pty, Linux/macOS)
+
+Un SimulateurRecepteur émet des alertes au débit demandé; elles traversent le
+même chemin que dans RFIDRecepteurMonitor: boucle série partagée (wave_serie),
+file du client scrutée par la boucle d'interface toutes les
+INTERVALLE_VIDAGE_MS, ClientRecepteur.process_line, puis un rendu regroupé
+par tick de INTERVALLE_UI_MS. La boucle Tk est
+remplacée par un ordonnanceur à un seul thread (after), sans affichage.
+Le simulateur tourne dans le même processus: les débits mesurés sont une
+borne basse (il partage le GIL avec le lecteur).
+
+Usage: python benchmarks/bench_debit.py [--debit 50] [--duree 10] [--compact]
+       [--binaire] [--perte 0.02] [--doublons 0.02] [--hors-sequence 0.05] [--fec 4]
+       [--compression]
+--debit 0 envoie aussi vite que le récepteur absorbe (recherche du maximum).
+"""
+import argparse
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_client_recepteur import ClientRecepteur
+from wave_recepteur import INTERVALLE_UI_MS
+from wave_serie import INTERVALLE_VIDAGE_MS
+from wave_simulateur import SimulateurRecepteur
+from wave_traces import formater_ms, percentile
+
+ATTENTE_FIN = 3.0  # Secondes sans nouvelle alerte avant de clore la mesure
+
+
+class OrdonnanceurUI:
+    """Boucle d'évènements à un seul thread, comme celle de Tk (after)"""
+
+    def __init__(self):
+        self.taches = []
+        self.condition = threading.Condition()
+        self.compteur = itertools.count()
+        self.actif = True
+        self.profondeurs = []  # Tâches en attente à chaque exécution
+
+    def after(self, ms, fonction):
+        with self.condition:
+            heapq.heappush(self.taches, (time.monotonic() + ms / 1000, next(self.compteur), fonction))
+            self.condition.notify()
+
+    def boucle(self):
+        while self.actif:
+            with self.condition:
+                if not self.taches:
+                    self.condition.wait(0.1)
+                    continue
+                attente = self.taches[0][0] - time.monotonic()
+                if attente > 0:
+                    self.condition.wait(attente)
+                    continue
+                _, _, fonction = heapq.heappop(self.taches)
+                self.profondeurs.append(len(self.taches) + 1)
+            fonction()
+
+
+class ClientMesure(ClientRecepteur):
+    """ClientRecepteur qui compte les éléments (lignes ou trames) traités"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.elements = 0
+
+    def traiter(self, recepteur, elements):
+        self.elements += len(elements)
+        super().traiter(recepteur, elements)
+
+
+class BancRecepteur:
+    """Reproduit le chemin boucle série -> vidage -> rendu de RFIDRecepteurMonitor"""
+
+    def __init__(self, ui, envois):
+        self.ui = ui
+        self.envois = envois  # texte -> instant d'écriture sur le port simulé
+        self.client = ClientMesure(reveil=self.reveiller)
+        self.client.abonner('message', self.on_message)
+        self._donnees_serie = False
+        self._rendu_planifie = False
+        self._dernier_rendu = 0.0
+        self._a_afficher = []
+
+        self.lots_en_attente = []  # Lots dans la file série à chaque vidage
+        self.latences_journal = []
+        self.latences_rendu = []
+        self.vus = set()
+        self.inattendus = 0
+        self.mises_a_jour = 0
+        self.rendus = 0
+        self.dernier_message = time.monotonic()
+
+    def reveiller(self):
+        self._donnees_serie = True
+
+    def surveiller_serie(self):
+        if self._donnees_serie:
+            self._donnees_serie = False
+            self.lots_en_attente.append(self.client.file.qsize())
+            self.client.traiter_en_attente()
+        if self.ui.actif:
+            self.ui.after(INTERVALLE_VIDAGE_MS, self.surveiller_serie)
+
+    def on_message(self, entree, evincee):
+        maintenant = time.monotonic()
+        self.dernier_message = maintenant
+        envoi = self.envois.get(entree.texte)
+        if envoi is None or entree.texte in self.vus:
+            # Texte altéré par le firmware (paquet perdu ou en double) ou second affichage
+            self.inattendus += 1
+        else:
+            self.vus.add(entree.texte)
+            self.latences_journal.append(maintenant - envoi)
+            self._a_afficher.append(envoi)
+        self.mises_a_jour += 1
+        if not self._rendu_planifie:
+            self._rendu_planifie = True
+            ecoule_ms = (maintenant - self._dernier_rendu) * 1000
+            self.ui.after(max(0, int(INTERVALLE_UI_MS - ecoule_ms)), self.rendre)
+
+    def rendre(self):
+        self._rendu_planifie = False
+        self._dernier_rendu = maintenant = time.monotonic()
+        self.rendus += 1
+        for envoi in self._a_afficher:
+            self.latences_rendu.append(maintenant - envoi)
+        self._a_afficher = []
+
+
+def generer(simulateur, envois, debit, duree, groupe_fec=0, compression=False):
+    """Émet les alertes à `debit` par seconde (0: sans pause) pendant `duree` secondes"""
+    debut = time.monotonic()
+    numero = 0
+    while True:
+        maintenant = time.monotonic()
+        if maintenant - debut >= duree:
+            return numero
+        if debit:
+            echeance = debut + numero / debit
+            if echeance > maintenant:
+                time.sleep(echeance - maintenant)
+        texte = f"ALERTE {numero:06d} EVACUATION BATIMENT A" if compression else f"ALERTE {numero:06d}"
+        envois[texte] = time.monotonic()
+        simulateur.recevoir_message(texte, groupe_fec, compression)
+        numero += 1
+
+
+def ligne_latence(nom, valeurs):
+    ms = sorted(v * 1000 for v in valeurs)
+    if not ms:
+        return f"  {nom:22} -"
+    return (f"  {nom:22} p50 {formater_ms(percentile(ms, 50)):>9}  p95 {formater_ms(percentile(ms, 95)):>9}  "
+            f"p99 {formater_ms(percentile(ms, 99)):>9}  max {formater_ms(ms[-1]):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--debit', type=float, default=50.0, help="alertes par seconde (0: maximum)")
+    parser.add_argument('--duree', type=float, default=10.0, help="durée d'émission en secondes")
+    parser.add_argument('--compact', action='store_true', help="firmware en debugoff (lignes RX: seulement)")
+    parser.add_argument('--binaire', action='store_true', help="mode binaire négocié")
+    parser.add_argument('--perte', type=float, default=0.0, help="probabilité de perte d'un code radio")
+    parser.add_argument('--doublons', type=float, default=0.0, help="probabilité qu'un code soit reçu deux fois")
+    parser.add_argument('--hors-sequence', type=float, default=0.0, help="probabilité d'un code parasite par alerte")
+    parser.add_argument('--fec', type=int, default=0, metavar='G', help="un paquet de parité pour G paquets de données")
+    parser.add_argument('--compression', action='store_true', help="alertes plus longues, compressées")
+    args = parser.parse_args()
+
+    simulateur = SimulateurRecepteur(verbeux=not args.compact, perte=args.perte, doublons=args.doublons,
+                                     hors_sequence=args.hors_sequence, graine=42).demarrer()
+    ui = OrdonnanceurUI()
+    threading.Thread(target=ui.boucle, daemon=True).start()
+    envois = {}
+    banc = BancRecepteur(ui, envois)
+    ui.after(0, banc.surveiller_serie)
+    banc.client.connecter(simulateur.nom_port, args.binaire)
+    if args.binaire:
+        time.sleep(0.5)  # Réponse BIN:OK avant la première alerte
+
+    debut = time.monotonic()
+    envoyees = generer(simulateur, envois, args.debit, args.duree, args.fec, args.compression)
+    fin_emission = time.monotonic()
+    while len(banc.vus) < envoyees and time.monotonic() - banc.dernier_message < ATTENTE_FIN:
+        time.sleep(0.05)
+    fin = max(banc.dernier_message, fin_emission)
+    ui.after(0, lambda: None)
+    time.sleep(0.1)
+    banc.client.fermer()
+    simulateur.arreter()
+    ui.actif = False
+
+    ecoule = fin - debut
+    client = banc.client
+    mode = "binaire" if args.binaire else ("texte compact" if args.compact else "texte détaillé")
+    recepteur = next(iter(client.recepteurs.values()))
+    print(f"Débit demandé: {'maximum' if not args.debit else f'{args.debit:g} alertes/s'} pendant "
+          f"{args.duree:g} s ({mode}, perte {args.perte:.0%}, doublons {args.doublons:.0%}, "
+          f"hors séquence {args.hors_sequence:.0%}, parité {f'1/{args.fec}' if args.fec else 'non'})")
+    print(f"Éléments traités: {client.elements} ({client.elements / ecoule:.0f}/s), "
+          f"{recepteur.octets_lus} octets ({recepteur.octets_lus / ecoule / 1024:.1f} Kio/s)")
+    print(f"Alertes: {envoyees} émises ({envoyees / (fin_emission - debut):.1f}/s), "
+          f"{len(banc.vus)} reçues intactes ({len(banc.vus) / ecoule:.1f}/s), "
+          f"{banc.inattendus} altérées ou en double, {client.codes_non_reconnus} non reconnus")
+    trames_fec, paquets, reparees, irrecuperables = client.stats_fec()
+    if trames_fec:
+        print(f"Parité: {reparees} trames réparées ({paquets} paquets), {irrecuperables} irrécupérables "
+              f"sur {trames_fec}")
+    compressees, octets, paquets = client.stats_compression()
+    if compressees:
+        print(f"Compression: {compressees} trames, {octets} octets et {paquets} paquets économisés")
+    print("Latence depuis l'écriture sur le port:")
+    print(ligne_latence("-> journal", banc.latences_journal))
+    print(ligne_latence("-> rendu (tick UI)", banc.latences_rendu))
+    lots = sorted(banc.lots_en_attente)
+    taches = sorted(ui.profondeurs)
+    if lots:
+        print(f"File série au vidage: moyenne {sum(lots) / len(lots):.1f} lots, "
+              f"p95 {percentile(lots, 95)}, max {lots[-1]} ({len(lots)} vidages)")
+    if taches:
+        print(f"File d'évènements UI: p95 {percentile(taches, 95)}, max {taches[-1]} tâches")
+    print(f"Rendus: {banc.rendus} pour {banc.mises_a_jour} nouvelles lignes")
+    return 0 if len(banc.vus) + banc.inattendus else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Benchmark: démarrage à froid des deux interfaces (imports, premier affichage, interface complète)
+
+Chaque mesure lance un nouveau processus Python qui importe l'interface, crée
+la fenêtre et note:
+    imports             tkinter + module de l'interface (et tout ce qu'il importe)
+    fenêtre             tk.Tk()
+    construction        constructeur de l'interface (en-tête et panneau de connexion)
+    premier affichage   depuis le début du processus, fenêtre affichée et dessinée
+    interface complète  reste de l'interface construit, historique rechargé
+Le temps total vu du processus parent inclut le démarrage de l'interpréteur.
+Sans affichage (pas de DISPLAY), seuls les imports sont mesurés.
+
+Usage: python benchmarks/bench_demarrage.py [--essais 5] [--interface recepteur|emetteur]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+INTERFACES = {
+    'emetteur': ('wave_connect_gov', 'WaveConnectGov'),
+    'recepteur': ('wave_recepteur', 'RFIDRecepteurMonitor'),
+}
+ETAPES = ('imports', 'fenetre', 'construction', 'premier_affichage', 'interface_complete', 'processus')
+NOMS_ETAPES = {'imports': "Imports", 'fenetre': "Fenêtre", 'construction': "Construction",
+               'premier_affichage': "Premier affichage", 'interface_complete': "Interface complète",
+               'processus': "Processus (total)"}
+DELAI_MAX = 30.0
+
+
+def enfant(nom):
+    """Processus mesuré: une ligne JSON de durées (secondes) sur la sortie standard"""
+    debut = time.perf_counter()
+    mesures = {}
+    import importlib
+    import tkinter as tk
+    module_nom, classe_nom = INTERFACES[nom]
+    module = importlib.import_module(module_nom)
+    mesures['imports'] = time.perf_counter() - debut
+    try:
+        t = time.perf_counter()
+        root = tk.Tk()
+        mesures['fenetre'] = time.perf_counter() - t
+    except tk.TclError:
+        print(json.dumps(mesures), flush=True)  # Pas d'affichage: imports seulement
+        return
+
+    from wave_demarrage import apres_premier_affichage
+    apres_premier_affichage(root, lambda: mesures.setdefault('premier_affichage', time.perf_counter() - debut))
+    t = time.perf_counter()
+    app = getattr(module, classe_nom)(root)
+    mesures['construction'] = time.perf_counter() - t
+
+    def verifier():
+        if app.interface_complete and 'premier_affichage' in mesures:
+            mesures['interface_complete'] = time.perf_counter() - debut
+            print(json.dumps(mesures), flush=True)
+            if hasattr(app, 'on_close'):
+                app.on_close()  # Récepteur: ferme aussi le journal sur disque
+            else:
+                root.destroy()
+            return
+        root.after(2, verifier)
+    root.after(2, verifier)
+    root.mainloop()
+
+
+def mesurer(nom):
+    debut = time.perf_counter()
+    processus = subprocess.run([sys.executable, os.path.abspath(__file__), '--enfant', nom],
+                               capture_output=True, text=True, timeout=DELAI_MAX, cwd=RACINE)
+    total = time.perf_counter() - debut
+    for ligne in processus.stdout.splitlines():
+        if ligne.startswith('{'):
+            mesures = json.loads(ligne)
+            mesures['processus'] = total
+            return mesures
+    raise RuntimeError(f"{nom}: pas de mesure\n{processus.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de démarrage des interfaces")
+    parser.add_argument('--essais', type=int, default=5)
+    parser.add_argument('--interface', choices=sorted(INTERFACES), action='append')
+    parser.add_argument('--enfant', choices=sorted(INTERFACES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.enfant:
+        enfant(args.enfant)
+        return
+
+    for nom in args.interface or ('emetteur', 'recepteur'):
+        mesurer(nom)  # Premier lancement écarté: caches disque et .pyc
+        essais = [mesurer(nom) for _ in range(args.essais)]
+        print(f"{INTERFACES[nom][0]}.py ({args.essais} lancements)")
+        for etape in ETAPES:
+            valeurs = [essai[etape] * 1000 for essai in essais if etape in essai]
+            if valeurs:
+                print(f"  {NOMS_ETAPES[etape]:<20} médiane {statistics.median(valeurs):6.0f} ms • "
+                      f"min {min(valeurs):6.0f} ms")
+        if not any('fenetre' in essai for essai in essais):
+            print("  (pas d'affichage: fenêtre et rendu non mesurés)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Micro-benchmark: chaîne de tests `in` historique vs classifieur précompilé
+
+Rejoue une capture du récepteur et compare le coût de classification par ligne.
+Usage: python benchmarks/bench_dispatch.py [capture.log] [repetitions]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_protocole import ClassifieurLignes
+
+
+def ancien_dispatch(line):
+    """Réplique de l'ancienne chaîne if/elif de process_line (sans effets de bord)"""
+    if "Signal détecté" in line:
+        return 'signal'
+    elif "Code brut reçu :" in line:
+        line.split("Code brut reçu :")[1].strip()
+        return 'code_brut'
+    elif "Longueur :" in line:
+        line.split("Longueur :")[1].strip()
+        return 'longueur'
+    elif "Protocole :" in line:
+        line.split("Protocole :")[1].strip()
+        return 'protocole'
+    elif "Code valide détecté" in line:
+        return 'code_valide'
+    elif "✅ MESSAGE PERSONNALISÉ REÇU:" in line:
+        re.search(r"✅ MESSAGE PERSONNALISÉ REÇU: '([^']*)'", line)
+        return 'message_recu'
+    elif "✅ ALERTE ARRÊTÉE - LED ÉTEINTE" in line:
+        return 'alerte_arretee'
+    elif "📄 Message lu:" in line:
+        re.search(r"📄 Message lu: '([^']*)'", line)
+        return 'message_lu'
+    elif "🚨 NOUVELLE ALERTE ACTIVÉE - LED CLIGNOTANTE" in line:
+        return 'nouvelle_alerte'
+    elif "📝 Commande reçue:" in line:
+        re.search(r"📝 Commande reçue: '([^']*)'", line)
+        return 'commande'
+    elif "🔊 SON ACTIVÉ" in line:
+        return 'son_active'
+    elif "🔇 SON DÉSACTIVÉ" in line:
+        return 'son_desactive'
+    elif "DEBUG: Début de message - Longueur attendue:" in line:
+        line.split("Longueur attendue:")[1].strip()
+        return 'debut_message'
+    elif "DEBUG: Paquet" in line and "reçu:" in line:
+        re.search(r"DEBUG: Paquet (\d+) reçu: (0x[0-9A-F]+)", line)
+        return 'paquet'
+    elif "Buffer actuel:" in line:
+        re.search(r"Buffer actuel: '([^']*)' \((\d+)/(\d+) chars\)", line)
+        return 'buffer'
+    elif "✅ CARTE AUTORISÉE DÉTECTÉE" in line:
+        return 'carte_autorisee'
+    elif "DEBUG: Signal hors séquence:" in line:
+        re.search(r"Signal hors séquence: (0x[0-9A-F]+)", line)
+        return 'hors_sequence'
+    elif "DEBUG: Buffer réinitialisé" in line:
+        return 'buffer_reinit'
+    elif "Signal rejeté" in line:
+        return 'signal_rejete'
+    elif "Code = 0" in line:
+        return 'bruit'
+    elif "Longueur incorrecte" in line:
+        return 'longueur_incorrecte'
+    elif line.startswith("DEBUG:"):
+        return 'debug'
+    return 'autre'
+
+
+def mesurer(fonction, lignes, repetitions):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        for line in lignes:
+            fonction(line)
+    return (time.perf_counter() - debut) / (repetitions * len(lignes))
+
+
+def main():
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    chemin = sys.argv[1] if len(sys.argv) > 1 else os.path.join(dossier, "capture_recepteur.log")
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with open(chemin, encoding='utf-8') as f:
+        lignes = [l.strip() for l in f if l.strip()]
+
+    classifieur = ClassifieurLignes()
+    nouveau = lambda line: classifieur.classer(line)[0]
+
+    # Les deux dispatchs doivent router chaque ligne vers le même handler
+    divergences = [l for l in lignes if ancien_dispatch(l) != nouveau(l)]
+    for l in divergences:
+        print(f"DIVERGENCE: {l!r} -> {ancien_dispatch(l)} / {nouveau(l)}")
+
+    ancien = mesurer(ancien_dispatch, lignes, repetitions)
+    compile_ = mesurer(nouveau, lignes, repetitions)
+    print(f"{len(lignes)} lignes x {repetitions} répétitions")
+    print(f"  chaîne if/elif : {ancien * 1e6:7.2f} µs/ligne")
+    print(f"  classifieur    : {compile_ * 1e6:7.2f} µs/ligne  (x{ancien / compile_:.2f})")
+    return 1 if divergences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Benchmark: recherche plein texte dans un journal persistant de N alertes
+
+Génère une base temporaire (un million d'alertes par défaut, une toutes les
+5 s), puis mesure les requêtes de la barre de recherche du récepteur. Le
+vocabulaire volontairement réduit (chaque mot dans ~20% des alertes) donne
+de longues listes de correspondances: c'est le cas défavorable pour FTS5.
+Usage: python benchmarks/bench_recherche.py [nombre_alertes] [repetitions]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_persistance import JournalPersistant, ouvrir
+
+MOTS = ["EVACUATION", "INCENDIE", "Batiment", "A", "B", "C", "salle", "exercice",
+        "confinement", "fin", "alerte", "etage", "1", "2", "3", "RDV", "parking", "nord", "sud"]
+INTERVALLE = 5.0  # Secondes entre deux alertes générées
+
+
+def remplir(chemin, nombre, debut):
+    random.seed(42)
+    connexion = ouvrir(chemin)
+    with connexion:
+        connexion.executemany(
+            "INSERT INTO messages (id, recu_a, heure, texte, non_lu) VALUES (?, ?, ?, ?, 0)",
+            ((i, debut + i * INTERVALLE, time.strftime("%H:%M:%S", time.localtime(debut + i * INTERVALLE)),
+              " ".join(random.choices(MOTS, k=random.randint(2, 6))))
+             for i in range(1, nombre + 1)))
+    connexion.execute("PRAGMA optimize")
+    connexion.close()
+
+
+def mesurer(journal, repetitions, *args):
+    journal.rechercher(*args)  # Cache de pages chaud, comme en usage interactif
+    durees = []
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        resultats = journal.rechercher(*args)
+        durees.append((time.perf_counter() - t0) * 1000)
+    durees.sort()
+    return len(resultats), durees[len(durees) // 2], durees[-1]
+
+
+def main():
+    nombre = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    debut = time.time() - nombre * INTERVALLE
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "bench.db")
+        t0 = time.perf_counter()
+        remplir(chemin, nombre, debut)
+        print(f"{nombre} alertes indexées en {time.perf_counter() - t0:.1f} s")
+
+        journal = JournalPersistant(chemin)
+        milieu = debut + nombre * INTERVALLE / 2
+        cas = [
+            ("mot fréquent", "EVACUATION", None, None),
+            ("préfixe", "evac", None, None),
+            ("deux mots", "EVACUATION nord", None, None),
+            ("mot rare + depuis", "EVACUATION parking sud", milieu, None),
+            ("mot + plage étroite", "INCENDIE", milieu, milieu + 3600),
+            ("sans résultat", "introuvable", None, None),
+            ("plage seule", "", milieu, milieu + 3600),
+        ]
+        print(f"{'requête':24} {'résultats':>9} {'médiane':>10} {'max':>10}")
+        pire = 0.0
+        for nom, texte, depuis, jusqu_a in cas:
+            nb, mediane, maximum = mesurer(journal, repetitions, texte, depuis, jusqu_a)
+            pire = max(pire, maximum)
+            print(f"{nom:24} {nb:9} {mediane:8.2f}ms {maximum:8.2f}ms")
+        journal.fermer()
+        verdict = "sous" if pire < 50 else "au-delà de"
+        print(f"Pire requête: {pire:.2f} ms ({verdict} l'objectif de 50 ms)")
+
+
+if __name__ == '__main__':
+    main()
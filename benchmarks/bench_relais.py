@@ -0,0 +1,166 @@
+"""Benchmark: débit et retard du relais entre stations (wave_relais), en boucle locale
+
+Plusieurs stations simulées tournent dans le même processus, chacune avec son
+Relais sur 127.0.0.1 (port --port, puis un de plus par station), toutes reliées
+entre elles. Chaque station publie --alertes alertes au débit demandé; on mesure
+le temps pour que toutes aient reçu celles des autres, et le retard de chaque
+livraison (réception ici - réception à la station d'origine).
+
+Avec --coupure, la dernière station est ensuite arrêtée pendant que les autres
+publient; à son redémarrage, on mesure la reprise des alertes en attente et on
+vérifie qu'elles arrivent toutes, une seule fois et dans l'ordre de chaque
+station d'origine.
+
+Toutes les stations partagent la boucle série (un seul thread): les débits
+mesurés sont ceux d'un poste qui relaierait pour toutes.
+
+Usage: python benchmarks/bench_relais.py [--stations 4] [--alertes 2000] [--debit 0] [--coupure 500]
+--debit 0 publie aussi vite que possible; sinon alertes/s par station.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_relais import Relais
+from wave_traces import formater_ms, percentile
+
+ATTENTE_MAX = 60.0  # Secondes avant d'abandonner une phase
+
+
+class Station:
+    """Relais d'une station simulée et alertes qu'il a livrées"""
+
+    def __init__(self, nom, port, pairs):
+        self.nom = nom
+        self.port = port
+        self.pairs = pairs
+        self.livrees = []   # (station d'origine, numéro local)
+        self.retards = []   # Secondes
+        self.publiees = 0
+        self.condition = threading.Condition()
+        self.relais = None
+        self.demarrer()
+
+    def demarrer(self):
+        self.relais = Relais(self.nom, [("127.0.0.1", port) for port in self.pairs], self.port, self.livrer)
+        self.relais.demarrer()
+
+    def livrer(self, alerte):
+        with self.condition:
+            self.livrees.append((alerte['station'], int(alerte['id'].rpartition('/')[2])))
+            self.retards.append(time.time() - alerte['recu_a'])
+            self.condition.notify_all()
+
+    def publier(self, n, debit):
+        debut = time.perf_counter()
+        for i in range(n):
+            if debit:
+                attente = debut + i / debit - time.perf_counter()
+                if attente > 0:
+                    time.sleep(attente)
+            self.publiees += 1
+            self.relais.publier(f"ALERTE {self.nom} {self.publiees}", "Étage 1", time.time(), self.publiees)
+
+    def attendre(self, total, limite):
+        with self.condition:
+            return self.condition.wait_for(lambda: len(self.livrees) >= total, limite - time.monotonic())
+
+
+def publier_toutes(stations, n, debit):
+    threads = [threading.Thread(target=station.publier, args=(n, debit)) for station in stations]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def verifier(station):
+    """(doublons, alertes hors ordre) parmi les livraisons d'une station"""
+    doublons = len(station.livrees) - len(set(station.livrees))
+    hors_ordre = 0
+    derniers = {}
+    for origine, numero in station.livrees:
+        if numero <= derniers.get(origine, 0):
+            hors_ordre += 1
+        derniers[origine] = numero
+    return doublons, hors_ordre
+
+
+def afficher_retards(retards):
+    retards = sorted(retard * 1000 for retard in retards)
+    print(f"  Retard de livraison: p50 {formater_ms(percentile(retards, 50))} • "
+          f"p95 {formater_ms(percentile(retards, 95))} • p99 {formater_ms(percentile(retards, 99))} • "
+          f"max {formater_ms(retards[-1] if retards else None)}")
+
+
+def mesurer(stations, attendues, debut, titre):
+    limite = time.monotonic() + ATTENTE_MAX
+    complet = all(station.attendre(attendues(station), limite) for station in stations)
+    duree = time.perf_counter() - debut
+    livrees = sum(len(station.livrees) for station in stations)
+    print(f"{titre}: {livrees} livraisons en {duree:.2f} s ({livrees / duree:.0f}/s)"
+          + ("" if complet else " - INCOMPLET"))
+    for station in stations:
+        doublons, hors_ordre = verifier(station)
+        print(f"  {station.nom}: {len(station.livrees)}/{attendues(station)} reçues, "
+              f"{doublons} doublons, {hors_ordre} hors ordre, {station.relais.doublons} doublons écartés")
+    return complet
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du relais entre stations")
+    parser.add_argument('--stations', type=int, default=4)
+    parser.add_argument('--alertes', type=int, default=2000, help="alertes publiées par station")
+    parser.add_argument('--debit', type=float, default=0, help="alertes/s par station (0 = maximum)")
+    parser.add_argument('--coupure', type=int, default=0, metavar='N',
+                        help="alertes publiées par station pendant l'arrêt de la dernière")
+    parser.add_argument('--port', type=int, default=7950)
+    args = parser.parse_args()
+
+    ports = [args.port + i for i in range(args.stations)]
+    stations = [Station(f"Poste {chr(ord('A') + i)}", port, [autre for autre in ports if autre != port])
+                for i, port in enumerate(ports)]
+    # Toutes les connexions établies avant la mesure
+    limite = time.monotonic() + ATTENTE_MAX
+    while any(station.relais.pairs_connectes() < len(station.pairs) for station in stations):
+        if time.monotonic() > limite:
+            raise SystemExit("stations non connectées entre elles")
+        time.sleep(0.05)
+
+    print(f"{args.stations} stations, {args.alertes} alertes chacune"
+          + (f" à {args.debit:.0f}/s" if args.debit else " au maximum"))
+    debut = time.perf_counter()
+    publier_toutes(stations, args.alertes, args.debit)
+    mesurer(stations, lambda station: (len(stations) - 1) * args.alertes, debut, "Diffusion")
+    afficher_retards([retard for station in stations for retard in station.retards])
+
+    if args.coupure:
+        coupee, autres = stations[-1], stations[:-1]
+        coupee.relais.arreter().result(5.0)
+        avant = len(coupee.livrees)
+        publier_toutes(autres, args.coupure, args.debit)
+        time.sleep(0.5)
+        en_attente = sum(len(pair.en_attente) for station in autres for pair in station.relais.pairs
+                         if pair.port == coupee.port)
+        print(f"\n{coupee.nom} arrêtée: {en_attente} alertes en attente chez les autres stations")
+
+        # Même nom et même port: les autres stations s'y reconnectent et rejouent leur file
+        coupee.livrees, coupee.retards = [], []
+        debut = time.perf_counter()
+        coupee.demarrer()
+        mesurer([coupee], lambda station: len(autres) * args.coupure, debut, "Reprise")
+        afficher_retards(coupee.retards)
+        print(f"  ({avant} alertes reçues avant l'arrêt)")
+
+    print()
+    for station in stations:
+        print(station.relais.resume())
+        station.relais.arreter().result(5.0)
+
+
+if __name__ == '__main__':
+    main()
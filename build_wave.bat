@@ -4,7 +4,7 @@ echo   CREATION DES EXECUTABLES WAVE
 echo ========================================
 echo.
 
-echo [1/4] Installation de PyInstaller...
+echo [1/5] Installation de PyInstaller...
 py -3.13 -m pip install pyinstaller pillow
 if %errorlevel% neq 0 (
     echo ERREUR: Installation de PyInstaller echouee
@@ -13,20 +13,29 @@ if %errorlevel% neq 0 (
 )
 
 echo.
-echo [2/4] Creation de l'executable WAVE CONNECT GOV...
+echo [2/5] Reduction des logos (lus sans PIL au demarrage)...
+py -3.13 wave_demarrage.py
+if %errorlevel% neq 0 (
+    echo ERREUR: Reduction des logos echouee
+    pause
+    exit /b 1
+)
 
-REM Detection des images disponibles pour WAVE Connect Gov
+REM --onedir: rien a decompresser dans un dossier temporaire a chaque lancement
+REM (--onefile le fait a chaque demarrage). PIL n'est plus utilise a l'execution.
+set OPTIONS=--onedir --windowed --noupx --exclude-module PIL
+
+echo.
+echo [3/5] Creation de l'executable WAVE CONNECT GOV...
+
+REM Logos deja reduits (wave_demarrage.py)
 set ADD_DATA_GOV=
-if exist "logo.png" (
-    echo   - Ajout de logo.png
-    set ADD_DATA_GOV=%ADD_DATA_GOV% --add-data="logo.png;."
-)
-if exist "WAVE-CONNECT.png" (
-    echo   - Ajout de WAVE-CONNECT.png
-    set ADD_DATA_GOV=%ADD_DATA_GOV% --add-data="WAVE-CONNECT.png;."
+if exist "logo-80x80.png" (
+    echo   - Ajout de logo-80x80.png
+    set ADD_DATA_GOV=%ADD_DATA_GOV% --add-data="logo-80x80.png;."
 )
 
-py -3.13 -m PyInstaller --onefile --windowed --name="WAVE_Connect_Gov" %ADD_DATA_GOV% wave_connect_gov.py
+py -3.13 -m PyInstaller %OPTIONS% --name="WAVE_Connect_Gov" %ADD_DATA_GOV% wave_connect_gov.py
 if %errorlevel% neq 0 (
     echo ERREUR: Creation WAVE Connect Gov echouee
     pause
@@ -34,20 +43,20 @@ if %errorlevel% neq 0 (
 )
 
 echo.
-echo [3/4] Creation de l'executable WAVE RECEPTEUR...
+echo [4/5] Creation de l'executable WAVE RECEPTEUR...
 
-REM Detection des images disponibles pour WAVE Recepteur
+REM Logos deja reduits (wave_demarrage.py)
 set ADD_DATA_REC=
-if exist "WAVE-CONNECT.png" (
-    echo   - Ajout de WAVE-CONNECT.png
-    set ADD_DATA_REC=%ADD_DATA_REC% --add-data="WAVE-CONNECT.png;."
+if exist "WAVE-CONNECT-120x80.png" (
+    echo   - Ajout de WAVE-CONNECT-120x80.png
+    set ADD_DATA_REC=%ADD_DATA_REC% --add-data="WAVE-CONNECT-120x80.png;."
 )
-if exist "logo.png" (
-    echo   - Ajout de logo.png
-    set ADD_DATA_REC=%ADD_DATA_REC% --add-data="logo.png;."
+if exist "logo-120x80.png" (
+    echo   - Ajout de logo-120x80.png
+    set ADD_DATA_REC=%ADD_DATA_REC% --add-data="logo-120x80.png;."
 )
 
-py -3.13 -m PyInstaller --onefile --windowed --name="WAVE_Recepteur" %ADD_DATA_REC% wave_recepteur.py
+py -3.13 -m PyInstaller %OPTIONS% --name="WAVE_Recepteur" %ADD_DATA_REC% wave_recepteur.py
 if %errorlevel% neq 0 (
     echo ERREUR: Creation WAVE Recepteur echouee
     pause
@@ -55,7 +64,7 @@ if %errorlevel% neq 0 (
 )
 
 echo.
-echo [4/4] Nettoyage des fichiers temporaires...
+echo [5/5] Nettoyage des fichiers temporaires...
 rmdir /s /q build 2>nul
 del *.spec 2>nul
 
@@ -64,9 +73,9 @@ echo ========================================
 echo        CREATION TERMINEE AVEC SUCCES !
 echo ========================================
 echo.
-echo Executables crees dans le dossier 'dist' :
-echo  - WAVE_Connect_Gov.exe
-echo  - WAVE_Recepteur.exe
+echo Applications creees dans le dossier 'dist' (copier le dossier entier) :
+echo  - WAVE_Connect_Gov\WAVE_Connect_Gov.exe
+echo  - WAVE_Recepteur\WAVE_Recepteur.exe
 echo.
 echo Appuyez sur une touche pour ouvrir le dossier...
 pause >nul
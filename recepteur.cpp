@@ -12,6 +12,8 @@ RCSwitch mySwitch = RCSwitch();
 String messageBuffer = "";
 int expectedLength = 0;
 bool receivingMessage = false;
+bool packedMessage = false; // Message compressé (wave_compression.py): décodé par le PC seulement
+int packedBytes = 0;
 unsigned long lastPacketTime = 0;
 bool ledState = LOW;
 const unsigned long BLINK_INTERVAL = 100; // Intervalle de clignotement en ms
@@ -23,10 +25,27 @@ String lastMessage = "";  // Stocke le dernier message reçu
 // ⭐ NOUVELLE VARIABLE POUR CONTRÔLE DU SON ⭐
 bool soundEnabled = true; // Contrôle global du son
 
+// Traces détaillées des paquets (désactivables: le PC réassemble via les lignes RX:)
+bool verboseDebug = true;
+
+// ===== MODE BINAIRE (wave_binaire.py) =====
+// Trame: A5 5A | type | longueur | données | CRC-16/CCITT (big-endian)
+bool binaryMode = false;
+const byte FRAME_CODE = 0x01;
+const byte FRAME_MESSAGE = 0x02;
+const byte FRAME_ALERT_STOPPED = 0x03;
+const byte FRAME_SOUND = 0x04;
+const byte FRAME_OUT_OF_SEQUENCE = 0x05;
+
 // Variables pour la déduplication
 unsigned long lastReceivedCode = 0;
 unsigned long lastCodeTime = 0;
 const unsigned long DUPLICATE_DELAY_MS = 200;
+// Code modèle: le transmetteur l'émet deux fois, la copie arrive ~220 ms après
+// (répétitions RCSwitch + 50 ms), au-delà de DUPLICATE_DELAY_MS
+unsigned long lastTemplateCode = 0;
+unsigned long lastTemplateTime = 0;
+const unsigned long TEMPLATE_DUPLICATE_MS = 1000; // DELAI_COPIE_MODELE de wave_trames.py
 
 // ===== VARIABLES POUR ALERTE SONORE NUCLÉAIRE =====
 unsigned long lastSoundChange = 0;
@@ -61,7 +80,8 @@ void setup() {
   Serial.println("   - 'soundoff'  : ⭐ DÉSACTIVER le son");
   Serial.println("   - 'status'    : Vérifier l'état");
   Serial.println("   - 'help'      : Afficher l'aide");
-  Serial.println("   - 'testsound' : Tester le son d'alerte\n");
+  Serial.println("   - 'testsound' : Tester le son d'alerte");
+  Serial.println("   - 'debugoff'  : Codes compacts RX: uniquement\n");
 
   // Test rapide du buzzer au démarrage (si son activé)
   if (soundEnabled) {
@@ -99,7 +119,9 @@ void loop() {
 
   // Timeout pour réinitialiser si on ne reçoit pas de paquet pendant 10 secondes
   if (receivingMessage && (millis() - lastPacketTime > 10000)) {
-    Serial.println("DEBUG: Timeout - Réinitialisation du buffer");
+    if (!binaryMode) {
+      Serial.println("DEBUG: Timeout - Réinitialisation du buffer");
+    }
     resetMessageBuffer();
   }
 
@@ -164,7 +186,9 @@ void playMessageReceivedSound() {
   if (!soundEnabled) return; // ⭐ Vérifier si son activé
   
   // Son d'alerte d'urgence quand message reçu
-  Serial.println("🚨 SIGNAL D'ALERTE NUCLÉAIRE ACTIVÉ !");
+  if (!binaryMode) {
+    Serial.println("🚨 SIGNAL D'ALERTE NUCLÉAIRE ACTIVÉ !");
+  }
   noTone(BUZZER_PIN);
   
   // Sirène d'urgence
@@ -202,24 +226,38 @@ void processTerminalCommand(String command) {
   // ⭐⭐ NOUVELLES COMMANDES POUR CONTRÔLE DU SON ⭐⭐
   if (command == "soundon") {
     soundEnabled = true;
-    Serial.println("🔊 SON ACTIVÉ - Les alertes sonores sont maintenant actives");
+    if (binaryMode) {
+      byte state = 1;
+      sendFrame(FRAME_SOUND, &state, 1);
+    } else {
+      Serial.println("🔊 SON ACTIVÉ - Les alertes sonores sont maintenant actives");
+    }
     playConfirmationSound(); // Jouer un son de confirmation
   }
   else if (command == "soundoff") {
     soundEnabled = false;
     noTone(BUZZER_PIN); // Arrêter immédiatement tout son en cours
-    Serial.println("🔇 SON DÉSACTIVÉ - Les alertes sont maintenant silencieuses");
-    Serial.println("💡 La LED continuera à clignoter lors des alertes");
+    if (binaryMode) {
+      byte state = 0;
+      sendFrame(FRAME_SOUND, &state, 1);
+    } else {
+      Serial.println("🔇 SON DÉSACTIVÉ - Les alertes sont maintenant silencieuses");
+      Serial.println("💡 La LED continuera à clignoter lors des alertes");
+    }
   }
   else if (command == "stopalert") {
     if (alertActive) {
       alertActive = false;
       digitalWrite(LED_GREEN, LOW);
       noTone(BUZZER_PIN); // Arrêter le son
-      Serial.println("✅ ALERTE ARRÊTÉE - LED + SON ÉTEINTS");
-      Serial.print("📄 Message lu: '");
-      Serial.print(lastMessage);
-      Serial.println("'");
+      if (binaryMode) {
+        sendTextFrame(FRAME_ALERT_STOPPED, lastMessage);
+      } else {
+        Serial.println("✅ ALERTE ARRÊTÉE - LED + SON ÉTEINTS");
+        Serial.print("📄 Message lu: '");
+        Serial.print(lastMessage);
+        Serial.println("'");
+      }
       
       // Son de confirmation (si son activé)
       playConfirmationSound();
@@ -259,6 +297,25 @@ void processTerminalCommand(String command) {
       Serial.println("🔇 Son désactivé - Tapez 'soundon' pour activer le son");
     }
   }
+  else if (command == "debugon") {
+    verboseDebug = true;
+    Serial.println("🐞 DEBUG DÉTAILLÉ ACTIVÉ");
+  }
+  else if (command == "debugoff") {
+    verboseDebug = false;
+    Serial.println("🐞 DEBUG DÉTAILLÉ DÉSACTIVÉ - Codes RX: uniquement");
+  }
+  else if (command == "binon") {
+    // Réponse texte d'abord: le PC bascule son décodeur en la lisant
+    Serial.print("BIN:OK ");
+    Serial.println(1);
+    binaryMode = true;
+    verboseDebug = false;
+  }
+  else if (command == "binoff") {
+    binaryMode = false;
+    Serial.println("BIN:OFF");
+  }
   else if (command == "help") {
     showHelp();
   }
@@ -299,6 +356,8 @@ void showHelp() {
   Serial.println("status     - Afficher l'état du système");
   Serial.println("test       - Simuler une alerte complète");
   Serial.println("testsound  - Tester uniquement le son");
+  Serial.println("debugon    - Traces détaillées des paquets");
+  Serial.println("debugoff   - Codes compacts RX: uniquement");
   Serial.println("clear      - Effacer l'écran du terminal");
   Serial.println("help       - Afficher cette aide");
   Serial.println("=====================================");
@@ -311,60 +370,87 @@ void showHelp() {
 }
 
 void processCode(unsigned long code) {
+  // Code brut compact: le PC réassemble lui-même la trame (wave_trames.py)
+  if (binaryMode) {
+    sendCodeFrame(FRAME_CODE, code);
+  } else {
+    Serial.print("RX:");
+    Serial.println(code, HEX);
+  }
+
   byte byte0 = (code >> 24) & 0xFF;
   byte byte1 = (code >> 16) & 0xFF;
   byte byte2 = (code >> 8) & 0xFF;
   byte byte3 = code & 0xFF;
 
+  // Code modèle (0xFD): message standard complet en un code (wave_modeles.py), développé par le PC
+  if (byte0 == 0xFD) {
+    // Copie du même code modèle: déjà annoncé, la copie ne sert qu'en cas de perte
+    unsigned long now = millis();
+    bool copy = (code == lastTemplateCode && (now - lastTemplateTime) < TEMPLATE_DUPLICATE_MS);
+    lastTemplateCode = code;
+    lastTemplateTime = now;
+    if (copy) return;
+    String saved = messageBuffer;
+    messageBuffer = "MODELE " + String(byte1);
+    if (byte2 >= 32 && byte2 <= 126) messageBuffer += " " + String((char)byte2);
+    if (byte3 >= 32 && byte3 <= 126) messageBuffer += (char)byte3;
+    announceMessage();
+    lastTemplateTime = millis(); // Après le son bloquant: la copie est comptée depuis la fin de l'annonce
+    messageBuffer = saved; // Une trame en cours continue
+    return;
+  }
+
   // Code de début (0xFF)
   if (byte0 == 0xFF) {
     expectedLength = code & 0xFF;
     messageBuffer = "";
     receivingMessage = true;
+    packedMessage = byte1 & 0x80;
+    packedBytes = 0;
     lastPacketTime = millis();
-    Serial.print("DEBUG: Début de message - Longueur attendue: ");
-    Serial.println(expectedLength);
+    if (verboseDebug) {
+      Serial.print("DEBUG: Début de message - Longueur attendue: ");
+      Serial.println(expectedLength);
+    }
     return;
   }
 
   // Code de fin (0xFE)
   if (byte0 == 0xFE) {
     if (receivingMessage) {
-      Serial.print("✅ MESSAGE PERSONNALISÉ REÇU: '");
-      Serial.print(messageBuffer);
-      Serial.print("' (");
-      Serial.print(messageBuffer.length());
-      Serial.println(" caractères)");
-
-      // ⭐ ACTIVER L'ALERTE COMPLÈTE (LED + SON SI ACTIVÉ) ⭐
-      alertActive = true;
-      lastMessage = messageBuffer;
-      
-      Serial.println("🚨 ALERTE NUCLÉAIRE ACTIVÉE !");
-      Serial.println("💡 LED: Clignotante");
-      
-      if (soundEnabled) {
-        Serial.println("🔊 SON: Alerte nucléaire continue");
-        // Jouer le son d'alerte lors de la réception
-        playMessageReceivedSound();
-      } else {
-        Serial.println("🔇 SON: Désactivé (alerte silencieuse)");
+      if (packedMessage) {
+        // Texte compressé illisible ici: l'interface PC affiche le message décodé
+        messageBuffer = "MESSAGE COMPRESSE (" + String(packedBytes) + " octets)";
       }
-      
-      Serial.println("💡 Tapez 'stopalert' dans le terminal pour arrêter l'alerte");
+      announceMessage();
     }
     resetMessageBuffer();
     return;
   }
 
+  // Paquet de parité (0x80 + groupe): réservé à la correction d'erreurs côté PC
+  if (receivingMessage && byte0 >= 0x80) {
+    lastPacketTime = millis();
+    return;
+  }
+
   // Paquet de données
   if (receivingMessage) {
     int packetNumber = byte0;
 
-    Serial.print("DEBUG: Paquet ");
-    Serial.print(packetNumber + 1);
-    Serial.print(" reçu: 0x");
-    Serial.println(code, HEX);
+    if (verboseDebug) {
+      Serial.print("DEBUG: Paquet ");
+      Serial.print(packetNumber + 1);
+      Serial.print(" reçu: 0x");
+      Serial.println(code, HEX);
+    }
+
+    if (packedMessage) {
+      packedBytes = min(packedBytes + 3, expectedLength);
+      lastPacketTime = millis();
+      return;
+    }
 
     if (byte1 != 0x00 && messageBuffer.length() < expectedLength) {
       if (byte1 >= 32 && byte1 <= 126) messageBuffer += (char)byte1;
@@ -376,19 +462,25 @@ void processCode(unsigned long code) {
       if (byte3 >= 32 && byte3 <= 126) messageBuffer += (char)byte3;
     }
 
-    Serial.print("  Buffer actuel: '");
-    Serial.print(messageBuffer);
-    Serial.print("' (");
-    Serial.print(messageBuffer.length());
-    Serial.print("/");
-    Serial.print(expectedLength);
-    Serial.println(" chars)");
+    if (verboseDebug) {
+      Serial.print("  Buffer actuel: '");
+      Serial.print(messageBuffer);
+      Serial.print("' (");
+      Serial.print(messageBuffer.length());
+      Serial.print("/");
+      Serial.print(expectedLength);
+      Serial.println(" chars)");
+    }
 
     lastPacketTime = millis();
     return;
   }
 
   // Signal hors séquence
+  if (binaryMode) {
+    sendCodeFrame(FRAME_OUT_OF_SEQUENCE, code);
+    return;
+  }
   Serial.print("DEBUG: Signal hors séquence: 0x");
   Serial.print(code, HEX);
   Serial.print(" (byte0=0x");
@@ -396,9 +488,77 @@ void processCode(unsigned long code) {
   Serial.println(")");
 }
 
+// ⭐ ACTIVER L'ALERTE COMPLÈTE (LED + SON SI ACTIVÉ) ⭐
+void announceMessage() {
+  alertActive = true;
+  lastMessage = messageBuffer;
+
+  if (binaryMode) {
+    sendTextFrame(FRAME_MESSAGE, messageBuffer);
+    playMessageReceivedSound();
+  } else {
+    Serial.print("✅ MESSAGE PERSONNALISÉ REÇU: '");
+    Serial.print(messageBuffer);
+    Serial.print("' (");
+    Serial.print(messageBuffer.length());
+    Serial.println(" caractères)");
+
+    Serial.println("🚨 ALERTE NUCLÉAIRE ACTIVÉE !");
+    Serial.println("💡 LED: Clignotante");
+
+    if (soundEnabled) {
+      Serial.println("🔊 SON: Alerte nucléaire continue");
+      // Jouer le son d'alerte lors de la réception
+      playMessageReceivedSound();
+    } else {
+      Serial.println("🔇 SON: Désactivé (alerte silencieuse)");
+    }
+
+    Serial.println("💡 Tapez 'stopalert' dans le terminal pour arrêter l'alerte");
+  }
+}
+
 void resetMessageBuffer() {
   messageBuffer = "";
   expectedLength = 0;
   receivingMessage = false;
-  Serial.println("DEBUG: Buffer réinitialisé");
+  packedMessage = false;
+  if (!binaryMode) {
+    Serial.println("DEBUG: Buffer réinitialisé");
+  }
+}
+
+// ===== TRAMES BINAIRES =====
+uint16_t crc16(const byte* data, size_t len, uint16_t crc) {
+  for (size_t i = 0; i < len; i++) {
+    crc ^= ((uint16_t)data[i]) << 8;
+    for (byte b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void sendFrame(byte type, const byte* payload, byte len) {
+  byte header[2] = {type, len};
+  uint16_t crc = crc16(header, 2, 0xFFFF);
+  crc = crc16(payload, len, crc);
+  Serial.write(0xA5);
+  Serial.write(0x5A);
+  Serial.write(header, 2);
+  Serial.write(payload, len);
+  Serial.write((byte)(crc >> 8));
+  Serial.write((byte)(crc & 0xFF));
+}
+
+void sendCodeFrame(byte type, unsigned long code) {
+  byte payload[4] = {
+    (byte)(code >> 24), (byte)(code >> 16), (byte)(code >> 8), (byte)code
+  };
+  sendFrame(type, payload, 4);
+}
+
+void sendTextFrame(byte type, const String& text) {
+  byte len = text.length() > 64 ? 64 : text.length();
+  sendFrame(type, (const byte*)text.c_str(), len);
 }
\ No newline at end of file
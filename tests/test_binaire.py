@@ -0,0 +1,93 @@
+"""Mode série binaire (wave_binaire): CRC, découpage du flux mixte et fausses synchros
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_binaire import (SYNC, TYPE_CODE, TYPE_MESSAGE, Evenement, LecteurFlux, crc16_ccitt,
+                          encoder_trame)
+
+
+def lecteur_binaire():
+    lecteur = LecteurFlux()
+    lecteur.pousser(b"BIN:OK 1\n")
+    return lecteur
+
+
+def pousser_octet_par_octet(lecteur, data):
+    elements = []
+    for i in range(len(data)):
+        elements.extend(lecteur.pousser(data[i:i + 1]))
+    return elements
+
+
+class TestCrc(unittest.TestCase):
+
+    def test_valeur_de_reference(self):
+        # CRC-16/CCITT-FALSE de "123456789"
+        self.assertEqual(crc16_ccitt(b"123456789"), 0x29B1)
+
+    def test_donnees_trop_longues(self):
+        with self.assertRaises(ValueError):
+            encoder_trame(TYPE_MESSAGE, b"x" * 65)
+
+
+class TestLecteurFlux(unittest.TestCase):
+
+    def test_texte_avant_negociation(self):
+        lecteur = LecteurFlux()
+        self.assertEqual(lecteur.pousser(b"RX:FF00000C\r\nAide"), ["RX:FF00000C"])
+        self.assertEqual(lecteur.pousser(b"\n"), ["Aide"])
+        self.assertFalse(lecteur.binaire)
+
+    def test_trames_et_texte_melanges(self):
+        lecteur = lecteur_binaire()
+        flux = (encoder_trame(TYPE_CODE, (0xFF00000C).to_bytes(4, 'big')) + b"Etat: pret\n"
+                + encoder_trame(TYPE_MESSAGE, "ALERTE".encode()))
+        elements = pousser_octet_par_octet(lecteur, flux)
+        self.assertEqual(len(elements), 3)
+        self.assertIsInstance(elements[0], Evenement)
+        self.assertEqual((elements[0].type, elements[0].code), (TYPE_CODE, 0xFF00000C))
+        self.assertEqual(elements[1], "Etat: pret")
+        self.assertEqual((elements[2].type, elements[2].texte), (TYPE_MESSAGE, "ALERTE"))
+        self.assertEqual(lecteur.trames, 2)
+
+    def test_crc_invalide_ecarte(self):
+        lecteur = lecteur_binaire()
+        abimee = bytearray(encoder_trame(TYPE_MESSAGE, b"ALERTE"))
+        abimee[6] ^= 0x01
+        elements = lecteur.pousser(bytes(abimee) + encoder_trame(TYPE_MESSAGE, b"SUIVANTE"))
+        self.assertEqual([element.texte for element in elements if isinstance(element, Evenement)],
+                         ["SUIVANTE"])
+        self.assertGreaterEqual(lecteur.erreurs_crc, 1)
+
+    def test_fausse_synchro_dans_le_texte(self):
+        # A5 5A suivi d'une longueur impossible: octets de texte, pas une trame
+        lecteur = lecteur_binaire()
+        texte = b"Bruit " + SYNC + b"\xF0\x00 fin\n"
+        elements = lecteur.pousser(texte + encoder_trame(TYPE_MESSAGE, b"OK"))
+        self.assertEqual(len(elements), 2)
+        self.assertIsInstance(elements[0], str)
+        self.assertTrue(elements[0].startswith("Bruit"))
+        self.assertEqual(elements[1].texte, "OK")
+
+    def test_fausse_synchro_longueur_plausible(self):
+        # Longueur valide mais CRC faux: la vraie trame qui suit est retrouvée
+        lecteur = lecteur_binaire()
+        elements = lecteur.pousser(SYNC + b"\x02\x03ab" + encoder_trame(TYPE_MESSAGE, b"VRAIE"))
+        trames = [element for element in elements if isinstance(element, Evenement)]
+        self.assertEqual([trame.texte for trame in trames], ["VRAIE"])
+
+    def test_retour_au_texte(self):
+        lecteur = lecteur_binaire()
+        elements = lecteur.pousser(b"BIN:OFF\nRX:FE000000\n")
+        self.assertEqual(elements, ["BIN:OFF", "RX:FE000000"])
+        self.assertFalse(lecteur.binaire)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,331 @@
+"""Émetteur et récepteur sans interface (wave_client_*)
+
+Les lots de lignes sont déposés comme le ferait le thread de lecture, sur des
+ports factices qui mémorisent les commandes envoyées; TestBoutEnBout relie les
+deux clients par les cartes simulées de wave_simulateur (Linux/macOS seulement).
+
+Usage: python -m unittest discover tests
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wave_traces
+from wave_binaire import TYPE_CODE, LecteurFlux, encoder_trame
+from wave_client_emetteur import ClientEmetteur
+from wave_client_recepteur import ClientRecepteur
+from wave_diffusion import Emetteur, GroupeEmetteurs
+from wave_modeles import CODE_MODELE, PAR_NUMERO, encoder_modele
+from wave_multiport import Recepteur
+from wave_trames import encoder_message
+
+try:
+    import pty  # noqa: F401
+except ImportError:
+    pty = None
+
+ATTENTE = 10.0
+
+
+def attendre(condition):
+    limite = time.monotonic() + ATTENTE
+    while not condition():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class PortFactice:
+    def __init__(self):
+        self.ecrit = []
+        self.is_open = True
+
+    def write(self, data):
+        self.ecrit.append(data)
+
+    def close(self):
+        self.is_open = False
+
+
+class TraceurFactice:
+    def __init__(self):
+        self.etapes = []
+
+    def noter(self, etape, texte, source="", t=None):
+        self.etapes.append((etape, texte, source))
+
+
+def lignes_rx(texte):
+    return [f"RX:{code:X}" for code in encoder_message(texte)]
+
+
+class TestClientRecepteur(unittest.TestCase):
+
+    def setUp(self):
+        self.client = ClientRecepteur(traceur=TraceurFactice())
+        self.nord = Recepteur("Nord", "COM8", PortFactice())
+        self.sud = Recepteur("Sud", "COM9", PortFactice())
+        self.client.recepteurs = {"Nord": self.nord, "Sud": self.sud}
+        self.client.connecte = True
+        self.recus = []
+        self.client.abonner('message', lambda entree, evincee: self.recus.append((entree.source, entree.texte)))
+
+    def test_trame_rx_journalisee_une_fois(self):
+        self.client.deposer(self.nord, lignes_rx("ALERTE A"))
+        self.assertEqual(self.recus, [("Nord", "ALERTE A")])
+        self.assertEqual(self.client.traceur.etapes[0], (wave_traces.PREMIER_PAQUET, "ALERTE A", "Nord"))
+        # La confirmation du firmware qui suit n'est pas journalisée à nouveau
+        self.client.deposer(self.nord, ["✅ MESSAGE PERSONNALISÉ REÇU: 'ALERTE A' (8 caractères)"])
+        self.assertEqual(self.recus, [("Nord", "ALERTE A")])
+        self.assertEqual((self.client.messages_recus, self.nord.messages_recus), (1, 1))
+
+    def test_confirmation_seule_journalisee(self):
+        # Sans lignes RX: (ancien firmware), la ligne ✅ reste la source du message
+        self.client.deposer(self.sud, ["✅ MESSAGE PERSONNALISÉ REÇU: 'ALERTE B' (8 caractères)"])
+        self.assertEqual(self.recus, [("Sud", "ALERTE B")])
+
+    def test_code_modele_en_deux_copies(self):
+        # Copie ~220 ms après l'original: au-delà des 200 ms de déduplication des paquets,
+        # un firmware sans déduplication des modèles l'annonce une seconde fois
+        code = f"RX:{encoder_modele(PAR_NUMERO[1], 'B'):X}"
+        ligne = "✅ MESSAGE PERSONNALISÉ REÇU: 'MODELE 1 B' (10 caractères)"
+        self.client.deposer(self.nord, [code, ligne])
+        self.client.deposer(self.nord, [code, ligne])
+        self.assertEqual(self.recus, [("Nord", "EVACUATION IMMEDIATE - BATIMENT B")])
+        self.assertEqual(self.nord.messages_recus, 1)
+        # Le même modèle renvoyé plus tard est une nouvelle alerte
+        self.nord.modele_annonce = (self.nord.modele_annonce[0], 0.0)
+        self.nord.decodeur_trames.dernier_modele = (0, 0.0)
+        self.client.deposer(self.nord, [code, ligne])
+        self.assertEqual(self.nord.messages_recus, 2)
+
+    def test_modele_inconnu_annonce_une_fois(self):
+        # Modèle ajouté côté émetteur seulement: la ligne du firmware fait foi, pas sa copie
+        code = f"RX:{CODE_MODELE << 24 | 99 << 16 | ord('C') << 8:X}"
+        ligne = "✅ MESSAGE PERSONNALISÉ REÇU: 'MODELE 99 C' (11 caractères)"
+        self.client.deposer(self.sud, [code, ligne, code, ligne])
+        self.assertEqual(self.recus, [("Sud", "MODELE 99 C")])
+        self.assertEqual(self.sud.messages_recus, 1)
+
+    def test_decodage_propre_a_chaque_recepteur(self):
+        nord, sud = lignes_rx("NORD"), lignes_rx("SUD")
+        # Trames entrelacées de deux cartes: aucun mélange des paquets
+        for i in range(max(len(nord), len(sud))):
+            self.client.deposer(self.nord, nord[i:i + 1])
+            self.client.deposer(self.sud, sud[i:i + 1])
+        self.assertEqual(sorted(self.recus), [("Nord", "NORD"), ("Sud", "SUD")])
+
+    def test_trame_compressee_incomplete(self):
+        codes = encoder_message("EVACUATION BATIMENT A ESCALIER NORD", compression=True)
+        self.client.deposer(self.nord, [f"RX:{code:X}" for code in codes[:2] + codes[3:]])
+        # Le firmware ne sait pas lire le message compressé: sa ligne est écartée
+        self.client.deposer(self.nord, ["✅ MESSAGE PERSONNALISÉ REÇU: 'MESSAGE COMPRESSE (9 octets)' (29 caractères)"])
+        self.assertEqual(self.recus, [])
+        self.assertEqual(self.client.codes_non_reconnus, 1)
+
+    def test_mode_binaire(self):
+        lecteur = LecteurFlux()
+        elements = lecteur.pousser(b"BIN:OK 1\n")
+        for code in encoder_message("ALERTE C"):
+            elements += lecteur.pousser(encoder_trame(TYPE_CODE, code.to_bytes(4, 'big')))
+        self.client.deposer(self.nord, elements)
+        self.assertEqual(self.recus, [("Nord", "ALERTE C")])
+
+    def test_trame_incomplete_comptee(self):
+        self.client.deposer(self.nord, lignes_rx("ALERTE")[:2] + ["RX:FE000000"])
+        self.assertEqual(self.recus, [])
+        self.assertEqual((self.client.codes_non_reconnus, self.nord.codes_non_reconnus), (1, 1))
+
+    def test_lots_traites_au_reveil(self):
+        reveils = []
+        client = ClientRecepteur(reveil=lambda: reveils.append(1))
+        recus = []
+        client.abonner('message', lambda entree, evincee: recus.append(entree.texte))
+        client.deposer(self.nord, lignes_rx("ALERTE D"))
+        client.signaler_perte(self.sud, "port absent")
+        # Rien n'est traité dans le thread de lecture
+        self.assertEqual((len(reveils), recus), (2, []))
+        pertes = []
+        client.connecte = True
+        client.abonner('perte', lambda recepteur, erreur: pertes.append(recepteur.nom))
+        client.traiter_en_attente()
+        self.assertEqual((recus, pertes), (["ALERTE D"], ["Sud"]))
+
+    def test_repetition_regroupee(self):
+        repetitions = []
+        self.client.abonner('repetition', lambda entree: repetitions.append((entree.source, entree.occurrences)))
+        self.client.deposer(self.nord, lignes_rx("ALERTE R"))
+        self.client.deposer(self.nord, lignes_rx("ALERTE R"))
+        # Même texte sur une autre carte: sa propre ligne
+        self.client.deposer(self.sud, lignes_rx("ALERTE R"))
+        self.assertEqual(self.recus, [("Nord", "ALERTE R"), ("Sud", "ALERTE R")])
+        self.assertEqual(repetitions, [("Nord", 2)])
+        self.assertEqual(self.client.messages_regroupes, 1)
+
+    def test_arreter_alerte_vers_la_carte_source(self):
+        self.client.deposer(self.sud, lignes_rx("ALERTE E"))
+        entree = self.client.magasin[0]
+        self.assertTrue(self.client.arreter_alerte(entree.id))
+        # Écriture faite par la boucle série
+        self.assertTrue(attendre(lambda: self.sud.connexion.ecrit == [b"stopalert\n"]))
+        self.assertEqual(self.nord.connexion.ecrit, [])
+        # Déjà lue: pas de second stopalert
+        self.assertFalse(self.client.arreter_alerte(entree.id))
+
+    def test_son_diffuse_a_toutes_les_cartes(self):
+        self.client.regler_son(False)
+        self.assertTrue(attendre(lambda: (self.nord.connexion.ecrit, self.sud.connexion.ecrit)
+                                 == ([b"soundoff\n"], [b"soundoff\n"])))
+        self.client.deposer(self.nord, ["🔊 SON ACTIVÉ"])
+        self.assertTrue(self.client.son_actif)
+
+    def test_iterateur_asynchrone(self):
+        async def premier_message():
+            messages = self.client.messages()
+            attente = asyncio.ensure_future(messages.__anext__())
+            await asyncio.sleep(0)
+            self.client.deposer(self.nord, lignes_rx("ALERTE F"))
+            return await asyncio.wait_for(attente, 5.0)
+
+        entree = asyncio.run(premier_message())
+        self.assertEqual((entree.texte, entree.source), ("ALERTE F", "Nord"))
+
+
+class TestClientEmetteur(unittest.TestCase):
+
+    def setUp(self):
+        # Traitement dans le thread du test, comme le thread Tk (voir deposer)
+        self.client = ClientEmetteur(reveil=lambda: None)
+        self.nord = Emetteur("Nord", "COM4", PortFactice())
+        self.sud = Emetteur("Sud", "COM5", PortFactice())
+        self.client.groupe = GroupeEmetteurs([self.nord, self.sud])
+        self.client.connecte = True
+        self.evenements = []
+        self.client.abonner('carte_validee', lambda emetteur, valides, attendus:
+                            self.evenements.append(('validee', emetteur.nom, valides, attendus)))
+        self.client.abonner('succes', lambda: self.evenements.append(('succes',)))
+        self.client.abonner('refus', lambda emetteur: self.evenements.append(('refus', emetteur.nom)))
+
+    def tearDown(self):
+        self.client.deconnecter()
+
+    def deposer(self, emetteur, elements):
+        self.client.deposer(emetteur, elements)
+        self.client.traiter_en_attente()
+
+    def test_message_invalide(self):
+        with self.assertRaises(ValueError):
+            self.client.etablir_message("   ")
+        with self.assertRaises(ValueError):
+            self.client.etablir_message("X" * 51)
+
+    def test_succes_quand_toutes_les_cartes_valident(self):
+        self.client.etablir_message(" EVACUATION ")
+        self.assertEqual(self.nord.connexion.ecrit, [b"FEC:0\nMSG:EVACUATION\n"])
+        self.deposer(self.nord, ["Nouveau message défini: EVACUATION", "DEBUG: UID AUTORISÉ"])
+        self.assertEqual(self.evenements, [('validee', "Nord", 1, 2)])
+        self.assertFalse(self.client.termine.is_set())
+        self.deposer(self.sud, ["DEBUG: UID AUTORISÉ"])
+        self.assertEqual(self.evenements[-1], ('succes',))
+        self.assertTrue(self.client.attendre(0))
+        self.assertIn("défini", self.nord.resume())
+
+    def test_message_compresse(self):
+        compressions = []
+        self.client.abonner('compression', lambda *args: compressions.append(args))
+        self.client.compression = True
+        self.client.etablir_message("EVACUATION BATIMENT A ESCALIER NORD")
+        commandes = self.nord.connexion.ecrit[0].decode().splitlines()
+        # MSG: en clair d'abord, pour un firmware qui ignorerait MSGZ:
+        self.assertEqual(commandes[:2], ["FEC:0", "MSG:EVACUATION BATIMENT A ESCALIER NORD"])
+        self.assertTrue(commandes[2].startswith("MSGZ:"))
+        self.assertEqual(len(commandes[2]), len("MSGZ:") + 2 * 9)
+        self.assertEqual(compressions, [(35, 9, 14, 5)])
+
+    def test_message_modele(self):
+        self.client.compression = True
+        self.client.etablir_message("ALERTE INCENDIE - BATIMENT C")
+        commandes = self.nord.connexion.ecrit[0].decode().splitlines()
+        self.assertEqual(commandes, ["FEC:0", "MSG:ALERTE INCENDIE - BATIMENT C", "TPL:FD044300"])
+
+    def test_refus(self):
+        self.client.etablir_message("CONFINEMENT")
+        self.deposer(self.sud, ["DEBUG: UID NON AUTORISÉ"])
+        self.assertEqual(self.evenements, [('refus', "Sud")])
+        self.assertFalse(self.client.attendre(0))
+
+
+@unittest.skipIf(pty is None, "simulateurs pty indisponibles (Windows)")
+class TestBoutEnBout(unittest.TestCase):
+
+    def setUp(self):
+        from wave_simulateur import SimulateurEmetteur, SimulateurRecepteur
+        self.sim_recepteur = SimulateurRecepteur(verbeux=False).demarrer()
+        self.sim_emetteur = SimulateurEmetteur(recepteurs=[self.sim_recepteur], cadence=0).demarrer()
+
+        self.recus = []
+        self.recepteur = ClientRecepteur()
+        self.recepteur.abonner('message', lambda entree, evincee: self.recus.append(entree.texte))
+        self.assertEqual(self.recepteur.connecter(self.sim_recepteur.nom_port), [])
+
+        self.emetteur = ClientEmetteur()
+        self.assertEqual(self.emetteur.connecter(self.sim_emetteur.nom_port), [])
+
+    def tearDown(self):
+        self.emetteur.deconnecter()
+        self.recepteur.fermer()
+        self.sim_emetteur.arreter()
+        self.sim_recepteur.arreter()
+
+    def etablir(self, message):
+        self.emetteur.etablir_message(message)
+        self.assertTrue(attendre(lambda: self.sim_emetteur.message == message))
+
+    def presenter_carte(self, autorisee):
+        # Passage de la carte pendant que attendre() bloque le thread du test
+        threading.Timer(0.2, self.sim_emetteur.presenter_carte, (autorisee,)).start()
+        return self.emetteur.attendre(ATTENTE)
+
+    def test_carte_autorisee(self):
+        self.etablir("EVACUATION BATIMENT A")
+        self.assertTrue(self.presenter_carte(True))
+        self.assertTrue(attendre(lambda: self.recus == ["EVACUATION BATIMENT A"]), self.recus)
+
+    def test_carte_autorisee_avec_parite(self):
+        self.emetteur.groupe_fec = 4
+        self.etablir("EVACUATION PAR LES ESCALIERS NORD")
+        self.assertTrue(self.presenter_carte(True))
+        self.assertTrue(attendre(lambda: self.recus == ["EVACUATION PAR LES ESCALIERS NORD"]), self.recus)
+
+    def test_carte_autorisee_message_compresse(self):
+        self.emetteur.compression = True
+        self.etablir("EVACUATION BATIMENT A ESCALIER NORD")
+        self.assertTrue(self.presenter_carte(True))
+        self.assertTrue(attendre(lambda: self.recus), self.recus)
+        time.sleep(0.2)
+        # La ligne "MESSAGE COMPRESSE" du firmware n'est pas journalisée
+        self.assertEqual(self.recus, ["EVACUATION BATIMENT A ESCALIER NORD"])
+
+    def test_carte_autorisee_message_modele(self):
+        self.emetteur.compression = True
+        self.etablir("EVACUATION IMMEDIATE - BATIMENT B")
+        self.assertTrue(self.presenter_carte(True))
+        self.assertTrue(attendre(lambda: self.recus), self.recus)
+        time.sleep(0.2)
+        self.assertEqual(self.recus, ["EVACUATION IMMEDIATE - BATIMENT B"])
+
+    def test_carte_refusee(self):
+        self.etablir("CONFINEMENT GENERAL")
+        self.assertFalse(self.presenter_carte(False))
+        time.sleep(0.2)
+        self.assertEqual(self.recus, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
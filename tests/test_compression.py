@@ -0,0 +1,48 @@
+"""Compression des textes d'alerte (wave_compression)
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_compression import compresser, decompresser
+from wave_trames import charge_utile, encoder_message
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_aller_retour(self):
+        for texte in ("EVACUATION IMMEDIATE - BATIMENT B", "FIN D'ALERTE", "POINT DE RASSEMBLEMENT 3",
+                      "Exercice incendie: sortie par l'escalier #2", "A", ""):
+            self.assertEqual(decompresser(compresser(texte)), texte, texte)
+
+    def test_dictionnaire_et_gain(self):
+        texte = "EVACUATION IMMEDIATE DU BATIMENT B"
+        self.assertLessEqual(len(compresser(texte)), len(texte) // 3)
+        # Exemple du README: 35 octets -> 9, 14 codes radio en clair -> 5
+        texte = "EVACUATION BATIMENT A ESCALIER NORD"
+        self.assertEqual(len(compresser(texte)), 9)
+        self.assertEqual(len(encoder_message(texte)), 14)
+        self.assertEqual(len(encoder_message(texte, compression=True)), 5)
+
+    def test_echappement_hors_alphabet(self):
+        # Minuscules: 13 bits par caractère, plus long que le texte brut
+        donnees = compresser("alerte")
+        self.assertEqual(decompresser(donnees), "alerte")
+        self.assertGreater(len(donnees), len("alerte"))
+        self.assertEqual(charge_utile("alerte", compression=True), (b"alerte", False))
+
+    def test_texte_non_ascii(self):
+        self.assertIsNone(compresser("ÉVACUATION"))
+        self.assertFalse(charge_utile("ÉVACUATION", compression=True)[1])
+
+    def test_prefixe_si_fin_perdue(self):
+        donnees = compresser("EVACUATION IMMEDIATE - BATIMENT B")
+        self.assertTrue("EVACUATION IMMEDIATE - BATIMENT B".startswith(decompresser(donnees[:3])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Courtier de ports (wave_courtier): diffusion aux clients et carte simulée partagée
+
+TestCourtier fait partager une carte simulée (pty) à deux programmes: Linux/macOS
+seulement (wave_simulateur).
+
+Usage: python -m unittest discover tests
+"""
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pty  # noqa: F401
+except ImportError:
+    pty = None
+
+from wave_binaire import TYPE_CODE, LecteurFlux, encoder_trame
+from wave_courtier import TAMPON_CLIENT_MAX, CartePartagee, ClientCourtier, serialiser
+
+ATTENTE = 10.0
+
+
+def attendre(condition):
+    limite = time.monotonic() + ATTENTE
+    while not condition():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class EcrivainFactice:
+    """StreamWriter dont le tampon d'envoi est fixé par le test"""
+
+    def __init__(self, en_attente=0):
+        self.transport = self
+        self.en_attente = en_attente
+        self.recu = b""
+        self.ferme = False
+
+    def get_write_buffer_size(self):
+        return self.en_attente
+
+    def write(self, data):
+        self.recu += data
+
+    def close(self):
+        self.ferme = True
+
+
+class TestDiffusion(unittest.TestCase):
+
+    def test_lignes_et_trames_reserialisees(self):
+        # Le client reçoit les octets émis par la carte, trame binaire comprise
+        emis = b"BIN:OK\n" + encoder_trame(TYPE_CODE, b"\x12\x34\x56\x78")
+        elements = LecteurFlux().pousser(emis)
+        self.assertEqual(len(elements), 2)
+        self.assertEqual(b"".join(serialiser(element) for element in elements), emis)
+
+    def test_client_lent_deconnecte_sans_attendre(self):
+        journal = []
+        partagee = CartePartagee(carte=type("Carte", (), {"nom": "Hall"})(), journal=journal.append)
+        rapide = ClientCourtier("rapide", EcrivainFactice())
+        lent = ClientCourtier("lent", EcrivainFactice(en_attente=TAMPON_CLIENT_MAX))
+        partagee.clients = {rapide, lent}
+        partagee.diffuser(["EVACUATION HALL"])
+        self.assertEqual(rapide.ecrivain.recu, b"EVACUATION HALL\n")
+        self.assertEqual(partagee.clients, {rapide})
+        self.assertTrue(lent.ecrivain.ferme)
+        self.assertEqual((partagee.clients_lents, partagee.octets_diffuses), (1, 16))
+        self.assertEqual(journal, ["Hall: client lent déconnecté (trop lent)"])
+
+
+@unittest.skipIf(pty is None, "simulateurs pty indisponibles (Windows)")
+class TestCourtier(unittest.TestCase):
+
+    def setUp(self):
+        from wave_client_recepteur import ClientRecepteur
+        from wave_courtier import Courtier
+        from wave_simulateur import SimulateurRecepteur
+        self.simulateur = SimulateurRecepteur(verbeux=False).demarrer()
+        self.courtier = Courtier(journal=lambda texte: None)
+        self.port = port_libre()
+        self.assertEqual(self.courtier.demarrer(f"Hall={self.simulateur.nom_port}", port_tcp=self.port), [])
+
+        self.recus = []
+        self.condition = threading.Condition()
+        self.clients = []
+        for nom in ("Tk", "Supervision"):
+            client = ClientRecepteur()
+            client.abonner('message', lambda entree, evincee, nom=nom: self.message(nom, entree))
+            self.clients.append(client)
+
+    def tearDown(self):
+        for client in self.clients:
+            client.fermer()
+        arret = self.courtier.arreter()
+        if arret is not None:
+            arret.result(5.0)
+        self.simulateur.arreter()
+
+    def message(self, nom, entree):
+        with self.condition:
+            self.recus.append((nom, entree.texte))
+            self.condition.notify_all()
+
+    def connecter(self):
+        partagee = next(iter(self.courtier.partagees.values()))
+        for client in self.clients:
+            self.assertEqual(client.connecter(f"socket://127.0.0.1:{self.port}"), [])
+        # Le courtier compte un client après son délai d'accueil
+        self.assertTrue(attendre(lambda: len(partagee.clients) == len(self.clients)))
+
+    def test_alerte_diffusee_aux_deux_programmes(self):
+        self.connecter()
+        self.simulateur.recevoir_message("EVACUATION HALL")
+        with self.condition:
+            self.assertTrue(self.condition.wait_for(lambda: len(self.recus) >= 2, ATTENTE), self.recus)
+        self.assertEqual(sorted(self.recus), [("Supervision", "EVACUATION HALL"), ("Tk", "EVACUATION HALL")])
+
+    def test_commandes_des_deux_programmes(self):
+        self.connecter()
+        tk, supervision = self.clients
+        supervision.regler_son(False)
+        self.assertTrue(attendre(lambda: not self.simulateur.son_actif))
+        tk.regler_son(True)
+        self.assertTrue(attendre(lambda: self.simulateur.son_actif))
+
+
+if __name__ == '__main__':
+    unittest.main()
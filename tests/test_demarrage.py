@@ -0,0 +1,118 @@
+"""Démarrage des interfaces (wave_demarrage): logo réduit en cache, PIL absent au lancement
+
+Usage: python -m unittest discover tests
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wave_demarrage
+from wave_demarrage import apres_premier_affichage, image_reduite
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEPOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RacineFactice:
+    """Fenêtre Tk réduite à bind / after_idle / after, exécutés à la demande"""
+
+    def __init__(self):
+        self.liaisons = []
+        self.planifies = []
+
+    def bind(self, sequence, fonction, add=None):
+        self.liaisons.append((sequence, fonction))
+
+    def after_idle(self, fonction):
+        self.planifies.append(fonction)
+
+    def after(self, delai, fonction):
+        self.planifies.append(fonction)
+
+    def executer(self):
+        while self.planifies:
+            self.planifies.pop(0)()
+
+
+@unittest.skipIf(Image is None, "PIL absent")
+class TestLogoReduit(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dossier, ignore_errors=True)
+        self.cache = os.path.join(self.dossier, "cache")
+        patch = mock.patch.object(wave_demarrage, 'dossier_cache', lambda: self.cache)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.logo = os.path.join(self.dossier, "logo.png")
+        Image.new('RGB', (400, 100), color='#007aff').save(self.logo)
+
+    def test_reduit_une_fois_ratio_conserve(self):
+        reduite = image_reduite(self.logo, (80, 80))
+        self.assertEqual(reduite, os.path.join(self.dossier, "logo-80x80.png"))
+        with Image.open(reduite) as image:
+            self.assertEqual(image.size, (80, 20))
+        # Lancement suivant: la copie est reprise sans PIL
+        with mock.patch.object(Image.Image, 'save') as save:
+            self.assertEqual(image_reduite(self.logo, (80, 80)), reduite)
+        save.assert_not_called()
+
+    def test_original_plus_recent_refait(self):
+        reduite = image_reduite(self.logo, (80, 80))
+        os.utime(reduite, (1, 1))
+        image_reduite(self.logo, (80, 80))
+        self.assertGreater(os.path.getmtime(reduite), 1)
+
+    def test_dossier_en_lecture_seule(self):
+        enregistrer = Image.Image.save
+
+        def save(image, chemin, *args, **kwargs):
+            if not chemin.startswith(self.cache):
+                raise PermissionError("lecture seule")
+            return enregistrer(image, chemin, *args, **kwargs)
+
+        with mock.patch.object(Image.Image, 'save', save):
+            reduite = image_reduite(self.logo, (80, 80))
+        self.assertEqual(reduite, os.path.join(self.cache, "logo-80x80.png"))
+        self.assertTrue(os.path.exists(reduite))
+
+    def test_logo_absent(self):
+        self.assertIsNone(image_reduite(os.path.join(self.dossier, "absent.png"), (80, 80)))
+
+
+class TestDemarrage(unittest.TestCase):
+
+    def test_interfaces_sans_pil(self):
+        code = "import sys, wave_connect_gov, wave_recepteur; print('PIL' in sys.modules)"
+        sortie = subprocess.run([sys.executable, "-c", code], cwd=DEPOT, capture_output=True,
+                                text=True, check=True).stdout
+        self.assertEqual(sortie.strip(), "False")
+
+    def test_apres_premier_affichage(self):
+        root = RacineFactice()
+        appels = []
+        apres_premier_affichage(root, lambda: appels.append(True))
+        (sequence, affichee), = root.liaisons
+        self.assertEqual(sequence, '<Map>')
+        # <Map> d'un widget enfant: ignoré
+        affichee(SimpleNamespace(widget=object()))
+        self.assertEqual(root.planifies, [])
+        affichee(SimpleNamespace(widget=root))
+        affichee(SimpleNamespace(widget=root))
+        root.executer()
+        self.assertEqual(appels, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
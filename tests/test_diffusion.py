@@ -0,0 +1,101 @@
+"""Diffusion vers un groupe de cartes émettrices et suivi des acquittements (wave_diffusion)
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wave_multiport
+from wave_diffusion import (CARTE_AUTORISEE, CARTE_REFUSEE, MESSAGE_DEFINI, Emetteur,
+                            GroupeEmetteurs, formater_delai)
+
+
+class PortFactice:
+    def __init__(self, bloque=None, erreur=None):
+        self.ecrit = []
+        self.is_open = True
+        self.bloque = bloque
+        self.erreur = erreur
+
+    def write(self, data):
+        if self.bloque is not None:
+            self.bloque.wait()
+        if self.erreur is not None:
+            raise self.erreur
+        self.ecrit.append(data)
+
+    def close(self):
+        self.is_open = False
+
+
+class TestGroupe(unittest.TestCase):
+
+    def groupe(self, *emetteurs):
+        return GroupeEmetteurs(emetteurs)
+
+    def test_diffusion_a_toutes_les_cartes(self):
+        nord, sud = Emetteur("Nord", "COM4", PortFactice()), Emetteur("Sud", "COM5", PortFactice())
+        groupe = self.groupe(nord, sud)
+        self.assertEqual(groupe.diffuser(b"MSG:ALERTE\n"), 2)
+        self.assertEqual((nord.connexion.ecrit, sud.connexion.ecrit), ([b"MSG:ALERTE\n"], [b"MSG:ALERTE\n"]))
+        self.assertEqual(groupe.nb_en_diffusion(), 2)
+        self.assertEqual(nord.resume(), "Nord: en attente")
+
+    def test_carte_bloquee_ou_en_erreur(self):
+        debloquer = threading.Event()
+        nord = Emetteur("Nord", "COM4", PortFactice())
+        bloquee = Emetteur("Sud", "COM5", PortFactice(bloque=debloquer))
+        en_erreur = Emetteur("Est", "COM6", PortFactice(erreur=OSError("port absent")))
+        groupe = self.groupe(nord, bloquee, en_erreur)
+        self.addCleanup(debloquer.set)
+        with mock.patch.object(wave_multiport, 'TIMEOUT_ECRITURE', 0.1):
+            self.assertEqual(groupe.diffuser(b"MSG:ALERTE\n"), 1)
+        self.assertEqual(groupe.nb_en_diffusion(), 1)
+        self.assertEqual(bloquee.resume(), "Sud: ❌ TimeoutError")
+        self.assertEqual(en_erreur.resume(), "Est: ❌ port absent")
+
+    def test_carte_perdue_ignoree(self):
+        perdue = Emetteur("Nord", "COM4", PortFactice())
+        perdue.erreur = "déconnectée"
+        groupe = self.groupe(perdue)
+        self.assertEqual(groupe.diffuser(b"PING\n"), 0)
+        self.assertEqual(perdue.connexion.ecrit, [])
+        self.assertEqual(perdue.resume(), "Nord: perdu depuis 0 ms, reconnexion...")
+
+
+class TestAcquittements(unittest.TestCase):
+
+    def test_delais_depuis_l_envoi(self):
+        emetteur = Emetteur("Nord", "COM4", PortFactice())
+        # Hors diffusion: rien n'est enregistré
+        self.assertIsNone(emetteur.acquitter(MESSAGE_DEFINI, maintenant=1.0))
+        emetteur.envoye_a = 10.0
+        self.assertAlmostEqual(emetteur.acquitter(MESSAGE_DEFINI, maintenant=10.012), 0.012)
+        emetteur.acquitter(CARTE_REFUSEE, maintenant=11.0)
+        emetteur.acquitter(CARTE_AUTORISEE, maintenant=12.31)
+        # Seule la première occurrence d'une étape compte
+        emetteur.acquitter(CARTE_REFUSEE, maintenant=13.0)
+        self.assertEqual(emetteur.resume(), "Nord: défini 12 ms • refusé 1.00 s • autorisé 2.31 s")
+
+    def test_nb_acquittes(self):
+        nord, sud = Emetteur("Nord", "COM4", PortFactice()), Emetteur("Sud", "COM5", PortFactice())
+        groupe = GroupeEmetteurs([nord, sud])
+        groupe.diffuser(b"MSG:ALERTE\n")
+        nord.acquitter(CARTE_AUTORISEE)
+        self.assertEqual(groupe.nb_acquittes(CARTE_AUTORISEE), 1)
+        # Un nouveau message remet les acquittements à zéro
+        groupe.diffuser(b"MSG:SUIVANT\n")
+        self.assertEqual(groupe.nb_acquittes(CARTE_AUTORISEE), 0)
+
+    def test_formater_delai(self):
+        self.assertEqual(formater_delai(0.0123), "12 ms")
+        self.assertEqual(formater_delai(2.314), "2.31 s")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""File d'envoi par priorité (wave_file_envoi) et son service par ClientEmetteur
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_client_emetteur import ClientEmetteur
+from wave_diffusion import Emetteur, GroupeEmetteurs
+from wave_file_envoi import (ATTENTE_MAX, ATTENTES_MEMORISEES, DELAI_ACQUITTEMENT, IMPORTANT, ROUTINE, URGENT,
+                             FileEnvoi)
+
+
+class PortFactice:
+    def __init__(self):
+        self.ecrit = []
+        self.is_open = True
+
+    def write(self, data):
+        self.ecrit.append(data)
+
+    def close(self):
+        self.is_open = False
+
+
+class TestFileEnvoi(unittest.TestCase):
+
+    def setUp(self):
+        self.file = FileEnvoi()
+
+    def test_priorite_puis_arrivee(self):
+        self.file.deposer("A", ROUTINE, 0.0)
+        self.file.deposer("B", URGENT, 1.0)
+        self.file.deposer("C", ROUTINE, 2.0)
+        self.file.deposer("D", URGENT, 3.0)
+        self.assertEqual([self.file.extraire().message for _ in range(4)], ["B", "D", "A", "C"])
+
+    def test_doublon_fusionne(self):
+        premiere, fusionne = self.file.deposer("A", ROUTINE, 0.0)
+        self.assertFalse(fusionne)
+        seconde, fusionne = self.file.deposer("A", ROUTINE, 1.0)
+        self.assertTrue(fusionne)
+        self.assertIs(seconde, premiere)
+        self.assertEqual((len(self.file), premiere.doublons), (1, 1))
+
+    def test_doublon_plus_urgent_releve(self):
+        self.file.deposer("A", ROUTINE, 0.0)
+        self.file.deposer("B", IMPORTANT, 1.0)
+        alerte, fusionne = self.file.deposer("A", URGENT, 2.0)
+        self.assertTrue(fusionne)
+        self.assertEqual([(a.message, a.priorite) for a in self.file.elements()], [("A", URGENT), ("B", IMPORTANT)])
+        # Redéposé moins urgent: la priorité la plus haute est gardée
+        self.file.deposer("A", ROUTINE, 3.0)
+        self.assertEqual([(a.message, a.priorite) for a in self.file.elements()], [("A", URGENT), ("B", IMPORTANT)])
+        self.assertEqual(alerte.doublons, 2)
+
+    def test_attentes_bornees(self):
+        alerte, _ = self.file.deposer("A", ROUTINE, 0.0)
+        for i in range(ATTENTES_MEMORISEES + 10):
+            self.file.noter_envoi(alerte, float(i))
+        attentes = self.file.attentes[ROUTINE]
+        self.assertEqual(len(attentes), ATTENTES_MEMORISEES)
+        self.assertEqual(attentes[-1], ATTENTES_MEMORISEES + 9)
+
+    def test_remise_a_son_rang(self):
+        ancienne, _ = self.file.deposer("A", IMPORTANT, 0.0)
+        self.file.deposer("B", IMPORTANT, 1.0)
+        self.assertIs(self.file.extraire(), ancienne)
+        self.file.remettre(ancienne)
+        self.assertEqual([alerte.message for alerte in self.file.elements()], ["A", "B"])
+
+    def test_delai_renvoi_double_et_borne(self):
+        alerte, _ = self.file.deposer("A", ROUTINE, 0.0)
+        delais = []
+        for tentatives in (1, 2, 3, 4, 10):
+            alerte.tentatives = tentatives
+            delais.append(alerte.delai_renvoi())
+        self.assertEqual(delais, [1.0, 2.0, 4.0, 8.0, ATTENTE_MAX])
+
+
+class TestMiseEnFile(unittest.TestCase):
+    """ClientEmetteur.mettre_en_file sur deux cartes factices"""
+
+    def setUp(self):
+        # Traitement dans le thread du test, comme le thread Tk (voir deposer)
+        self.client = ClientEmetteur(reveil=lambda: None)
+        self.nord = Emetteur("Nord", "COM4", PortFactice())
+        self.sud = Emetteur("Sud", "COM5", PortFactice())
+        self.client.groupe = GroupeEmetteurs([self.nord, self.sud])
+        self.client.connecte = True
+
+    def tearDown(self):
+        self.client.deconnecter()
+
+    def deposer(self, emetteur, elements):
+        self.client.deposer(emetteur, elements)
+        self.client.traiter_en_attente()
+
+    def dernier_message(self):
+        return self.nord.connexion.ecrit[-1].decode().splitlines()[-1]
+
+    def acquitter(self, message):
+        for carte in (self.nord, self.sud):
+            self.deposer(carte, [f"Nouveau message défini: {message}"])
+
+    def test_plus_urgent_remplace_le_message_en_attente(self):
+        self.client.mettre_en_file("EXERCICE", ROUTINE, maintenant=0.0)
+        self.assertEqual(self.dernier_message(), "MSG:EXERCICE")
+        self.client.mettre_en_file("EVACUATION", URGENT, maintenant=1.0)
+        self.assertEqual(self.dernier_message(), "MSG:EVACUATION")
+        self.assertEqual([alerte.message for alerte in self.client.file_envoi.elements()], ["EXERCICE"])
+
+        # Envoi réussi: l'alerte remise en file est établie à son tour
+        self.acquitter("EVACUATION")
+        for carte in (self.nord, self.sud):
+            self.deposer(carte, ["DEBUG: UID AUTORISÉ"])
+        self.assertEqual(self.dernier_message(), "MSG:EXERCICE")
+        self.assertEqual(len(self.client.file_envoi), 0)
+
+    def test_alerte_en_cours_relevee_sans_doublon(self):
+        en_cours = self.client.mettre_en_file("EXERCICE", ROUTINE, maintenant=0.0)
+        alerte = self.client.mettre_en_file("EXERCICE", URGENT, maintenant=1.0)
+        self.assertIs(alerte, en_cours)
+        self.assertEqual(en_cours.priorite, URGENT)
+        self.assertEqual(len(self.client.file_envoi), 0)
+        self.assertEqual(len(self.nord.connexion.ecrit), 1)
+
+    def test_pas_de_remplacement_apres_une_carte_validee(self):
+        self.client.mettre_en_file("EXERCICE", ROUTINE, maintenant=0.0)
+        self.deposer(self.nord, ["DEBUG: UID AUTORISÉ"])
+        self.client.mettre_en_file("EVACUATION", URGENT, maintenant=1.0)
+        self.assertEqual(self.dernier_message(), "MSG:EXERCICE")
+        self.assertEqual(self.client.en_cours.message, "EXERCICE")
+
+    def test_renvoi_sans_acquittement(self):
+        self.client.mettre_en_file("EVACUATION", URGENT, maintenant=0.0)
+        self.assertEqual(len(self.nord.connexion.ecrit), 1)
+        self.client.verifier_file(maintenant=DELAI_ACQUITTEMENT)
+        self.assertEqual(len(self.nord.connexion.ecrit), 1)
+        self.client.verifier_file(maintenant=DELAI_ACQUITTEMENT + 1.0)
+        self.assertEqual(len(self.nord.connexion.ecrit), 2)
+        self.assertEqual(self.client.en_cours.tentatives, 2)
+
+    def test_pas_de_renvoi_une_fois_acquitte(self):
+        self.client.mettre_en_file("EVACUATION", URGENT, maintenant=0.0)
+        self.acquitter("EVACUATION")
+        self.client.verifier_file(maintenant=60.0)
+        self.assertEqual(len(self.nord.connexion.ecrit), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Magasin de messages du journal récepteur (wave_journal)
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_journal import MagasinMessages
+
+T0 = 1_700_000_000.0
+
+
+class TestMagasin(unittest.TestCase):
+
+    def test_ordre_et_non_lus(self):
+        magasin = MagasinMessages(capacite=3)
+        for texte in ("A", "B"):
+            magasin.ajouter(texte, "12:00:00", T0)
+        self.assertEqual([entree.texte for entree in magasin], ["A", "B"])
+        self.assertEqual(magasin.nb_non_lus, 2)
+        self.assertEqual(magasin.get(1).statut, '🚨')
+
+    def test_eviction_de_la_plus_ancienne(self):
+        magasin = MagasinMessages(capacite=3)
+        for texte in ("A", "B", "C"):
+            magasin.ajouter(texte, "12:00:00", T0)
+        entree, evincee = magasin.ajouter("D", "12:00:01", T0 + 1)
+        self.assertEqual((entree.id, evincee.texte), (4, "A"))
+        self.assertEqual([entree.texte for entree in magasin], ["B", "C", "D"])
+        self.assertEqual(len(magasin), 3)
+        self.assertNotIn(1, magasin)
+        # L'entrée évincée ne compte plus parmi les non lus
+        self.assertEqual(magasin.nb_non_lus, 3)
+
+    def test_marquer_lu(self):
+        magasin = MagasinMessages()
+        entree, _ = magasin.ajouter("A", "12:00:00", T0)
+        self.assertTrue(magasin.marquer_lu(entree.id))
+        self.assertFalse(magasin.marquer_lu(entree.id))
+        self.assertFalse(magasin.marquer_lu(42))
+        self.assertEqual((magasin.nb_non_lus, entree.statut), (0, '✅'))
+
+    def test_vider_garde_la_numerotation(self):
+        magasin = MagasinMessages()
+        magasin.ajouter("A", "12:00:00", T0)
+        magasin.vider()
+        self.assertEqual((len(magasin), magasin.nb_non_lus), (0, 0))
+        entree, _ = magasin.ajouter("B", "12:00:01", T0 + 1)
+        # Les iid de la vue restent uniques après un effacement
+        self.assertEqual(entree.id, 2)
+
+    def test_restauration_avec_identifiant(self):
+        magasin = MagasinMessages()
+        entree, _ = magasin.ajouter("A", "12:00:00", T0, id_=41, non_lu=False)
+        self.assertEqual((entree.id, magasin.nb_non_lus), (41, 0))
+        # Les nouveaux messages continuent après le plus grand id restauré
+        self.assertEqual(magasin.ajouter("B", "12:00:01", T0 + 1)[0].id, 42)
+
+
+class TestRegroupement(unittest.TestCase):
+
+    def test_repetition_dans_la_fenetre(self):
+        magasin = MagasinMessages(fenetre_regroupement=60.0)
+        entree, _, regroupe = magasin.recevoir("EVACUATION  NORD", "12:00:00", T0, source="Nord")
+        self.assertFalse(regroupe)
+        magasin.marquer_lu(entree.id)
+        # Casse et espaces ignorés; la fenêtre part de la dernière réception
+        for decalage in (30, 80):
+            repetee, _, regroupe = magasin.recevoir("evacuation nord", "12:00:30", T0 + decalage, source="Nord")
+            self.assertTrue(regroupe)
+        self.assertIs(repetee, entree)
+        self.assertEqual((entree.occurrences, entree.vu_a, len(magasin)), (3, T0 + 80, 1))
+        # La carte clignote de nouveau: l'alerte arrêtée redevient active
+        self.assertTrue(magasin.est_non_lu(entree.id))
+        self.assertTrue(entree.libelle.startswith("EVACUATION  NORD  (×3, dernière "))
+
+    def test_hors_fenetre_ou_autre_carte(self):
+        magasin = MagasinMessages(fenetre_regroupement=60.0)
+        magasin.recevoir("EVACUATION", "12:00:00", T0, source="Nord")
+        _, _, regroupe = magasin.recevoir("EVACUATION", "12:00:00", T0 + 1, source="Sud")
+        self.assertFalse(regroupe)
+        _, _, regroupe = magasin.recevoir("EVACUATION", "12:01:01", T0 + 61, source="Nord")
+        self.assertFalse(regroupe)
+        self.assertEqual(len(magasin), 3)
+
+    def test_regroupement_desactive(self):
+        magasin = MagasinMessages(fenetre_regroupement=0)
+        magasin.recevoir("A", "12:00:00", T0)
+        _, _, regroupe = magasin.recevoir("A", "12:00:00", T0)
+        self.assertFalse(regroupe)
+        self.assertEqual(len(magasin), 2)
+
+    def test_entree_evincee_plus_regroupee(self):
+        magasin = MagasinMessages(capacite=2)
+        magasin.recevoir("A", "12:00:00", T0)
+        magasin.recevoir("B", "12:00:00", T0)
+        magasin.recevoir("C", "12:00:00", T0)
+        entree, _, regroupe = magasin.recevoir("A", "12:00:01", T0 + 1)
+        self.assertFalse(regroupe)
+        self.assertEqual(entree.id, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Métriques Prometheus (wave_metriques): format d'exposition, histogrammes et point d'accès /metrics
+
+Usage: python -m unittest discover tests
+"""
+import os
+import socket
+import sys
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_client_recepteur import ClientRecepteur
+from wave_metriques import TYPE_CONTENU, Registre, ServeurMetriques, port_environnement
+from wave_multiport import Recepteur
+from wave_trames import encoder_message
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class PortFactice:
+    def __init__(self):
+        self.is_open = True
+
+    def write(self, data):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+class TestExposition(unittest.TestCase):
+
+    def test_compteur_et_jauge(self):
+        registre = Registre()
+        lignes = registre.compteur("wave_lignes_total", "Lignes lues", ("carte",))
+        lignes.inc("Sud")
+        lignes.inc('Hall "B"', n=3)
+        registre.jauge("wave_alertes_actives", "Alertes actives").fixer(2)
+        self.assertEqual(registre.exposer(), "\n".join([
+            "# HELP wave_lignes_total Lignes lues",
+            "# TYPE wave_lignes_total counter",
+            'wave_lignes_total{carte="Hall \\"B\\""} 3',
+            'wave_lignes_total{carte="Sud"} 1',
+            "# HELP wave_alertes_actives Alertes actives",
+            "# TYPE wave_alertes_actives gauge",
+            "wave_alertes_actives 2",
+        ]) + "\n")
+
+    def test_histogramme_cumule(self):
+        registre = Registre()
+        delais = registre.histogramme("wave_delai_secondes", "Délais", (0.1, 1.0), ("carte",))
+        for valeur in (0.05, 0.1, 0.5, 3.0):
+            delais.observer(valeur, "Nord")
+        lignes = registre.exposer().splitlines()
+        self.assertEqual(lignes[2:], [
+            'wave_delai_secondes_bucket{carte="Nord",le="0.1"} 2',
+            'wave_delai_secondes_bucket{carte="Nord",le="1.0"} 3',
+            'wave_delai_secondes_bucket{carte="Nord",le="+Inf"} 4',
+            'wave_delai_secondes_sum{carte="Nord"} 3.65',
+            'wave_delai_secondes_count{carte="Nord"} 4',
+        ])
+
+    def test_port_environnement(self):
+        for valeur, attendu in (("", None), ("non", None), ("oui", 9810), ("9900", 9900)):
+            with mock.patch.dict(os.environ, {"WAVE_METRIQUES": valeur}):
+                self.assertEqual(port_environnement(9810), attendu, valeur)
+
+
+class TestClientRecepteur(unittest.TestCase):
+
+    def test_alerte_comptee_par_carte(self):
+        client = ClientRecepteur()
+        nord = Recepteur("Nord", "COM8", PortFactice())
+        client.recepteurs = {"Nord": nord}
+        client.connecte = True
+        client.deposer(nord, [f"RX:{code:X}" for code in encoder_message("EVACUATION")] + ["Code = 0"])
+        texte = client.metriques.exposer()
+        self.assertIn('wave_alertes_total{carte="Nord"} 1', texte)
+        self.assertIn('wave_bruit_total{carte="Nord"} 1', texte)
+        self.assertIn('wave_carte_connectee{carte="Nord",port="COM8"} 1', texte)
+        self.assertIn("wave_alertes_actives 1", texte)
+
+    def test_alerte_sans_carte_source(self):
+        # Message enregistré hors du traitement d'un lot (pas de carte en cours)
+        client = ClientRecepteur()
+        client.enregistrer_message("EVACUATION")
+        self.assertEqual(client.messages_recus, 1)
+        self.assertNotIn("wave_alertes_total{", client.metriques.exposer())
+
+
+class TestServeur(unittest.TestCase):
+
+    def setUp(self):
+        registre = Registre()
+        registre.compteur("wave_alertes_total", "Alertes").inc()
+        self.serveur = ServeurMetriques(registre, port_libre(), hote="127.0.0.1")
+        self.serveur.demarrer()
+        self.addCleanup(self.serveur.arreter)
+        self.url = f"http://127.0.0.1:{self.serveur.port}"
+
+    def test_metrics(self):
+        with urllib.request.urlopen(f"{self.url}/metrics", timeout=5) as reponse:
+            self.assertEqual(reponse.headers["Content-Type"], TYPE_CONTENU)
+            self.assertIn("wave_alertes_total 1\n", reponse.read().decode())
+        self.assertEqual(self.serveur.requetes, 1)
+
+    def test_autre_chemin(self):
+        with self.assertRaises(urllib.error.HTTPError) as erreur:
+            urllib.request.urlopen(f"{self.url}/", timeout=5)
+        self.assertEqual(erreur.exception.code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
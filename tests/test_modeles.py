@@ -0,0 +1,49 @@
+"""Modèles d'alerte envoyés en un seul code radio (wave_modeles)
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_modeles import MODELES, PAR_NUMERO, annonce_firmware, decoder_modele, encoder_modele, reconnaitre
+
+
+class TestModeles(unittest.TestCase):
+
+    def test_reconnaitre_avec_parametre(self):
+        modele, parametre = reconnaitre("EVACUATION IMMEDIATE - BATIMENT B2")
+        self.assertEqual((modele.numero, parametre), (1, "B2"))
+        modele, parametre = reconnaitre("CONFINEMENT - RESTEZ A L'INTERIEUR")
+        self.assertEqual((modele.numero, parametre), (3, ""))
+
+    def test_texte_non_conforme(self):
+        # Paramètre trop long, minuscule ou absent, texte qui déborde du modèle
+        for texte in ("EVACUATION IMMEDIATE - BATIMENT B12", "EVACUATION IMMEDIATE - BATIMENT b",
+                      "EVACUATION IMMEDIATE - BATIMENT ", "CONFINEMENT - RESTEZ A L'INTERIEUR !"):
+            self.assertIsNone(reconnaitre(texte), texte)
+
+    def test_code_aller_retour(self):
+        for modele in MODELES:
+            parametre = "7" if "{}" in modele.texte else ""
+            code = encoder_modele(modele, parametre)
+            self.assertEqual(code >> 24, 0xFD)
+            self.assertEqual(decoder_modele(code), (modele, modele.numero, parametre))
+            self.assertEqual(reconnaitre(modele.developper(parametre)), (modele, parametre))
+
+    def test_code_connu(self):
+        self.assertEqual(encoder_modele(PAR_NUMERO[1], "B"), 0xFD014200)
+
+    def test_modele_inconnu(self):
+        self.assertEqual(decoder_modele(0xFD634100), (None, 0x63, "A"))
+
+    def test_annonce_firmware(self):
+        # Texte de la ligne ✅ de recepteur.cpp
+        self.assertEqual(annonce_firmware(0xFD014200), "MODELE 1 B")
+        self.assertEqual(annonce_firmware(0xFD030000), "MODELE 3")
+
+
+if __name__ == '__main__':
+    unittest.main()
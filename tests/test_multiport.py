@@ -0,0 +1,207 @@
+"""Lecture de plusieurs récepteurs dans la boucle série partagée (wave_multiport)
+
+Les cartes sont simulées par des paires pty (add_reader) ou par un port factice
+sans descripteur (scrutation, comme les ports COM de Windows).
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pty
+except ImportError:
+    pty = None
+
+from wave_multiport import LecteurMultiPort, Recepteur, analyser_ports
+
+ATTENTE = 10.0
+
+
+def attendre(condition):
+    limite = time.monotonic() + ATTENTE
+    while not condition():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class Livraisons:
+    """Collecte les lots livrés et les erreurs signalées par la boucle série"""
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.lignes = []
+        self.erreurs = []
+
+    def livrer(self, recepteur, elements):
+        with self.verrou:
+            self.lignes.extend((recepteur.nom, element) for element in elements)
+
+    def signaler_erreur(self, recepteur, message):
+        with self.verrou:
+            self.erreurs.append(recepteur.nom)
+
+    def de(self, nom):
+        with self.verrou:
+            return [ligne for source, ligne in self.lignes if source == nom]
+
+
+class PortFactice:
+    """Port sans fileno(): read() attend les octets jusqu'au timeout, comme pyserial"""
+
+    def __init__(self, morceaux=(), timeout=0.5):
+        self.timeout = timeout
+        self.tampon = bytearray(b"".join(morceaux))
+        self.condition = threading.Condition()
+        self.is_open = True
+        self.lectures = 0
+        self.acces = 0  # Appels de read() et in_waiting
+
+    def ajouter(self, data):
+        with self.condition:
+            self.tampon += data
+            self.condition.notify_all()
+
+    @property
+    def in_waiting(self):
+        with self.condition:
+            self.acces += 1
+            return len(self.tampon)
+
+    def read(self, n=1):
+        with self.condition:
+            self.lectures += 1
+            self.acces += 1
+            self.condition.wait_for(lambda: self.tampon or not self.is_open, self.timeout)
+            if not self.is_open:
+                raise OSError("port fermé")
+            data = bytes(self.tampon[:n])
+            del self.tampon[:n]
+            return data
+
+    def close(self):
+        with self.condition:
+            self.is_open = False
+            self.condition.notify_all()
+
+
+class TestAnalysePorts(unittest.TestCase):
+
+    def test_port_simple(self):
+        self.assertEqual(analyser_ports(" COM8 "), [("COM8", "COM8")])
+
+    def test_liste_nommee(self):
+        self.assertEqual(analyser_ports("Étage 1=COM8, Étage 2=COM9,,=COM10"),
+                         [("Étage 1", "COM8"), ("Étage 2", "COM9"), ("COM10", "COM10")])
+
+
+class TestScrutation(unittest.TestCase):
+
+    def test_lignes_par_recepteur(self):
+        livraisons = Livraisons()
+        nord = Recepteur("Nord", "COM8", PortFactice([b"RX:FF00", b"000C\r\nA", b"\n"]))
+        sud = Recepteur("Sud", "COM9", PortFactice([b"B\nC\n"]))
+        lecteur = LecteurMultiPort([nord, sud], livraisons.livrer, livraisons.signaler_erreur)
+        lecteur.demarrer()
+        self.assertTrue(attendre(lambda: len(livraisons.lignes) == 4))
+        lecteur.arreter().result(ATTENTE)
+        self.assertFalse(nord.connexion.is_open)
+        self.assertEqual(livraisons.de("Nord"), ["RX:FF00000C", "A"])
+        self.assertEqual(livraisons.de("Sud"), ["B", "C"])
+        self.assertEqual(nord.octets_lus, 15)
+        # Ports fermés par arreter(): pas d'erreur signalée
+        self.assertEqual(livraisons.erreurs, [])
+
+    def test_lecture_bloquante_sans_attente_active(self):
+        livraisons = Livraisons()
+        port = PortFactice(timeout=0.2)
+        nord = Recepteur("Nord", "COM8", port)
+        lecteur = LecteurMultiPort([nord], livraisons.livrer, livraisons.signaler_erreur)
+        lecteur.demarrer()
+        time.sleep(0.5)
+        # Un read(1) par timeout du port, pas un tour toutes les quelques millisecondes
+        self.assertLessEqual(port.acces, 5)
+        # Octets arrivés pendant la lecture: livrés sans attendre le timeout
+        debut = time.monotonic()
+        port.ajouter(b"RX:FF00000C\r\n")
+        self.assertTrue(attendre(lambda: livraisons.de("Nord") == ["RX:FF00000C"]))
+        self.assertLess(time.monotonic() - debut, 0.15)
+        lecteur.arreter().result(ATTENTE)
+
+    def test_arret_pendant_une_lecture(self):
+        livraisons = Livraisons()
+        port = PortFactice(timeout=5.0)
+        lecteur = LecteurMultiPort([Recepteur("Nord", "COM8", port)], livraisons.livrer,
+                                   livraisons.signaler_erreur)
+        lecteur.demarrer()
+        self.assertTrue(attendre(lambda: port.lectures == 1))
+        # La lecture en cours est abandonnée: l'arrêt n'attend pas le timeout du port
+        debut = time.monotonic()
+        lecteur.arreter().result(ATTENTE)
+        self.assertLess(time.monotonic() - debut, 1.0)
+        self.assertFalse(port.is_open)
+        self.assertEqual(lecteur.scrutations, {})
+        self.assertEqual(livraisons.erreurs, [])
+
+    def test_erreur_de_lecture_signalee(self):
+        livraisons = Livraisons()
+        port = PortFactice(timeout=5.0)
+        lecteur = LecteurMultiPort([Recepteur("Nord", "COM8", port)], livraisons.livrer,
+                                   livraisons.signaler_erreur)
+        lecteur.demarrer()
+        self.assertTrue(attendre(lambda: port.lectures == 1))
+        port.close()  # Carte débranchée pendant la lecture
+        self.assertTrue(attendre(lambda: livraisons.erreurs == ["Nord"]))
+        lecteur.arreter().result(ATTENTE)
+
+
+@unittest.skipIf(pty is None, "simulateurs pty indisponibles (Windows)")
+class TestSelecteur(unittest.TestCase):
+
+    def setUp(self):
+        self.maitres = []
+        self.recepteurs = []
+        for nom in ("Nord", "Sud", "Est"):
+            maitre, esclave = pty.openpty()
+            self.maitres.append(maitre)
+            self.recepteurs.append(Recepteur.ouvrir(nom, os.ttyname(esclave)))
+            os.close(esclave)
+        self.livraisons = Livraisons()
+        self.lecteur = LecteurMultiPort(self.recepteurs, self.livraisons.livrer,
+                                        self.livraisons.signaler_erreur)
+        self.lecteur.demarrer()
+
+    def tearDown(self):
+        self.lecteur.arreter().result(ATTENTE)
+        for maitre in self.maitres:
+            try:
+                os.close(maitre)
+            except OSError:
+                pass
+
+    def test_livraison_simultanee(self):
+        for i in range(20):
+            for maitre, nom in zip(self.maitres, ("N", "S", "E")):
+                os.write(maitre, f"{nom}{i}\n".encode())
+        self.assertTrue(attendre(lambda: len(self.livraisons.lignes) == 60))
+        self.assertEqual(self.livraisons.de("Sud"), [f"S{i}" for i in range(20)])
+        self.assertEqual(self.livraisons.de("Est"), [f"E{i}" for i in range(20)])
+
+    def test_perte_d_un_port(self):
+        os.close(self.maitres[1])
+        self.assertTrue(attendre(lambda: self.livraisons.erreurs == ["Sud"]))
+        self.assertFalse(self.recepteurs[1].actif)
+        # Les autres cartes continuent d'être lues
+        os.write(self.maitres[0], b"TOUJOURS LA\n")
+        self.assertTrue(attendre(lambda: self.livraisons.de("Nord") == ["TOUJOURS LA"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
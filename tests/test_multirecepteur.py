@@ -0,0 +1,83 @@
+"""Plusieurs récepteurs simulés (pty) surveillés par un seul ClientRecepteur
+
+Linux/macOS seulement (wave_simulateur). Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pty  # noqa: F401
+except ImportError:
+    pty = None
+
+ATTENTE = 10.0  # Secondes max pour qu'une alerte traverse carte simulée -> journal
+
+
+@unittest.skipIf(pty is None, "simulateurs pty indisponibles (Windows)")
+class TestMultiRecepteur(unittest.TestCase):
+
+    def setUp(self):
+        from wave_client_recepteur import ClientRecepteur
+        from wave_simulateur import SimulateurRecepteur
+        self.simulateurs = [SimulateurRecepteur(verbeux=False).demarrer() for _ in range(2)]
+        self.recus = []
+        self.condition = threading.Condition()
+        self.client = ClientRecepteur()  # Sans reveil: traité dans le thread de lecture
+        self.client.abonner('message', self.message)
+
+    def tearDown(self):
+        self.client.fermer()
+        for simulateur in self.simulateurs:
+            simulateur.arreter()
+
+    def message(self, entree, evincee=None):
+        with self.condition:
+            self.recus.append((entree.source, entree.texte))
+            self.condition.notify_all()
+
+    def attendre(self, nombre):
+        with self.condition:
+            return self.condition.wait_for(lambda: len(self.recus) >= nombre, ATTENTE)
+
+    def connecter(self, binaire=False):
+        nord, sud = self.simulateurs
+        erreurs = self.client.connecter(f"Nord={nord.nom_port}, Sud={sud.nom_port}", binaire)
+        self.assertEqual(erreurs, [])
+        self.assertEqual(self.client.nb_actifs(), 2)
+
+    def test_alertes_attribuees_a_leur_carte(self):
+        self.connecter()
+        nord, sud = self.simulateurs
+        nord.recevoir_message("ALERTE NORD")
+        sud.recevoir_message("ALERTE SUD", groupe_fec=4)
+        self.assertTrue(self.attendre(2), self.recus)
+        self.assertEqual(sorted(self.recus), [("Nord", "ALERTE NORD"), ("Sud", "ALERTE SUD")])
+        self.assertEqual(self.client.recepteurs["Nord"].messages_recus, 1)
+        self.assertEqual(self.client.recepteurs["Sud"].messages_recus, 1)
+
+    def test_mode_binaire(self):
+        self.connecter(binaire=True)
+        limite = time.monotonic() + ATTENTE
+        while not all(simulateur.binaire for simulateur in self.simulateurs) and time.monotonic() < limite:
+            time.sleep(0.01)
+        nord, _ = self.simulateurs
+        nord.recevoir_message("ALERTE BINAIRE")
+        self.assertTrue(self.attendre(1), self.recus)
+        time.sleep(0.1)
+        # Trame TYPE_MESSAGE du firmware reconnue comme la même alerte
+        self.assertEqual(self.recus, [("Nord", "ALERTE BINAIRE")])
+
+    def test_nom_en_double_refuse(self):
+        nord, sud = self.simulateurs
+        erreurs = self.client.connecter(f"Nord={nord.nom_port}, Nord={sud.nom_port}")
+        self.assertEqual([port for port, _ in erreurs], [sud.nom_port])
+        self.assertEqual(list(self.client.recepteurs), ["Nord"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+"""Historique SQLite des alertes (wave_persistance): écriture, rechargement et recherche
+
+Usage: python -m unittest discover tests
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_journal import EntreeJournal
+from wave_persistance import JournalPersistant, horodatage_saisie, requete_fts
+
+T0 = 1_700_000_000.0
+
+
+def entree(id_, recu_a, texte, source="Étage 1"):
+    return EntreeJournal(id_, recu_a, "00:00:00", texte, source=source)
+
+
+class TestJournalPersistant(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.chemin = os.path.join(self.dossier, "journal.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.dossier, ignore_errors=True)
+
+    def recharger(self, nombre=100):
+        journal = JournalPersistant(self.chemin)
+        try:
+            return journal.charger_derniers(nombre)
+        finally:
+            journal.fermer()
+
+    def test_rechargement_apres_fermeture(self):
+        journal = JournalPersistant(self.chemin, intervalle_sync=0.01)
+        for i in range(1, 6):
+            journal.ajouter(entree(i, T0 + 60 * i, f"ALERTE {i}"))
+        journal.marquer_lu(2)
+        journal.fermer()
+        self.assertIsNone(journal.derniere_erreur)
+
+        lignes, dernier_id = self.recharger(3)
+        self.assertEqual(dernier_id, 5)
+        self.assertEqual([ligne[0] for ligne in lignes], [3, 4, 5])
+        self.assertEqual(lignes[0][1:], (T0 + 180, "00:00:00", "ALERTE 3", 1, "Étage 1", 1, T0 + 180))
+
+        lignes, _ = self.recharger()
+        self.assertEqual([ligne[4] for ligne in lignes], [1, 0, 1, 1, 1])
+
+    def test_effacement_garde_l_historique(self):
+        journal = JournalPersistant(self.chemin, intervalle_sync=0.01)
+        journal.ajouter(entree(1, T0, "AVANT"))
+        journal.effacer_tout()
+        journal.ajouter(entree(2, T0 + 1, "APRES"))
+        journal.fermer()
+
+        lignes, dernier_id = self.recharger()
+        self.assertEqual([ligne[3] for ligne in lignes], ["APRES"])
+        # Les ids continuent après l'historique effacé
+        self.assertEqual(dernier_id, 2)
+
+    def test_base_anterieure_sans_source(self):
+        connexion = sqlite3.connect(self.chemin)
+        connexion.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY, recu_a REAL NOT NULL, "
+                          "heure TEXT NOT NULL, texte TEXT NOT NULL, "
+                          "non_lu INTEGER NOT NULL DEFAULT 1, efface INTEGER NOT NULL DEFAULT 0)")
+        connexion.execute("INSERT INTO messages (id, recu_a, heure, texte) VALUES (1, ?, '00:00:00', 'ANCIENNE')",
+                          (T0,))
+        connexion.commit()
+        connexion.close()
+
+        lignes, _ = self.recharger()
+        self.assertEqual(lignes, [(1, T0, "00:00:00", "ANCIENNE", 1, "", 1, None)])
+
+    def test_repetition_mise_a_jour(self):
+        journal = JournalPersistant(self.chemin, intervalle_sync=0.01)
+        alerte = entree(1, T0, "EVACUATION")
+        journal.ajouter(alerte)
+        journal.marquer_lu(1)
+        alerte.occurrences, alerte.vu_a, alerte.non_lu = 3, T0 + 50, True
+        journal.repeter(alerte)
+        journal.fermer()
+
+        lignes, _ = self.recharger()
+        self.assertEqual(lignes, [(1, T0, "00:00:00", "EVACUATION", 1, "Étage 1", 3, T0 + 50)])
+
+    def test_ecritures_groupees(self):
+        journal = JournalPersistant(self.chemin, intervalle_sync=0.5)
+        for i in range(1, 51):
+            journal.ajouter(entree(i, T0 + i, f"ALERTE {i}"))
+        journal.fermer()
+        self.assertEqual(journal.operations_ecrites, 50)
+        self.assertLess(journal.lots_ecrits, 50)
+
+
+class TestRecherche(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.journal = JournalPersistant(os.path.join(self.dossier, "journal.db"), intervalle_sync=0.01)
+        # Une alerte par minute: ids et heures de réception croissants
+        for i in range(1, 11):
+            self.journal.ajouter(entree(i, T0 + 60 * i, f"ALERTE LOCALE {i}"))
+        self.journal.ajouter(entree(11, T0 + 60 * 11, "Évacuation du bâtiment \"B\""))
+        self.journal.fermer()
+
+    def tearDown(self):
+        if self.journal._lecture is not None:
+            self.journal._lecture.close()
+        shutil.rmtree(self.dossier, ignore_errors=True)
+
+    def ids(self, *args, **kwargs):
+        return [ligne[0] for ligne in self.journal.rechercher(*args, **kwargs)]
+
+    def test_sans_bornes(self):
+        self.assertEqual(self.ids(), list(range(11, 0, -1)))
+        self.assertEqual(self.ids(limite=2), [11, 10])
+
+    def test_mots_prefixes_tous_requis(self):
+        self.assertEqual(self.ids("locale 7"), [7])
+        self.assertEqual(self.ids("alert loc 1"), [10, 1])
+        self.assertEqual(self.ids("locale batiment"), [])
+
+    def test_accents_et_guillemets(self):
+        self.assertEqual(self.ids("evacuation BATIMENT"), [11])
+        self.assertEqual(self.ids('"b"'), [11])
+
+    def test_periode(self):
+        self.assertEqual(self.ids(depuis=T0 + 60 * 2, jusqu_a=T0 + 60 * 5), [4, 3, 2])
+        self.assertEqual(self.ids("alerte", depuis=T0 + 60 * 9), [10, 9])
+        self.assertEqual(self.ids(depuis=T0 + 60 * 20), [])
+        self.assertEqual(self.ids(jusqu_a=T0), [])
+
+
+class TestRechercheRelayee(unittest.TestCase):
+    """Messages relayés après une coupure: ids récents, heure de réception d'origine ancienne"""
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.journal = JournalPersistant(os.path.join(self.dossier, "journal.db"), intervalle_sync=0.01)
+        for i in range(1, 11):
+            self.journal.ajouter(entree(i, T0 + 60 * i, f"ALERTE LOCALE {i}"))
+        self.journal.ajouter(entree(11, T0 + 60 * 3.5, "INCENDIE RELAYE", "Étage 2@Poste B"))
+        self.journal.ajouter(entree(12, T0 + 60 * 20, "EVACUATION RELAYEE", "Étage 2@Poste B"))
+        self.journal.fermer()
+
+    def tearDown(self):
+        if self.journal._lecture is not None:
+            self.journal._lecture.close()
+        shutil.rmtree(self.dossier, ignore_errors=True)
+
+    def ids(self, *args, **kwargs):
+        return [ligne[0] for ligne in self.journal.rechercher(*args, **kwargs)]
+
+    def test_periode_avec_message_relaye(self):
+        self.assertEqual(self.ids(depuis=T0 + 60 * 2, jusqu_a=T0 + 60 * 5), [11, 4, 3, 2])
+
+    def test_texte_et_periode_avec_message_relaye(self):
+        self.assertEqual(self.ids("incendie", depuis=T0 + 60 * 3, jusqu_a=T0 + 60 * 4), [11])
+        self.assertEqual(self.ids("incendie", depuis=T0 + 60 * 4), [])
+
+    def test_periode_sans_message_local(self):
+        self.assertEqual(self.ids(depuis=T0 + 60 * 15), [12])
+        self.assertEqual(self.ids(jusqu_a=T0), [])
+
+
+class TestSaisie(unittest.TestCase):
+
+    def test_requete_fts(self):
+        self.assertEqual(requete_fts(' feu  "nord" '), '"feu"* """nord"""*')
+        self.assertEqual(requete_fts("   "), "")
+
+    def test_horodatage_saisie(self):
+        maintenant = datetime(2026, 10, 17, 15, 30)
+        self.assertIsNone(horodatage_saisie("  ", maintenant))
+        self.assertEqual(horodatage_saisie("08:05", maintenant), datetime(2026, 10, 17, 8, 5).timestamp())
+        self.assertEqual(horodatage_saisie("16/10 08:05", maintenant), datetime(2026, 10, 16, 8, 5).timestamp())
+        self.assertEqual(horodatage_saisie("16/10/2025 08:05", maintenant),
+                         datetime(2025, 10, 16, 8, 5).timestamp())
+        with self.assertRaises(ValueError):
+            horodatage_saisie("hier", maintenant)
+
+
+if __name__ == '__main__':
+    unittest.main()
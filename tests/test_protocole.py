@@ -0,0 +1,47 @@
+"""Tests du classifieur de lignes du firmware récepteur
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_protocole import ClassifieurLignes
+
+
+class TestClassifieur(unittest.TestCase):
+    def setUp(self):
+        self.classifieur = ClassifieurLignes()
+
+    def test_champs_extraits(self):
+        nom, match = self.classifieur.classer("✅ MESSAGE PERSONNALISÉ REÇU: 'FIN D' (6 caractères)")
+        self.assertEqual(nom, 'message_recu')
+        self.assertEqual(match.group('texte_recu'), "FIN D")
+
+        nom, match = self.classifieur.classer("DEBUG: Paquet 2 reçu: 0x1204427")
+        self.assertEqual(nom, 'paquet')
+        self.assertEqual(match.group('num_paquet', 'code_paquet'), ("2", "0x1204427"))
+
+        nom, match = self.classifieur.classer("Buffer actuel: 'FIN' (3/12 chars)")
+        self.assertEqual(nom, 'buffer')
+        self.assertEqual(match.group('texte_buffer', 'buffer_len', 'buffer_total'), ("FIN", "3", "12"))
+
+    def test_prefixes_partages(self):
+        # Même initiale ✅: chaque variante garde sa propre règle
+        self.assertEqual(self.classifieur.classer("✅ ALERTE ARRÊTÉE - LED ÉTEINTE")[0], 'alerte_arretee')
+        self.assertEqual(self.classifieur.classer("✅ CARTE AUTORISÉE DÉTECTÉE")[0], 'carte_autorisee')
+        self.assertEqual(self.classifieur.classer("DEBUG: Buffer réinitialisé")[0], 'buffer_reinit')
+
+    def test_lignes_inconnues(self):
+        self.assertEqual(self.classifieur.classer("DEBUG: LED verte initialisée"), ('debug', None))
+        self.assertEqual(self.classifieur.classer("💡 LED: Clignotante"), ('autre', None))
+        self.assertEqual(self.classifieur.classer(""), ('autre', None))
+
+    def test_regle_ancree_en_debut(self):
+        self.assertEqual(self.classifieur.classer("x Signal détecté")[0], 'autre')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Vue Tk du récepteur sans affichage: réveil du thread Tk et rendus regroupés
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_recepteur import INTERVALLE_UI_MS, RFIDRecepteurMonitor
+from wave_serie import INTERVALLE_VIDAGE_MS
+
+
+class RacineFactice:
+    """Remplace la fenêtre Tk: mémorise les appels planifiés sans les exécuter"""
+
+    def __init__(self):
+        self.planifies = []
+
+    def after(self, delai, fonction, *args):
+        self.planifies.append((delai, fonction, args))
+
+
+class ClientFactice:
+    def __init__(self):
+        self.vidages = 0
+
+    def traiter_en_attente(self):
+        self.vidages += 1
+
+
+def moniteur_factice():
+    moniteur = RFIDRecepteurMonitor.__new__(RFIDRecepteurMonitor)
+    moniteur.root = RacineFactice()
+    moniteur._donnees_serie = False
+    moniteur.client = ClientFactice()
+    return moniteur
+
+
+class TestReveil(unittest.TestCase):
+    def test_reveil_sans_appel_tk(self):
+        moniteur = moniteur_factice()
+        for _ in range(3):
+            moniteur.reveiller()
+        # Appelé depuis la boucle série: rien n'est planifié sur la fenêtre
+        self.assertEqual(moniteur.root.planifies, [])
+        self.assertTrue(moniteur._donnees_serie)
+
+    def test_un_vidage_par_tour(self):
+        moniteur = moniteur_factice()
+        moniteur.reveiller()
+        moniteur.reveiller()
+        moniteur.surveiller_serie()
+        self.assertEqual(moniteur.client.vidages, 1)
+        self.assertEqual([delai for delai, _, _ in moniteur.root.planifies], [INTERVALLE_VIDAGE_MS])
+        # Tour suivant sans nouveau lot: pas de vidage, la scrutation continue
+        _, fonction, _ = moniteur.root.planifies[0]
+        fonction()
+        self.assertEqual(moniteur.client.vidages, 1)
+        self.assertEqual(len(moniteur.root.planifies), 2)
+
+
+class WidgetFactice:
+    def __init__(self):
+        self.options = {}
+
+    def configure(self, **options):
+        self.options.update(options)
+
+
+def moniteur_affichage():
+    """Moniteur réduit au regroupement des rafraîchissements"""
+    moniteur = RFIDRecepteurMonitor.__new__(RFIDRecepteurMonitor)
+    moniteur.root = RacineFactice()
+    moniteur._ui_sale = set()
+    moniteur._ui_planifie = False
+    moniteur._dernier_rendu = 0.0
+    moniteur._suivre_journal = True
+    moniteur._evincees = 0
+    moniteur.ui_evenements = 0
+    moniteur.ui_rendus = 0
+    moniteur.rendus = []
+    moniteur.appliquer_stats = lambda: moniteur.rendus.append('stats')
+    moniteur.appliquer_bouton_son = lambda: moniteur.rendus.append('son')
+    moniteur.ui_label = WidgetFactice()
+    return moniteur
+
+
+class TestRegroupementAffichage(unittest.TestCase):
+    def test_rafale_rendue_une_fois(self):
+        moniteur = moniteur_affichage()
+        for _ in range(50):
+            moniteur.update_stats()
+        moniteur.update_sound_button()
+        # Période calme auparavant: un seul rendu planifié, immédiat
+        self.assertEqual([delai for delai, _, _ in moniteur.root.planifies], [0])
+        moniteur.root.planifies[0][1]()
+        self.assertEqual(sorted(moniteur.rendus), ['son', 'stats'])
+        self.assertEqual((moniteur.ui_evenements, moniteur.ui_rendus), (51, 1))
+        self.assertIn("50 regroupées", moniteur.ui_label.options['text'])
+
+    def test_rendu_suivant_attend_le_tick(self):
+        moniteur = moniteur_affichage()
+        moniteur.update_stats()
+        moniteur.root.planifies.pop()[1]()
+        moniteur.update_stats()
+        delai, fonction, _ = moniteur.root.planifies.pop()
+        self.assertGreater(delai, 0)
+        self.assertLessEqual(delai, INTERVALLE_UI_MS)
+        fonction()
+        self.assertEqual(moniteur.rendus, ['stats', 'stats'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+"""Relais entre stations (wave_relais): file par pair, doublons et reprise en boucle locale
+
+Usage: python -m unittest discover tests
+"""
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wave_relais
+from wave_client_recepteur import ClientRecepteur
+from wave_multiport import Recepteur
+from wave_relais import PORT_RELAIS, Pair, Relais, analyser_pairs
+from wave_trames import encoder_message
+
+ATTENTE = 15.0  # Secondes max (la reconnexion attend RELANCE_INITIALE puis le double)
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def attendre(condition):
+    limite = time.monotonic() + ATTENTE
+    while not condition():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class PortFactice:
+    def __init__(self):
+        self.ecrit = []
+        self.is_open = True
+
+    def write(self, data):
+        self.ecrit.append(data)
+
+    def close(self):
+        self.is_open = False
+
+
+class TestPair(unittest.TestCase):
+
+    def test_analyser_pairs(self):
+        self.assertEqual(analyser_pairs("10.0.0.12:7901, poste-b,,"),
+                         [("10.0.0.12", 7901), ("poste-b", PORT_RELAIS)])
+
+    def test_acquittement_cumulatif(self):
+        pair = Pair("poste-b", PORT_RELAIS)
+        for i in range(5):
+            pair.deposer({'id': i})
+        pair.envoyees = 4
+        pair.acquitter(3)
+        self.assertEqual([alerte['id'] for _, alerte in pair.en_attente], [3, 4])
+        self.assertEqual((pair.acquittees, pair.envoyees), (3, 1))
+
+    def test_file_bornee(self):
+        pair = Pair("poste-b", PORT_RELAIS)
+        with mock.patch.object(wave_relais, 'EN_ATTENTE_MAX', 3):
+            for i in range(5):
+                pair.deposer({'id': i})
+        # Les plus anciennes sont abandonnées
+        self.assertEqual([alerte['id'] for _, alerte in pair.en_attente], [2, 3, 4])
+        self.assertEqual(pair.abandonnees, 2)
+
+
+class TestRelais(unittest.TestCase):
+
+    def setUp(self):
+        self.livrees = []
+        self.condition = threading.Condition()
+        self.port_b = port_libre()
+        self.b = self.station_b()
+        # A envoie ses alertes à B
+        self.a = Relais("Poste A", [("127.0.0.1", self.port_b)], port_libre())
+        self.a.demarrer()
+
+    def tearDown(self):
+        for relais in (self.a, self.b):
+            relais.arreter().result(5.0)
+
+    def station_b(self):
+        relais = Relais("Poste B", (), self.port_b, self.livrer)
+        relais.demarrer()
+        return relais
+
+    def livrer(self, alerte):
+        with self.condition:
+            self.livrees.append((alerte['texte'], alerte['id'].rpartition('/')[2], alerte['occurrences']))
+            self.condition.notify_all()
+
+    def attendre(self, condition):
+        with self.condition:
+            return self.condition.wait_for(condition, ATTENTE)
+
+    def publier(self, nombre, debut=1):
+        for i in range(debut, debut + nombre):
+            self.a.publier(f"ALERTE {i}", "Étage 1", time.time(), i)
+
+    def test_repetition_et_doublon(self):
+        self.publier(2)
+        self.a.publier("ALERTE 2", "Étage 1", time.time(), 2, occurrences=2)
+        self.assertTrue(self.attendre(lambda: len(self.livrees) >= 3), self.livrees)
+        # Même alerte, même nombre de réceptions (acquittement perdu): écartée
+        self.a.publier("ALERTE 2", "Étage 1", time.time(), 2, occurrences=2)
+        self.publier(1, debut=3)
+        self.assertTrue(self.attendre(lambda: len(self.livrees) >= 4), self.livrees)
+        self.assertEqual(self.livrees, [("ALERTE 1", "1", 1), ("ALERTE 2", "2", 1),
+                                        ("ALERTE 2", "2", 2), ("ALERTE 3", "3", 1)])
+        self.assertEqual(self.b.doublons, 1)
+
+    def test_reprise_apres_coupure(self):
+        self.publier(5)
+        self.assertTrue(self.attendre(lambda: len(self.livrees) >= 5), self.livrees)
+        self.b.arreter().result(5.0)
+
+        pair = self.a.pairs[0]
+        limite = time.monotonic() + ATTENTE
+        while pair.connecte and time.monotonic() < limite:
+            time.sleep(0.05)
+        self.assertFalse(pair.connecte)
+
+        # B injoignable: les alertes attendent dans la file du pair
+        self.publier(20, debut=6)
+        time.sleep(0.1)
+        self.assertEqual(len(pair.en_attente), 20)
+
+        self.b = self.station_b()
+        self.assertTrue(self.attendre(lambda: len(self.livrees) >= 25), self.livrees)
+        time.sleep(0.2)  # Un éventuel doublon arriverait maintenant
+        self.assertEqual([texte for texte, _, _ in self.livrees], [f"ALERTE {i}" for i in range(1, 26)])
+        self.assertEqual(pair.coupures, 1)
+
+
+class TestJournalPartage(unittest.TestCase):
+    """Deux ClientRecepteur reliés: le journal de B reçoit les alertes de A"""
+
+    def setUp(self):
+        port_b = port_libre()
+        self.client_a, self.client_b = ClientRecepteur(), ClientRecepteur()
+        self.nord = Recepteur("Nord", "COM8", PortFactice())
+        self.client_a.recepteurs = {"Nord": self.nord}
+        self.client_b.recepteurs = {"Sud": Recepteur("Sud", "COM9", PortFactice())}
+        self.client_a.connecte = self.client_b.connecte = True
+
+        self.relais_b = Relais("Poste B", (), port_b)
+        self.relais_b.relier(self.client_b)
+        self.relais_b.demarrer()
+        self.relais_a = Relais("Poste A", [("127.0.0.1", port_b)], port_libre())
+        self.relais_a.relier(self.client_a)
+        self.relais_a.demarrer()
+
+    def tearDown(self):
+        for relais in (self.relais_a, self.relais_b):
+            relais.arreter().result(5.0)
+
+    def test_alerte_relayee(self):
+        self.client_a.deposer(self.nord, [f"RX:{code:X}" for code in encoder_message("EVACUATION")])
+        self.assertTrue(attendre(lambda: len(self.client_b.magasin) == 1))
+        entree = self.client_b.magasin[0]
+        self.assertEqual((entree.texte, entree.source, entree.station), ("EVACUATION", "Nord@Poste A", "Poste A"))
+        self.assertEqual(self.client_b.messages_relayes, 1)
+        # Arrêtée sur B: aucune carte de B n'a sonné, pas de stopalert
+        self.assertTrue(self.client_b.arreter_alerte(entree.id))
+        time.sleep(0.1)
+        self.assertEqual(self.client_b.recepteurs["Sud"].connexion.ecrit, [])
+
+        # Répétée sur A: la ligne de B est mise à jour et réactivée
+        self.client_a.deposer(self.nord, [f"RX:{code:X}" for code in encoder_message("EVACUATION")])
+        self.assertTrue(attendre(lambda: entree.occurrences == 2))
+        self.assertEqual(len(self.client_b.magasin), 1)
+        self.assertTrue(self.client_b.magasin.est_non_lu(entree.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+"""Boucle série partagée (wave_serie): appels bloquants bornés et ouverture annulable des ports
+
+Les ports sont des objets factices créés à la place de serial.Serial: ouverture
+immédiate, en erreur ou bloquée jusqu'à ce que le test la libère.
+
+Usage: python -m unittest discover tests
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent import futures
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wave_multiport
+from wave_client_recepteur import ClientRecepteur
+from wave_multiport import Recepteur, fermer_cartes, ouvrir_cartes
+from wave_serie import BoucleSerie, bloquant, boucle_serie
+
+ATTENTE = 10.0
+
+
+def attendre(condition):
+    limite = time.monotonic() + ATTENTE
+    while not condition():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def arreter(boucle):
+    boucle.boucle.call_soon_threadsafe(boucle.boucle.stop)
+    boucle.thread.join(ATTENTE)
+    boucle.boucle.close()
+
+
+class PortFactice:
+    def __init__(self, port):
+        self.port = port
+        self.ecrit = []
+        self.is_open = True
+        self.in_waiting = 0
+        self.ferme = threading.Event()
+
+    def write(self, data):
+        self.ecrit.append(data)
+
+    def read(self, n=1):
+        self.ferme.wait(0.05)  # Timeout du port, sans données
+        return b""
+
+    def close(self):
+        self.is_open = False
+        self.ferme.set()
+
+
+class Ports:
+    """Fabrique de ports: 'ABSENT' échoue, 'LENT' attend `liberer`, les autres s'ouvrent"""
+
+    def __init__(self):
+        self.ouverts = []
+        self.liberer = threading.Event()
+        self.lent_demande = threading.Event()
+
+    def __call__(self, port, **options):
+        if port == "ABSENT":
+            raise OSError("port introuvable")
+        if port == "LENT":
+            self.lent_demande.set()
+            self.liberer.wait(ATTENTE)
+        connexion = PortFactice(port)
+        self.ouverts.append(connexion)
+        return connexion
+
+
+class TestBoucle(unittest.TestCase):
+
+    def test_executer_et_appeler(self):
+        boucle = boucle_serie()
+        self.assertIs(boucle_serie(), boucle)
+
+        async def double(x):
+            return 2 * x
+
+        self.assertEqual(boucle.executer(double(21), ATTENTE), 42)
+        threads = []
+        fait = threading.Event()
+        boucle.appeler(lambda: (threads.append(threading.current_thread()), fait.set()))
+        self.assertTrue(fait.wait(ATTENTE))
+        self.assertIs(threads[0], boucle.thread)
+
+    def test_bloquant_abandonne_libere_le_resultat(self):
+        boucle = BoucleSerie()
+        self.addCleanup(arreter, boucle)
+        fin = threading.Event()
+        liberes = []
+
+        def lent():
+            fin.wait(ATTENTE)
+            return "port"
+
+        with self.assertRaises(asyncio.TimeoutError):
+            boucle.executer(bloquant(lent, timeout=0.05, liberer=liberes.append), ATTENTE)
+        self.assertEqual(liberes, [])
+        # L'appel finit après l'abandon: son résultat est rendu à `liberer`
+        fin.set()
+        self.assertTrue(attendre(lambda: liberes == ["port"]))
+
+
+class TestOuverture(unittest.TestCase):
+
+    def setUp(self):
+        self.ports = Ports()
+        self.addCleanup(self.ports.liberer.set)
+        patch = mock.patch.object(wave_multiport.serial, 'Serial', self.ports)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.boucle = boucle_serie()
+
+    def test_ports_en_erreur_signales(self):
+        cartes, erreurs = self.boucle.executer(
+            ouvrir_cartes(Recepteur, [("Nord", "COM8"), ("Sud", "ABSENT")], initialisation=b"BIN:1\n"), ATTENTE)
+        self.assertEqual([carte.nom for carte in cartes], ["Nord"])
+        self.assertEqual(erreurs, [("ABSENT", "port introuvable")])
+        self.assertEqual(cartes[0].connexion.ecrit, [b"BIN:1\n"])
+
+    def test_port_qui_ne_repond_pas(self):
+        with mock.patch.object(wave_multiport, 'TIMEOUT_OUVERTURE', 0.05):
+            cartes, erreurs = self.boucle.executer(
+                ouvrir_cartes(Recepteur, [("Nord", "COM8"), ("Lent", "LENT")]), ATTENTE)
+        self.assertEqual([carte.nom for carte in cartes], ["Nord"])
+        self.assertEqual(erreurs, [("LENT", "pas de réponse du port en 0.05 s")])
+        # Ouvert trop tard: refermé aussitôt
+        self.ports.liberer.set()
+        self.assertTrue(attendre(lambda: len(self.ports.ouverts) == 2))
+        self.assertTrue(attendre(lambda: not self.ports.ouverts[1].is_open))
+
+    def test_annulation_referme_les_ports_ouverts(self):
+        ouverture = self.boucle.soumettre(ouvrir_cartes(Recepteur, [("Nord", "COM8"), ("Lent", "LENT")]))
+        self.assertTrue(self.ports.lent_demande.wait(ATTENTE))
+        self.assertTrue(attendre(lambda: len(self.ports.ouverts) == 1))
+        self.assertTrue(ouverture.cancel())
+        self.assertTrue(attendre(lambda: not self.ports.ouverts[0].is_open))
+        self.ports.liberer.set()
+        self.assertTrue(attendre(lambda: len(self.ports.ouverts) == 2))
+        self.assertTrue(attendre(lambda: not self.ports.ouverts[1].is_open))
+
+    def test_annulation_quand_les_ports_s_ouvrent(self):
+        # cancel() au moment où les ouvertures finissent: aucun port ne reste ouvert sans carte
+        rendus = []
+        for i in range(50):
+            ouverture = self.boucle.soumettre(ouvrir_cartes(Recepteur, [("Nord", "COM8"), ("Sud", "COM9")]),
+                                              liberer=fermer_cartes)
+            time.sleep(0.0002 * (i % 10))
+            if not ouverture.cancel():
+                rendus += [carte.connexion for carte in ouverture.result(ATTENTE)[0]]
+        self.assertTrue(attendre(lambda: all(not port.is_open for port in self.ports.ouverts
+                                             if port not in rendus)))
+
+
+class TestConnexionClient(unittest.TestCase):
+
+    def setUp(self):
+        self.ports = Ports()
+        self.addCleanup(self.ports.liberer.set)
+        patch = mock.patch.object(wave_multiport.serial, 'Serial', self.ports)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.reveils = threading.Event()
+        self.client = ClientRecepteur(reveil=self.reveils.set)
+        self.connexions = []
+        self.client.abonner('connexion', self.connexions.append)
+
+    def test_resultat_par_la_file(self):
+        ouverture = self.client.demarrer_connexion("Nord=COM8, Sud=ABSENT")
+        ouverture.result(ATTENTE)
+        self.assertTrue(self.reveils.wait(ATTENTE))
+        # Rien n'est installé hors du thread de traitement
+        self.assertFalse(self.client.connecte)
+        self.client.traiter_en_attente()
+        self.assertTrue(self.client.connecte)
+        self.assertEqual(list(self.client.recepteurs), ["Nord"])
+        self.assertEqual(self.connexions, [[("ABSENT", "port introuvable")]])
+        futures.wait([self.client.deconnecter()], ATTENTE)
+        self.assertFalse(self.ports.ouverts[0].is_open)
+
+    def test_annulation(self):
+        ouverture = self.client.demarrer_connexion("Nord=COM8, Lent=LENT")
+        self.assertTrue(self.ports.lent_demande.wait(ATTENTE))
+        self.assertTrue(ouverture.cancel())
+        self.ports.liberer.set()
+        self.assertTrue(attendre(lambda: len(self.ports.ouverts) == 2
+                                 and not any(port.is_open for port in self.ports.ouverts)))
+        self.client.traiter_en_attente()
+        self.assertFalse(self.client.connecte)
+        self.assertEqual(self.connexions, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+"""Reconnexion automatique des cartes perdues (wave_supervision)
+
+Un port est simulé par un fichier temporaire (présent = carte branchée) et une
+connexion factice sans descripteur, lue par read() bloquant comme un port COM.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wave_supervision
+from wave_multiport import LecteurMultiPort, Recepteur
+from wave_supervision import chercher
+
+ATTENTE = 10.0
+
+
+def attendre(condition):
+    limite = time.monotonic() + ATTENTE
+    while not condition():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def info(device, vid=None, pid=None, serial_number=None):
+    return SimpleNamespace(device=device, vid=vid, pid=pid, serial_number=serial_number)
+
+
+class ConnexionFactice:
+    """Connexion qui lève une erreur une fois `debrancher()` appelé"""
+
+    def __init__(self, port, data=b""):
+        self.port = port
+        self.baudrate = 115200
+        self.data = data
+        self.is_open = True
+        self.debranchee = False
+        self.evenement = threading.Event()  # Débranchée ou fermée: read() n'attend plus
+
+    @property
+    def in_waiting(self):
+        if self.debranchee:
+            raise OSError("périphérique déconnecté")
+        return len(self.data)
+
+    def read(self, n=1):
+        if not self.data:
+            self.evenement.wait(0.05)  # Timeout du port
+        if self.debranchee:
+            raise OSError("périphérique déconnecté")
+        data, self.data = self.data[:n], self.data[n:]
+        return data
+
+    def write(self, data):
+        pass
+
+    def debrancher(self):
+        self.debranchee = True
+        self.evenement.set()
+
+    def close(self):
+        self.is_open = False
+        self.evenement.set()
+
+
+class Evenements:
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.lignes = []
+        self.pertes = []
+        self.reprises = []
+
+    def livrer(self, carte, elements):
+        with self.verrou:
+            self.lignes.extend(elements)
+
+    def signaler_erreur(self, carte, erreur):
+        with self.verrou:
+            self.pertes.append(carte.nom)
+
+    def signaler_reprise(self, carte, duree):
+        with self.verrou:
+            self.reprises.append((carte.nom, duree))
+
+
+class TestChercher(unittest.TestCase):
+
+    def test_carte_rebranchee_sur_un_autre_port(self):
+        identite = (0x1A86, 0x7523, "A1")
+        ports = [info("COM3", 0x10C4, 0xEA60, "B2"), info("COM9", 0x1A86, 0x7523, "A1")]
+        with mock.patch.object(wave_supervision.list_ports, 'comports', return_value=ports):
+            self.assertEqual(chercher(identite, "COM8"), "COM9")
+            self.assertIsNone(chercher((0x1A86, 0x7523, "C3"), "COM8"))
+
+    def test_port_d_origine_prefere_et_ports_exclus(self):
+        identite = (0x1A86, 0x7523, None)
+        ports = [info("COM5", 0x1A86, 0x7523), info("COM8", 0x1A86, 0x7523)]
+        with mock.patch.object(wave_supervision.list_ports, 'comports', return_value=ports):
+            self.assertEqual(chercher(identite, "COM8"), "COM8")
+            # Même modèle sans numéro de série: un port déjà pris par une autre carte est écarté
+            self.assertEqual(chercher(identite, "COM7", exclus={"COM5"}), "COM8")
+
+    def test_sans_identite_usb(self):
+        with mock.patch.object(wave_supervision.list_ports, 'comports', return_value=[info("COM8")]):
+            self.assertEqual(chercher(None, "COM8"), "COM8")
+            self.assertIsNone(chercher(None, "COM9"))
+
+
+@mock.patch.multiple(wave_supervision, PERIODE_DETECTION=0.01, RELANCE_INITIALE=0.1, RELANCE_MAX=0.4)
+class TestReprise(unittest.TestCase):
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        self.port = os.path.join(dossier.name, "ttyUSB0")
+        open(self.port, "w").close()
+        self.ouvertures = []  # instants des essais d'ouverture
+        self.refuser = False
+
+        patch = mock.patch.object(wave_supervision.list_ports, 'comports', return_value=[])
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.carte = Recepteur("Nord", self.port, ConnexionFactice(self.port))
+        patch = mock.patch.object(self.carte, 'connexion_serie', self.connexion_serie)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.evenements = Evenements()
+        self.lecteur = LecteurMultiPort([self.carte], self.evenements.livrer, self.evenements.signaler_erreur,
+                                        signaler_reprise=self.evenements.signaler_reprise)
+        self.lecteur.demarrer()
+        self.addCleanup(lambda: self.lecteur.arreter().result(ATTENTE))
+
+    def connexion_serie(self, port, baudrate):
+        self.ouvertures.append(time.monotonic())
+        if self.refuser:
+            raise OSError("accès refusé")
+        return ConnexionFactice(port, b"DE RETOUR\n")
+
+    def test_reprise_quand_la_carte_reapparait(self):
+        os.remove(self.port)
+        self.carte.connexion.debrancher()
+        self.assertTrue(attendre(lambda: self.evenements.pertes == ["Nord"]))
+        time.sleep(0.3)
+        # Absente de la liste des ports: aucun essai d'ouverture
+        self.assertEqual(self.ouvertures, [])
+        open(self.port, "w").close()
+        self.assertTrue(attendre(lambda: self.evenements.reprises))
+        self.assertTrue(attendre(lambda: self.evenements.lignes == ["DE RETOUR"]))
+        self.assertTrue(self.carte.actif)
+        self.assertEqual(len(self.carte.pannes), 1)
+        self.assertGreaterEqual(self.evenements.reprises[0][1], 0.3)
+
+    def test_attente_doublee_puis_bornee(self):
+        self.refuser = True
+        perte = time.monotonic()
+        self.carte.connexion.debrancher()
+        self.assertTrue(attendre(lambda: len(self.ouvertures) >= 4))
+        self.assertFalse(self.carte.actif)
+        premier = self.ouvertures[0] - perte
+        ecarts = [b - a for a, b in zip(self.ouvertures, self.ouvertures[1:4])]
+        self.assertGreaterEqual(premier, 0.1)
+        self.assertGreaterEqual(ecarts[0], 0.2)
+        self.assertGreaterEqual(ecarts[1], 0.4)
+        self.assertLess(ecarts[2], 0.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
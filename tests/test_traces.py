@@ -0,0 +1,92 @@
+"""Traces de latence (wave_traces): corrélation des étapes des deux processus et percentiles
+
+Usage: python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wave_traces
+from wave_traces import CorrelateurTraces, TraceurLatence, percentile
+
+
+class TestPercentile(unittest.TestCase):
+
+    def test_rang_le_plus_proche(self):
+        valeurs = list(range(1, 101))
+        self.assertEqual(percentile(valeurs, 50), 50)
+        self.assertEqual(percentile(valeurs, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+
+class TestCorrelation(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.chemin = os.path.join(self.dossier, "traces.jsonl")
+        self.emetteur = TraceurLatence(self.chemin, 'emetteur')
+        self.recepteur = TraceurLatence(self.chemin, 'recepteur')
+        self.correlateur = CorrelateurTraces(self.chemin)
+
+    def tearDown(self):
+        self.emetteur.fermer()
+        self.recepteur.fermer()
+        shutil.rmtree(self.dossier, ignore_errors=True)
+
+    def trajet(self, texte, t, sources=("Nord",)):
+        for source in sources:
+            self.emetteur.noter(wave_traces.MSG_ENVOYE, texte, source, t=t)
+        self.emetteur.noter(wave_traces.UID_AUTORISE, texte, sources[0], t=t + 2.0)
+        self.emetteur.noter(wave_traces.TRANSMISSION_OK, texte, sources[0], t=t + 2.5)
+        self.recepteur.noter(wave_traces.PREMIER_PAQUET, texte, "Étage 1", t=t + 2.1)
+        self.recepteur.noter(wave_traces.MESSAGE_ASSEMBLE, texte, "Étage 1", t=t + 2.4)
+        self.recepteur.noter(wave_traces.LIGNE_AFFICHEE, texte, t=t + 2.45)
+
+    def test_etapes_des_deux_processus_regroupees(self):
+        self.trajet("EVACUATION", 100.0)
+        self.assertEqual(self.correlateur.lire(), 6)
+        self.assertEqual(len(self.correlateur.traces), 1)
+        latences = self.correlateur.latences()
+        self.assertAlmostEqual(latences[wave_traces.SEGMENT_PRINCIPAL][0], 0.45)
+        self.assertAlmostEqual(latences["Envoi MSG → affichage"][0], 2.45)
+
+    def test_diffusion_a_un_groupe(self):
+        # Un MSG: par carte émettrice: un seul message tracé
+        self.trajet("CONFINEMENT", 100.0, sources=("Nord", "Sud", "Est"))
+        self.correlateur.lire()
+        self.assertEqual(len(self.correlateur.traces), 1)
+        self.assertEqual(self.correlateur.traces[0].sources[wave_traces.MSG_ENVOYE], "Nord")
+
+    def test_meme_texte_envoye_deux_fois(self):
+        self.trajet("EXERCICE", 100.0)
+        self.trajet("EXERCICE", 110.0)
+        self.correlateur.lire()
+        self.assertEqual(len(self.correlateur.traces), 2)
+        self.assertEqual(self.correlateur.resume()[wave_traces.SEGMENT_PRINCIPAL]['n'], 2)
+
+    def test_etape_hors_fenetre(self):
+        self.emetteur.noter(wave_traces.UID_AUTORISE, "ALERTE", t=100.0)
+        self.recepteur.noter(wave_traces.LIGNE_AFFICHEE, "ALERTE", t=100.0 + wave_traces.FENETRE_CORRELATION + 1)
+        self.correlateur.lire()
+        self.assertEqual(len(self.correlateur.traces), 2)
+        self.assertEqual(self.correlateur.latences()[wave_traces.SEGMENT_PRINCIPAL], [])
+
+    def test_lecture_au_fil_de_l_eau(self):
+        # Ligne en cours d'écriture par l'autre processus: gardée jusqu'à sa fin de ligne
+        self.emetteur.noter(wave_traces.UID_AUTORISE, "ALERTE", t=100.0)
+        with open(self.chemin, 'a', encoding='utf-8') as fichier:
+            fichier.write('{"t": 100.5, "etape": "ligne_affichee", ')
+        self.assertEqual(self.correlateur.lire(), 1)
+        with open(self.chemin, 'a', encoding='utf-8') as fichier:
+            fichier.write('"texte": "ALERTE", "source": "", "proc": "recepteur"}\n')
+        self.assertEqual(self.correlateur.lire(), 1)
+        self.assertAlmostEqual(self.correlateur.latences()[wave_traces.SEGMENT_PRINCIPAL][0], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
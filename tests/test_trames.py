@@ -0,0 +1,168 @@
+"""Trames 433MHz (wave_trames): aller-retour encodage/décodage et réparation par la parité
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_trames import SEQ_PARITE, DecodeurTrames, encoder_message
+
+
+def decoder(codes):
+    """Messages rendus par un décodeur neuf pour la suite de codes"""
+    decodeur = DecodeurTrames()
+    messages = [decodeur.pousser(code, maintenant=0.0) for code in codes]
+    return [message for message in messages if message is not None], decodeur
+
+
+def sans_paquets(codes, *sequences):
+    """Codes privés des paquets de données de ces numéros (pertes radio)"""
+    return [code for code in codes if (code >> 24) not in sequences or code >> 24 >= SEQ_PARITE]
+
+
+class TestAllerRetour(unittest.TestCase):
+
+    def test_message_simple(self):
+        messages, _ = decoder(encoder_message("EVACUATION BATIMENT A"))
+        self.assertEqual(len(messages), 1)
+        self.assertTrue(messages[0].complet)
+        self.assertEqual(messages[0].texte, "EVACUATION BATIMENT A")
+
+    def test_livre_des_le_dernier_paquet(self):
+        codes = encoder_message("ALERTE")
+        decodeur = DecodeurTrames()
+        message = None
+        for code in codes[:-1]:
+            message = decodeur.pousser(code, maintenant=0.0)
+        self.assertEqual(message.texte, "ALERTE")
+        # Le code de fin qui suit ne rend pas le message une seconde fois
+        self.assertIsNone(decodeur.pousser(codes[-1], maintenant=0.0))
+
+    def test_paquet_en_double_ecarte(self):
+        codes = encoder_message("ALERTE 42")
+        messages, decodeur = decoder(codes[:2] + codes[1:])
+        self.assertEqual([message.texte for message in messages], ["ALERTE 42"])
+        self.assertEqual(decodeur.doublons_total, 1)
+
+    def test_paquet_perdu(self):
+        messages, _ = decoder(sans_paquets(encoder_message("ALERTE INCENDIE"), 2))
+        self.assertEqual(len(messages), 1)
+        self.assertFalse(messages[0].complet)
+        self.assertEqual(messages[0].raison, 'fin')
+        self.assertEqual(messages[0].lacunes, [2])
+
+    def test_compression(self):
+        texte = "ATTENTION ALERTE EVACUATION DU BATIMENT PRINCIPAL"
+        codes = encoder_message(texte, compression=True)
+        self.assertLess(len(codes), len(encoder_message(texte)))
+        messages, decodeur = decoder(codes)
+        self.assertEqual([message.texte for message in messages], [texte])
+        self.assertTrue(messages[0].compresse)
+        self.assertEqual(decodeur.paquets_economises, len(encoder_message(texte)) - len(codes))
+
+    def test_compression_paquet_perdu(self):
+        texte = "ATTENTION ALERTE EVACUATION DU BATIMENT PRINCIPAL"
+        messages, _ = decoder(sans_paquets(encoder_message(texte, compression=True), 2))
+        self.assertFalse(messages[0].complet)
+        # Seul le début, avant le paquet manquant, est décodable
+        self.assertTrue(texte.startswith(messages[0].texte))
+        self.assertLess(len(messages[0].texte), len(texte))
+
+    def test_modele_et_sa_copie(self):
+        codes = encoder_message("EVACUATION IMMEDIATE - BATIMENT B", compression=True)
+        self.assertEqual(len(codes), 2)
+        messages, decodeur = decoder(codes)
+        self.assertEqual([message.texte for message in messages], ["EVACUATION IMMEDIATE - BATIMENT B"])
+        self.assertEqual(messages[0].modele, 1)
+        self.assertEqual(decodeur.doublons_total, 1)
+
+    def test_modele_repete_plus_tard(self):
+        code = encoder_message("EVACUATION IMMEDIATE - BATIMENT B", compression=True)[0]
+        decodeur = DecodeurTrames()
+        self.assertIsNotNone(decodeur.pousser(code, maintenant=0.0))
+        self.assertIsNone(decodeur.pousser(code, maintenant=0.5))
+        # Au-delà du délai de copie, c'est une nouvelle alerte
+        self.assertIsNotNone(decodeur.pousser(code, maintenant=5.0))
+
+    def test_modele_pendant_une_trame(self):
+        trame = encoder_message("SECOND MESSAGE")
+        modele = encoder_message("CONFINEMENT - RESTEZ A L'INTERIEUR", compression=True)[0]
+        messages, _ = decoder(trame[:2] + [modele] + trame[2:])
+        self.assertEqual([message.texte for message in messages],
+                         ["CONFINEMENT - RESTEZ A L'INTERIEUR", "SECOND MESSAGE"])
+
+    def test_modele_inconnu(self):
+        messages, decodeur = decoder([0xFD634100])
+        self.assertFalse(messages[0].complet)
+        self.assertEqual(messages[0].texte, "MODELE 99 A")
+        self.assertEqual(decodeur.modeles_inconnus, 1)
+
+
+class TestParite(unittest.TestCase):
+    TEXTE = "EVACUATION IMMEDIATE PAR LES ESCALIERS NORD"  # 15 paquets, 4 groupes de parité
+
+    def test_paquet_perdu_reconstitue(self):
+        messages, decodeur = decoder(sans_paquets(encoder_message(self.TEXTE, 4), 5))
+        self.assertEqual(len(messages), 1)
+        self.assertTrue(messages[0].complet)
+        self.assertEqual(messages[0].texte, self.TEXTE)
+        self.assertEqual(messages[0].recuperes, [5])
+        self.assertEqual(decodeur.trames_recuperees, 1)
+
+    def test_rafale_repartie_sur_les_groupes(self):
+        # Entrelacement: des paquets consécutifs appartiennent à des groupes différents
+        messages, _ = decoder(sans_paquets(encoder_message(self.TEXTE, 4), 4, 5, 6, 7))
+        self.assertTrue(messages[0].complet)
+        self.assertEqual(messages[0].texte, self.TEXTE)
+        self.assertEqual(sorted(messages[0].recuperes), [4, 5, 6, 7])
+
+    def test_deux_pertes_dans_un_groupe(self):
+        # Paquets 1 et 5 dans le même groupe (1 % 4 == 5 % 4): irrécupérable
+        messages, decodeur = decoder(sans_paquets(encoder_message(self.TEXTE, 4), 1, 5))
+        self.assertEqual(len(messages), 1)
+        self.assertFalse(messages[0].complet)
+        self.assertEqual(messages[0].lacunes, [1, 5])
+        self.assertEqual(decodeur.trames_irrecuperables, 1)
+
+    def test_parite_arrivee_avant_le_paquet(self):
+        codes = sans_paquets(encoder_message(self.TEXTE, 4), 3)
+        debut, fin = codes[:1], codes[-1:]
+        donnees = [code for code in codes[1:-1] if code >> 24 < SEQ_PARITE]
+        parites = [code for code in codes[1:-1] if code >> 24 >= SEQ_PARITE]
+        messages, _ = decoder(debut + parites + donnees + fin)
+        self.assertTrue(messages[0].complet)
+        self.assertEqual(messages[0].texte, self.TEXTE)
+
+
+class TestInterruptions(unittest.TestCase):
+
+    def test_nouveau_debut_interrompt(self):
+        premier = encoder_message("PREMIER MESSAGE")
+        second = encoder_message("SECOND")
+        messages, _ = decoder(premier[:3] + second)
+        self.assertEqual([(message.complet, message.raison) for message in messages],
+                         [(False, 'interrompu'), (True, 'complet')])
+        self.assertEqual(messages[1].texte, "SECOND")
+
+    def test_paquet_hors_trame(self):
+        codes = encoder_message("ALERTE")
+        messages, decodeur = decoder(codes[1:2])
+        self.assertEqual(messages, [])
+        self.assertEqual(decodeur.hors_sequence, 1)
+
+    def test_timeout(self):
+        codes = encoder_message("ALERTE TIMEOUT")
+        decodeur = DecodeurTrames(timeout=10.0)
+        for code in codes[:3]:
+            self.assertIsNone(decodeur.pousser(code, maintenant=0.0))
+        message = decodeur.verifier_timeout(maintenant=11.0)
+        self.assertFalse(message.complet)
+        self.assertEqual(message.raison, 'timeout')
+        self.assertEqual(decodeur.timeouts, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Fenêtre visible du journal virtualisé (wave_vue_journal), sans affichage
+
+Les widgets Tk sont remplacés par des objets qui mémorisent leur configuration.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wave_journal import MagasinMessages
+from wave_vue_journal import JournalVirtuel
+
+T0 = 1_700_000_000.0
+
+
+class WidgetFactice:
+    def __init__(self):
+        self.options = {}
+        self.configurations = 0
+
+    def configure(self, **options):
+        self.options.update(options)
+        self.configurations += 1
+
+    def set(self, debut, fin):
+        self.options['position'] = (debut, fin)
+
+
+def journal_factice(magasin, nb_visibles=3):
+    journal = JournalVirtuel.__new__(JournalVirtuel)
+    journal.magasin = magasin
+    journal.colors = {'card': 'white'}
+    journal.premier = 0
+    journal.nb_visibles = nb_visibles
+    journal.selection_id = None
+    journal.lignes = [tuple(WidgetFactice() for _ in range(5)) for _ in range(nb_visibles)]
+    journal.contenu = [None] * nb_visibles
+    journal.scrollbar = WidgetFactice()
+    journal.evenements = []
+    journal.event_generate = journal.evenements.append
+    return journal
+
+
+def textes_affiches(journal):
+    return [ligne[-1].options.get('text', '') for ligne in journal.lignes]
+
+
+def remplir(magasin, nb):
+    for i in range(nb):
+        magasin.ajouter(f"M{i}", "12:00:00", T0)
+
+
+class TestFenetre(unittest.TestCase):
+
+    def test_suit_la_fin(self):
+        magasin = MagasinMessages(capacite=100)
+        journal = journal_factice(magasin)
+        remplir(magasin, 5)
+        journal.nouvelle_entree(suivre=True)
+        self.assertEqual(textes_affiches(journal), ["M2", "M3", "M4"])
+        self.assertTrue(journal.a_la_fin())
+
+    def test_reste_en_place_si_pas_en_bas(self):
+        magasin = MagasinMessages(capacite=100)
+        journal = journal_factice(magasin)
+        remplir(magasin, 5)
+        journal.yview('moveto', 0.0)
+        self.assertFalse(journal.a_la_fin())
+        remplir(magasin, 1)
+        journal.nouvelle_entree(suivre=False)
+        self.assertEqual(textes_affiches(journal), ["M0", "M1", "M2"])
+
+    def test_eviction_garde_les_memes_entrees(self):
+        magasin = MagasinMessages(capacite=5)
+        journal = journal_factice(magasin)
+        remplir(magasin, 5)
+        journal.yview('scroll', 1, 'units')
+        self.assertEqual(textes_affiches(journal), ["M1", "M2", "M3"])
+        evincees = 0
+        for texte in ("M5", "M6"):
+            evincees += magasin.ajouter(texte, "12:00:01", T0 + 1)[1] is not None
+        # Deux évictions rendues en une fois
+        journal.nouvelle_entree(suivre=False, evincees=evincees)
+        self.assertEqual(textes_affiches(journal), ["M2", "M3", "M4"])
+
+    def test_defilement_borne(self):
+        magasin = MagasinMessages(capacite=100)
+        journal = journal_factice(magasin)
+        remplir(magasin, 5)
+        journal.yview('scroll', 10, 'pages')
+        self.assertEqual(journal.premier, 2)
+        journal.yview('scroll', -10, 'pages')
+        self.assertEqual(journal.premier, 0)
+
+    def test_lignes_inchangees_non_reconfigurees(self):
+        magasin = MagasinMessages(capacite=100)
+        journal = journal_factice(magasin)
+        remplir(magasin, 3)
+        journal.rafraichir()
+        avant = journal.lignes[0][-1].configurations
+        journal.rafraichir()
+        self.assertEqual(journal.lignes[0][-1].configurations, avant)
+
+    def test_selection_et_vidage(self):
+        magasin = MagasinMessages(capacite=100)
+        journal = journal_factice(magasin)
+        remplir(magasin, 2)
+        journal.rafraichir()
+        journal.on_click(1)
+        self.assertEqual(journal.selection(), (magasin[1].id,))
+        self.assertEqual(journal.evenements, ['<<JournalSelect>>'])
+        # Clic sur une ligne vide: sélection inchangée
+        journal.on_click(2)
+        self.assertEqual(len(journal.evenements), 1)
+        magasin.vider()
+        journal.vider()
+        self.assertEqual(journal.selection(), ())
+        self.assertEqual(textes_affiches(journal), ['', '', ''])
+
+
+if __name__ == '__main__':
+    unittest.main()
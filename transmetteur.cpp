@@ -29,6 +29,26 @@ String customMessage = "HELLO"; // Message par défaut
 String serialBuffer = "";
 bool messageUpdated = false;
 
+// ===== CHARGE UTILE RADIO =====
+// Octets émis: le texte de customMessage, ou sa forme compressée reçue par MSGZ: (wave_compression.py)
+byte radioPayload[64];
+byte radioLength = 0;
+bool radioPacked = false;
+// Code modèle 0xFDIIAABB reçu par TPL: (wave_modeles.py): émis seul à la place de la trame
+unsigned long radioTemplate = 0;
+
+// ===== CORRECTION D'ERREURS (wave_trames.py) =====
+// Un paquet de parité (0x80 + groupe) pour fecGroup paquets de données, groupes entrelacés
+byte fecGroup = 0; // 0: sans parité
+
+// ===== MODE BINAIRE (wave_binaire.py) =====
+// Trame: A5 5A | type | longueur | données | CRC-16/CCITT (big-endian)
+bool binaryMode = false;
+const byte FRAME_CARD_AUTHORIZED = 0x10;
+const byte FRAME_CARD_REFUSED = 0x11;
+const byte FRAME_MESSAGE_SET = 0x12;
+const byte FRAME_TRANSMISSION_OK = 0x13;
+
 void setup() {
   Serial.begin(115200);
   Serial.println("\n=== RFID + 433MHz Transmitter avec Messages Personnalisés ===");
@@ -64,6 +84,7 @@ void setup() {
   mySwitch.setProtocol(1);
   mySwitch.setRepeatTransmit(3);
   Serial.println("DEBUG: Émetteur 433MHz configuré");
+  setPayload(customMessage);
 
   Serial.println("DEBUG: Système prêt !");
   Serial.print("INFO: Message actuel: '");
@@ -81,31 +102,43 @@ void loop() {
     return;
   }
 
-  Serial.println("DEBUG: Carte détectée !");
-  Serial.print("UID scanné : ");
-  for (byte i = 0; i < mfrc522.uid.size; i++) {
-    Serial.print(mfrc522.uid.uidByte[i] < 0x10 ? " 0" : " ");
-    Serial.print(mfrc522.uid.uidByte[i], HEX);
+  if (!binaryMode) {
+    Serial.println("DEBUG: Carte détectée !");
+    Serial.print("UID scanné : ");
+    for (byte i = 0; i < mfrc522.uid.size; i++) {
+      Serial.print(mfrc522.uid.uidByte[i] < 0x10 ? " 0" : " ");
+      Serial.print(mfrc522.uid.uidByte[i], HEX);
+    }
+    Serial.println();
   }
-  Serial.println();
 
   bool isAuthorized = checkUID();
 
   if (isAuthorized) {
-    Serial.print("DEBUG: UID AUTORISÉ - Envoi de '");
-    Serial.print(customMessage);
-    Serial.println("'");
+    if (binaryMode) {
+      sendFrame(FRAME_CARD_AUTHORIZED, mfrc522.uid.uidByte, mfrc522.uid.size);
+    } else {
+      Serial.print("DEBUG: UID AUTORISÉ - Envoi de '");
+      Serial.print(customMessage);
+      Serial.println("'");
+    }
 
     setLED(true);
     sendCustomMessage(customMessage);
   } else {
-    Serial.println("DEBUG: UID NON AUTORISÉ - Aucune transmission");
+    if (binaryMode) {
+      sendFrame(FRAME_CARD_REFUSED, mfrc522.uid.uidByte, mfrc522.uid.size);
+    } else {
+      Serial.println("DEBUG: UID NON AUTORISÉ - Aucune transmission");
+    }
     setLED(false);
   }
 
   mfrc522.PICC_HaltA();
   mfrc522.PCD_StopCrypto1();
-  Serial.println("DEBUG: Communication RFID fermée\n");
+  if (!binaryMode) {
+    Serial.println("DEBUG: Communication RFID fermée\n");
+  }
 
   delay(2000);
   setLEDOff();
@@ -125,13 +158,17 @@ void setLEDOff() {
 
 // ===== Vérification UIDs =====
 bool checkUID() {
-  Serial.println("DEBUG: Vérification de l'UID...");
+  if (!binaryMode) {
+    Serial.println("DEBUG: Vérification de l'UID...");
+  }
 
   if (mfrc522.uid.size != authorizedUIDSize) {
-    Serial.print("DEBUG: Taille UID incorrecte. Reçu: ");
-    Serial.print(mfrc522.uid.size);
-    Serial.print(", Attendu: ");
-    Serial.println(authorizedUIDSize);
+    if (!binaryMode) {
+      Serial.print("DEBUG: Taille UID incorrecte. Reçu: ");
+      Serial.print(mfrc522.uid.size);
+      Serial.print(", Attendu: ");
+      Serial.println(authorizedUIDSize);
+    }
     return false;
   }
 
@@ -144,13 +181,17 @@ bool checkUID() {
       }
     }
     if (match) {
-      Serial.print("DEBUG: UID correspond à la carte ");
-      Serial.println(c + 1);
+      if (!binaryMode) {
+        Serial.print("DEBUG: UID correspond à la carte ");
+        Serial.println(c + 1);
+      }
       return true;
     }
   }
 
-  Serial.println("DEBUG: Aucun UID correspondant trouvé");
+  if (!binaryMode) {
+    Serial.println("DEBUG: Aucun UID correspondant trouvé");
+  }
   return false;
 }
 
@@ -159,7 +200,23 @@ void checkSerialCommands() {
   while (Serial.available() > 0) {
     char c = Serial.read();
     if (c == '\n') {
-      if (serialBuffer.startsWith("MSG:")) {
+      serialBuffer.trim();
+      if (serialBuffer == "binon") {
+        // Réponse texte d'abord: le PC bascule son décodeur en la lisant
+        Serial.print("BIN:OK ");
+        Serial.println(1);
+        binaryMode = true;
+      } else if (serialBuffer == "binoff") {
+        binaryMode = false;
+        Serial.println("BIN:OFF");
+      } else if (serialBuffer.startsWith("FEC:")) {
+        fecGroup = constrain(serialBuffer.substring(4).toInt(), 0, 16);
+        if (!binaryMode) {
+          Serial.print("INFO: Parité: 1 paquet pour ");
+          Serial.print(fecGroup);
+          Serial.println(" paquets de données");
+        }
+      } else if (serialBuffer.startsWith("MSG:")) {
         String newMessage = serialBuffer.substring(4);
         if (newMessage.length() > 0) {
           if (newMessage.length() > 50) {
@@ -167,11 +224,43 @@ void checkSerialCommands() {
             Serial.println("INFO: Message limité à 50 caractères");
           }
           customMessage = newMessage;
+          setPayload(customMessage);
           messageUpdated = true;
-          Serial.print("INFO: Nouveau message défini: '");
-          Serial.print(customMessage);
-          Serial.println("'");
-          Serial.println("INFO: Scannez une carte autorisée pour l'envoyer");
+          if (binaryMode) {
+            sendTextFrame(FRAME_MESSAGE_SET, customMessage);
+          } else {
+            Serial.print("INFO: Nouveau message défini: '");
+            Serial.print(customMessage);
+            Serial.println("'");
+            Serial.println("INFO: Scannez une carte autorisée pour l'envoyer");
+          }
+        }
+      } else if (serialBuffer.startsWith("TPL:")) {
+        // Message défini juste avant reconnu comme modèle: un seul code radio
+        unsigned long code = strtoul(serialBuffer.substring(4).c_str(), NULL, 16);
+        if ((code >> 24) == 0xFD) {
+          radioTemplate = code;
+          if (!binaryMode) {
+            Serial.print("INFO: Message modèle: code 0x");
+            Serial.println(radioTemplate, HEX);
+          }
+        }
+      } else if (serialBuffer.startsWith("MSGZ:")) {
+        // Forme compressée du message défini juste avant (hexadécimal), émise à sa place
+        String hex = serialBuffer.substring(5);
+        int len = hex.length() / 2;
+        if (len > 0 && len <= (int)sizeof(radioPayload)) {
+          for (int i = 0; i < len; i++) {
+            radioPayload[i] = (byte)strtoul(hex.substring(i * 2, i * 2 + 2).c_str(), NULL, 16);
+          }
+          radioLength = len;
+          radioPacked = true;
+          if (!binaryMode) {
+            Serial.print("INFO: Message compressé: ");
+            Serial.print(radioLength);
+            Serial.print(" octets au lieu de ");
+            Serial.println(customMessage.length());
+          }
         }
       }
       serialBuffer = "";
@@ -183,46 +272,152 @@ void checkSerialCommands() {
 
 // ===== Transmission message =====
 void sendCustomMessage(String message) {
-  Serial.print("DEBUG: Envoi du message personnalisé: '");
-  Serial.print(message);
-  Serial.print("' (");
-  Serial.print(message.length());
-  Serial.println(" caractères)");
-
-  unsigned long startCode = 0xFF000000L | (message.length() & 0xFF);
-  Serial.print("DEBUG: Envoi code de début: 0x");
-  Serial.println(startCode, HEX);
+  if (!binaryMode) {
+    Serial.print("DEBUG: Envoi du message personnalisé: '");
+    Serial.print(message);
+    Serial.print("' (");
+    Serial.print(message.length());
+    Serial.println(" caractères)");
+    if (radioPacked) {
+      Serial.print("DEBUG: Charge utile compressée: ");
+      Serial.print(radioLength);
+      Serial.println(" octets");
+    }
+  }
+
+  if (radioTemplate) {
+    sendTemplateCode();
+    return;
+  }
+
+  byte flags = fecGroup | (radioPacked ? 0x80 : 0x00);
+  unsigned long startCode = 0xFF000000L | ((unsigned long)flags << 16) | radioLength;
+  if (!binaryMode) {
+    Serial.print("DEBUG: Envoi code de début: 0x");
+    Serial.println(startCode, HEX);
+  }
   mySwitch.send(startCode, 32);
   delay(100);
 
-  int packets = (message.length() + 2) / 3;
+  int packets = (radioLength + 2) / 3;
 
   for (int p = 0; p < packets; p++) {
-    unsigned long code = ((unsigned long)(p & 0xFF)) << 24;
+    unsigned long code = ((unsigned long)(p & 0xFF)) << 24 | packetData(p);
+
+    if (!binaryMode) {
+      Serial.print("DEBUG: Paquet ");
+      Serial.print(p + 1);
+      Serial.print("/");
+      Serial.print(packets);
+      Serial.print(" - Code: 0x");
+      Serial.println(code, HEX);
+    }
 
-    for (int i = 0; i < 3; i++) {
-      int charIndex = p * 3 + i;
-      if (charIndex < message.length()) {
-        byte charByte = (byte)message[charIndex];
-        code |= ((unsigned long)charByte) << (16 - (i * 8));
-      }
+    mySwitch.send(code, 32);
+    delay(50);
+  }
+
+  // Parités après les données: groupe g = XOR des paquets g, g + groups, g + 2 * groups...
+  int groups = fecGroup ? (packets + fecGroup - 1) / fecGroup : 0;
+  for (int g = 0; g < groups; g++) {
+    unsigned long code = ((unsigned long)(0x80 + g)) << 24;
+    for (int p = g; p < packets; p += groups) {
+      code ^= packetData(p);
     }
 
-    Serial.print("DEBUG: Paquet ");
-    Serial.print(p + 1);
-    Serial.print("/");
-    Serial.print(packets);
-    Serial.print(" - Code: 0x");
-    Serial.println(code, HEX);
+    if (!binaryMode) {
+      Serial.print("DEBUG: Parité ");
+      Serial.print(g + 1);
+      Serial.print("/");
+      Serial.print(groups);
+      Serial.print(" - Code: 0x");
+      Serial.println(code, HEX);
+    }
 
     mySwitch.send(code, 32);
     delay(50);
   }
 
   unsigned long endCode = 0xFE000000L;
-  Serial.print("DEBUG: Envoi code de fin: 0x");
-  Serial.println(endCode, HEX);
+  if (!binaryMode) {
+    Serial.print("DEBUG: Envoi code de fin: 0x");
+    Serial.println(endCode, HEX);
+  }
   mySwitch.send(endCode, 32);
 
-  Serial.println("DEBUG: Transmission terminée avec succès !");
+  if (binaryMode) {
+    byte codes = packets + groups + 2;
+    sendFrame(FRAME_TRANSMISSION_OK, &codes, 1);
+  } else {
+    Serial.println("DEBUG: Transmission terminée avec succès !");
+  }
+}
+
+// Message modèle: le code seul, deux fois (le récepteur écarte la copie: même code modèle en moins d'1 s)
+void sendTemplateCode() {
+  for (byte copy = 0; copy < 2; copy++) {
+    if (!binaryMode) {
+      Serial.print("DEBUG: Code modèle ");
+      Serial.print(copy + 1);
+      Serial.print("/2 - Code: 0x");
+      Serial.println(radioTemplate, HEX);
+    }
+    mySwitch.send(radioTemplate, 32);
+    if (copy == 0) delay(50);
+  }
+
+  if (binaryMode) {
+    byte codes = 2;
+    sendFrame(FRAME_TRANSMISSION_OK, &codes, 1);
+  } else {
+    Serial.println("DEBUG: Transmission terminée avec succès !");
+  }
+}
+
+// Charge utile radio = texte brut du message (annule une forme compressée ou un modèle précédent)
+void setPayload(const String& message) {
+  radioLength = min((unsigned int)message.length(), (unsigned int)sizeof(radioPayload));
+  memcpy(radioPayload, message.c_str(), radioLength);
+  radioPacked = false;
+  radioTemplate = 0;
+}
+
+// 3 octets du paquet p (0 au-delà de la fin de la charge utile)
+unsigned long packetData(int p) {
+  unsigned long data = 0;
+  for (int i = 0; i < 3; i++) {
+    int index = p * 3 + i;
+    if (index < radioLength) {
+      data |= ((unsigned long)radioPayload[index]) << (16 - (i * 8));
+    }
+  }
+  return data;
+}
+
+// ===== Trames binaires =====
+uint16_t crc16(const byte* data, size_t len, uint16_t crc) {
+  for (size_t i = 0; i < len; i++) {
+    crc ^= ((uint16_t)data[i]) << 8;
+    for (byte b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void sendFrame(byte type, const byte* payload, byte len) {
+  byte header[2] = {type, len};
+  uint16_t crc = crc16(header, 2, 0xFFFF);
+  crc = crc16(payload, len, crc);
+  Serial.write(0xA5);
+  Serial.write(0x5A);
+  Serial.write(header, 2);
+  Serial.write(payload, len);
+  Serial.write((byte)(crc >> 8));
+  Serial.write((byte)(crc & 0xFF));
+}
+
+void sendTextFrame(byte type, const String& text) {
+  byte len = text.length() > 64 ? 64 : text.length();
+  sendFrame(type, (const byte*)text.c_str(), len);
 }
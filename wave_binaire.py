@@ -0,0 +1,159 @@
+"""Mode série binaire compact (optionnel) entre les interfaces et les ESP8266
+
+Négociation: le PC envoie la commande texte `binon`; un firmware compatible
+répond par la ligne `BIN:OK <version>` puis remplace ses lignes bavardes par
+des trames typées. `binoff` rétablit le mode texte (réponse `BIN:OFF`). Un
+firmware ancien ignore la commande et le flux reste en texte.
+
+Trame: A5 5A | type (1) | longueur (1) | données | CRC-16/CCITT (2, big-endian)
+Le CRC couvre type, longueur et données. Les lignes texte restantes (aide,
+état...) peuvent s'intercaler entre les trames.
+"""
+
+SYNC = b"\xA5\x5A"
+VERSION = 1
+TAILLE_MAX_DONNEES = 64
+TAILLE_ENTETE = 4  # sync (2) + type + longueur
+TAILLE_CRC = 2
+
+COMMANDE_ACTIVER = b"binon\n"
+COMMANDE_DESACTIVER = b"binoff\n"
+REPONSE_ACTIVE = "BIN:OK"
+REPONSE_DESACTIVE = "BIN:OFF"
+
+# Types d'évènements (firmware récepteur)
+TYPE_CODE = 0x01            # Code radio 32 bits accepté (équivalent ligne RX:)
+TYPE_MESSAGE = 0x02         # Message assemblé par le firmware (texte)
+TYPE_ALERTE_ARRETEE = 0x03  # Alerte arrêtée (texte du dernier message)
+TYPE_SON = 0x04             # État du son (1 octet: 0/1)
+TYPE_HORS_SEQUENCE = 0x05   # Code hors séquence (32 bits)
+# Types d'évènements (firmware émetteur)
+TYPE_CARTE_AUTORISEE = 0x10  # UID de la carte
+TYPE_CARTE_REFUSEE = 0x11    # UID de la carte
+TYPE_MESSAGE_DEFINI = 0x12   # Nouveau message en attente (texte)
+TYPE_TRANSMISSION_OK = 0x13  # Nombre de codes émis (1 octet)
+
+
+def crc16_ccitt(data, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE (polynôme 0x1021), identique à crc16() des firmwares"""
+    for octet in data:
+        crc ^= octet << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+    return crc
+
+
+def encoder_trame(type_evt, donnees=b""):
+    """Construit une trame binaire complète"""
+    if len(donnees) > TAILLE_MAX_DONNEES:
+        raise ValueError(f"Données trop longues ({len(donnees)} > {TAILLE_MAX_DONNEES})")
+    corps = bytes((type_evt, len(donnees))) + bytes(donnees)
+    return SYNC + corps + crc16_ccitt(corps).to_bytes(2, 'big')
+
+
+class Evenement:
+    """Évènement typé décodé d'une trame binaire"""
+    __slots__ = ('type', 'donnees')
+
+    def __init__(self, type_evt, donnees):
+        self.type = type_evt
+        self.donnees = donnees
+
+    @property
+    def code(self):
+        return int.from_bytes(self.donnees[:4], 'big')
+
+    @property
+    def texte(self):
+        return self.donnees.decode('utf-8', errors='ignore')
+
+    @property
+    def actif(self):
+        return bool(self.donnees and self.donnees[0])
+
+    def __repr__(self):
+        return f"Evenement(0x{self.type:02X}, {self.donnees!r})"
+
+
+class LecteurFlux:
+    """Découpe le flux série en lignes texte (str) et, après négociation, en Evenement
+
+    pousser() accepte des morceaux de taille quelconque et retourne la liste des
+    éléments complets dans l'ordre d'arrivée.
+    """
+
+    def __init__(self):
+        self.binaire = False
+        self.tampon = bytearray()
+        self.erreurs_crc = 0
+        self.trames = 0
+
+    def pousser(self, data):
+        self.tampon += data
+        elements = []
+        if self.binaire:
+            self._extraire_mixte(elements)
+        else:
+            self._extraire_lignes(elements)
+        return elements
+
+    def _ligne(self, brut, elements):
+        line = bytes(brut).decode('utf-8', errors='ignore').strip()
+        if not line:
+            return
+        elements.append(line)
+        if line.startswith(REPONSE_ACTIVE):
+            self.binaire = True
+        elif line.startswith(REPONSE_DESACTIVE):
+            self.binaire = False
+
+    def _extraire_lignes(self, elements):
+        while not self.binaire:
+            fin = self.tampon.find(b"\n")
+            if fin < 0:
+                return
+            brut = self.tampon[:fin]
+            del self.tampon[:fin + 1]
+            self._ligne(brut, elements)
+        # La réponse BIN:OK vient d'arriver: la suite du tampon est mixte
+        self._extraire_mixte(elements)
+
+    def _extraire_mixte(self, elements):
+        tampon = self.tampon
+        depart = 0  # Début de la recherche de synchro (après une fausse synchro)
+        while self.binaire:
+            sync = tampon.find(SYNC, depart)
+            fin = tampon.find(b"\n", depart)
+            if fin >= 0 and (sync < 0 or fin < sync):
+                # Ligne texte complète avant toute trame
+                brut = tampon[:fin]
+                del tampon[:fin + 1]
+                depart = 0
+                self._ligne(brut, elements)
+                continue
+            if sync < 0 or len(tampon) < sync + TAILLE_ENTETE:
+                return
+            longueur = tampon[sync + 3]
+            total = TAILLE_ENTETE + longueur + TAILLE_CRC
+            if longueur > TAILLE_MAX_DONNEES:
+                # Fausse synchro: ces octets font partie du texte
+                self.erreurs_crc += 1
+                depart = sync + 1
+                continue
+            if len(tampon) < sync + total:
+                return
+            corps = bytes(tampon[sync + 2:sync + TAILLE_ENTETE + longueur])
+            crc = int.from_bytes(tampon[sync + total - 2:sync + total], 'big')
+            if crc16_ccitt(corps) != crc:
+                self.erreurs_crc += 1
+                depart = sync + 1
+                continue
+            if sync:
+                # Texte sans fin de ligne juste avant la trame
+                self._ligne(tampon[:sync], elements)
+            del tampon[:sync + total]
+            depart = 0
+            self.trames += 1
+            elements.append(Evenement(corps[0], corps[2:]))
+        if not self.binaire:
+            self._extraire_lignes(elements)
@@ -0,0 +1,593 @@
+"""Client émetteur sans interface: diffusion d'une alerte et suivi des acquittements
+
+L'interface Tk (wave_connect_gov.py) n'en est qu'une vue. Le client peut aussi
+servir dans un script, par exemple pour un envoi planifié:
+
+    python wave_client_emetteur.py "COM4, COM5" "EVACUATION BATIMENT A" --attente 120
+
+Évènements (abonner(nom, fonction)):
+    'acquittement'  (emetteur, etape, delai)     étape acquittée par une carte
+    'carte_validee' (emetteur, valides, attendus) carte RFID validée sur une carte du groupe
+    'succes'        ()                           toutes les cartes ont validé
+    'refus'         (emetteur,)                  carte RFID refusée
+    'compression'   (octets, octets_emis,        message compressé: octets et codes
+                     codes, codes_emis)          radio avant / après compression
+    'file'          ()                           file d'envoi ou message en cours modifié
+    'connexion'     (erreurs,)                   ouverture des ports terminée: [(port, erreur)]
+    'perte'         (emetteur, erreur)           port qui ne répond plus (relancé automatiquement)
+    'reprise'       (emetteur, duree)            port relu après `duree` secondes de panne
+    'log'           (texte,)                     trace lisible de l'activité
+"""
+import queue
+import threading
+import time
+from concurrent import futures
+
+import wave_binaire
+import wave_modeles
+import wave_traces
+import wave_trames
+from wave_diffusion import (Emetteur, GroupeEmetteurs, formater_delai,
+                            MESSAGE_DEFINI, CARTE_AUTORISEE, CARTE_REFUSEE, TRANSMISSION_OK)
+from wave_file_envoi import DELAI_ACQUITTEMENT, NOMS_PRIORITES, ROUTINE, FileEnvoi
+from wave_metriques import (BORNES_DELAI, BORNES_LOT, PORT_EMETTEUR, Compteur, Registre,
+                            ServeurMetriques, metriques_cartes)
+from wave_multiport import LecteurMultiPort, analyser_ports, fermer_cartes, ouvrir_cartes
+from wave_serie import TIMEOUT_ECRITURE, boucle_serie
+
+TAILLE_MAX_MESSAGE = 50  # Limite du firmware transmetteur
+
+
+class ClientEmetteur:
+    """Groupe de cartes émettrices recevant le même message
+
+    `reveil` a le même rôle que pour ClientRecepteur. Sans lui, les
+    acquittements sont traités (et les rappels appelés) dans un thread de
+    traitement propre au client: ils peuvent écrire sur les cartes (message
+    suivant de la file), ce qui ne peut pas attendre depuis la boucle série.
+    """
+
+    def __init__(self, traceur=None, reveil=None):
+        self.traceur = traceur
+        self.reveil = reveil
+        self.rappels = {}
+
+        self.boucle = boucle_serie()
+        self.groupe = None
+        self.lecteur_ports = None
+        self.source = None  # Émetteur dont les éléments sont en cours de traitement
+        self.connecte = False
+        self.binaire = False  # Mode binaire renégocié à chaque reprise d'une carte
+        self.message_alerte = ""
+        self.groupe_fec = 0  # Paquets de données par parité radio (0: sans correction)
+        self.compression = False  # Message compressé ou code modèle pour la radio
+
+        # Fin de la dernière diffusion (succès ou refus), pour attendre()
+        self.termine = threading.Event()
+        self.succes = False
+
+        # File d'envoi par priorité; en_cours: alerte établie sur les cartes
+        self.file_envoi = FileEnvoi()
+        self.en_cours = None
+        self.verrou = threading.RLock()  # File partagée entre la boucle série et l'appelant
+
+        # File unique entre la boucle série et le thread de traitement: (fonction, arguments)
+        self.file = queue.SimpleQueue()
+
+        # Métriques /metrics (wave_metriques), comptées dans le thread de traitement
+        self.metriques = Registre()
+        self.lignes_lues = self.metriques.compteur("wave_lignes_total", "Lignes lues, par carte", ("carte",))
+        self.evenements_lus = self.metriques.compteur(
+            "wave_evenements_binaires_total", "Trames du mode binaire lues, par carte et par type (wave_binaire.TYPE_*)",
+            ("carte", "type"))
+        self.duree_lot = self.metriques.histogramme(
+            "wave_traitement_lot_secondes", "Traitement d'un lot d'une carte, handlers compris", BORNES_LOT)
+        self.msg_envoyes = self.metriques.compteur(
+            "wave_msg_envoyes_total", "Commandes MSG: écrites sur la carte (renvois compris)", ("carte",))
+        self.renvois = self.metriques.compteur("wave_renvois_total", "Renvois d'une alerte non acquittée")
+        self.envois_impossibles = self.metriques.compteur(
+            "wave_envois_impossibles_total", "Alertes qu'aucune carte n'a pu recevoir")
+        self.autorisations = self.metriques.compteur(
+            "wave_autorisations_total", "Cartes RFID autorisées (transmission validée)", ("carte",))
+        self.refus = self.metriques.compteur("wave_refus_total", "Cartes RFID refusées", ("carte",))
+        self.delais = self.metriques.histogramme(
+            "wave_delai_acquittement_secondes", "Délai entre l'envoi de MSG: et chaque acquittement de la carte",
+            BORNES_DELAI, ("etape",))
+        self.metriques.collecter(self.collecter_metriques)
+        self.serveur_metriques = None
+
+        if reveil is None:
+            threading.Thread(target=self._traiter_en_continu, daemon=True, name='traitement-emetteur').start()
+
+        # Étapes de l'émetteur pour la mesure de latence de bout en bout (voir wave_traces)
+        self.etapes_tracees = {
+            CARTE_AUTORISEE: wave_traces.UID_AUTORISE,
+            TRANSMISSION_OK: wave_traces.TRANSMISSION_OK,
+        }
+        self.event_handlers = {
+            wave_binaire.TYPE_CARTE_AUTORISEE: self.handle_evt_carte_autorisee,
+            wave_binaire.TYPE_CARTE_REFUSEE: self.handle_evt_carte_refusee,
+            wave_binaire.TYPE_MESSAGE_DEFINI: self.handle_evt_message_defini,
+            wave_binaire.TYPE_TRANSMISSION_OK: self.handle_evt_transmission_ok,
+        }
+
+    # ----- Rappels -----
+
+    def abonner(self, evenement, fonction):
+        self.rappels.setdefault(evenement, []).append(fonction)
+
+    def emettre(self, evenement, *args):
+        for fonction in self.rappels.get(evenement, ()):
+            fonction(*args)
+
+    def log(self, texte):
+        self.emettre('log', texte)
+
+    # ----- Connexion -----
+
+    def connecter(self, saisie, binaire=False, baudrate=11550):
+        """Ouvre les ports de `saisie` ('COM4' ou 'Hall=COM4, Cour=COM5') et attend le résultat
+
+        Retourne la liste des erreurs (port, message); les ports ouverts forment
+        le groupe même si d'autres ont échoué. Le thread Tk utilise
+        demarrer_connexion(), qui ne bloque pas.
+        """
+        self.binaire = binaire
+        emetteurs, erreurs = self.boucle.executer(self.ouvrir_ports(saisie, binaire, baudrate))
+        self.installer(emetteurs, erreurs)
+        return erreurs
+
+    def demarrer_connexion(self, saisie, binaire=False, baudrate=11550):
+        """Ouvre les ports en tâche de fond; 'connexion' est émis à la fin (via la file)
+
+        Retourne un concurrent.futures.Future: cancel() abandonne l'ouverture
+        et referme les ports déjà ouverts.
+        """
+        self.binaire = binaire
+        ouverture = self.boucle.soumettre(self.ouvrir_ports(saisie, binaire, baudrate), liberer=fermer_cartes)
+        ouverture.add_done_callback(self._ouverture_terminee)
+        return ouverture
+
+    def _ouverture_terminee(self, ouverture):
+        if ouverture.cancelled():
+            return
+        try:
+            emetteurs, erreurs = ouverture.result()
+        except Exception as e:
+            emetteurs, erreurs = [], [("", str(e))]
+        self.transmettre(self.installer, emetteurs, erreurs)
+
+    async def ouvrir_ports(self, saisie, binaire=False, baudrate=11550):
+        """Coroutine (boucle série): ([Emetteur], [(port, erreur)])"""
+        return await ouvrir_cartes(Emetteur, analyser_ports(saisie), baudrate,
+                                   initialisation=wave_binaire.COMMANDE_ACTIVER if binaire else None)
+
+    def installer(self, emetteurs, erreurs):
+        """Forme le groupe des émetteurs ouverts (thread de traitement) puis émet 'connexion'"""
+        if emetteurs:
+            self.groupe = GroupeEmetteurs(emetteurs, self.boucle)
+            self.connecte = True
+            self.lecteur_ports = LecteurMultiPort(
+                emetteurs, self.deposer, self.signaler_perte, self.boucle, self.signaler_reprise,
+                wave_binaire.COMMANDE_ACTIVER if self.binaire else None)
+            self.lecteur_ports.demarrer()
+        self.emettre('connexion', erreurs)
+
+    def deconnecter(self):
+        """Arrête la lecture; retourne un Future terminé une fois les ports fermés (ou None)"""
+        arret = None
+        if self.lecteur_ports is not None:
+            arret = self.lecteur_ports.arreter()
+            self.lecteur_ports = None
+        self.connecte = False
+        return arret
+
+    def tester(self):
+        """PING vers chaque carte; IOError si aucune n'est joignable"""
+        if not self.groupe.diffuser(b"PING\n"):
+            raise IOError("aucun émetteur joignable")
+
+    def etablir_message(self, message):
+        """Diffuse le message à toutes les cartes; il part au passage d'une carte RFID autorisée
+
+        ValueError si le message est vide ou trop long, IOError si aucune carte n'est joignable.
+        Remplace le message en attente sur les cartes: voir mettre_en_file() pour passer par la file.
+        """
+        message = valider_message(message)
+        if not self.connecte:
+            raise IOError("non connecté")
+
+        self.termine.clear()
+        self.succes = False
+        # Envoie le message à toutes les cartes ESP8266 du groupe en parallèle
+        commandes, donnees, compresse, modele = self.preparer_commandes(message)
+        if not self.groupe.diffuser(commandes.encode()):
+            raise IOError("aucun émetteur joignable")
+        if compresse:
+            self.signaler_compression(message, donnees, modele)
+        for emetteur in self.groupe.emetteurs:
+            if emetteur.envoye_a is not None:
+                self.msg_envoyes.inc(emetteur.nom)
+                self.noter(wave_traces.MSG_ENVOYE, message, emetteur.nom)
+        self.message_alerte = message
+
+    def preparer_commandes(self, message):
+        """(commandes, charge utile, compressée, modèle reconnu) pour établir `message`
+
+        MSG: est précédé du réglage de parité et suivi du code modèle ou de la
+        forme compressée (ignorés par un firmware plus ancien, qui émet le texte brut).
+        """
+        commandes = f"FEC:{self.groupe_fec}\nMSG:{message}\n"
+        modele = wave_modeles.reconnaitre(message) if self.compression else None
+        if modele is not None:
+            donnees, compresse = wave_modeles.encoder_modele(*modele).to_bytes(4, 'big')[1:], True
+            commandes += f"TPL:{wave_modeles.encoder_modele(*modele):08X}\n"
+        else:
+            donnees, compresse = wave_trames.charge_utile(message, self.compression)
+            if compresse:
+                commandes += f"MSGZ:{donnees.hex().upper()}\n"
+        return commandes, donnees, compresse, modele
+
+    def signaler_compression(self, message, donnees, modele=None):
+        """Octets et codes radio économisés par la compression du message ou son modèle"""
+        octets = len(message.encode('ascii', errors='replace'))
+        codes = len(wave_trames.encoder_message(message, self.groupe_fec))
+        codes_emis = len(wave_trames.encoder_message(message, self.groupe_fec, True))
+        if modele is not None:
+            self.log(f"📋 Modèle {modele[0].numero} ({modele[0].nom}): "
+                     f"{codes} -> {codes_emis} codes radio ({codes - codes_emis} de moins)")
+        else:
+            self.log(f"📦 Compression: {octets} -> {len(donnees)} octets, "
+                     f"{codes} -> {codes_emis} codes radio ({codes - codes_emis} de moins)")
+        self.emettre('compression', octets, len(donnees), codes, codes_emis)
+
+    def attendre(self, timeout=None):
+        """Bloque jusqu'au succès ou au refus du message établi (sans `reveil` seulement)
+
+        Retourne True si toutes les cartes ont validé, False sinon (refus ou délai dépassé).
+        Les renvois de la file d'envoi sont faits pendant l'attente.
+        """
+        fin = None if timeout is None else time.monotonic() + timeout
+        while not self.termine.is_set():
+            restant = 0.5 if fin is None else min(0.5, fin - time.monotonic())
+            if restant <= 0:
+                break
+            self.termine.wait(restant)
+            self.verifier_file()
+        return self.succes
+
+    # ----- File d'envoi -----
+
+    def mettre_en_file(self, message, priorite=ROUTINE, maintenant=None):
+        """Ajoute une alerte à la file; elle est établie dès que les cartes sont libres
+
+        Une alerte plus urgente que celle en attente de carte la remplace sur les
+        cartes (l'autre reprend sa place dans la file). ValueError si le message
+        est vide ou trop long. Retourne l'alerte, déjà en file ou en cours si le
+        même message attend: elle prend alors la plus urgente des deux priorités.
+        """
+        message = valider_message(message)
+        if maintenant is None:
+            maintenant = time.monotonic()
+        with self.verrou:
+            en_cours = self.en_cours
+            if en_cours is not None and en_cours.message == message:
+                # Déjà sur les cartes: relevé sur place, sans préemption ni second envoi
+                en_cours.doublons += 1
+                en_cours.priorite = min(en_cours.priorite, priorite)
+                alerte = en_cours
+            else:
+                alerte, _ = self.file_envoi.deposer(message, priorite, maintenant)
+                self.servir(maintenant)  # Nouvelle ou relevée, elle peut préempter l'alerte en cours
+        self.emettre('file')
+        return alerte
+
+    def servir(self, maintenant):
+        """Établit la tête de file si les cartes sont libres ou si elle est plus urgente"""
+        tete = self.file_envoi.tete()
+        if tete is None or not self.connecte:
+            return
+        en_cours = self.en_cours
+        if en_cours is not None:
+            # Préemption, sauf si une carte RFID a déjà validé l'envoi en cours
+            if tete.priorite >= en_cours.priorite or self.groupe.nb_acquittes(CARTE_AUTORISEE):
+                return
+            self.log(f"[WAVE] Priorité {NOMS_PRIORITES[tete.priorite]}: '{tete.message}' "
+                     f"remplace '{en_cours.message}', remis en file")
+            en_cours.tentatives = 0  # Remplacement volontaire: pas d'attente de renvoi accumulée
+            self.file_envoi.remettre(en_cours)
+        self.en_cours = self.file_envoi.extraire()
+        self.essayer(self.en_cours, maintenant)
+
+    def essayer(self, alerte, maintenant):
+        """Envoie MSG: pour l'alerte en cours et planifie un renvoi s'il n'est pas acquitté"""
+        alerte.tentatives += 1
+        alerte.etabli_a = maintenant
+        alerte.prochain_essai = maintenant + DELAI_ACQUITTEMENT + alerte.delai_renvoi()
+        try:
+            self.etablir_message(alerte.message)
+        except IOError as e:
+            self.envois_impossibles.inc()
+            self.log(f"[WAVE] Envoi de '{alerte.message}' impossible ({e}), "
+                     f"essai {alerte.tentatives + 1} dans {alerte.prochain_essai - maintenant:.0f} s")
+
+    def message_acquitte(self):
+        """Toutes les cartes en diffusion ont acquitté le message établi"""
+        attendus = self.groupe.nb_en_diffusion() if self.groupe is not None else 0
+        return attendus > 0 and self.groupe.nb_acquittes(MESSAGE_DEFINI) >= attendus
+
+    def verifier_file(self, maintenant=None):
+        """Renvois avec attente croissante et reprise de la file; à appeler périodiquement"""
+        if maintenant is None:
+            maintenant = time.monotonic()
+        with self.verrou:
+            alerte = self.en_cours
+            if alerte is None:
+                if self.file_envoi.tete() is None:
+                    return
+                self.servir(maintenant)
+            elif self.message_acquitte() or maintenant < alerte.prochain_essai or not self.connecte:
+                return
+            else:
+                self.log(f"[WAVE] '{alerte.message}' non acquitté, renvoi {alerte.tentatives + 1}")
+                self.renvois.inc()
+                self.essayer(alerte, maintenant)
+        self.emettre('file')
+
+    def annuler_en_cours(self):
+        """Abandonne l'alerte en attente de carte et passe à la suivante"""
+        with self.verrou:
+            self.en_cours = None
+            self.servir(time.monotonic())
+        self.emettre('file')
+
+    def terminer_en_cours(self):
+        """Alerte en cours envoyée par toutes les cartes: passe à la suivante"""
+        with self.verrou:
+            if self.en_cours is None:
+                return
+            maintenant = time.monotonic()
+            self.file_envoi.noter_envoi(self.en_cours, maintenant)
+            self.en_cours = None
+            self.servir(maintenant)
+        self.emettre('file')
+
+    # ----- Boucle série -> traitement -----
+
+    def transmettre(self, fonction, *args):
+        """Fait appeler `fonction(*args)` dans le thread de traitement (file unique)"""
+        self.file.put((fonction, args))
+        if self.reveil is not None:
+            self.reveil()
+
+    def _traiter_en_continu(self):
+        while True:
+            fonction, args = self.file.get()
+            fonction(*args)
+
+    def deposer(self, emetteur, elements):
+        """Appelé par la boucle série avec un lot d'éléments d'une carte"""
+        self.transmettre(self.traiter, emetteur, elements)
+
+    def signaler_perte(self, emetteur, erreur):
+        self.transmettre(self.emetteur_perdu, emetteur, erreur)
+
+    def signaler_reprise(self, emetteur, duree):
+        self.transmettre(self.emetteur_repris, emetteur, duree)
+
+    def traiter_en_attente(self):
+        """Traite tous les lots et résultats en attente (thread de l'appelant)"""
+        while True:
+            try:
+                fonction, args = self.file.get_nowait()
+            except queue.Empty:
+                break
+            fonction(*args)
+
+    def traiter(self, emetteur, elements):
+        self.source = emetteur
+        debut = time.perf_counter()
+        for element in elements:
+            if isinstance(element, str):
+                self.process_line(element)
+            else:
+                self.process_event(element)
+        self.duree_lot.observer(time.perf_counter() - debut)
+
+    def emetteur_perdu(self, emetteur, erreur):
+        self.log(f"[WAVE] Erreur lecture {emetteur.nom}: {erreur} - reconnexion automatique")
+        if self.connecte:
+            self.emettre('perte', emetteur, erreur)
+
+    def emetteur_repris(self, emetteur, duree):
+        """Carte relancée: elle a perdu le message en attente, qui lui est réécrit"""
+        self.log(f"[WAVE] {emetteur.nom} reconnecté sur {emetteur.port} après {duree:.1f} s")
+        if not self.connecte:
+            return
+        with self.verrou:
+            if self.en_cours is not None:
+                commandes, _, _, _ = self.preparer_commandes(self.en_cours.message)
+                if self.groupe.diffuser(commandes.encode(), [emetteur]):
+                    self.log(f"[WAVE] '{self.en_cours.message}' réécrit sur {emetteur.nom}")
+        self.emettre('reprise', emetteur, duree)
+
+    # ----- Acquittements -----
+
+    def process_event(self, evenement):
+        """Traite un évènement du mode binaire"""
+        self.evenements_lus.inc(self.source.nom, evenement.type)
+        handler = self.event_handlers.get(evenement.type)
+        if handler is not None:
+            handler(evenement)
+        else:
+            self.log(f"[WAVE] Trame binaire inconnue: {evenement!r}")
+
+    def handle_evt_carte_autorisee(self, evenement):
+        self.carte_autorisee()
+
+    def handle_evt_carte_refusee(self, evenement):
+        self.carte_refusee()
+
+    def handle_evt_message_defini(self, evenement):
+        self.acquitter(MESSAGE_DEFINI)
+        self.log(f"Message défini avec succès: '{evenement.texte}'")
+
+    def handle_evt_transmission_ok(self, evenement):
+        self.acquitter(TRANSMISSION_OK)
+        self.log("✅ Transmission 433MHz réussie")
+
+    def process_line(self, line):
+        """Traite les messages reçus du système"""
+        self.lignes_lues.inc(self.source.nom)
+        self.log(f"[WAVE] {line}")
+
+        # Message établi avec succès
+        if "Nouveau message défini:" in line:
+            self.acquitter(MESSAGE_DEFINI)
+            self.log("Message défini avec succès")
+
+        # Carte RFID détectée
+        elif "Carte détectée" in line:
+            self.log("🎯 Carte RFID détectée")
+
+        # UID autorisé - Transmission OK
+        elif "DEBUG: UID AUTORISÉ" in line:
+            self.carte_autorisee()
+
+        # UID non autorisé
+        elif "DEBUG: UID NON AUTORISÉ" in line:
+            self.carte_refusee()
+
+        # Transmission terminée avec succès
+        elif "DEBUG: Transmission terminée avec succès" in line:
+            self.acquitter(TRANSMISSION_OK)
+            self.log("✅ Transmission 433MHz réussie")
+
+    def acquitter(self, etape):
+        """Acquittement de l'émetteur courant, avec son délai depuis l'envoi"""
+        nouvelle = etape not in self.source.acquittements
+        delai = self.source.acquitter(etape)
+        if delai is not None:
+            if nouvelle:
+                self.delais.observer(delai, etape)
+            self.log(f"[WAVE] {self.source.nom}: {etape} après {formater_delai(delai)}")
+        if etape in self.etapes_tracees and self.message_alerte:
+            self.noter(self.etapes_tracees[etape], self.message_alerte, self.source.nom)
+        self.emettre('acquittement', self.source, etape, delai)
+
+    def carte_autorisee(self):
+        """Transmission validée sur une carte; succès global quand toutes l'ont validée"""
+        self.acquitter(CARTE_AUTORISEE)
+        self.autorisations.inc(self.source.nom)
+        attendus = self.groupe.nb_en_diffusion()
+        valides = self.groupe.nb_acquittes(CARTE_AUTORISEE)
+        if valides < attendus:
+            self.emettre('carte_validee', self.source, valides, attendus)
+            return
+        self.succes = True
+        self.termine.set()
+        self.emettre('succes')
+        self.terminer_en_cours()
+
+    def carte_refusee(self):
+        self.acquitter(CARTE_REFUSEE)
+        self.refus.inc(self.source.nom)
+        self.termine.set()
+        self.emettre('refus', self.source)
+
+    # ----- Métriques -----
+
+    def demarrer_metriques(self, port=PORT_EMETTEUR):
+        """Sert /metrics sur `port` (OSError si le port est pris)"""
+        serveur = ServeurMetriques(self.metriques, port)
+        serveur.demarrer()
+        self.serveur_metriques = serveur
+
+    def arreter_metriques(self):
+        if self.serveur_metriques is not None:
+            self.serveur_metriques.arreter()
+            self.serveur_metriques = None
+
+    def collecter_metriques(self):
+        """File d'envoi et compteurs des cartes, relevés à chaque collecte"""
+        en_file = Compteur("wave_alertes_en_file", "Alertes en attente dans la file d'envoi", type_='gauge')
+        en_file.fixer(len(self.file_envoi))
+        en_cours = Compteur("wave_alerte_en_cours", "1 si une alerte attend le passage d'une carte RFID",
+                            type_='gauge')
+        en_cours.fixer(int(self.en_cours is not None))
+        groupe = self.groupe
+        return [en_file, en_cours] + metriques_cartes(groupe.emetteurs if groupe is not None else ())
+
+    def noter(self, etape, texte, source):
+        if self.traceur is not None:
+            self.traceur.noter(etape, texte, source)
+
+
+def valider_message(message):
+    """Message sans espaces de bord; ValueError s'il est vide ou trop long"""
+    message = message.strip()
+    if not message:
+        raise ValueError("MESSAGE REQUIS")
+    if len(message) > TAILLE_MAX_MESSAGE:
+        raise ValueError(f"MESSAGE TROP LONG (MAX {TAILLE_MAX_MESSAGE})")
+    return message
+
+
+def main():
+    import argparse  # Ligne de commande seulement: pas à l'ouverture des interfaces
+    parser = argparse.ArgumentParser(description="Émetteur WAVE-CONNECT sans interface")
+    parser.add_argument('ports', help="'COM4' ou 'Hall=COM4, Cour=COM5'")
+    parser.add_argument('message', help=f"texte de l'alerte ({TAILLE_MAX_MESSAGE} caractères max)")
+    parser.add_argument('--binaire', action='store_true', help="négocie le mode binaire compact")
+    parser.add_argument('--fec', type=int, default=0, metavar='G',
+                        help=f"un paquet de parité radio pour G paquets de données (ex. {wave_trames.GROUPE_FEC})")
+    parser.add_argument('--compresser', action='store_true',
+                        help="compresse le message ou l'envoie en code modèle (wave_modeles)")
+    parser.add_argument('--priorite', choices=[nom.lower() for nom in NOMS_PRIORITES.values()],
+                        default='routine', help="priorité dans la file d'envoi (défaut routine)")
+    parser.add_argument('--attente', type=float, default=60.0,
+                        help="secondes d'attente du passage de la carte RFID (défaut 60)")
+    parser.add_argument('--verbeux', action='store_true', help="affiche les lignes des cartes")
+    parser.add_argument('--metriques', type=int, nargs='?', const=PORT_EMETTEUR, metavar='PORT',
+                        help=f"sert /metrics au format Prometheus (défaut {PORT_EMETTEUR})")
+    args = parser.parse_args()
+
+    client = ClientEmetteur()
+    client.groupe_fec = args.fec
+    client.compression = args.compresser
+    client.abonner('acquittement', lambda emetteur, etape, delai: print(emetteur.resume(), flush=True))
+    client.abonner('refus', lambda emetteur: print(f"❌ CARTE REFUSÉE sur {emetteur.nom}", flush=True))
+    client.abonner('perte', lambda emetteur, erreur: print(f"⚠️ {emetteur.nom} perdu: {erreur}", flush=True))
+    client.abonner('reprise', lambda emetteur, duree: print(
+        f"🔌 {emetteur.nom} reconnecté sur {emetteur.port} après {duree:.1f} s", flush=True))
+    client.abonner('compression', lambda octets, octets_emis, codes, codes_emis:
+                   print(f"📦 {octets} -> {octets_emis} octets, {codes} -> {codes_emis} codes radio", flush=True))
+    if args.verbeux:
+        client.abonner('log', lambda texte: print(f"  {texte}", flush=True))
+
+    if args.metriques is not None:
+        client.demarrer_metriques(args.metriques)
+
+    for port, erreur in client.connecter(args.ports, args.binaire):
+        print(f"{port}: {erreur}")
+    if not client.connecte:
+        raise SystemExit(1)
+    try:
+        priorite = next(p for p, nom in NOMS_PRIORITES.items() if nom.lower() == args.priorite)
+        client.mettre_en_file(args.message, priorite)
+        print("📡 MESSAGE ÉTABLI - PASSEZ VOTRE CARTE", flush=True)
+        reussi = client.attendre(args.attente)
+    except (ValueError, IOError) as e:
+        print(f"❌ {e}")
+        reussi = False
+    except KeyboardInterrupt:
+        reussi = False
+    finally:
+        futures.wait([client.deconnecter()], TIMEOUT_ECRITURE)
+        client.arreter_metriques()
+    print("✅ CARTE VALIDÉE - MESSAGE ENVOYÉ" if reussi else "❌ MESSAGE NON ENVOYÉ")
+    raise SystemExit(0 if reussi else 2)
+
+
+if __name__ == '__main__':
+    main()
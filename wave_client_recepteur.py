@@ -0,0 +1,754 @@
+"""Client récepteur sans interface: connexions, décodage, journal et compteurs
+
+L'interface Tk (wave_recepteur.py) n'en est qu'une vue. Le client peut aussi
+tourner seul, par exemple en service sur une borne sans écran:
+
+    python wave_client_recepteur.py "Étage 1=COM8, Étage 2=COM9" --binaire
+
+Évènements (abonner(nom, fonction)):
+    'message'  (entree, evincee)  nouveau message ajouté au journal (entree.station: relayé)
+    'repetition' (entree,)        message répété, regroupé sur sa ligne (entree.occurrences)
+    'stats'    ()                 compteurs modifiés
+    'son'      (actif,)           état du son confirmé ou demandé
+    'perte'    (recepteur, erreur) port qui ne répond plus (relancé automatiquement)
+    'reprise'  (recepteur, duree)  port relu après `duree` secondes de panne
+    'connexion' (erreurs,)        ouverture des ports terminée: [(port, erreur)]
+    'log'      (texte, niveau)    trace lisible de l'activité
+"""
+import asyncio
+import queue
+import time
+from concurrent import futures
+from datetime import datetime
+
+import wave_binaire
+import wave_traces
+from wave_journal import FENETRE_REGROUPEMENT, SEPARATEUR_STATION, MagasinMessages
+from wave_metriques import (BORNES_ANALYSE, BORNES_LOT, ECHANTILLON_ANALYSE, PORT_RECEPTEUR, Compteur,
+                            Registre, ServeurMetriques, metriques_cartes)
+from wave_modeles import PAR_NUMERO, annonce_firmware
+from wave_multiport import LecteurMultiPort, Recepteur, analyser_ports, fermer_cartes, ouvrir_cartes
+from wave_persistance import JournalPersistant
+from wave_protocole import ClassifieurLignes
+from wave_relais import PORT_RELAIS, Relais, analyser_pairs
+from wave_serie import TIMEOUT_ECRITURE, boucle_serie
+from wave_trames import DELAI_COPIE_MODELE, nombre_paquets
+
+
+class ClientRecepteur:
+    """Surveillance d'un ou plusieurs récepteurs ESP8266
+
+    Les ports appartiennent à la boucle série partagée (wave_serie). `reveil`,
+    s'il est fourni, est appelé depuis la boucle quand un lot ou un résultat
+    arrive dans la file; l'appelant doit alors appeler traiter_en_attente() dans
+    son propre thread (thread Tk). Sans `reveil`, les lots sont traités
+    directement dans le thread de la boucle et les rappels y sont appelés.
+    """
+
+    def __init__(self, magasin=None, traceur=None, reveil=None):
+        self.magasin = magasin if magasin is not None else MagasinMessages()
+        self.persistance = None
+        self.traceur = traceur
+        self.reveil = reveil
+        self.rappels = {}
+
+        # Un ou plusieurs récepteurs (un par étage), lus dans la boucle série
+        self.boucle = boucle_serie()
+        self.recepteurs = {}  # nom -> Recepteur
+        self.lecteur_ports = None
+        self.source = None    # Récepteur dont les éléments sont en cours de traitement
+        self.connecte = False
+        self.binaire = False  # Mode binaire renégocié à chaque reprise d'un récepteur
+
+        self.messages_recus = 0
+        self.messages_relayes = 0  # Reçus d'autres stations (wave_relais)
+        self.ids_distants = {}  # Id de message d'une autre station -> id de sa ligne ici
+        self.messages_regroupes = 0  # Répétitions comptées sur une ligne existante
+        self.codes_non_reconnus = 0
+        self.son_actif = True  # État du son (par défaut activé)
+        self.dernier_statut = ""
+
+        # File unique entre la boucle série et le thread de traitement: (fonction, arguments)
+        self.file = queue.SimpleQueue()
+
+        # Métriques /metrics (wave_metriques), comptées dans le thread de traitement;
+        # les lignes par règle sont comptées sur chaque récepteur (lignes_par_regle)
+        self.metriques = Registre()
+        self.evenements_lus = self.metriques.compteur(
+            "wave_evenements_binaires_total", "Trames du mode binaire lues, par carte et par type (wave_binaire.TYPE_*)",
+            ("carte", "type"))
+        self.duree_analyse = self.metriques.histogramme(
+            "wave_analyse_ligne_secondes", f"Classement d'une ligne par le classifieur (une sur {ECHANTILLON_ANALYSE})",
+            BORNES_ANALYSE, ("regle",))
+        self.avant_mesure = 1
+        self.duree_lot = self.metriques.histogramme(
+            "wave_traitement_lot_secondes", "Traitement d'un lot d'une carte, handlers compris", BORNES_LOT)
+        self.alertes_recues = self.metriques.compteur(
+            "wave_alertes_total", "Alertes assemblées (répétitions regroupées comprises)", ("carte",))
+        self.hors_sequence = self.metriques.compteur(
+            "wave_codes_hors_sequence_total", "Codes radio hors séquence", ("carte",))
+        self.bruit = self.metriques.compteur("wave_bruit_total", "Lignes 'Code = 0' (bruit radio)", ("carte",))
+        self.signaux_rejetes = self.metriques.compteur(
+            "wave_signaux_rejetes_total", "Signaux rejetés par le firmware", ("carte",))
+        self.autorisations = self.metriques.compteur(
+            "wave_autorisations_total", "Cartes RFID autorisées signalées par le récepteur", ("carte",))
+        self.metriques.collecter(self.collecter_metriques)
+        self.serveur_metriques = None
+
+        self.event_handlers = {
+            wave_binaire.TYPE_CODE: self.handle_evt_code,
+            wave_binaire.TYPE_MESSAGE: self.handle_evt_message,
+            wave_binaire.TYPE_ALERTE_ARRETEE: self.handle_evt_alerte_arretee,
+            wave_binaire.TYPE_SON: self.handle_evt_son,
+            wave_binaire.TYPE_HORS_SEQUENCE: self.handle_evt_hors_sequence,
+        }
+
+        # Classifieur précompilé + table de dispatch règle -> handler
+        self.classifieur = ClassifieurLignes()
+        self.line_handlers = {
+            'signal': self.handle_signal,
+            'code_brut': self.handle_code_brut,
+            'longueur': self.handle_longueur,
+            'protocole': self.handle_protocole,
+            'code_valide': self.handle_code_valide,
+            'message_recu': self.handle_message_recu,
+            'alerte_arretee': self.handle_alerte_arretee,
+            'message_lu': self.handle_message_lu,
+            'nouvelle_alerte': self.handle_nouvelle_alerte,
+            'commande': self.handle_commande,
+            'son_active': self.handle_son_active,
+            'son_desactive': self.handle_son_desactive,
+            'debut_message': self.handle_debut_message,
+            'paquet': self.handle_paquet,
+            'buffer': self.handle_buffer,
+            'carte_autorisee': self.handle_carte_autorisee,
+            'hors_sequence': self.handle_hors_sequence,
+            'buffer_reinit': self.handle_buffer_reinit,
+            'signal_rejete': self.handle_signal_rejete,
+            'bruit': self.handle_bruit,
+            'longueur_incorrecte': self.handle_longueur_incorrecte,
+            'code_rx': self.handle_code_rx,
+            'debug': self.handle_debug,
+            'autre': self.handle_autre,
+        }
+
+    # ----- Rappels -----
+
+    def abonner(self, evenement, fonction):
+        self.rappels.setdefault(evenement, []).append(fonction)
+
+    def emettre(self, evenement, *args):
+        for fonction in self.rappels.get(evenement, ()):
+            fonction(*args)
+
+    def log(self, texte, niveau='normal'):
+        self.emettre('log', texte, niveau)
+
+    async def messages(self):
+        """Itérateur asynchrone des messages reçus: `async for entree in client.messages()`"""
+        boucle = asyncio.get_running_loop()
+        file = asyncio.Queue()
+        self.abonner('message', lambda entree, evincee: boucle.call_soon_threadsafe(file.put_nowait, entree))
+        while True:
+            yield await file.get()
+
+    # ----- Journal -----
+
+    def charger_historique(self, chemin=None):
+        """Ouvre le journal persistant et recharge les dernières entrées (exception si indisponible)"""
+        persistance = JournalPersistant(chemin)
+        lignes, dernier_id = persistance.charger_derniers()
+        for id_, recu_a, heure, texte, non_lu, source, occurrences, vu_a in lignes:
+            self.magasin.ajouter(texte, heure, recu_a, id_=id_, non_lu=bool(non_lu), source=source,
+                                 occurrences=occurrences, vu_a=vu_a)
+        # Les nouveaux ids continuent après ceux déjà sur disque (même effacés)
+        self.magasin.prochain_id = max(self.magasin.prochain_id, dernier_id + 1)
+        self.persistance = persistance
+        self.emettre('stats')
+
+    def arreter_alerte(self, id_):
+        """Marque le message comme lu et envoie stopalert à la carte qui l'a reçu"""
+        entree = self.magasin.get(id_)
+        if entree is None or not self.magasin.est_non_lu(id_):
+            return False
+        # Un message relayé n'a allumé aucune carte de cette station
+        if self.connecte and not entree.station:
+            self.envoyer(b"stopalert\n", entree.source)
+            self.log("Commande 'stopalert' envoyée à l'ESP", 'info')
+        self.magasin.marquer_lu(entree.id)
+        if self.persistance is not None:
+            self.persistance.marquer_lu(entree.id)
+        self.emettre('stats')
+        self.log(f"🔴 Arrêt de l'alerte demandé pour: '{entree.texte}'", 'info')
+        return True
+
+    def vider_journal(self):
+        """Vide le journal affiché; l'historique reste sur disque"""
+        self.magasin.vider()
+        if self.persistance is not None:
+            self.persistance.effacer_tout()
+        self.emettre('stats')
+
+    def fermer(self):
+        """Déconnecte et écrit les dernières alertes sur disque"""
+        if self.connecte:
+            # Un port figé n'empêche pas de quitter: le système le fermera
+            futures.wait([self.deconnecter()], TIMEOUT_ECRITURE)
+        if self.persistance is not None:
+            self.persistance.fermer()
+
+    # ----- Connexion -----
+
+    def connecter(self, saisie, binaire=False):
+        """Ouvre les ports de `saisie` ('COM8' ou 'Étage 1=COM8, ...') et attend le résultat
+
+        Retourne la liste des erreurs (port, message); les ports ouverts sont
+        surveillés même si d'autres ont échoué. Le thread Tk utilise
+        demarrer_connexion(), qui ne bloque pas.
+        """
+        self.binaire = binaire
+        recepteurs, erreurs = self.boucle.executer(self.ouvrir_ports(saisie, binaire))
+        self.installer(recepteurs, erreurs)
+        return erreurs
+
+    def demarrer_connexion(self, saisie, binaire=False):
+        """Ouvre les ports en tâche de fond; 'connexion' est émis à la fin (via la file)
+
+        Retourne un concurrent.futures.Future: cancel() abandonne l'ouverture
+        et referme les ports déjà ouverts.
+        """
+        self.binaire = binaire
+        ouverture = self.boucle.soumettre(self.ouvrir_ports(saisie, binaire), liberer=fermer_cartes)
+        ouverture.add_done_callback(self._ouverture_terminee)
+        return ouverture
+
+    def _ouverture_terminee(self, ouverture):
+        if ouverture.cancelled():
+            return
+        try:
+            recepteurs, erreurs = ouverture.result()
+        except Exception as e:
+            recepteurs, erreurs = [], [("", str(e))]
+        self.transmettre(self.installer, recepteurs, erreurs)
+
+    async def ouvrir_ports(self, saisie, binaire=False):
+        """Coroutine (boucle série): ([Recepteur], [(port, erreur)])"""
+        ports = []
+        erreurs = []
+        for nom, port in analyser_ports(saisie):
+            if any(nom == autre for autre, _ in ports):
+                erreurs.append((port, f"NOM EN DOUBLE: {nom}"))
+            else:
+                ports.append((nom, port))
+        recepteurs, echecs = await ouvrir_cartes(
+            Recepteur, ports, initialisation=wave_binaire.COMMANDE_ACTIVER if binaire else None)
+        return recepteurs, erreurs + echecs
+
+    def installer(self, recepteurs, erreurs):
+        """Surveille les récepteurs ouverts (thread de traitement) puis émet 'connexion'"""
+        if recepteurs:
+            self.recepteurs = {recepteur.nom: recepteur for recepteur in recepteurs}
+            self.connecte = True
+            self.log(f"Surveillance d'accès activée sur {', '.join(r.port for r in recepteurs)}", 'success')
+            self.lecteur_ports = LecteurMultiPort(
+                recepteurs, self.deposer, self.signaler_perte, self.boucle, self.signaler_reprise,
+                wave_binaire.COMMANDE_ACTIVER if self.binaire else None)
+            self.lecteur_ports.demarrer()
+            self.emettre('stats')
+        self.emettre('connexion', erreurs)
+
+    def deconnecter(self):
+        """Arrête la surveillance; retourne un Future terminé une fois les ports fermés (ou None)"""
+        arret = None
+        if self.lecteur_ports is not None:
+            arret = self.lecteur_ports.arreter()
+            self.lecteur_ports = None
+        self.connecte = False
+        self.log("Surveillance d'accès désactivée", 'warning')
+        return arret
+
+    def nb_actifs(self):
+        return sum(1 for recepteur in self.recepteurs.values() if recepteur.actif)
+
+    def envoyer(self, data, nom=None):
+        """Envoie une commande au récepteur `nom`, ou à tous les récepteurs actifs (sans attendre)"""
+        cibles = [self.recepteurs[nom]] if nom in self.recepteurs else list(self.recepteurs.values())
+        for recepteur in cibles:
+            if recepteur.actif:
+                envoi = self.boucle.soumettre(recepteur.ecrire_async(data))
+                envoi.add_done_callback(lambda envoi, recepteur=recepteur: self._envoi_termine(recepteur, envoi))
+
+    def _envoi_termine(self, recepteur, envoi):
+        if envoi.cancelled() or envoi.exception() is None:
+            return
+        erreur = envoi.exception()
+        self.transmettre(self.log, f"Erreur envoi {recepteur.nom}: {str(erreur) or type(erreur).__name__}", 'error')
+
+    def regler_son(self, actif):
+        """Active/désactive le son des alertes sur toutes les cartes"""
+        self.envoyer(b"soundon\n" if actif else b"soundoff\n")
+        self.log(f"Commande '{'soundon' if actif else 'soundoff'}' envoyée à l'ESP", 'info')
+        self.son_actif = actif
+        self.emettre('son', actif)
+
+    # ----- Boucle série -> traitement -----
+
+    def transmettre(self, fonction, *args):
+        """Fait appeler `fonction(*args)` dans le thread de traitement (file unique)"""
+        if self.reveil is None:
+            fonction(*args)
+            return
+        self.file.put((fonction, args))
+        self.reveil()
+
+    def deposer(self, recepteur, elements):
+        """Appelé par la boucle série avec un lot d'éléments d'un récepteur"""
+        self.transmettre(self.traiter, recepteur, elements)
+
+    def signaler_perte(self, recepteur, erreur):
+        self.transmettre(self.recepteur_perdu, recepteur, erreur)
+
+    def signaler_reprise(self, recepteur, duree):
+        self.transmettre(self.recepteur_repris, recepteur, duree)
+
+    def traiter_en_attente(self):
+        """Traite tous les lots et résultats en attente (thread de l'appelant)"""
+        while True:
+            try:
+                fonction, args = self.file.get_nowait()
+            except queue.Empty:
+                break
+            fonction(*args)
+
+    def traiter(self, recepteur, elements):
+        # Les handlers s'appliquent à l'état de décodage de ce récepteur
+        self.source = recepteur
+        debut = time.perf_counter()
+        for element in elements:
+            if isinstance(element, str):
+                self.process_line(element)
+            else:
+                self.process_event(element)
+        self.duree_lot.observer(time.perf_counter() - debut)
+
+    def recepteur_perdu(self, recepteur, erreur):
+        self.log(f"Erreur lecture {recepteur.nom}: {erreur} - reconnexion automatique", 'error')
+        if self.connecte:
+            self.emettre('perte', recepteur, erreur)
+            self.emettre('stats')
+
+    def recepteur_repris(self, recepteur, duree):
+        self.log(f"Récepteur {recepteur.nom} reconnecté sur {recepteur.port} après {duree:.1f} s", 'success')
+        if self.connecte:
+            self.emettre('reprise', recepteur, duree)
+            self.emettre('stats')
+
+    def verifier_timeouts(self):
+        """Trames radio restées sans suite (même délai que le firmware); à appeler périodiquement
+
+        Dans le thread de traitement: celui de l'appelant avec `reveil`, sinon la
+        boucle série (boucle.appeler), seule à toucher aux décodeurs et au journal.
+        """
+        for recepteur in self.recepteurs.values():
+            trame = recepteur.decodeur_trames.verifier_timeout()
+            if trame is not None:
+                self.source = recepteur
+                self.handle_trame(trame)
+
+    # ----- Dispatch -----
+
+    def process_event(self, evenement):
+        """Dispatch d'un évènement du mode binaire"""
+        self.evenements_lus.inc(self.source.nom, evenement.type)
+        handler = self.event_handlers.get(evenement.type)
+        if handler is not None:
+            handler(evenement)
+        else:
+            self.log(f"Trame binaire inconnue: {evenement!r}", 'warning')
+
+    def handle_evt_code(self, evenement):
+        trame = self.source.decodeur_trames.pousser(evenement.code)
+        if trame is not None:
+            self.handle_trame(trame)
+
+    def handle_evt_message(self, evenement):
+        self.message_firmware(evenement.texte)
+
+    def handle_evt_alerte_arretee(self, evenement):
+        self.log(f"✅ ESP confirme: Alerte arrêtée - '{evenement.texte}'", 'success')
+
+    def handle_evt_son(self, evenement):
+        self.son_actif = evenement.actif
+        self.emettre('son', self.son_actif)
+        self.log(f"ESP confirme: Son {'activé' if evenement.actif else 'désactivé'}", 'info')
+
+    def handle_evt_hors_sequence(self, evenement):
+        self.signal_hors_sequence(f"0x{evenement.code:X}")
+
+    def process_line(self, line):
+        if not line:
+            return
+
+        # Une seule passe regex, puis appel direct du handler associé
+        self.avant_mesure -= 1
+        if self.avant_mesure:
+            nom, match = self.classifieur.classer(line)
+        else:
+            self.avant_mesure = ECHANTILLON_ANALYSE
+            debut = time.perf_counter()
+            nom, match = self.classifieur.classer(line)
+            self.duree_analyse.observer(time.perf_counter() - debut, nom)
+        par_regle = self.source.lignes_par_regle
+        par_regle[nom] = par_regle.get(nom, 0) + 1
+        self.line_handlers[nom](line, match)
+
+    def handle_signal(self, line, match):
+        self.log("Signal 433MHz détecté", 'signal')
+
+    def handle_code_brut(self, line, match):
+        self.log(f"Code reçu: {match.group('code').strip()}", 'info')
+
+    def handle_longueur(self, line, match):
+        self.log(f"Longueur: {match.group('valeur_longueur').strip()}", 'info')
+
+    def handle_protocole(self, line, match):
+        self.log(f"Protocole: {match.group('valeur_protocole').strip()}", 'info')
+
+    def handle_code_valide(self, line, match):
+        self.log("Code valide (32 bits)", 'success')
+
+    def handle_message_recu(self, line, match):
+        """Message personnalisé reçu avec émojis ✅"""
+        message_recu = match.group('texte_recu')
+        if message_recu is not None:
+            self.message_firmware(message_recu)
+
+    def message_firmware(self, message_recu):
+        """Message assemblé par le firmware (ligne ✅ ou trame binaire)"""
+        # Déjà affiché par le décodeur de trames dès le dernier paquet. Le texte du
+        # firmware peut différer (paquet en double ou reconstitué par la parité):
+        # celui du décodeur, dédoublonné et corrigé, fait foi
+        source = self.source
+        if source.message_trame_livre is not None:
+            source.message_trame_livre = None
+            return
+        maintenant = time.monotonic()
+        annonce, instant = source.modele_annonce
+        if message_recu == annonce and maintenant - instant < DELAI_COPIE_MODELE:
+            # Copie d'un code modèle déjà livré: arrivée ~220 ms après l'original, au-delà
+            # de la déduplication des paquets, un firmware ancien l'annonce une seconde fois
+            return
+        decodeur = source.decodeur_trames
+        code_modele, instant = decodeur.dernier_modele
+        if (code_modele and decodeur.horloge() - instant < DELAI_COPIE_MODELE
+                and message_recu == annonce_firmware(code_modele)):
+            # Modèle inconnu du PC: seule la ligne du firmware l'affiche, sa copie est écartée
+            source.modele_annonce = (message_recu, maintenant)
+        self.enregistrer_message(message_recu)
+
+    def enregistrer_message(self, message_recu):
+        """Ajoute un message reçu au journal et met à jour les compteurs"""
+        if message_recu:  # Seulement si le message n'est pas vide
+            self.noter(wave_traces.MESSAGE_ASSEMBLE, message_recu)
+            self.dernier_statut = f"✅ {message_recu}"
+            self.journal_message(message_recu)
+            self.messages_recus += 1
+            if self.source is not None:
+                self.alertes_recues.inc(self.source.nom)
+                self.source.messages_recus += 1
+            self.emettre('stats')
+            self.log(f"✅ MESSAGE REÇU: '{message_recu}'", 'success')
+        else:
+            # Message vide détecté
+            self.dernier_statut = "⚠️ MESSAGE VIDE"
+            self.compter_non_reconnu()
+            self.log("⚠️ Message vide reçu - Problème de décodage", 'error')
+
+    def journal_message(self, message_text):
+        """Ajoute le message au journal avec l'heure système, ou compte une répétition récente"""
+        maintenant = datetime.now()
+        source = self.source.nom if self.source is not None else ""
+        # Le magasin évince lui-même le plus ancien message au-delà de sa capacité
+        entree, evincee, regroupe = self.magasin.recevoir(message_text, maintenant.strftime("%H:%M:%S"),
+                                                          maintenant.timestamp(), source=source)
+        if regroupe:
+            # Émission répétée (setRepeatTransmit) ou badge passé deux fois: même ligne
+            self.messages_regroupes += 1
+            if self.persistance is not None:
+                self.persistance.repeter(entree)
+            self.emettre('repetition', entree)
+            return
+        if self.persistance is not None:
+            self.persistance.ajouter(entree)
+        self.emettre('message', entree, evincee)
+
+    def journal_distant(self, texte, source, station, recu_a, id_distant=None, occurrences=1, vu_a=None):
+        """Ajoute au journal un message reçu par une autre station (wave_relais)
+
+        Une répétition regroupée là-bas (même `id_distant`, `occurrences` plus
+        grand) met à jour la ligne déjà reçue et la réactive, comme ici.
+        """
+        entree = self.magasin.get(self.ids_distants.get(id_distant))
+        if entree is not None:
+            if occurrences > entree.occurrences:
+                self.magasin.repeter(entree, vu_a, occurrences)
+                if self.persistance is not None:
+                    self.persistance.repeter(entree)
+                self.emettre('repetition', entree)
+                self.emettre('stats')
+            return
+        heure = datetime.fromtimestamp(recu_a).strftime("%H:%M:%S")
+        entree, evincee = self.magasin.ajouter(texte, heure, recu_a,
+                                               source=f"{source}{SEPARATEUR_STATION}{station}",
+                                               occurrences=occurrences, vu_a=vu_a)
+        if id_distant is not None:
+            self.ids_distants[id_distant] = entree.id
+            if len(self.ids_distants) > self.magasin.capacite:
+                del self.ids_distants[next(iter(self.ids_distants))]  # Ligne déjà évincée du journal
+        if self.persistance is not None:
+            self.persistance.ajouter(entree)
+        self.messages_relayes += 1
+        self.emettre('message', entree, evincee)
+        self.emettre('stats')
+        self.log(f"📡 MESSAGE RELAYÉ ({station}): '{texte}'", 'success')
+
+    def handle_alerte_arretee(self, line, match):
+        self.log("✅ ESP confirme: Alerte arrêtée - LED éteinte", 'success')
+
+    def handle_message_lu(self, line, match):
+        message_lu = match.group('texte_lu')
+        if message_lu is not None:
+            self.log(f"📖 Message lu confirmé: '{message_lu}'", 'success')
+        else:
+            self.log("📖 Message marqué comme lu", 'success')
+
+    def handle_nouvelle_alerte(self, line, match):
+        self.log("🚨 Nouvelle alerte activée sur l'ESP - LED clignote", 'warning')
+
+    def handle_commande(self, line, match):
+        commande = match.group('nom_commande')
+        if commande is not None:
+            self.log(f"📝 ESP a reçu la commande: '{commande}'", 'info')
+
+    def handle_son_active(self, line, match):
+        self.son_actif = True
+        self.emettre('son', True)
+        self.log("🔊 ESP confirme: Son activé", 'success')
+
+    def handle_son_desactive(self, line, match):
+        self.son_actif = False
+        self.emettre('son', False)
+        self.log("🔇 ESP confirme: Son désactivé", 'info')
+
+    def handle_debut_message(self, line, match):
+        longueur = match.group('longueur_attendue').strip()
+        self.log(f"📡 Début réception - {longueur} caractères attendus", 'info')
+
+    def handle_paquet(self, line, match):
+        if match.group('num_paquet') is not None:
+            self.log(f"📦 Paquet {match.group('num_paquet')}: {match.group('code_paquet')}", 'info')
+
+    def handle_buffer(self, line, match):
+        """Buffer actuel avec progression"""
+        buffer_actuel = match.group('texte_buffer')
+        if buffer_actuel:  # Ne log que si non vide
+            progress = f"({match.group('buffer_len')}/{match.group('buffer_total')})"
+            self.log(f"🔄 Assemblage: '{buffer_actuel}' {progress}", 'info')
+
+    def handle_carte_autorisee(self, line, match):
+        self.autorisations.inc(self.source.nom)
+        self.log("✅ Accès accordé - Carte RFID autorisée", 'success')
+
+    def handle_hors_sequence(self, line, match):
+        code_hex = match.group('code_hors_sequence')
+        if code_hex is not None:
+            self.signal_hors_sequence(code_hex)
+
+    def signal_hors_sequence(self, code_hex):
+        self.hors_sequence.inc(self.source.nom)
+        self.dernier_statut = f"⚠️ {code_hex[:8]}"
+        self.compter_non_reconnu()
+        self.log(f"⚠️ Signal hors séquence: {code_hex}", 'warning')
+
+    def handle_buffer_reinit(self, line, match):
+        self.log("🔄 Buffer de réception réinitialisé", 'info')
+
+    def handle_signal_rejete(self, line, match):
+        self.signaux_rejetes.inc(self.source.nom)
+        self.log("Signal rejeté (bruit/format invalide)", 'error')
+
+    def handle_bruit(self, line, match):
+        self.bruit.inc(self.source.nom)
+        self.log("Bruit radio détecté", 'warning')
+
+    def handle_longueur_incorrecte(self, line, match):
+        details = (match.group('details_longueur') or "").strip()
+        self.log(f"Format incorrect: {details}", 'warning')
+
+    def handle_code_rx(self, line, match):
+        """Code radio brut: réassemblage local, affichage dès le dernier paquet"""
+        trame = self.source.decodeur_trames.pousser(int(match.group('valeur_rx'), 16))
+        if trame is not None:
+            self.handle_trame(trame)
+
+    def handle_trame(self, trame):
+        """Traite une trame rendue par le décodeur (complète ou abandonnée)"""
+        if trame.complet:
+            if trame.recuperes:
+                self.log(f"🛠️ Trame réparée par la parité: paquets {trame.recuperes}", 'success')
+                self.emettre('stats')
+            if trame.modele is not None:
+                self.log(f"📋 Modèle {trame.modele} ({PAR_NUMERO[trame.modele].nom}) reçu en un code radio", 'info')
+                code_modele = self.source.decodeur_trames.dernier_modele[0]
+                self.source.modele_annonce = (annonce_firmware(code_modele), time.monotonic())
+            if trame.compresse:
+                self.log(f"📦 Message compressé: {trame.longueur} octets reçus pour "
+                         f"{len(trame.texte)} caractères ({trame.paquets_attendus} paquets au lieu de "
+                         f"{nombre_paquets(len(trame.texte))})", 'info')
+            # Horodatage du code de début de trame, en temps monotone
+            self.noter(wave_traces.PREMIER_PAQUET, trame.texte, t=trame.debut)
+            self.source.message_trame_livre = trame.texte
+            self.enregistrer_message(trame.texte)
+        else:
+            # La ligne ✅ qui suivra (texte tronqué du firmware) n'a pas été affichée,
+            # sauf pour un message compressé que le firmware ne sait pas lire
+            self.source.message_trame_livre = "" if trame.compresse else None
+            self.compter_non_reconnu()
+            self.log(f"⚠️ Trame incomplète ({trame.raison}): '{trame.texte}' - "
+                     f"paquets manquants {trame.lacunes}", 'warning')
+
+    def stats_fec(self):
+        """(trames avec parité, paquets reconstitués, trames réparées, trames irrécupérables)"""
+        totaux = [0, 0, 0, 0]
+        for recepteur in self.recepteurs.values():
+            decodeur = recepteur.decodeur_trames
+            for i, valeur in enumerate((decodeur.trames_fec, decodeur.paquets_recuperes,
+                                        decodeur.trames_recuperees, decodeur.trames_irrecuperables)):
+                totaux[i] += valeur
+        return tuple(totaux)
+
+    def stats_compression(self):
+        """(trames compressées, octets économisés, paquets économisés)"""
+        totaux = [0, 0, 0]
+        for recepteur in self.recepteurs.values():
+            decodeur = recepteur.decodeur_trames
+            for i, valeur in enumerate((decodeur.trames_compressees, decodeur.octets_economises,
+                                        decodeur.paquets_economises)):
+                totaux[i] += valeur
+        return tuple(totaux)
+
+    def compter_non_reconnu(self):
+        self.codes_non_reconnus += 1
+        if self.source is not None:
+            self.source.codes_non_reconnus += 1
+        self.emettre('stats')
+
+    def handle_debug(self, line, match):
+        debug_msg = line[6:].strip()
+        if "prêt" in debug_msg.lower():
+            self.log(debug_msg, 'info')
+        else:
+            self.log(debug_msg, 'normal')
+
+    def handle_autre(self, line, match):
+        self.log(line, 'normal')
+
+    # ----- Métriques -----
+
+    def demarrer_metriques(self, port=PORT_RECEPTEUR):
+        """Sert /metrics sur `port` (OSError si le port est pris)"""
+        serveur = ServeurMetriques(self.metriques, port)
+        serveur.demarrer()
+        self.serveur_metriques = serveur
+
+    def arreter_metriques(self):
+        if self.serveur_metriques is not None:
+            self.serveur_metriques.arreter()
+            self.serveur_metriques = None
+
+    def collecter_metriques(self):
+        """Compteurs déjà tenus par le client et ses cartes, relevés à chaque collecte"""
+        recepteurs = list(self.recepteurs.values())
+        lignes = Compteur("wave_lignes_total", "Lignes lues, par carte et par règle de process_line",
+                          ("carte", "regle"))
+        for recepteur in recepteurs:
+            for regle, nombre in list(recepteur.lignes_par_regle.items()):
+                lignes.fixer(nombre, recepteur.nom, regle)
+        non_reconnus = Compteur("wave_codes_non_reconnus_total",
+                                "Codes hors séquence, messages vides et trames incomplètes", ("carte",))
+        for recepteur in recepteurs:
+            non_reconnus.fixer(recepteur.codes_non_reconnus, recepteur.nom)
+        regroupees = Compteur("wave_alertes_regroupees_total", "Répétitions comptées sur une ligne existante")
+        regroupees.fixer(self.messages_regroupes)
+        relayees = Compteur("wave_alertes_relayees_total", "Alertes reçues d'autres stations (wave_relais)")
+        relayees.fixer(self.messages_relayes)
+        actives = Compteur("wave_alertes_actives", "Alertes du journal non arrêtées", type_='gauge')
+        actives.fixer(len(self.magasin.non_lus))
+        return [lignes, non_reconnus, regroupees, relayees, actives] + metriques_cartes(recepteurs)
+
+    def noter(self, etape, texte, t=None):
+        if self.traceur is not None:
+            self.traceur.noter(etape, texte, self.source.nom if self.source is not None else "", t=t)
+
+
+def main():
+    import argparse  # Ligne de commande seulement: pas à l'ouverture des interfaces
+    parser = argparse.ArgumentParser(description="Récepteur WAVE-CONNECT sans interface")
+    parser.add_argument('ports', help="'COM8' ou 'Étage 1=COM8, Étage 2=COM9'")
+    parser.add_argument('--binaire', action='store_true', help="négocie le mode binaire compact")
+    parser.add_argument('--sans-journal', action='store_true', help="n'écrit pas wave_journal.db")
+    parser.add_argument('--verbeux', action='store_true', help="affiche aussi l'activité des cartes")
+    parser.add_argument('--regroupement', type=float, default=FENETRE_REGROUPEMENT, metavar='SECONDES',
+                        help=f"regroupe les répétitions d'une alerte (défaut {FENETRE_REGROUPEMENT:.0f} s, 0: jamais)")
+    parser.add_argument('--pairs', metavar='HOTES', help="relaie le journal avec ces stations: 'poste-b:7900, 10.0.0.12'")
+    parser.add_argument('--station', help="nom de cette station pour le relais (défaut: nom de la machine)")
+    parser.add_argument('--relais', type=int, default=PORT_RELAIS, metavar='PORT',
+                        help=f"port d'écoute du relais (défaut {PORT_RELAIS})")
+    parser.add_argument('--metriques', type=int, nargs='?', const=PORT_RECEPTEUR, metavar='PORT',
+                        help=f"sert /metrics au format Prometheus (défaut {PORT_RECEPTEUR})")
+    args = parser.parse_args()
+
+    client = ClientRecepteur(magasin=MagasinMessages(fenetre_regroupement=args.regroupement))
+    if not args.sans_journal:
+        client.charger_historique()
+    client.abonner('message', lambda entree, evincee: print(
+        f"{entree.heure} [{entree.source}] 🚨 {entree.texte}", flush=True))
+    client.abonner('repetition', lambda entree: print(
+        f"{entree.heure} [{entree.source}] ↻ {entree.libelle}", flush=True))
+    client.abonner('perte', lambda recepteur, erreur: print(f"Récepteur {recepteur.nom} perdu: {erreur}", flush=True))
+    client.abonner('reprise', lambda recepteur, duree: print(
+        f"Récepteur {recepteur.nom} reconnecté sur {recepteur.port} après {duree:.1f} s", flush=True))
+    if args.verbeux:
+        client.abonner('log', lambda texte, niveau: print(f"  {texte}", flush=True))
+
+    if args.metriques is not None:
+        client.demarrer_metriques(args.metriques)
+
+    relais = None
+    if args.pairs is not None:
+        relais = Relais(args.station, analyser_pairs(args.pairs), args.relais)
+        relais.relier(client)
+        relais.demarrer()
+
+    for port, erreur in client.connecter(args.ports, args.binaire):
+        print(f"{port}: {erreur}")
+    if not client.connecte:
+        raise SystemExit(1)
+    try:
+        # Les récepteurs perdus sont relancés: la surveillance continue jusqu'à Ctrl+C
+        while client.connecte:
+            time.sleep(1.0)
+            # Sans reveil, les lots sont traités dans la boucle série: pas en parallèle d'eux
+            client.boucle.appeler(client.verifier_timeouts)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if relais is not None:
+            print(relais.resume())
+            relais.arreter().result(2.0)
+        client.arreter_metriques()
+        client.fermer()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Compression des messages d'alerte pour la charge utile radio (3 octets par paquet)
+
+Le texte est découpé en symboles de 6 bits, écrits bit de poids fort d'abord:
+    0..44   un caractère de ALPHABET (majuscules, chiffres, ponctuation courante)
+    45..62  une expression de DICTIONNAIRE (mots fréquents des alertes)
+    63      échappement, suivi de 7 bits: un caractère ASCII hors alphabet
+Le dernier octet est complété par des bits à 1: un reste de moins de 6 bits,
+ou un échappement sans ses 7 bits, marque la fin du texte.
+
+Le découpage minimise le nombre de bits (programmation dynamique). Un texte
+non ASCII n'est pas compressible; l'émetteur garde alors le texte brut, de
+même quand la compression ne gagne aucun paquet.
+"""
+
+ALPHABET = " ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,'-!?:/"
+DICTIONNAIRE = (
+    "EVACUATION", "EVACUEZ", "IMMEDIATE", "BATIMENT", "ALERTE", "INCENDIE",
+    "CONFINEMENT", "CONFINEZ-VOUS", "EXERCICE", "ESCALIER", "SORTIE", "ETAGE",
+    "RASSEMBLEMENT", "POINT DE ", "URGENCE", "FIN D'ALERTE", "MENT", "TION",
+)
+ECHAPPEMENT = 63
+BITS_SYMBOLE = 6
+BITS_ASCII = 7
+
+_CARACTERES = {c: i for i, c in enumerate(ALPHABET)}
+_PREMIER_MOT = len(ALPHABET)
+assert _PREMIER_MOT + len(DICTIONNAIRE) == ECHAPPEMENT
+
+
+def compresser(texte):
+    """Octets compressés de `texte`, ou None s'il contient un caractère non ASCII"""
+    if any(ord(c) > 0x7F for c in texte):
+        return None
+
+    # cout[i]: bits minimaux pour coder texte[i:]; choix[i]: (symbole, caractères consommés)
+    n = len(texte)
+    cout = [0] * (n + 1)
+    choix = [None] * n
+    for i in range(n - 1, -1, -1):
+        c = texte[i]
+        if c in _CARACTERES:
+            meilleur = (BITS_SYMBOLE + cout[i + 1], _CARACTERES[c], 1)
+        else:
+            meilleur = (BITS_SYMBOLE + BITS_ASCII + cout[i + 1], ECHAPPEMENT, 1)
+        for rang, mot in enumerate(DICTIONNAIRE):
+            if texte.startswith(mot, i):
+                bits = BITS_SYMBOLE + cout[i + len(mot)]
+                if bits < meilleur[0]:
+                    meilleur = (bits, _PREMIER_MOT + rang, len(mot))
+        cout[i], choix[i] = meilleur[0], meilleur[1:]
+
+    accumulateur = 0
+    nb_bits = 0
+    i = 0
+    while i < n:
+        symbole, consommes = choix[i]
+        accumulateur = accumulateur << BITS_SYMBOLE | symbole
+        nb_bits += BITS_SYMBOLE
+        if symbole == ECHAPPEMENT:
+            accumulateur = accumulateur << BITS_ASCII | ord(texte[i])
+            nb_bits += BITS_ASCII
+        i += consommes
+    remplissage = -nb_bits % 8
+    accumulateur = accumulateur << remplissage | ((1 << remplissage) - 1)
+    return accumulateur.to_bytes((nb_bits + remplissage) // 8, 'big')
+
+
+def decompresser(donnees):
+    """Texte de `donnees` compressées (préfixe décodable si la fin manque)"""
+    valeur = int.from_bytes(bytes(donnees), 'big')
+    restants = len(donnees) * 8
+    morceaux = []
+    while restants >= BITS_SYMBOLE:
+        restants -= BITS_SYMBOLE
+        symbole = valeur >> restants & 0x3F
+        if symbole < _PREMIER_MOT:
+            morceaux.append(ALPHABET[symbole])
+        elif symbole < ECHAPPEMENT:
+            morceaux.append(DICTIONNAIRE[symbole - _PREMIER_MOT])
+        else:
+            if restants < BITS_ASCII:
+                break  # Remplissage
+            restants -= BITS_ASCII
+            morceaux.append(chr(valeur >> restants & 0x7F))
+    return "".join(morceaux)
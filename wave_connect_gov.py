@@ -1,11 +1,16 @@
 import tkinter as tk
 from tkinter import scrolledtext, messagebox, font
-import serial
-import threading
 from datetime import datetime
 import time
-from PIL import Image, ImageTk
 import os
+from wave_client_emetteur import ClientEmetteur
+from wave_demarrage import LOGO_EMETTEUR, apres_premier_affichage, charger_logo, dossier_application
+from wave_file_envoi import IMPORTANT, NOMS_PRIORITES, ROUTINE, SYMBOLES_PRIORITES, URGENT
+from wave_metriques import PORT_EMETTEUR, port_environnement
+from wave_modeles import MODELES, TAILLE_MAX_PARAMETRE, reconnaitre
+from wave_serie import INTERVALLE_VIDAGE_MS
+from wave_trames import GROUPE_FEC, encoder_message
+from wave_traces import TraceurLatence
 
 class WaveConnectGov:
     def __init__(self, root):
@@ -17,9 +22,23 @@ class WaveConnectGov:
         self.root.minsize(650, 600)
 
         # Variables
-        self.message_alerte = ""
-        self.serial_connection = None
-        self.connected = False
+        # Groupe de cartes émettrices et acquittements: wave_client_emetteur.
+        # Étapes tracées pour la mesure de latence de bout en bout (voir wave_traces)
+        self.traceur = TraceurLatence(processus='emetteur')
+        # Les ports sont lus dans la boucle série; ses résultats sont traités dans le thread Tk
+        self.client = ClientEmetteur(traceur=self.traceur, reveil=self.reveiller)
+        self._donnees_serie = False
+        self.ouverture = None  # Ouverture des ports en cours (Future annulable)
+        self.client.abonner('log', print)  # Debug dans la console
+        self.client.abonner('acquittement', lambda emetteur, etape, delai: self.update_group_status())
+        self.client.abonner('carte_validee', self.carte_validee)
+        self.client.abonner('succes', self.show_success)
+        self.client.abonner('refus', lambda emetteur: self.show_error())
+        self.client.abonner('perte', self.emetteur_perdu)
+        self.client.abonner('reprise', lambda emetteur, duree: self.emetteur_perdu(emetteur, None))
+        self.client.abonner('compression', self.afficher_compression)
+        self.client.abonner('file', self.update_file_status)
+        self.client.abonner('connexion', self.connexion_terminee)
 
         # Couleurs gouvernementales
         self.colors = {
@@ -42,27 +61,11 @@ class WaveConnectGov:
         self.setup_scrollable_container()
 
     def load_logo(self):
-        """Charge le logo officiel"""
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            logo_path = os.path.join(script_dir, "logo.png")
-
-            if not os.path.exists(logo_path):
-                logo_path = "logo.png"
-
-            if not os.path.exists(logo_path):
-                # Logo par défaut gouvernemental
-                img = Image.new('RGB', (120, 120), color='#1e40af')
-                self.logo_image = ImageTk.PhotoImage(img)
-                return
-
-            img = Image.open(logo_path)
-            # Préserve le ratio: limite à 80x80 max
-            img.thumbnail((80, 80), Image.Resampling.LANCZOS)
-            self.logo_image = ImageTk.PhotoImage(img)
-        except Exception as e:
-            img = Image.new('RGB', (120, 120), color='#1e40af')
-            self.logo_image = ImageTk.PhotoImage(img)
+        """Charge le logo officiel (copie réduite en cache, ratio conservé, 80x80 max)"""
+        noms, taille = LOGO_EMETTEUR
+        # À côté du script (ou dans l'exécutable), sinon dans le dossier courant
+        self.logo_image, _ = charger_logo(noms, taille, '#1e40af',
+                                          (dossier_application(), os.getcwd()))
 
     def setup_scrollable_container(self):
         """Configure un container scrollable pour toute l'interface"""
@@ -99,8 +102,31 @@ class WaveConnectGov:
         # Bind la molette de souris pour le scroll vertical
         self.bind_mouse_scroll()
 
-        # Maintenant configurer l'UI dans le frame scrollable
+        # Maintenant configurer l'UI dans le frame scrollable: en-tête et
+        # connexion d'abord, la saisie après le premier rendu
+        self.interface_complete = False
         self.setup_main_ui()
+        apres_premier_affichage(self.root, self.terminer_interface)
+
+    def terminer_interface(self):
+        """Saisie du message et file d'envoi, construites après le premier rendu"""
+        self.setup_saisie_ui()
+
+        # Renvois de la file d'envoi et attentes affichées
+        self.surveiller_file()
+        self.surveiller_serie()
+        self.demarrer_metriques()
+        self.interface_complete = True
+
+    def demarrer_metriques(self):
+        """Point d'accès /metrics si WAVE_METRIQUES est définie (port, ou 1 pour le port par défaut)"""
+        try:
+            port = port_environnement(PORT_EMETTEUR)
+            if port is not None:
+                self.client.demarrer_metriques(port)
+                print(f"Métriques: http://localhost:{port}/metrics")
+        except (OSError, ValueError) as e:
+            print(f"Métriques indisponibles: {e}")
 
     def on_frame_configure(self, event=None):
         """Met à jour la scrollregion du canvas quand le frame change de taille"""
@@ -193,7 +219,7 @@ class WaveConnectGov:
         com_frame = tk.Frame(com_content, bg=self.colors['card'])
         com_frame.pack(fill=tk.X, pady=(8, 0))
 
-        tk.Label(com_frame, text="Port COM :",
+        tk.Label(com_frame, text="Port(s) COM :",
                 font=('Segoe UI', 11, 'bold'),
                 fg=self.colors['text'], bg=self.colors['card']).pack(side=tk.LEFT)
 
@@ -201,7 +227,7 @@ class WaveConnectGov:
         self.port_entry = tk.Entry(com_frame, textvariable=self.port_var,
                                   font=('Segoe UI', 11),
                                   bg='white', fg=self.colors['text'],
-                                  width=8, relief='solid', bd=1)
+                                  width=16, relief='solid', bd=1)
         self.port_entry.pack(side=tk.LEFT, padx=(10, 15))
 
         self.connect_btn = tk.Button(com_frame, text="📡 CONNECTER",
@@ -217,6 +243,41 @@ class WaveConnectGov:
                                          fg=self.colors['text_light'], bg=self.colors['card'])
         self.connection_status.pack(side=tk.LEFT, padx=(15, 0))
 
+        # Mode binaire compact (négocié à la connexion, texte si non supporté)
+        self.binary_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(com_content, text="Mode binaire compact",
+                       variable=self.binary_var,
+                       font=('Segoe UI', 9),
+                       fg=self.colors['text_light'], bg=self.colors['card'],
+                       activebackground=self.colors['card']).pack(anchor='w', pady=(6, 0))
+
+        # Paquets de parité radio: le récepteur reconstruit un paquet perdu par groupe
+        self.fec_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(com_content, text="Correction d'erreurs radio (parité)",
+                       variable=self.fec_var,
+                       command=self.update_char_count,
+                       font=('Segoe UI', 9),
+                       fg=self.colors['text_light'], bg=self.colors['card'],
+                       activebackground=self.colors['card']).pack(anchor='w')
+
+        # Message compressé pour la radio (décodé par l'interface récepteur)
+        self.compression_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(com_content, text="Compression radio du message",
+                       variable=self.compression_var,
+                       command=self.update_char_count,
+                       font=('Segoe UI', 9),
+                       fg=self.colors['text_light'], bg=self.colors['card'],
+                       activebackground=self.colors['card']).pack(anchor='w')
+
+        tk.Label(com_content, text="Plusieurs émetteurs: ports séparés par des virgules (ex. Nord=COM4, Sud=COM5)",
+                font=('Segoe UI', 9),
+                fg=self.colors['text_light'], bg=self.colors['card']).pack(anchor='w', pady=(2, 0))
+        self.main_content = main_content
+
+    def setup_saisie_ui(self):
+        """Saisie, modèles, priorité et boutons d'envoi"""
+        main_content = self.main_content
+
         # Section de saisie
         input_card = tk.Frame(main_content, bg=self.colors['card'], relief='solid', bd=1)
         input_card.pack(fill=tk.BOTH, expand=True)
@@ -232,6 +293,27 @@ class WaveConnectGov:
                 font=('Segoe UI', 10),
                 fg=self.colors['text_light'], bg=self.colors['card']).pack(anchor='w', pady=(5, 10))
 
+        # Modèles standard: un seul code radio si la compression est cochée
+        modeles_frame = tk.Frame(input_content, bg=self.colors['card'])
+        modeles_frame.pack(fill=tk.X, pady=(0, 8))
+
+        tk.Label(modeles_frame, text="Modèle :", font=('Segoe UI', 10),
+                fg=self.colors['text'], bg=self.colors['card']).pack(side=tk.LEFT)
+
+        self.modele_var = tk.StringVar(value="")
+        modele_menu = tk.OptionMenu(modeles_frame, self.modele_var,
+                                    *[modele.nom for modele in MODELES],
+                                    command=self.inserer_modele)
+        modele_menu.configure(font=('Segoe UI', 10), width=22)
+        modele_menu.pack(side=tk.LEFT, padx=(8, 12))
+
+        tk.Label(modeles_frame, text="Bâtiment / étage :", font=('Segoe UI', 10),
+                fg=self.colors['text'], bg=self.colors['card']).pack(side=tk.LEFT)
+
+        self.parametre_var = tk.StringVar(value="")
+        tk.Entry(modeles_frame, textvariable=self.parametre_var,
+                font=('Segoe UI', 10), width=4).pack(side=tk.LEFT, padx=(8, 0))
+
         # Zone de texte
         text_frame = tk.Frame(input_content, bg=self.colors['card'])
         text_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
@@ -271,6 +353,18 @@ class WaveConnectGov:
                                          state=tk.DISABLED)
         self.send_message_btn.pack(pady=(0, 10))
 
+        # Priorité dans la file d'envoi: un message plus urgent passe devant
+        priorite_frame = tk.Frame(button_section, bg=self.colors['card'])
+        priorite_frame.pack(pady=(0, 8))
+        self.priorite_var = tk.IntVar(value=ROUTINE)
+        for priorite in (URGENT, IMPORTANT, ROUTINE):
+            tk.Radiobutton(priorite_frame,
+                           text=f"{SYMBOLES_PRIORITES[priorite]} {NOMS_PRIORITES[priorite].capitalize()}",
+                           variable=self.priorite_var, value=priorite,
+                           font=('Segoe UI', 10),
+                           fg=self.colors['text'], bg=self.colors['card'],
+                           activebackground=self.colors['card']).pack(side=tk.LEFT, padx=6)
+
         # Bouton d'établissement du message
         self.demander_btn = tk.Button(button_section, text="📢 ÉTABLIR MESSAGE ET ATTENDRE CARTE",
                                      font=('Segoe UI', 12, 'bold'),
@@ -280,6 +374,14 @@ class WaveConnectGov:
                                      state=tk.DISABLED)
         self.demander_btn.pack()
 
+        # Abandon du message en attente de carte (le suivant de la file est établi)
+        self.annuler_btn = tk.Button(button_section, text="⏹ ANNULER LE MESSAGE EN COURS",
+                                    font=('Segoe UI', 9, 'bold'),
+                                    bg=self.colors['border'], fg=self.colors['secondary'],
+                                    relief='flat', padx=12, pady=4,
+                                    command=self.reset_message,
+                                    state=tk.DISABLED)
+        self.annuler_btn.pack(pady=(6, 0))
 
         # Statut du message
         self.message_status = tk.Label(button_section, text="⚪ AUCUN MESSAGE ÉTABLI",
@@ -287,6 +389,20 @@ class WaveConnectGov:
                                       fg=self.colors['text_light'], bg=self.colors['card'])
         self.message_status.pack(pady=(8, 0))
 
+        # Acquittements par carte émettrice et délais depuis l'envoi
+        self.group_status = tk.Label(button_section, text="",
+                                    font=('Segoe UI', 9),
+                                    fg=self.colors['text_light'], bg=self.colors['card'],
+                                    justify='left')
+        self.group_status.pack(pady=(6, 0))
+
+        # File d'envoi: profondeur et attente de chaque message
+        self.file_status = tk.Label(button_section, text="",
+                                   font=('Segoe UI', 9),
+                                   fg=self.colors['secondary'], bg=self.colors['card'],
+                                   justify='left')
+        self.file_status.pack(pady=(6, 0))
+
         # Footer officiel
         footer = tk.Frame(self.scrollable_frame, bg=self.colors['border'], height=1)
         footer.pack(fill=tk.X)
@@ -298,10 +414,22 @@ class WaveConnectGov:
 
     def update_char_count(self, event=None):
         """Met à jour le compteur de caractères"""
+        if not self.interface_complete:
+            return  # Parité ou compression cochée avant la construction de la saisie (terminer_interface)
         content = self.message_text.get(1.0, tk.END).strip()
         char_count = len(content)
 
-        self.char_counter.configure(text=f"{char_count} / 50 caractères")
+        texte = f"{char_count} / 50 caractères"
+        if content and self.compression_var.get():
+            # Codes radio émis (un toutes les 50 ms) avec et sans compression
+            groupe_fec = GROUPE_FEC if self.fec_var.get() else 0
+            codes = len(encoder_message(content, groupe_fec))
+            codes_emis = len(encoder_message(content, groupe_fec, compression=True))
+            modele = reconnaitre(content)
+            if modele is not None:
+                texte += f" • modèle {modele[0].nom}"
+            texte += f" • {codes_emis} codes radio au lieu de {codes}"
+        self.char_counter.configure(text=texte)
 
         if char_count > 50:
             self.char_counter.configure(fg=self.colors['danger'])
@@ -310,51 +438,98 @@ class WaveConnectGov:
         else:
             self.char_counter.configure(fg=self.colors['text_light'])
 
+    def inserer_modele(self, nom):
+        """Remplace le message par le texte du modèle choisi"""
+        modele = next(modele for modele in MODELES if modele.nom == nom)
+        parametre = self.parametre_var.get().strip().upper()[:TAILLE_MAX_PARAMETRE]
+        self.message_text.delete(1.0, tk.END)
+        self.message_text.insert(1.0, modele.developper(parametre))
+        self.message_text.focus_set()
+        self.update_char_count()
+
+    def afficher_compression(self, octets, octets_emis, codes, codes_emis):
+        """Gain de la compression pour le message établi"""
+        self.char_counter.configure(text=f"📦 {octets} → {octets_emis} octets, "
+                                         f"{codes_emis} codes radio au lieu de {codes}",
+                                    fg=self.colors['success'])
+
     def toggle_connection(self):
-        """Connecter/déconnecter du système"""
-        if not self.connected:
-            port = self.port_var.get()
-            try:
-                self.serial_connection = serial.Serial(
-                    port=port,
-                    baudrate=11550,
-                    timeout=0.1
-                )
-                self.connected = True
-                self.connection_status.configure(text="🟢 CONNECTÉ", fg=self.colors['success'])
-                self.connect_btn.configure(text="🔌 DÉCONNECTER", bg=self.colors['danger'])
-                self.send_message_btn.configure(state=tk.NORMAL)
-
-                # Démarre la lecture série
-                threading.Thread(target=self.read_serial, daemon=True).start()
-
-            except Exception as e:
-                self.connection_status.configure(text="🔴 ÉCHEC CONNEXION", fg=self.colors['danger'])
-                messagebox.showerror("Erreur de Connexion",
-                                   f"Impossible de se connecter au port {port}\n\n"
-                                   f"Vérifiez :\n"
-                                   f"• ESP8266 connecté et allumé\n"
-                                   f"• Port COM correct (COM3, COM4, etc.)\n"
-                                   f"• Aucune autre application n'utilise le port\n\n"
-                                   f"Erreur: {str(e)}")
+        """Connecter/déconnecter du système; l'ouverture des ports ne bloque pas l'interface"""
+        if self.ouverture is not None:
+            # Clic pendant l'ouverture: abandon (sauf si le résultat est déjà en file)
+            if self.ouverture.cancel():
+                self.ouverture = None
+                self.connection_status.configure(text="⚪ NON CONNECTÉ", fg=self.colors['text_light'])
+                self.connect_btn.configure(text="📡 CONNECTER", bg=self.colors['success'])
+        elif not self.client.connecte:
+            self.ouverture = self.client.demarrer_connexion(self.port_var.get(), self.binary_var.get())
+            self.connection_status.configure(text="🟡 CONNEXION...", fg=self.colors['warning'])
+            self.connect_btn.configure(text="✖ ANNULER", bg=self.colors['warning'])
         else:
-            if self.serial_connection:
-                self.serial_connection.close()
-            self.connected = False
+            self.client.deconnecter()
             self.connection_status.configure(text="⚪ NON CONNECTÉ", fg=self.colors['text_light'])
             self.connect_btn.configure(text="📡 CONNECTER", bg=self.colors['success'])
             self.send_message_btn.configure(state=tk.DISABLED)
             self.demander_btn.configure(state=tk.DISABLED)
 
+    def connexion_terminee(self, erreurs):
+        """Résultat de l'ouverture des ports (thread Tk, via la file du client)"""
+        self.ouverture = None
+        erreurs = [f"{port}: {erreur}" for port, erreur in erreurs]
+        if not self.client.connecte:
+            self.connection_status.configure(text="🔴 ÉCHEC CONNEXION", fg=self.colors['danger'])
+            self.connect_btn.configure(text="📡 CONNECTER", bg=self.colors['success'])
+            messagebox.showerror("Erreur de Connexion",
+                               f"Impossible de se connecter au port {self.port_var.get()}\n\n"
+                               f"Vérifiez :\n"
+                               f"• ESP8266 connecté et allumé\n"
+                               f"• Port COM correct (COM3, COM4, etc.)\n"
+                               f"• Aucune autre application n'utilise le port\n\n"
+                               f"Erreur: {'; '.join(erreurs)}")
+            return
+        if erreurs:
+            messagebox.showwarning("Émetteurs non connectés",
+                                   "Ces ports n'ont pas pu être ouverts:\n\n" + "\n".join(erreurs))
+
+        self.update_connection_status()
+        self.connect_btn.configure(text="🔌 DÉCONNECTER", bg=self.colors['danger'])
+        self.send_message_btn.configure(state=tk.NORMAL)
+        self.update_group_status()
+
+    def update_connection_status(self):
+        groupe = self.client.groupe
+        actifs = len(groupe.actifs())
+        if len(groupe) == 1:
+            texte = "🟢 CONNECTÉ" if actifs else "🔴 CONNEXION PERDUE - RECONNEXION..."
+        else:
+            texte = f"🟢 CONNECTÉ ({actifs}/{len(groupe)} ÉMETTEURS)"
+        if not actifs:
+            couleur = self.colors['danger']
+        else:
+            couleur = self.colors['success'] if actifs == len(groupe) else self.colors['warning']
+        self.connection_status.configure(text=texte, fg=couleur)
+
+    def update_group_status(self):
+        """Une ligne par carte: étapes acquittées et délai depuis l'envoi"""
+        groupe = self.client.groupe
+        if groupe is None or len(groupe) == 1 and groupe.emetteurs[0].envoye_a is None:
+            self.group_status.configure(text="")
+            return
+        self.group_status.configure(text="\n".join(e.resume() for e in groupe.emetteurs))
+
+    def emetteur_perdu(self, emetteur, erreur):
+        self.update_connection_status()
+        self.update_group_status()
+
     def send_message_to_system(self):
         """Envoie un message de test"""
-        if not self.connected or not self.serial_connection:
+        if not self.client.connecte:
             messagebox.showwarning("Non connecté", "Connectez-vous d'abord au système.")
             return
 
         try:
-            # Envoie un ping test pour vérifier la connexion
-            self.serial_connection.write(b"PING\n")
+            # Envoie un ping test pour vérifier la connexion de chaque carte
+            self.client.tester()
             self.message_status.configure(text="🟢 TEST RÉUSSI - PRÊT À ENVOYER", fg=self.colors['success'])
             self.demander_btn.configure(state=tk.NORMAL, bg=self.colors['primary'])
 
@@ -367,92 +542,64 @@ class WaveConnectGov:
             self.root.after(3000, lambda: self.card_status_label.configure(text=""))
 
     def demander_autorisation(self):
-        """Établit le message et attend la carte pour envoi automatique"""
+        """Met le message en file: établi sur les cartes dès qu'elles sont libres"""
         message = self.message_text.get(1.0, tk.END).strip()
 
-        if not message:
-            self.card_status_label.configure(text="⚠️ MESSAGE REQUIS", fg=self.colors['warning'])
-            self.root.after(3000, lambda: self.card_status_label.configure(text=""))
-            return
-
-        if len(message) > 50:
-            self.card_status_label.configure(text="⚠️ MESSAGE TROP LONG (MAX 50)", fg=self.colors['danger'])
-            self.root.after(3000, lambda: self.card_status_label.configure(text=""))
-            return
-
-        if not self.connected or not self.serial_connection:
-            self.card_status_label.configure(text="⚠️ NON CONNECTÉ", fg=self.colors['warning'])
-            self.root.after(3000, lambda: self.card_status_label.configure(text=""))
-            return
-
-        # Envoie le message au système ESP8266
+        # Envoie le message à toutes les cartes ESP8266 du groupe en parallèle
+        self.client.groupe_fec = GROUPE_FEC if self.fec_var.get() else 0
+        self.client.compression = self.compression_var.get()
         try:
-            command = f"MSG:{message}\n"
-            self.serial_connection.write(command.encode())
-
-            self.message_alerte = message
+            alerte = self.client.mettre_en_file(message, self.priorite_var.get())
+            self.update_group_status()
 
             # Affiche l'état dans le label
-            self.card_status_label.configure(text="📡 MESSAGE ÉTABLI - PASSEZ VOTRE CARTE",
-                                            fg=self.colors['primary'])
-
-            # Change le texte mais garde le bouton actif pour annuler si besoin
-            self.demander_btn.configure(text="🔄 ATTENTE CARTE - CLIQUER POUR ANNULER",
-                                       bg=self.colors['warning'], state=tk.NORMAL,
-                                       command=self.reset_message)
-            self.message_status.configure(text="📡 EN ATTENTE DE CARTE", fg=self.colors['warning'])
-
+            if alerte is self.client.en_cours:
+                self.card_status_label.configure(text="📡 MESSAGE ÉTABLI - PASSEZ VOTRE CARTE",
+                                                fg=self.colors['primary'])
+                self.message_status.configure(text="📡 EN ATTENTE DE CARTE", fg=self.colors['warning'])
+            else:
+                rang = self.client.file_envoi.elements().index(alerte) + 1
+                self.card_status_label.configure(text=f"📥 MESSAGE EN FILE (POSITION {rang})",
+                                                fg=self.colors['primary'])
+            self.root.after(5000, lambda: self.card_status_label.configure(text=""))
+
+        except ValueError as e:
+            # Message vide ou trop long
+            couleur = self.colors['warning'] if not message else self.colors['danger']
+            self.card_status_label.configure(text=f"⚠️ {e}", fg=couleur)
+            self.root.after(3000, lambda: self.card_status_label.configure(text=""))
         except Exception as e:
-            self.card_status_label.configure(text="❌ ERREUR D'ENVOI", fg=self.colors['danger'])
+            if not self.client.connecte:
+                self.card_status_label.configure(text="⚠️ NON CONNECTÉ", fg=self.colors['warning'])
+            else:
+                self.card_status_label.configure(text="❌ ERREUR D'ENVOI", fg=self.colors['danger'])
             self.root.after(3000, lambda: self.card_status_label.configure(text=""))
 
-    def read_serial(self):
-        """Lit les messages série en continu"""
-        while self.connected and self.serial_connection:
-            try:
-                if self.serial_connection.in_waiting > 0:
-                    line = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
-                    if line:
-                        self.root.after(0, lambda l=line: self.process_line(l))
-                else:
-                    time.sleep(0.01)
-            except Exception as e:
-                break
-
-    def process_line(self, line):
-        """Traite les messages reçus du système"""
-        print(f"[WAVE] {line}")  # Debug dans la console
-
-        # Message établi avec succès
-        if "Nouveau message défini:" in line:
-            print("Message défini avec succès")
-
-        # Carte RFID détectée
-        elif "Carte détectée" in line:
-            print("🎯 Carte RFID détectée")
-
-        # UID autorisé - Transmission OK
-        elif "DEBUG: UID AUTORISÉ" in line:
-            self.root.after(0, self.show_success)
-
-        # UID non autorisé
-        elif "DEBUG: UID NON AUTORISÉ" in line:
-            self.root.after(0, self.show_error)
-
-        # Transmission terminée avec succès
-        elif "DEBUG: Transmission terminée avec succès" in line:
-            print("✅ Transmission 433MHz réussie")
+    def reveiller(self):
+        """Appelé par la boucle série: note seulement la file non vide (aucun appel Tk hors du thread Tk)"""
+        self._donnees_serie = True
+
+    def surveiller_serie(self):
+        """Vide la file du client toutes les INTERVALLE_VIDAGE_MS (thread Tk)"""
+        try:
+            if self._donnees_serie:
+                # Remis à False avant de vider: un lot déposé entre-temps sera vu au tour suivant
+                self._donnees_serie = False
+                self.client.traiter_en_attente()
+        finally:
+            self.root.after(INTERVALLE_VIDAGE_MS, self.surveiller_serie)
+
+    def carte_validee(self, emetteur, valides, attendus):
+        """Transmission validée sur une partie du groupe seulement"""
+        self.card_status_label.configure(
+            text=f"✅ CARTE VALIDÉE SUR {emetteur.nom} ({valides}/{attendus})",
+            fg=self.colors['success'])
 
     def show_success(self):
         """Affiche le succès d'autorisation"""
         # Affiche le message de succès dans le label
         self.card_status_label.configure(text="✅ CARTE VALIDÉE - MESSAGE ENVOYÉ",
                                         fg=self.colors['success'])
-
-        # Réactive les boutons pour permettre un nouvel envoi
-        self.demander_btn.configure(text="📢 ÉTABLIR MESSAGE ET ATTENDRE CARTE",
-                                   bg=self.colors['primary'], state=tk.NORMAL,
-                                   command=self.demander_autorisation)
         self.message_status.configure(text="✅ DERNIER ENVOI RÉUSSI", fg=self.colors['success'])
 
         # L'ESP gère lui-même son état, pas besoin de reset
@@ -461,17 +608,49 @@ class WaveConnectGov:
         self.root.after(5000, lambda: self.card_status_label.configure(text=""))
 
     def reset_message(self):
-        """Annule le message en attente et réinitialise l'interface"""
-        # Réinitialise l'interface
-        self.demander_btn.configure(text="📢 ÉTABLIR MESSAGE ET ATTENDRE CARTE",
-                                   bg=self.colors['primary'], state=tk.NORMAL,
-                                   command=self.demander_autorisation)
+        """Annule le message en attente; le suivant de la file est établi"""
+        self.client.annuler_en_cours()
         self.message_status.configure(text="⚪ MESSAGE ANNULÉ", fg=self.colors['text_light'])
 
         # Affiche l'annulation dans le label
         self.card_status_label.configure(text="⚪ MESSAGE ANNULÉ", fg=self.colors['text_light'])
         self.root.after(3000, lambda: self.card_status_label.configure(text=""))
 
+    def update_file_status(self):
+        """Message en attente de carte et file d'envoi, avec leurs attentes"""
+        client = self.client
+        maintenant = time.monotonic()
+        en_cours = client.en_cours
+        lignes = []
+        if en_cours is not None:
+            essai = f", essai {en_cours.tentatives}" if en_cours.tentatives > 1 else ""
+            lignes.append(f"📡 En attente de carte: {en_cours.resume(maintenant)}{essai}")
+        attente = client.file_envoi.elements()
+        if attente:
+            lignes.append(f"📥 File d'envoi: {len(attente)} message(s)")
+            lignes.extend(f"   {rang}. {alerte.resume(maintenant)}" for rang, alerte in enumerate(attente, 1))
+        envoyes = [f"{NOMS_PRIORITES[priorite]} {len(attentes)} (max {max(attentes):.0f} s)"
+                   for priorite, attentes in client.file_envoi.attentes.items() if attentes]
+        if envoyes:
+            lignes.append("⏱ Attente avant envoi: " + " • ".join(envoyes))
+        self.file_status.configure(text="\n".join(lignes))
+
+        # Le bouton ajoute à la file tant qu'un message attend sa carte
+        if en_cours is not None:
+            self.demander_btn.configure(text="📥 AJOUTER À LA FILE D'ENVOI")
+            self.annuler_btn.configure(state=tk.NORMAL)
+        else:
+            self.demander_btn.configure(text="📢 ÉTABLIR MESSAGE ET ATTENDRE CARTE")
+            self.annuler_btn.configure(state=tk.DISABLED)
+
+    def surveiller_file(self):
+        """Renvois non acquittés et attentes affichées, chaque seconde"""
+        try:
+            self.client.verifier_file()
+            self.update_file_status()
+        finally:
+            self.root.after(1000, self.surveiller_file)
+
     def show_error(self):
         """Affiche l'erreur d'autorisation"""
         # Affiche le message d'erreur dans le label
@@ -479,9 +658,6 @@ class WaveConnectGov:
                                         fg=self.colors['danger'])
 
         # Garde le message actif en attente d'une carte valide
-        self.demander_btn.configure(text="🔒 RÉESSAYEZ AVEC UNE CARTE VALIDE",
-                                   bg=self.colors['danger'], state=tk.NORMAL,
-                                   command=self.reset_message)
         self.message_status.configure(text="❌ CARTE REFUSÉE - MESSAGE TOUJOURS ACTIF", fg=self.colors['danger'])
 
         # Efface le message après 5 secondes
@@ -0,0 +1,217 @@
+"""Courtier de ports série: plusieurs programmes partagent une même carte ESP8266
+
+    python wave_courtier.py "Étage 1=COM8, Hall=COM4" --tcp 7800 --unix /tmp/wave
+
+Le courtier possède les ports physiques (boucle série partagée, reconnexion
+automatique) et retransmet leur trafic, découpé en lignes et trames binaires
+complètes, à tous ses clients locaux: un port TCP par carte (127.0.0.1:7800,
+7801, ...) et, hors Windows, une socket Unix par carte (/tmp/wave-Étage 1.sock).
+Les interfaces s'y connectent en saisissant socket://127.0.0.1:7800 au lieu de COM8.
+
+Les lignes envoyées par les clients (stopalert, soundon, MSG:...) sont écrites
+sur la carte une par une: deux clients n'entremêlent jamais leurs commandes.
+Chaque client a un tampon d'envoi borné: un client trop lent est déconnecté
+au lieu de retarder la lecture de la carte, et se reconnecte comme après une
+coupure. Pendant une panne de la carte, les clients sont déconnectés et
+refusés, pour que leur statut l'indique.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import wave_binaire
+from wave_multiport import CartePort, LecteurMultiPort, analyser_ports, ouvrir_cartes
+from wave_serie import boucle_serie
+
+HOTE = "127.0.0.1"          # Clients locaux seulement
+PORT_TCP = 7800             # Premier port TCP, puis un de plus par carte
+TAMPON_CLIENT_MAX = 256 * 1024  # Octets en attente d'envoi avant déconnexion d'un client lent
+DELAI_ACCUEIL = 0.2         # pyserial (socket://) vide sa réception juste après s'être connecté
+
+
+def serialiser(element):
+    """Octets d'une ligne (str) ou d'un Evenement, tels que la carte les a émis"""
+    if isinstance(element, str):
+        return element.encode('utf-8') + b"\n"
+    return wave_binaire.encoder_trame(element.type, element.donnees)
+
+
+class ClientCourtier:
+    """Programme connecté à une carte partagée"""
+    __slots__ = ('adresse', 'ecrivain', 'connecte_a', 'octets_envoyes', 'commandes')
+
+    def __init__(self, adresse, ecrivain):
+        self.adresse = adresse
+        self.ecrivain = ecrivain
+        self.connecte_a = time.monotonic()
+        self.octets_envoyes = 0
+        self.commandes = 0
+
+
+class CartePartagee:
+    """Une carte physique, ses points d'accès et ses clients (thread de la boucle série)"""
+
+    def __init__(self, carte, journal):
+        self.carte = carte
+        self.journal = journal
+        self.clients = set()
+        self.adresses = []  # Points d'accès ouverts (socket://127.0.0.1:7800, chemin Unix)
+        self.serveurs = []
+        self.clients_lents = 0
+        self.octets_diffuses = 0
+
+    async def ecouter(self, port_tcp=None, chemin_unix=None):
+        if port_tcp is not None:
+            self.serveurs.append(await asyncio.start_server(self.servir, HOTE, port_tcp))
+            self.adresses.append(f"socket://{HOTE}:{port_tcp}")
+        if chemin_unix is not None:
+            if os.path.exists(chemin_unix):
+                os.unlink(chemin_unix)  # Socket laissée par un courtier arrêté brutalement
+            self.serveurs.append(await asyncio.start_unix_server(self.servir, chemin_unix))
+            self.adresses.append(chemin_unix)
+
+    def fermer(self):
+        for serveur in self.serveurs:
+            serveur.close()
+        for client in list(self.clients):
+            self.deconnecter(client, "arrêt du courtier")
+
+    def diffuser(self, elements):
+        """Envoie un lot à tous les clients sans jamais attendre l'un d'eux"""
+        data = b"".join(serialiser(element) for element in elements)
+        self.octets_diffuses += len(data)
+        for client in list(self.clients):
+            if client.ecrivain.transport.get_write_buffer_size() + len(data) > TAMPON_CLIENT_MAX:
+                self.clients_lents += 1
+                self.deconnecter(client, "trop lent")
+                continue
+            client.ecrivain.write(data)
+            client.octets_envoyes += len(data)
+
+    def deconnecter(self, client, raison):
+        if client in self.clients:
+            self.clients.discard(client)
+            self.journal(f"{self.carte.nom}: client {client.adresse} déconnecté ({raison})")
+        client.ecrivain.close()
+
+    def perdue(self):
+        for client in list(self.clients):
+            self.deconnecter(client, "carte perdue")
+
+    async def servir(self, lecteur, ecrivain):
+        """Un client: reçoit le trafic de la carte, ses lignes sont écrites sur la carte"""
+        adresse = ecrivain.get_extra_info('peername') or "unix"
+        client = ClientCourtier(adresse, ecrivain)
+        await asyncio.sleep(DELAI_ACCUEIL)
+        if not self.carte.actif:
+            ecrivain.close()
+            return
+        if self.carte.lecteur_flux.binaire:
+            # Le client découpe en lignes jusqu'à BIN:OK: il doit savoir que la carte est en binaire
+            ecrivain.write(f"{wave_binaire.REPONSE_ACTIVE}\n".encode())
+        self.clients.add(client)
+        self.journal(f"{self.carte.nom}: client {adresse} connecté ({len(self.clients)} clients)")
+        try:
+            while client in self.clients:
+                ligne = await lecteur.readline()
+                if not ligne.endswith(b"\n"):
+                    break  # Fin de connexion (ligne incomplète abandonnée)
+                client.commandes += 1
+                await self.carte.ecrire_async(ligne)
+        except Exception as e:
+            self.journal(f"{self.carte.nom}: client {adresse}: {str(e) or type(e).__name__}")
+        finally:
+            self.deconnecter(client, "fin de connexion")
+
+
+class Courtier:
+    """Cartes partagées d'un processus, lues par un LecteurMultiPort supervisé"""
+
+    def __init__(self, journal=print):
+        self.journal = journal
+        self.boucle = boucle_serie()
+        self.partagees = {}  # carte -> CartePartagee
+        self.lecteur_ports = None
+
+    def demarrer(self, saisie, binaire=False, port_tcp=PORT_TCP, prefixe_unix=None):
+        """Ouvre les cartes et leurs points d'accès; retourne les erreurs (port, message)"""
+        return self.boucle.executer(self._demarrer(saisie, binaire, port_tcp, prefixe_unix))
+
+    async def _demarrer(self, saisie, binaire, port_tcp, prefixe_unix):
+        initialisation = wave_binaire.COMMANDE_ACTIVER if binaire else None
+        cartes, erreurs = await ouvrir_cartes(CartePort, analyser_ports(saisie), initialisation=initialisation)
+        for rang, carte in enumerate(cartes):
+            partagee = CartePartagee(carte, self.journal)
+            try:
+                await partagee.ecouter(port_tcp + rang if port_tcp is not None else None,
+                                       f"{prefixe_unix}-{carte.nom}.sock" if prefixe_unix else None)
+            except OSError as e:
+                erreurs.append((carte.port, f"point d'accès: {e}"))
+                partagee.fermer()
+                await carte.fermer_async()
+                continue
+            self.partagees[carte] = partagee
+        if self.partagees:
+            self.lecteur_ports = LecteurMultiPort(list(self.partagees), self.livrer, self.perte,
+                                                  self.boucle, self.reprise, initialisation)
+            self.lecteur_ports.demarrer()
+        return erreurs
+
+    def arreter(self):
+        for partagee in self.partagees.values():
+            self.boucle.appeler(partagee.fermer)
+        if self.lecteur_ports is not None:
+            return self.lecteur_ports.arreter()
+        return None
+
+    # Rappels du LecteurMultiPort (thread de la boucle série)
+
+    def livrer(self, carte, elements):
+        self.partagees[carte].diffuser(elements)
+
+    def perte(self, carte, erreur):
+        self.journal(f"{carte.nom}: carte perdue ({erreur}), reconnexion automatique")
+        self.partagees[carte].perdue()
+
+    def reprise(self, carte, duree):
+        self.journal(f"{carte.nom}: carte reconnectée sur {carte.port} après {duree:.1f} s")
+
+    def resume(self):
+        lignes = []
+        for partagee in self.partagees.values():
+            lignes.append(f"{partagee.carte.nom} ({partagee.carte.port}): {' • '.join(partagee.adresses)} - "
+                          f"{len(partagee.clients)} clients, {partagee.octets_diffuses} octets diffusés, "
+                          f"{partagee.clients_lents} clients lents déconnectés")
+        return "\n".join(lignes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Courtier WAVE-CONNECT: partage des ports série")
+    parser.add_argument('ports', help="'COM8' ou 'Étage 1=COM8, Hall=COM4'")
+    parser.add_argument('--tcp', type=int, default=PORT_TCP, metavar='PORT',
+                        help=f"premier port TCP local, un par carte (défaut {PORT_TCP})")
+    parser.add_argument('--unix', metavar='PREFIXE', help="sockets Unix PREFIXE-<nom>.sock (Linux/macOS)")
+    parser.add_argument('--binaire', action='store_true', help="négocie le mode binaire compact")
+    args = parser.parse_args()
+
+    courtier = Courtier(journal=lambda texte: print(texte, flush=True))
+    for port, erreur in courtier.demarrer(args.ports, args.binaire, args.tcp, args.unix):
+        print(f"{port}: {erreur}")
+    if not courtier.partagees:
+        raise SystemExit(1)
+    print(courtier.resume(), flush=True)
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(courtier.resume())
+        arret = courtier.arreter()
+        if arret is not None:
+            arret.result(2.0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Démarrage rapide des interfaces: logo réduit en cache et construction différée
+
+La réduction LANCZOS d'un logo demande PIL (~35 ms d'import) et se refaisait à
+chaque lancement. Le logo réduit est maintenant écrit une fois pour toutes à
+côté de l'original (`logo-80x80.png`), ou dans le dossier de cache de
+l'utilisateur si celui de l'application est en lecture seule, et relu par
+tk.PhotoImage, qui lit le PNG sans PIL. build_wave.bat les prépare avant
+d'empaqueter les exécutables:
+
+    python wave_demarrage.py
+
+Les interfaces affichent d'abord l'en-tête et le panneau de connexion, puis
+construisent le reste (journal, statistiques, file d'envoi) juste après le
+premier rendu de la fenêtre (apres_premier_affichage).
+"""
+import os
+import sys
+import tkinter as tk
+
+# (noms de fichiers essayés, taille maximale) de chaque interface
+LOGO_EMETTEUR = (("logo.png",), (80, 80))
+LOGO_RECEPTEUR = (("WAVE-CONNECT.png", "logo.png", "WAVE.png"), (120, 80))
+
+
+def dossier_application():
+    """Dossier des fichiers livrés avec le script ou l'exécutable PyInstaller"""
+    return getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+
+
+def dossier_cache():
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser("~")
+        return os.path.join(base, "WAVE-CONNECT", "cache")
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser("~/.cache"), "wave-connect")
+
+
+def nom_reduit(chemin, taille):
+    base, _ = os.path.splitext(os.path.basename(chemin))
+    return f"{base}-{taille[0]}x{taille[1]}.png"
+
+
+def image_reduite(chemin, taille):
+    """Chemin d'une copie PNG de `chemin` réduite à `taille` (ratio conservé), créée au besoin
+
+    Une copie plus ancienne que l'original est refaite. Retourne None si
+    aucune copie n'existe et que PIL est absent ou que rien n'est inscriptible.
+    """
+    nom = nom_reduit(chemin, taille)
+    source_mtime = os.path.getmtime(chemin) if os.path.exists(chemin) else 0.0
+    candidats = [os.path.join(os.path.dirname(chemin), nom), os.path.join(dossier_cache(), nom)]
+    for candidat in candidats:
+        if os.path.exists(candidat) and os.path.getmtime(candidat) >= source_mtime:
+            return candidat
+    if not source_mtime:
+        return None
+    try:
+        from PIL import Image  # Seulement pour (re)faire le cache
+    except ImportError:
+        return None
+    image = Image.open(chemin)
+    image.thumbnail(taille, Image.Resampling.LANCZOS)
+    for candidat in candidats:
+        try:
+            os.makedirs(os.path.dirname(candidat), exist_ok=True)
+            image.save(candidat, "PNG", optimize=True)
+            return candidat
+        except OSError:
+            continue  # Dossier de l'application en lecture seule: cache utilisateur
+    return None
+
+
+def charger_logo(noms, taille, couleur, dossiers=None):
+    """(tk.PhotoImage, nom du fichier) du premier logo trouvé, ou un aplat `couleur` et None"""
+    for dossier in dossiers or (dossier_application(),):
+        for nom in noms:
+            chemin = os.path.join(dossier, nom)
+            try:
+                reduite = image_reduite(chemin, taille)
+                if reduite is not None:
+                    return tk.PhotoImage(file=reduite), nom
+            except Exception as e:
+                print(f"Erreur chargement logo {nom}: {e}")
+    image = tk.PhotoImage(width=taille[0], height=taille[1])
+    image.put(couleur, to=(0, 0, taille[0], taille[1]))
+    return image, None
+
+
+def apres_premier_affichage(root, fonction):
+    """Appelle `fonction` une fois, quand la fenêtre est affichée et dessinée"""
+    fait = []
+    def affichee(event):
+        # <Map> des widgets enfants aussi (liaison de la fenêtre principale). Pas
+        # de unbind: avant Python 3.13 il retire toutes les liaisons <Map>
+        if event.widget is not root or fait:
+            return
+        fait.append(True)
+        # Les rendus en attente passent avant le reste de la construction
+        root.after_idle(lambda: root.after(1, fonction))
+    root.bind('<Map>', affichee, add='+')
+
+
+def preparer_logos():
+    """Réduit les logos présents (build_wave.bat, avant PyInstaller); retourne les fichiers créés"""
+    crees = []
+    for noms, taille in (LOGO_EMETTEUR, LOGO_RECEPTEUR):
+        for nom in noms:
+            chemin = os.path.join(dossier_application(), nom)
+            if os.path.exists(chemin):
+                reduite = image_reduite(chemin, taille)
+                if reduite is not None:
+                    crees.append(reduite)
+    return crees
+
+
+if __name__ == '__main__':
+    for chemin in preparer_logos():
+        print(f"Logo réduit: {chemin}")
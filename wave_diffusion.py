@@ -0,0 +1,115 @@
+"""Diffusion d'une alerte vers un groupe de cartes émettrices
+
+Le message est écrit en parallèle sur tous les ports (coroutines de la boucle
+série partagée, voir wave_serie). Chaque carte acquitte
+séparément les étapes (message défini, carte RFID autorisée, transmission
+433MHz terminée) et le délai depuis l'envoi est mesuré pour chacune.
+"""
+import asyncio
+import time
+
+from wave_multiport import CartePort
+from wave_serie import boucle_serie
+
+# Étapes acquittées par le firmware transmetteur, dans l'ordre
+MESSAGE_DEFINI = 'message_defini'
+CARTE_AUTORISEE = 'carte_autorisee'
+CARTE_REFUSEE = 'carte_refusee'
+TRANSMISSION_OK = 'transmission_ok'
+LIBELLES_ETAPES = {
+    MESSAGE_DEFINI: "défini",
+    CARTE_AUTORISEE: "autorisé",
+    CARTE_REFUSEE: "refusé",
+    TRANSMISSION_OK: "transmis",
+}
+
+
+def formater_delai(secondes):
+    if secondes < 1.0:
+        return f"{secondes * 1000:.0f} ms"
+    return f"{secondes:.2f} s"
+
+
+class Emetteur(CartePort):
+    """Une carte émettrice et les acquittements du dernier message diffusé"""
+
+    def __init__(self, nom, port, connexion):
+        super().__init__(nom, port, connexion)
+        self.envoye_a = None     # perf_counter juste avant l'écriture du dernier message
+        self.acquittements = {}  # étape -> délai depuis l'envoi (s)
+        self.erreur_envoi = None
+
+    def acquitter(self, etape, maintenant=None):
+        """Enregistre une étape; retourne le délai depuis l'envoi (None hors diffusion)"""
+        if self.envoye_a is None:
+            return None
+        if maintenant is None:
+            maintenant = time.perf_counter()
+        # Un refus peut précéder l'autorisation d'une autre carte RFID: seule la
+        # première occurrence de chaque étape compte
+        return self.acquittements.setdefault(etape, maintenant - self.envoye_a)
+
+    def resume(self):
+        """'COM4: défini 12 ms • autorisé 2.31 s' pour l'affichage"""
+        if self.erreur_envoi is not None:
+            return f"{self.nom}: ❌ {self.erreur_envoi}"
+        if not self.actif:
+            return f"{self.nom}: perdu depuis {formater_delai(self.panne_en_cours())}, reconnexion..."
+        if self.envoye_a is None:
+            return f"{self.nom}: prêt"
+        if not self.acquittements:
+            return f"{self.nom}: en attente"
+        etapes = sorted(self.acquittements.items(), key=lambda item: item[1])
+        return f"{self.nom}: " + " • ".join(f"{LIBELLES_ETAPES[etape]} {formater_delai(delai)}"
+                                          for etape, delai in etapes)
+
+
+class GroupeEmetteurs:
+    """Pool de cartes émettrices recevant le même message"""
+
+    def __init__(self, emetteurs, boucle=None):
+        self.emetteurs = list(emetteurs)
+        self.boucle = boucle if boucle is not None else boucle_serie()
+
+    def __len__(self):
+        return len(self.emetteurs)
+
+    def actifs(self):
+        return [emetteur for emetteur in self.emetteurs if emetteur.actif]
+
+    def diffuser(self, data, emetteurs=None):
+        """Écrit `data` sur les cartes actives (toutes ou `emetteurs`) en parallèle; retourne le nombre de réussites
+
+        Les acquittements du message précédent sont remis à zéro. L'attente
+        est bornée par TIMEOUT_ECRITURE (une carte bloquée échoue seule).
+        """
+        actifs = self.actifs() if emetteurs is None else [emetteur for emetteur in emetteurs if emetteur.actif]
+        for emetteur in actifs:
+            emetteur.acquittements = {}
+            emetteur.erreur_envoi = None
+        resultats = self.boucle.executer(self.diffuser_async(actifs, data))
+
+        reussites = 0
+        for emetteur, resultat in zip(actifs, resultats):
+            if isinstance(resultat, Exception):
+                emetteur.erreur_envoi = str(resultat) or type(resultat).__name__
+                emetteur.envoye_a = None
+            else:
+                reussites += 1
+        return reussites
+
+    async def diffuser_async(self, emetteurs, data):
+        """Écritures parallèles; retourne le résultat (None ou exception) de chaque carte"""
+        async def ecrire(emetteur):
+            emetteur.envoye_a = time.perf_counter()
+            await emetteur.ecrire_async(data)
+
+        return await asyncio.gather(*(ecrire(emetteur) for emetteur in emetteurs), return_exceptions=True)
+
+    def nb_acquittes(self, etape):
+        return sum(1 for emetteur in self.emetteurs if etape in emetteur.acquittements)
+
+    def nb_en_diffusion(self):
+        """Cartes auxquelles le dernier message a bien été écrit"""
+        return sum(1 for emetteur in self.emetteurs if emetteur.envoye_a is not None and emetteur.actif)
+
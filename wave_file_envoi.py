@@ -0,0 +1,116 @@
+"""File d'envoi des alertes par priorité (émetteur)
+
+Les cartes émettrices ne gardent qu'un message à la fois: la file garde les
+suivants. Le plus urgent passe en tête (à priorité égale, le plus ancien), un
+message identique déjà en file n'est pas ajouté deux fois (redéposé plus
+urgent, il est relevé à sa nouvelle priorité), et un message établi qui n'est pas acquitté est renvoyé avec un délai doublé
+à chaque essai.
+"""
+import collections
+import heapq
+import itertools
+
+URGENT = 0
+IMPORTANT = 1
+ROUTINE = 2
+NOMS_PRIORITES = {URGENT: "URGENT", IMPORTANT: "IMPORTANT", ROUTINE: "ROUTINE"}
+SYMBOLES_PRIORITES = {URGENT: "🔴", IMPORTANT: "🟠", ROUTINE: "⚪"}
+
+DELAI_ACQUITTEMENT = 3.0  # Secondes pour que toutes les cartes acquittent MSG:
+ATTENTE_INITIALE = 1.0    # Premier délai avant renvoi, doublé à chaque essai
+ATTENTE_MAX = 30.0
+ATTENTES_MEMORISEES = 1000  # Attentes gardées par priorité pour l'affichage
+
+
+class AlerteEnFile:
+    """Message en attente d'envoi, avec son historique d'essais"""
+    __slots__ = ('message', 'priorite', 'depose_a', 'sequence', 'doublons',
+                 'tentatives', 'etabli_a', 'prochain_essai')
+
+    def __init__(self, message, priorite, depose_a, sequence):
+        self.message = message
+        self.priorite = priorite
+        self.depose_a = depose_a
+        self.sequence = sequence
+        self.doublons = 0          # Dépôts identiques fusionnés
+        self.tentatives = 0        # Envois MSG: aux cartes
+        self.etabli_a = None       # Dernier envoi MSG:
+        self.prochain_essai = 0.0  # Pas de renvoi avant cet instant
+
+    def cle(self):
+        return (self.priorite, self.sequence)
+
+    def attente(self, maintenant):
+        return maintenant - self.depose_a
+
+    def delai_renvoi(self):
+        """Délai avant le prochain essai après `tentatives` échecs"""
+        return min(ATTENTE_INITIALE * 2 ** max(0, self.tentatives - 1), ATTENTE_MAX)
+
+    def resume(self, maintenant):
+        return (f"{SYMBOLES_PRIORITES[self.priorite]} {NOMS_PRIORITES[self.priorite]} "
+                f"'{self.message}' ({self.attente(maintenant):.0f} s)")
+
+    def __repr__(self):
+        return f"AlerteEnFile({self.message!r}, {NOMS_PRIORITES[self.priorite]}, essais={self.tentatives})"
+
+
+class FileEnvoi:
+    """Tas de priorité (priorité, ordre d'arrivée) avec fusion des doublons"""
+
+    def __init__(self):
+        self.tas = []
+        self.index = {}  # message -> alerte en file
+        self.compteur = itertools.count()
+
+        # Dernières attentes constatées au moment de l'envoi réussi, par priorité
+        self.attentes = {priorite: collections.deque(maxlen=ATTENTES_MEMORISEES)
+                         for priorite in NOMS_PRIORITES}
+
+    def __len__(self):
+        return len(self.tas)
+
+    def deposer(self, message, priorite, maintenant):
+        """Ajoute un message; retourne (alerte, fusionné avec une alerte déjà en file)
+
+        Un message déjà en file à une priorité moindre y est relevé, à son rang
+        d'arrivée, plutôt que déposé une seconde fois.
+        """
+        existante = self.index.get(message)
+        if existante is not None:
+            existante.doublons += 1
+            if priorite < existante.priorite:
+                existante.priorite = priorite
+                self.tas = [(alerte.cle(), alerte) for _, alerte in self.tas]
+                heapq.heapify(self.tas)
+            return existante, True
+        alerte = AlerteEnFile(message, priorite, maintenant, next(self.compteur))
+        self.remettre(alerte)
+        return alerte, False
+
+    def remettre(self, alerte):
+        """Replace une alerte (préemptée) à son rang d'origine"""
+        heapq.heappush(self.tas, (alerte.cle(), alerte))
+        self.index[alerte.message] = alerte
+
+    def tete(self):
+        return self.tas[0][1] if self.tas else None
+
+    def extraire(self):
+        _, alerte = heapq.heappop(self.tas)
+        del self.index[alerte.message]
+        return alerte
+
+    def contient(self, message):
+        return message in self.index
+
+    def elements(self):
+        """Alertes dans l'ordre d'envoi"""
+        return [alerte for _, alerte in sorted(self.tas)]
+
+    def vider(self):
+        self.tas = []
+        self.index = {}
+
+    def noter_envoi(self, alerte, maintenant):
+        self.attentes[alerte.priorite].append(alerte.attente(maintenant))
@@ -0,0 +1,189 @@
+"""Stockage en mémoire des messages reçus (le journal affiché n'en est qu'une vue)"""
+import time
+
+CAPACITE_JOURNAL = 100000  # Une garde complète; la vue virtualisée n'affiche que la fenêtre visible
+SEPARATEUR_STATION = "@"   # Source d'un message relayé: "Étage 1@Poste B" (wave_relais)
+FENETRE_REGROUPEMENT = 60.0  # Secondes: une répétition plus proche du dernier passage est regroupée
+
+
+def cle_regroupement(texte, source):
+    """Même alerte de la même carte, à la casse et aux espaces près"""
+    return (source, " ".join(texte.split()).casefold())
+
+
+class EntreeJournal:
+    """Message reçu; `iid` est son identifiant sous forme de chaîne pour les vues Tk"""
+    __slots__ = ('id', 'recu_a', 'heure', 'texte', 'non_lu', 'source', 'occurrences', 'vu_a')
+
+    def __init__(self, id_, recu_a, heure, texte, non_lu=True, source="", occurrences=1, vu_a=None):
+        self.id = id_
+        self.recu_a = recu_a  # Horodatage epoch de réception
+        self.heure = heure
+        self.texte = texte
+        self.non_lu = non_lu
+        self.source = source  # Nom du récepteur qui a reçu le message
+        self.occurrences = occurrences  # Réceptions regroupées sur cette ligne
+        self.vu_a = recu_a if vu_a is None else vu_a  # Dernière réception
+
+    @property
+    def libelle(self):
+        """Texte affiché: le message, suivi du nombre de réceptions s'il est répété"""
+        if self.occurrences == 1:
+            return self.texte
+        return f"{self.texte}  (×{self.occurrences}, dernière {time.strftime('%H:%M:%S', time.localtime(self.vu_a))})"
+
+    @property
+    def station(self):
+        """Station distante d'un message relayé, "" pour un message reçu ici"""
+        return self.source.rpartition(SEPARATEUR_STATION)[2] if SEPARATEUR_STATION in self.source else ""
+
+    @property
+    def iid(self):
+        return str(self.id)
+
+    @property
+    def statut(self):
+        return '🚨' if self.non_lu else '✅'
+
+
+class MagasinMessages:
+    """Tampon circulaire de capacité fixe, index id -> entrée et ensemble des non lus
+
+    Ajout, éviction, marquage lu, recherche et accès par position sont en O(1).
+    Les répétitions d'une alerte (même texte normalisé, même carte) à moins de
+    `fenetre_regroupement` secondes de son dernier passage sont regroupées sur
+    sa ligne (recevoir); 0 désactive le regroupement.
+    """
+
+    def __init__(self, capacite=CAPACITE_JOURNAL, fenetre_regroupement=FENETRE_REGROUPEMENT):
+        self.capacite = capacite
+        self.fenetre_regroupement = fenetre_regroupement
+        self.prochain_id = 1
+        self.vider()
+
+    def vider(self):
+        self.anneau = [None] * self.capacite
+        self.tete = 0  # Emplacement de la plus ancienne entrée
+        self.taille = 0
+        self.par_id = {}
+        self.non_lus = set()
+        self.par_cle = {}  # cle_regroupement -> dernière entrée de ce message
+
+    def __len__(self):
+        return self.taille
+
+    def __iter__(self):
+        """Parcourt les entrées de la plus ancienne à la plus récente"""
+        for i in range(self.taille):
+            yield self.anneau[(self.tete + i) % self.capacite]
+
+    def __getitem__(self, index):
+        """Entrée à la position `index` (0 = plus ancienne), en O(1)"""
+        if index < 0:
+            index += self.taille
+        if not 0 <= index < self.taille:
+            raise IndexError(index)
+        return self.anneau[(self.tete + index) % self.capacite]
+
+    def __contains__(self, id_):
+        return id_ in self.par_id
+
+    @property
+    def nb_non_lus(self):
+        return len(self.non_lus)
+
+    def get(self, id_):
+        return self.par_id.get(id_)
+
+    def ajouter(self, texte, heure, recu_a, id_=None, non_lu=True, source="", occurrences=1, vu_a=None):
+        """Ajoute un message (non lu par défaut); retourne (entrée, entrée évincée ou None)
+
+        `id_` permet de restaurer une entrée persistée avec son identifiant d'origine.
+        """
+        if id_ is None:
+            id_ = self.prochain_id
+        self.prochain_id = max(self.prochain_id, id_ + 1)
+        entree = EntreeJournal(id_, recu_a, heure, texte, non_lu, source, occurrences, vu_a)
+
+        evincee = None
+        if self.taille == self.capacite:
+            evincee = self.anneau[self.tete]
+            del self.par_id[evincee.id]
+            self.non_lus.discard(evincee.id)
+            cle = cle_regroupement(evincee.texte, evincee.source)
+            if self.par_cle.get(cle) is evincee:
+                del self.par_cle[cle]
+            self.anneau[self.tete] = entree
+            self.tete = (self.tete + 1) % self.capacite
+        else:
+            self.anneau[(self.tete + self.taille) % self.capacite] = entree
+            self.taille += 1
+
+        self.par_id[entree.id] = entree
+        self.par_cle[cle_regroupement(texte, source)] = entree
+        if non_lu:
+            self.non_lus.add(entree.id)
+        return entree, evincee
+
+    def recevoir(self, texte, heure, recu_a, source=""):
+        """Ajoute un message reçu ou le regroupe avec sa ligne récente
+
+        Retourne (entrée, entrée évincée ou None, regroupé). Une répétition
+        incrémente le compteur, avance la dernière réception et réactive
+        l'alerte si elle avait été arrêtée (la carte clignote de nouveau).
+        """
+        if self.fenetre_regroupement > 0:
+            existante = self.par_cle.get(cle_regroupement(texte, source))
+            if existante is not None and recu_a - existante.vu_a <= self.fenetre_regroupement:
+                self.repeter(existante, recu_a)
+                return existante, None, True
+        entree, evincee = self.ajouter(texte, heure, recu_a, source=source)
+        return entree, evincee, False
+
+    def repeter(self, entree, vu_a, occurrences=None):
+        """Compte une réception de plus (ou `occurrences` au total) et réactive l'alerte"""
+        entree.occurrences = entree.occurrences + 1 if occurrences is None else occurrences
+        entree.vu_a = vu_a
+        entree.non_lu = True
+        self.non_lus.add(entree.id)
+
+    def est_non_lu(self, id_):
+        return id_ in self.non_lus
+
+    def marquer_lu(self, id_):
+        """Marque un message comme lu; retourne False s'il l'était déjà ou n'existe plus"""
+        if id_ not in self.non_lus:
+            return False
+        self.non_lus.discard(id_)
+        self.par_id[id_].non_lu = False
+        return True
+
+
+class ResultatsRecherche:
+    """Entrées rendues par une recherche, présentées comme un magasin en lecture seule
+
+    Une entrée encore en mémoire est partagée avec le magasin pour que son statut
+    lu/non lu reste synchronisé; les plus anciennes sont reconstruites depuis le disque.
+    """
+
+    def __init__(self, lignes, magasin):
+        self.entrees = []
+        for id_, recu_a, heure, texte, non_lu, source, occurrences, vu_a in lignes:
+            entree = magasin.get(id_)
+            if entree is None:
+                entree = EntreeJournal(id_, recu_a, heure, texte, bool(non_lu), source, occurrences, vu_a)
+            self.entrees.append(entree)
+        self.entrees.sort(key=lambda entree: entree.id)
+        self.ids = {entree.id for entree in self.entrees}
+
+    def __len__(self):
+        return len(self.entrees)
+
+    def __iter__(self):
+        return iter(self.entrees)
+
+    def __getitem__(self, index):
+        return self.entrees[index]
+
+    def __contains__(self, id_):
+        return id_ in self.ids
@@ -0,0 +1,205 @@
+"""Métriques au format texte Prometheus, servies sur http://<station>:<port>/metrics
+
+    python wave_client_recepteur.py "Étage 1=COM8" --metriques 9810
+    set WAVE_METRIQUES=9810 (interfaces Tk: variable d'environnement)
+
+Les clients comptent dans leur thread de traitement (additions sur des
+dictionnaires, sans verrou); le serveur HTTP tourne dans un thread à part et
+relève les valeurs à chaque collecte. Les compteurs que les cartes tiennent
+déjà (octets lus, pannes, reprises) sont lus sur les cartes par un collecteur
+au moment de la requête plutôt que recopiés.
+"""
+import bisect
+import os
+import threading
+
+PORT_RECEPTEUR = 9810
+PORT_EMETTEUR = 9811
+VARIABLE_PORT = "WAVE_METRIQUES"
+TYPE_CONTENU = "text/plain; version=0.0.4; charset=utf-8"
+
+ECHANTILLON_ANALYSE = 16  # Une ligne sur 16 chronométrée: deux perf_counter coûtent autant que l'analyse
+
+# Bornes (secondes) des histogrammes: analyse d'une ligne (µs), traitement d'un lot (ms)
+BORNES_ANALYSE = (1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 5e-4, 1e-3)
+BORNES_LOT = (1e-4, 5e-4, 1e-3, 2e-3, 5e-3, 1e-2, 2e-2, 5e-2, 0.1, 0.5)
+BORNES_DELAI = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def port_environnement(defaut):
+    """Port de WAVE_METRIQUES ('9810', ou '1'/'oui' pour `defaut`); None si absente ou vide"""
+    valeur = os.environ.get(VARIABLE_PORT, "").strip()
+    if not valeur or valeur.lower() in ("0", "non", "no", "false"):
+        return None
+    if valeur.lower() in ("1", "oui", "yes", "true"):
+        return defaut
+    return int(valeur)
+
+
+def _echapper(valeur):
+    return str(valeur).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquettes(noms, valeurs, supplement=""):
+    paires = [f'{nom}="{_echapper(valeur)}"' for nom, valeur in zip(noms, valeurs)]
+    if supplement:
+        paires.append(supplement)
+    return "{" + ",".join(paires) + "}" if paires else ""
+
+
+def _nombre(valeur):
+    if valeur == float('inf'):
+        return "+Inf"
+    return repr(float(valeur)) if isinstance(valeur, float) else str(valeur)
+
+
+class Compteur:
+    """Compteur (ou jauge) par combinaison de valeurs d'étiquettes"""
+
+    def __init__(self, nom, aide, etiquettes=(), type_='counter'):
+        self.nom = nom
+        self.aide = aide
+        self.etiquettes = tuple(etiquettes)
+        self.type = type_
+        self.valeurs = {}  # (valeurs des étiquettes) -> nombre
+
+    def inc(self, *etiquettes, n=1):
+        self.valeurs[etiquettes] = self.valeurs.get(etiquettes, 0) + n
+
+    def fixer(self, valeur, *etiquettes):
+        self.valeurs[etiquettes] = valeur
+
+    def exposer(self):
+        lignes = [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} {self.type}"]
+        # list(): copie d'un bloc sous le GIL, le thread de traitement peut ajouter une série
+        for valeurs, nombre in sorted(list(self.valeurs.items())):
+            lignes.append(f"{self.nom}{_etiquettes(self.etiquettes, valeurs)} {_nombre(nombre)}")
+        return lignes
+
+
+class Histogramme:
+    """Répartition de valeurs observées (durées en secondes) par combinaison d'étiquettes"""
+
+    def __init__(self, nom, aide, bornes, etiquettes=()):
+        self.nom = nom
+        self.aide = aide
+        self.bornes = tuple(bornes)
+        self.etiquettes = tuple(etiquettes)
+        self.series = {}  # (valeurs des étiquettes) -> [effectifs par borne puis +Inf, somme]
+
+    def observer(self, valeur, *etiquettes):
+        serie = self.series.get(etiquettes)
+        if serie is None:
+            serie = self.series[etiquettes] = [[0] * (len(self.bornes) + 1), 0.0]
+        serie[0][bisect.bisect_left(self.bornes, valeur)] += 1
+        serie[1] += valeur
+
+    def exposer(self):
+        lignes = [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} histogram"]
+        for valeurs, (effectifs, somme) in sorted(list(self.series.items())):
+            cumul = 0
+            for borne, effectif in zip(self.bornes + (float('inf'),), list(effectifs)):
+                cumul += effectif
+                le = f'le="{_nombre(borne)}"'
+                lignes.append(f"{self.nom}_bucket{_etiquettes(self.etiquettes, valeurs, le)} {cumul}")
+            lignes.append(f"{self.nom}_sum{_etiquettes(self.etiquettes, valeurs)} {somme!r}")
+            lignes.append(f"{self.nom}_count{_etiquettes(self.etiquettes, valeurs)} {cumul}")
+        return lignes
+
+
+class Registre:
+    """Métriques d'un processus et collecteurs relus à chaque requête"""
+
+    def __init__(self):
+        self.metriques = []
+        self.collecteurs = []  # fonction() -> [Compteur ou Histogramme] remplis au moment de la collecte
+
+    def compteur(self, nom, aide, etiquettes=()):
+        return self._ajouter(Compteur(nom, aide, etiquettes))
+
+    def jauge(self, nom, aide, etiquettes=()):
+        return self._ajouter(Compteur(nom, aide, etiquettes, 'gauge'))
+
+    def histogramme(self, nom, aide, bornes, etiquettes=()):
+        return self._ajouter(Histogramme(nom, aide, bornes, etiquettes))
+
+    def _ajouter(self, metrique):
+        self.metriques.append(metrique)
+        return metrique
+
+    def collecter(self, fonction):
+        self.collecteurs.append(fonction)
+
+    def exposer(self):
+        """Texte de la page /metrics"""
+        metriques = list(self.metriques)
+        for collecteur in self.collecteurs:
+            metriques.extend(collecteur())
+        lignes = []
+        for metrique in metriques:
+            lignes.extend(metrique.exposer())
+        return "\n".join(lignes) + "\n"
+
+
+def metriques_cartes(cartes):
+    """Métriques lues sur des CartePort (wave_multiport): octets, pannes et reprises par carte"""
+    octets = Compteur("wave_octets_lus_total", "Octets lus sur le port de la carte", ("carte",))
+    connectee = Compteur("wave_carte_connectee", "1 si le port de la carte est lu, 0 pendant une panne",
+                         ("carte", "port"), 'gauge')
+    pertes = Compteur("wave_pertes_total", "Ports perdus (lecture impossible)", ("carte",))
+    reprises = Compteur("wave_reprises_total", "Ports relancés après une perte", ("carte",))
+    tentatives = Compteur("wave_tentatives_reprise_total", "Réouvertures essayées pendant les pannes", ("carte",))
+    indisponibilite = Compteur("wave_indisponibilite_secondes_total",
+                               "Secondes sans lecture possible depuis la connexion", ("carte",))
+    for carte in cartes:
+        octets.fixer(carte.octets_lus, carte.nom)
+        connectee.fixer(int(carte.actif), carte.nom, carte.port)
+        pannes = len(carte.pannes)
+        pertes.fixer(pannes + (carte.perdue_depuis is not None), carte.nom)
+        reprises.fixer(pannes, carte.nom)
+        tentatives.fixer(carte.tentatives_reprise, carte.nom)
+        indisponibilite.fixer(round(carte.indisponibilite(), 3), carte.nom)
+    return [octets, connectee, pertes, reprises, tentatives, indisponibilite]
+
+
+class ServeurMetriques:
+    """Point d'accès HTTP /metrics d'un Registre, dans son propre thread"""
+
+    def __init__(self, registre, port, hote=""):
+        self.registre = registre
+        self.port = port
+        self.hote = hote  # Toutes les interfaces: la collecte se fait depuis un poste central
+        self.serveur = None
+        self.requetes = 0
+
+    def demarrer(self):
+        """Écoute le port (OSError s'il est pris) et sert les requêtes en tâche de fond"""
+        # Importé ici: http.server n'est pas chargé au démarrage des interfaces sans métriques
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metriques = self
+
+        class Requete(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                metriques.requetes += 1
+                corps = metriques.registre.exposer().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", TYPE_CONTENU)
+                self.send_header("Content-Length", str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+            def log_message(self, format, *args):
+                pass  # Une ligne par collecte n'a rien à faire sur la console
+
+        self.serveur = ThreadingHTTPServer((self.hote, self.port), Requete)
+        self.serveur.daemon_threads = True
+        threading.Thread(target=self.serveur.serve_forever, daemon=True, name='metriques').start()
+
+    def arreter(self):
+        if self.serveur is not None:
+            self.serveur.shutdown()
+            self.serveur.server_close()
+            self.serveur = None
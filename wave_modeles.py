@@ -0,0 +1,80 @@
+"""Modèles d'alerte partagés par l'émetteur et le récepteur
+
+Un message conforme à un modèle part en un seul code radio au lieu de la
+trame complète:
+    0xFDIIAABB          modèle II, paramètre de 0 à 2 caractères AA BB (0: absent)
+Le transmetteur l'émet deux fois à 50 ms d'intervalle; chaque émission dure
+~170 ms (répétitions RCSwitch), la copie arrive donc ~220 ms après l'original,
+au-delà de la déduplication des paquets (200 ms). Le firmware récepteur et le
+PC l'écartent comme copie d'un modèle déjà reçu (même code en moins d'une
+seconde): elle ne sert qu'en cas de perte de la première.
+
+Les numéros sont fixes: un modèle retiré laisse son numéro libre, un modèle
+modifié doit changer de numéro pour que les anciens récepteurs ne l'affichent
+pas avec un autre texte.
+"""
+import re
+
+CODE_MODELE = 0xFD
+TAILLE_MAX_PARAMETRE = 2
+CARACTERES_PARAMETRE = "A-Z0-9"
+
+
+class Modele:
+    """Texte d'alerte standard, avec au plus un paramètre court ({})"""
+    __slots__ = ('numero', 'nom', 'texte', 'motif')
+
+    def __init__(self, numero, nom, texte):
+        self.numero = numero
+        self.nom = nom
+        self.texte = texte
+        # Texte exact, le paramètre remplaçant {}
+        avant, _, apres = texte.partition("{}")
+        parametre = f"([{CARACTERES_PARAMETRE}]{{1,{TAILLE_MAX_PARAMETRE}}})" if "{}" in texte else ""
+        self.motif = re.compile(re.escape(avant) + parametre + re.escape(apres))
+
+    def developper(self, parametre=""):
+        return self.texte.replace("{}", parametre)
+
+    def __repr__(self):
+        return f"Modele({self.numero}, {self.nom!r}, {self.texte!r})"
+
+
+MODELES = (
+    Modele(1, "Évacuation", "EVACUATION IMMEDIATE - BATIMENT {}"),
+    Modele(2, "Évacuation d'un étage", "EVACUATION ETAGE {} - PAR LES ESCALIERS"),
+    Modele(3, "Confinement", "CONFINEMENT - RESTEZ A L'INTERIEUR"),
+    Modele(4, "Incendie", "ALERTE INCENDIE - BATIMENT {}"),
+    Modele(5, "Rassemblement", "REJOIGNEZ LE POINT DE RASSEMBLEMENT {}"),
+    Modele(6, "Exercice", "EXERCICE - EVACUATION BATIMENT {}"),
+    Modele(7, "Fin d'alerte", "FIN D'ALERTE - RETOUR A LA NORMALE"),
+)
+PAR_NUMERO = {modele.numero: modele for modele in MODELES}
+
+
+def reconnaitre(texte):
+    """(modèle, paramètre) si `texte` est exactement un modèle, sinon None"""
+    for modele in MODELES:
+        correspondance = modele.motif.fullmatch(texte)
+        if correspondance is not None:
+            return modele, (correspondance.group(1) if correspondance.groups() else "")
+    return None
+
+
+def encoder_modele(modele, parametre=""):
+    """Code radio 32 bits d'un modèle et de son paramètre"""
+    octets = parametre.encode('ascii')[:TAILLE_MAX_PARAMETRE].ljust(TAILLE_MAX_PARAMETRE, b"\x00")
+    return CODE_MODELE << 24 | modele.numero << 16 | octets[0] << 8 | octets[1]
+
+
+def decoder_modele(code):
+    """(modèle ou None si inconnu, numéro, paramètre) d'un code 0xFD..."""
+    numero = (code >> 16) & 0xFF
+    parametre = "".join(chr(octet) for octet in ((code >> 8) & 0xFF, code & 0xFF) if 32 <= octet <= 126)
+    return PAR_NUMERO.get(numero), numero, parametre
+
+
+def annonce_firmware(code):
+    """Texte annoncé par recepteur.cpp (ligne ✅) pour un code 0xFD...: MODELE n [paramètre]"""
+    _, numero, parametre = decoder_modele(code)
+    return f"MODELE {numero} {parametre}".strip()
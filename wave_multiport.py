@@ -0,0 +1,299 @@
+"""Surveillance de plusieurs cartes ESP8266 (récepteurs ou émetteurs) depuis un seul processus
+
+Chaque carte garde son propre état de décodage (flux série, trames radio) et
+ses compteurs. Tous les ports sont lus dans la boucle série partagée
+(wave_serie): `add_reader` quand le port expose un descripteur (Linux/macOS, y
+compris les pty de test), sinon une lecture bloquante dans un thread (Windows,
+où les ports COM ne sont pas sélectionnables): read(1) attend le premier octet
+jusqu'au timeout du port, sans scrutation périodique.
+"""
+import asyncio
+import time
+from concurrent import futures
+
+import serial
+
+import wave_binaire
+from wave_serie import TIMEOUT_ECRITURE, TIMEOUT_OUVERTURE, bloquant, boucle_serie
+from wave_supervision import SuperviseurPorts
+from wave_trames import DecodeurTrames
+
+TAILLE_LECTURE = 4096  # Lecture non bloquante (connexions au courtier)
+
+
+def analyser_ports(saisie):
+    """'COM8' ou 'Étage 1=COM8, Étage 2=COM9' -> [(nom, port), ...]"""
+    ports = []
+    for morceau in saisie.split(','):
+        morceau = morceau.strip()
+        if not morceau:
+            continue
+        nom, separateur, port = morceau.partition('=')
+        if separateur:
+            ports.append((nom.strip() or port.strip(), port.strip()))
+        else:
+            ports.append((morceau, morceau))
+    return ports
+
+
+class CartePort:
+    """Une carte sur un port série: connexion, découpage du flux et état de lecture"""
+
+    def __init__(self, nom, port, connexion):
+        self.nom = nom
+        self.port = port
+        self.connexion = connexion
+        self.lecteur_flux = wave_binaire.LecteurFlux()
+        self.octets_lus = 0
+        self.erreur = None  # Dernière erreur de lecture (carte perdue)
+        self.verrou_ecriture = asyncio.Lock()  # Commandes d'une carte jamais entremêlées
+
+        # Reconnexion (wave_supervision): identité USB, panne en cours et pannes passées
+        self.identite = None
+        self.perdue_depuis = None  # monotonic de la perte
+        self.pannes = []           # (time.time() de la perte, durée en s)
+        self.tentatives_reprise = 0
+
+    @staticmethod
+    def connexion_serie(port, baudrate):
+        if "://" in port:
+            # Carte partagée par wave_courtier (socket://hôte:port): in_waiting y vaut 0 ou 1,
+            # la lecture non bloquante (timeout 0) prend tout ce qui est arrivé
+            return serial.serial_for_url(port, baudrate=baudrate, timeout=0, write_timeout=TIMEOUT_ECRITURE)
+        # add_reader: lecture seulement quand des octets sont annoncés. Sans descripteur,
+        # read(1) attend au plus ce timeout (délai d'arrêt d'une lecture en cours)
+        return serial.Serial(port=port, baudrate=baudrate, timeout=0.5, write_timeout=TIMEOUT_ECRITURE)
+
+    @classmethod
+    def ouvrir(cls, nom, port, baudrate=115200):
+        return cls(nom, port, cls.connexion_serie(port, baudrate))
+
+    @classmethod
+    async def ouvrir_async(cls, nom, port, baudrate=115200):
+        """Ouvre le port sans bloquer la boucle; un port ouvert après abandon est refermé"""
+        try:
+            return await bloquant(cls.ouvrir, nom, port, baudrate,
+                                  timeout=TIMEOUT_OUVERTURE, liberer=lambda carte: carte.fermer())
+        except asyncio.TimeoutError:
+            raise IOError(f"pas de réponse du port en {TIMEOUT_OUVERTURE:g} s") from None
+
+    @property
+    def actif(self):
+        return self.erreur is None and self.connexion.is_open
+
+    def panne_en_cours(self):
+        """Secondes depuis la perte du port (0 s'il est lu)"""
+        return time.monotonic() - self.perdue_depuis if self.perdue_depuis is not None else 0.0
+
+    def indisponibilite(self):
+        """Secondes sans lecture possible depuis la connexion (panne en cours comprise)"""
+        return sum(duree for _, duree in self.pannes) + self.panne_en_cours()
+
+    def ecrire(self, data):
+        self.connexion.write(data)
+
+    async def ecrire_async(self, data):
+        async with self.verrou_ecriture:
+            await bloquant(self.ecrire, data, timeout=TIMEOUT_ECRITURE)
+
+    def fermer(self):
+        try:
+            self.connexion.close()
+        except Exception:
+            pass
+
+    async def fermer_async(self):
+        await bloquant(self.fermer)
+
+
+class Recepteur(CartePort):
+    """Une carte réceptrice: réassemblage des trames et compteurs propres"""
+
+    def __init__(self, nom, port, connexion):
+        super().__init__(nom, port, connexion)
+        self.decodeur_trames = DecodeurTrames()
+        self.message_trame_livre = None  # Texte déjà affiché avant la ligne ✅ du firmware
+        self.modele_annonce = ("", 0.0)  # (ligne ✅ du firmware, instant) du dernier modèle livré
+        self.messages_recus = 0
+        self.codes_non_reconnus = 0
+        self.lignes_par_regle = {}  # Règle de process_line -> lignes (métriques)
+
+
+async def ouvrir_cartes(classe, ports, baudrate=115200, initialisation=None):
+    """Ouvre `ports` [(nom, port)] en parallèle; retourne ([cartes], [(port, erreur)])
+
+    `initialisation` est écrit sur chaque carte ouverte (activation du mode
+    binaire). Annulée, la coroutine referme les ports déjà ouverts.
+    """
+    taches = [asyncio.ensure_future(classe.ouvrir_async(nom, port, baudrate)) for nom, port in ports]
+    try:
+        if taches:
+            await asyncio.wait(taches)
+        cartes = []
+        erreurs = []
+        for (_, port), tache in zip(ports, taches):
+            if tache.exception() is not None:
+                erreurs.append((port, str(tache.exception()) or type(tache.exception()).__name__))
+            else:
+                cartes.append(tache.result())
+        if initialisation is not None:
+            resultats = await asyncio.gather(*(carte.ecrire_async(initialisation) for carte in cartes),
+                                             return_exceptions=True)
+            for carte, resultat in zip(list(cartes), resultats):
+                if isinstance(resultat, Exception):
+                    erreurs.append((carte.port, str(resultat) or type(resultat).__name__))
+                    cartes.remove(carte)
+                    await carte.fermer_async()
+        return cartes, erreurs
+    except asyncio.CancelledError:
+        for tache in taches:
+            tache.cancel()
+        # Une ouverture qui se termine au moment de l'annulation rend sa carte malgré tout
+        for resultat in await asyncio.gather(*taches, return_exceptions=True):
+            if isinstance(resultat, CartePort):
+                await resultat.fermer_async()
+        raise
+
+
+def fermer_cartes(ouverture):
+    """Referme les cartes d'un résultat ([cartes], erreurs) d'ouvrir_cartes abandonné"""
+    cartes, _ = ouverture
+    for carte in cartes:
+        carte.fermer()
+
+
+def _a_descripteur(connexion):
+    try:
+        connexion.fileno()
+        return True
+    except (AttributeError, OSError):
+        return False
+
+
+class LecteurMultiPort:
+    """Lecture de N cartes (CartePort) dans la boucle série partagée
+
+    `livrer(carte, elements)` et `signaler_erreur(carte, message)` sont
+    appelés depuis le thread de la boucle: à l'appelant de repasser au thread Tk.
+    Avec `signaler_reprise(carte, duree)`, une carte perdue est relancée jusqu'à
+    sa reprise (wave_supervision); `initialisation` lui est alors réécrit.
+    """
+
+    def __init__(self, cartes, livrer, signaler_erreur, boucle=None, signaler_reprise=None,
+                 initialisation=None):
+        self.cartes = list(cartes)
+        self.livrer = livrer
+        self.signaler_erreur = signaler_erreur
+        self.boucle = boucle if boucle is not None else boucle_serie()
+        self.actif = False
+        self.descripteurs = {}  # carte -> descripteur surveillé par add_reader
+        self.scrutations = {}   # carte -> tâche de lecture bloquante (ports sans descripteur)
+        self.executeur = None   # Threads de ces lectures, hors de l'exécuteur de la boucle
+        self.superviseur = None
+        if signaler_reprise is not None:
+            self.superviseur = SuperviseurPorts(self, signaler_reprise, initialisation)
+
+    def demarrer(self):
+        self.actif = True
+        self.boucle.appeler(self._demarrer)
+
+    def arreter(self):
+        """Arrête la lecture et ferme les ports; retourne un Future terminé une fois les ports fermés"""
+        self.actif = False
+        return self.boucle.soumettre(self._arreter())
+
+    def _demarrer(self):
+        for carte in self.cartes:
+            self._surveiller(carte)
+        if self.superviseur is not None:
+            asyncio.get_running_loop().create_task(self.superviseur.identifier())
+
+    def _surveiller(self, carte):
+        boucle = asyncio.get_running_loop()
+        if _a_descripteur(carte.connexion):
+            descripteur = carte.connexion.fileno()
+            boucle.add_reader(descripteur, self._lire, carte)
+            self.descripteurs[carte] = descripteur
+        else:
+            if self.executeur is None:
+                # Une lecture en cours par carte, plus celle abandonnée à l'arrêt ou à la perte
+                self.executeur = futures.ThreadPoolExecutor(max_workers=2 * len(self.cartes),
+                                                            thread_name_prefix='lecture-port')
+            self.scrutations[carte] = boucle.create_task(self._scruter(carte))
+
+    def reprendre(self, carte, port, connexion):
+        """Carte relancée par le superviseur sur `connexion` (thread de la boucle)"""
+        carte.port = port
+        carte.connexion = connexion
+        carte.erreur = None
+        carte.lecteur_flux = wave_binaire.LecteurFlux()  # Ligne coupée par la panne abandonnée
+        self._surveiller(carte)
+
+    async def _arreter(self):
+        if self.superviseur is not None:
+            self.superviseur.arreter()
+        for carte in self.cartes:
+            self._retirer(carte)
+        await asyncio.gather(*(carte.fermer_async() for carte in self.cartes))
+        if self.executeur is not None:
+            # Les lectures abandonnées finissent au plus tard au timeout du port
+            self.executeur.shutdown(wait=False)
+            self.executeur = None
+
+    def _retirer(self, carte):
+        descripteur = self.descripteurs.pop(carte, None)
+        if descripteur is not None:
+            asyncio.get_running_loop().remove_reader(descripteur)
+        tache = self.scrutations.pop(carte, None)
+        if tache is not None and tache is not asyncio.current_task():
+            tache.cancel()
+
+    def _recevoir(self, carte, data):
+        carte.octets_lus += len(data)
+        # Lignes texte (str) et évènements binaires (Evenement)
+        elements = carte.lecteur_flux.pousser(data)
+        if elements:
+            self.livrer(carte, elements)
+
+    def _echec(self, carte, erreur):
+        self._retirer(carte)
+        if not self.actif:
+            return  # Port fermé par arreter()
+        carte.erreur = str(erreur)
+        self.signaler_erreur(carte, carte.erreur)
+        if self.superviseur is not None:
+            self.superviseur.carte_perdue(carte)
+
+    def _lire(self, carte):
+        try:
+            # Au moins 1 octet est disponible: read() ne bloque pas
+            connexion = carte.connexion
+            data = connexion.read(TAILLE_LECTURE if connexion.timeout == 0 else connexion.in_waiting or 1)
+        except Exception as e:
+            self._echec(carte, e)
+            return
+        if data:
+            self._recevoir(carte, data)
+
+    async def _scruter(self, carte):
+        connexion = carte.connexion
+        while True:
+            try:
+                data = await bloquant(_lire_bloquant, connexion, executeur=self.executeur)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._echec(carte, e)
+                return
+            if data:
+                self._recevoir(carte, data)
+
+
+def _lire_bloquant(connexion):
+    """Attend un octet (au plus le timeout du port) puis prend ceux déjà arrivés"""
+    data = connexion.read(1)
+    if data:
+        en_attente = connexion.in_waiting
+        if en_attente:
+            data += connexion.read(en_attente)
+    return data
@@ -0,0 +1,286 @@
+"""Journal des alertes sur disque (SQLite en mode WAL, écritures groupées)
+
+Le thread Tk ne fait que déposer des opérations dans une file; un thread
+d'écriture les applique par lots dans une seule transaction, validée (et donc
+synchronisée sur disque) au plus une fois par `intervalle_sync` secondes.
+Un index plein texte FTS5, tenu à jour par trigger, sert à la recherche.
+"""
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+INTERVALLE_SYNC = 1.0   # Secondes entre deux validations (fsync) du journal
+NB_RECHARGES = 500      # Entrées rechargées dans le journal au démarrage
+LIMITE_RECHERCHE = 500  # Résultats rendus par une recherche (les plus récents)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    recu_a REAL NOT NULL,
+    heure TEXT NOT NULL,
+    texte TEXT NOT NULL,
+    non_lu INTEGER NOT NULL DEFAULT 1,
+    efface INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT '',
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    vu_a REAL,
+    relaye INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS messages_recu_a ON messages (recu_a);
+"""
+
+# Les ids ne croissent avec recu_a que pour les messages reçus ici: un message
+# relayé garde l'heure de sa station d'origine et peut arriver bien plus tard
+# (file rejouée après une coupure). Chaque sorte a son index de recu_a.
+SCHEMA_RELAIS = """
+CREATE INDEX IF NOT EXISTS messages_locaux ON messages (recu_a) WHERE relaye = 0;
+CREATE INDEX IF NOT EXISTS messages_relayes ON messages (recu_a) WHERE relaye = 1;
+"""
+
+# Index externe: le texte n'est stocké qu'une fois, dans `messages`
+SCHEMA_FTS = """
+CREATE VIRTUAL TABLE messages_fts USING fts5(
+    texte, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER messages_fts_ajout AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, texte) VALUES (new.id, new.texte);
+END;
+CREATE TRIGGER messages_fts_suppression AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, texte) VALUES ('delete', old.id, old.texte);
+END;
+INSERT INTO messages_fts (messages_fts) VALUES ('rebuild');
+"""
+
+_ARRET = object()
+
+
+def chemin_par_defaut(nom="wave_journal.db"):
+    """Fichier à côté de l'exécutable (PyInstaller) ou du script"""
+    if getattr(sys, 'frozen', False):
+        dossier = os.path.dirname(sys.executable)
+    else:
+        dossier = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(dossier, nom)
+
+
+def ouvrir(chemin):
+    connexion = sqlite3.connect(chemin)
+    connexion.execute("PRAGMA journal_mode=WAL")
+    # FULL: chaque validation synchronise le WAL; on valide une fois par lot
+    connexion.execute("PRAGMA synchronous=FULL")
+    connexion.executescript(SCHEMA)
+    colonnes = {ligne[1] for ligne in connexion.execute("PRAGMA table_info(messages)")}
+    if 'source' not in colonnes:
+        # Base antérieure au mode multi-récepteurs
+        connexion.execute("ALTER TABLE messages ADD COLUMN source TEXT NOT NULL DEFAULT ''")
+        connexion.commit()
+    if 'occurrences' not in colonnes:
+        # Base antérieure au regroupement des répétitions (vu_a NULL: dernière réception = recu_a)
+        connexion.execute("ALTER TABLE messages ADD COLUMN occurrences INTEGER NOT NULL DEFAULT 1")
+        connexion.execute("ALTER TABLE messages ADD COLUMN vu_a REAL")
+        connexion.commit()
+    if 'relaye' not in colonnes:
+        # Base antérieure au tri des messages relayés: leur source est "carte@station"
+        connexion.execute("ALTER TABLE messages ADD COLUMN relaye INTEGER NOT NULL DEFAULT 0")
+        connexion.execute("UPDATE messages SET relaye = 1 WHERE source LIKE '%@%'")
+        connexion.commit()
+    connexion.executescript(SCHEMA_RELAIS)
+    existe = connexion.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone()
+    if not existe:
+        try:
+            # Création + indexation de l'historique existant (base antérieure)
+            with connexion:
+                connexion.executescript("BEGIN;" + SCHEMA_FTS + "COMMIT;")
+        except sqlite3.OperationalError:
+            pass  # SQLite compilé sans FTS5: la recherche se rabat sur LIKE
+    return connexion
+
+
+def requete_fts(texte):
+    """Transforme la saisie en requête FTS5 sûre: chaque mot est un préfixe, tous requis"""
+    mots = texte.split()
+    return " ".join('"' + mot.replace('"', '""') + '"*' for mot in mots)
+
+
+def horodatage_saisie(texte, maintenant=None):
+    """'08:00', '17/10 08:00' ou '17/10/2026 08:00' -> epoch; None si vide"""
+    texte = texte.strip()
+    if not texte:
+        return None
+    maintenant = maintenant or datetime.now()
+    for format_, complete in (("%H:%M", 'jour'), ("%d/%m %H:%M", 'annee'), ("%d/%m/%Y %H:%M", None)):
+        try:
+            valeur = datetime.strptime(texte, format_)
+        except ValueError:
+            continue
+        if complete == 'jour':
+            valeur = maintenant.replace(hour=valeur.hour, minute=valeur.minute, second=0, microsecond=0)
+        elif complete == 'annee':
+            valeur = valeur.replace(year=maintenant.year)
+        return valeur.timestamp()
+    raise ValueError(f"Horodatage invalide: '{texte}' (HH:MM, JJ/MM HH:MM ou JJ/MM/AAAA HH:MM)")
+
+
+class JournalPersistant:
+    """Enregistrement en tâche de fond des messages reçus et de leur état lu/non lu"""
+
+    def __init__(self, chemin=None, intervalle_sync=INTERVALLE_SYNC):
+        self.chemin = chemin or chemin_par_defaut()
+        self.intervalle_sync = intervalle_sync
+        self.file = queue.Queue()
+        self.lots_ecrits = 0
+        self.operations_ecrites = 0
+        self.derniere_erreur = None
+        self._lecture = None  # Connexion de lecture du thread Tk (recherche)
+
+        # Création du schéma dans le thread appelant: une erreur (dossier en
+        # lecture seule...) remonte au constructeur
+        ouvrir(self.chemin).close()
+
+        self.thread = threading.Thread(target=self._ecrire, daemon=True)
+        self.thread.start()
+
+    # ----- API thread Tk (non bloquante) -----
+
+    def ajouter(self, entree):
+        self.file.put(("INSERT OR REPLACE INTO messages (id, recu_a, heure, texte, non_lu, source, "
+                       "occurrences, vu_a, relaye) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (entree.id, entree.recu_a, entree.heure, entree.texte, int(entree.non_lu),
+                        entree.source, entree.occurrences, entree.vu_a, int(bool(entree.station)))))
+
+    def repeter(self, entree):
+        """Répétition regroupée sur une ligne existante (compteur, dernière réception, non lu)"""
+        self.file.put(("UPDATE messages SET occurrences = ?, vu_a = ?, non_lu = ? WHERE id = ?",
+                       (entree.occurrences, entree.vu_a, int(entree.non_lu), entree.id)))
+
+    def marquer_lu(self, id_):
+        self.file.put(("UPDATE messages SET non_lu = 0 WHERE id = ?", (id_,)))
+
+    def effacer_tout(self):
+        """L'historique reste sur disque mais n'est plus rechargé au démarrage"""
+        self.file.put(("UPDATE messages SET efface = 1 WHERE efface = 0", ()))
+
+    def fermer(self, timeout=5.0):
+        """Écrit les opérations en attente puis arrête le thread d'écriture"""
+        self.file.put(_ARRET)
+        self.thread.join(timeout)
+
+    # ----- Lecture (démarrage) -----
+
+    def charger_derniers(self, nombre=NB_RECHARGES):
+        """Dernières entrées non effacées, de la plus ancienne à la plus récente"""
+        connexion = ouvrir(self.chemin)
+        try:
+            lignes = connexion.execute(
+                "SELECT id, recu_a, heure, texte, non_lu, source, occurrences, vu_a FROM messages "
+                "WHERE efface = 0 ORDER BY id DESC LIMIT ?", (nombre,)).fetchall()
+            dernier_id = connexion.execute("SELECT MAX(id) FROM messages").fetchone()[0] or 0
+        finally:
+            connexion.close()
+        lignes.reverse()
+        return lignes, dernier_id
+
+    # ----- Recherche (thread Tk) -----
+
+    def rechercher(self, texte="", depuis=None, jusqu_a=None, limite=LIMITE_RECHERCHE):
+        """Messages correspondant à `texte` reçus dans [depuis, jusqu_a), du plus récent au plus ancien
+
+        Les bornes de temps sont converties en bornes d'id sur les messages reçus
+        ici (leurs ids croissent avec la réception) pour que FTS5 ne parcoure que
+        la plage utile de son index. Les messages relayés, dont l'heure d'origine
+        ne suit pas les ids, sont filtrés sur recu_a et cherchés aussi hors de
+        cette plage. Les écritures encore dans la file ne sont pas visibles.
+        """
+        if self._lecture is None:
+            self._lecture = ouvrir(self.chemin)
+        connexion = self._lecture
+
+        id_min, id_max = 0, (1 << 62)
+        debut, fin = float('-inf'), float('inf')
+        if depuis is not None:
+            debut = depuis
+            # Sondes sur l'index des messages locaux (MIN(id)/MAX(id) balaieraient la clé primaire)
+            ligne = connexion.execute("SELECT id FROM messages WHERE relaye = 0 AND recu_a >= ? "
+                                      "ORDER BY recu_a LIMIT 1", (depuis,)).fetchone()
+            id_min = ligne[0] if ligne is not None else id_max + 1  # Aucun message local: plage vide
+        if jusqu_a is not None:
+            fin = jusqu_a
+            ligne = connexion.execute("SELECT id FROM messages WHERE relaye = 0 AND recu_a < ? "
+                                      "ORDER BY recu_a DESC LIMIT 1", (jusqu_a,)).fetchone()
+            id_max = ligne[0] if ligne is not None else -1
+
+        colonnes = "m.id, m.recu_a, m.heure, m.texte, m.non_lu, m.source, m.occurrences, m.vu_a"
+        bornes = "m.recu_a >= ? AND m.recu_a < ?"
+        if not texte.strip():
+            lignes = connexion.execute(
+                f"SELECT {colonnes} FROM messages m WHERE m.id BETWEEN ? AND ? AND {bornes} "
+                "ORDER BY m.id DESC LIMIT ?", (id_min, id_max, debut, fin, limite)).fetchall()
+            filtre, parametres = "", ()
+        else:
+            try:
+                lignes = connexion.execute(
+                    f"SELECT {colonnes} FROM messages_fts f JOIN messages m ON m.id = f.rowid "
+                    f"WHERE messages_fts MATCH ? AND f.rowid BETWEEN ? AND ? AND {bornes} "
+                    "ORDER BY f.rowid DESC LIMIT ?",
+                    (requete_fts(texte), id_min, id_max, debut, fin, limite)).fetchall()
+                # Contrôle ligne par ligne: les messages relayés de la période sont peu nombreux
+                filtre = " AND EXISTS (SELECT 1 FROM messages_fts WHERE messages_fts MATCH ? AND rowid = m.id)"
+                parametres = (requete_fts(texte),)
+            except sqlite3.OperationalError:
+                # Pas de FTS5: balayage LIKE (lent sur un gros historique)
+                lignes = connexion.execute(
+                    f"SELECT {colonnes} FROM messages m WHERE m.texte LIKE ? AND m.id BETWEEN ? AND ? "
+                    f"AND {bornes} ORDER BY m.id DESC LIMIT ?",
+                    (f"%{texte.strip()}%", id_min, id_max, debut, fin, limite)).fetchall()
+                filtre, parametres = " AND m.texte LIKE ?", (f"%{texte.strip()}%",)
+
+        if depuis is None and jusqu_a is None:
+            return lignes
+        # Messages relayés de la période arrivés hors de la plage d'ids (index messages_relayes)
+        relayes = connexion.execute(
+            f"SELECT {colonnes} FROM messages m WHERE m.relaye = 1 AND {bornes} "
+            f"AND m.id NOT BETWEEN ? AND ?{filtre} ORDER BY m.id DESC LIMIT ?",
+            (debut, fin, id_min, id_max) + parametres + (limite,)).fetchall()
+        if not relayes:
+            return lignes
+        return sorted(lignes + relayes, reverse=True)[:limite]
+
+    # ----- Thread d'écriture -----
+
+    def _ecrire(self):
+        connexion = ouvrir(self.chemin)
+        arret = False
+        while not arret:
+            operation = self.file.get()
+            if operation is _ARRET:
+                break
+            lot = [operation]
+            # Regroupe tout ce qui arrive pendant l'intervalle en une transaction
+            echeance = time.monotonic() + self.intervalle_sync
+            while True:
+                reste = echeance - time.monotonic()
+                if reste <= 0:
+                    break
+                try:
+                    operation = self.file.get(timeout=reste)
+                except queue.Empty:
+                    break
+                if operation is _ARRET:
+                    arret = True
+                    break
+                lot.append(operation)
+            try:
+                with connexion:
+                    for requete, parametres in lot:
+                        connexion.execute(requete, parametres)
+                self.lots_ecrits += 1
+                self.operations_ecrites += len(lot)
+            except sqlite3.Error as e:
+                self.derniere_erreur = str(e)
+                print(f"Erreur journal persistant: {e}")
+        connexion.close()
@@ -0,0 +1,63 @@
+"""Grammaire des lignes série émises par le firmware récepteur (recepteur.cpp)"""
+import re
+
+# Règles dans l'ordre de priorité historique de process_line.
+# Chaque motif est une alternative nommée, ancrée en début de ligne (le firmware
+# préfixe toujours ses messages); ses sous-groupes extraient les champs utiles
+# afin d'éviter un second re.search dans les handlers. Les textes entre
+# apostrophes sont capturés jusqu'à la dernière (le message peut en contenir).
+REGLES_RECEPTEUR = (
+    ('signal', r"Signal détecté"),
+    ('code_brut', r"Code brut reçu :(?P<code>.*)"),
+    ('longueur', r"Longueur :(?P<valeur_longueur>.*)"),
+    ('protocole', r"Protocole :(?P<valeur_protocole>.*)"),
+    ('code_valide', r"Code valide détecté"),
+    ('message_recu', r"✅ MESSAGE PERSONNALISÉ REÇU:(?: '(?P<texte_recu>.*)')?"),
+    ('alerte_arretee', r"✅ ALERTE ARRÊTÉE - LED ÉTEINTE"),
+    ('message_lu', r"📄 Message lu:(?: '(?P<texte_lu>.*)')?"),
+    ('nouvelle_alerte', r"🚨 NOUVELLE ALERTE ACTIVÉE - LED CLIGNOTANTE"),
+    ('commande', r"📝 Commande reçue:(?: '(?P<nom_commande>.*)')?"),
+    ('son_active', r"🔊 SON ACTIVÉ"),
+    ('son_desactive', r"🔇 SON DÉSACTIVÉ"),
+    ('debut_message', r"DEBUG: Début de message - Longueur attendue:(?P<longueur_attendue>.*)"),
+    ('paquet', r"DEBUG: Paquet(?=.*reçu:)(?: (?P<num_paquet>\d+) reçu: (?P<code_paquet>0x[0-9A-F]+))?"),
+    ('buffer', r"Buffer actuel:(?: '(?P<texte_buffer>.*)' \((?P<buffer_len>\d+)/(?P<buffer_total>\d+) chars\))?"),
+    ('carte_autorisee', r"✅ CARTE AUTORISÉE DÉTECTÉE"),
+    ('hors_sequence', r"DEBUG: Signal hors séquence:(?: (?P<code_hors_sequence>0x[0-9A-F]+))?"),
+    ('buffer_reinit', r"DEBUG: Buffer réinitialisé"),
+    ('signal_rejete', r"Signal rejeté"),
+    ('bruit', r"Code = 0"),
+    ('longueur_incorrecte', r"Longueur incorrecte(?: :(?P<details_longueur>.*))?"),
+    ('code_rx', r"RX:(?P<valeur_rx>[0-9A-F]{1,8})$"),
+)
+
+
+class ClassifieurLignes:
+    """Associe une ligne (déjà strip) à sa règle en une seule passe d'une regex précompilée
+
+    Les règles sont réparties par caractère initial (premier niveau d'un trie de
+    préfixes): une ligne ne teste que l'alternation des règles qui peuvent la
+    commencer, et les lignes sans préfixe connu ne touchent pas au moteur regex.
+    """
+
+    def __init__(self, regles=REGLES_RECEPTEUR):
+        self.noms = tuple(nom for nom, _ in regles)
+        groupes = {}
+        for nom, motif in regles:
+            groupes.setdefault(motif[0], []).append(f"(?P<{nom}>{motif})")
+        self.par_initiale = {
+            initiale: re.compile("|".join(alternatives)).match
+            for initiale, alternatives in groupes.items()
+        }
+
+    def classer(self, ligne):
+        """Retourne (nom_regle, match); 'debug' ou 'autre' si aucune règle ne s'applique"""
+        match_regle = self.par_initiale.get(ligne[:1])
+        if match_regle is not None:
+            match = match_regle(ligne)
+            if match is not None:
+                # Le groupe externe se ferme en dernier: lastgroup est le nom de la règle
+                return match.lastgroup, match
+        if ligne.startswith("DEBUG:"):
+            return 'debug', None
+        return 'autre', None
@@ -1,12 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import serial
-import threading
 from datetime import datetime
 import time
-import re
-from PIL import Image, ImageTk
-import os
+from wave_journal import ResultatsRecherche
+from wave_metriques import PORT_RECEPTEUR, port_environnement
+from wave_vue_journal import JournalVirtuel
+from wave_persistance import horodatage_saisie
+from wave_client_recepteur import ClientRecepteur
+from wave_demarrage import LOGO_RECEPTEUR, apres_premier_affichage, charger_logo
+from wave_relais import Relais, analyser_pairs
+from wave_serie import INTERVALLE_VIDAGE_MS
+import wave_traces
+from wave_traces import CorrelateurTraces, TraceurLatence
+
+INTERVALLE_UI_MS = 33  # Au plus un rendu par tick (~30 images/s) pendant une rafale
 
 class RFIDRecepteurMonitor:
     def __init__(self, root):
@@ -22,15 +29,39 @@ class RFIDRecepteurMonitor:
         self.fullscreen = False
 
         # Variables
-        self.serial_connection = None
-        self.connected = False
-        self.autorisations_recues = 0
-        self.codes_non_reconnus = 0
-        self.dernier_statut = ""
+        # Latence de bout en bout: étapes du récepteur ajoutées au fichier de
+        # traces partagé avec l'émetteur, relu par le corrélateur
+        self.traceur = TraceurLatence(processus='recepteur')
+        self.correlateur = CorrelateurTraces()
+        self._lignes_a_tracer = []  # (texte, source) ajoutés depuis le dernier rendu
+
+        # Connexions, décodage, journal et compteurs: wave_client_recepteur.
+        # Les ports sont lus dans la boucle série; les lots sont traités dans le thread Tk (voir surveiller_serie)
+        self.client = ClientRecepteur(traceur=self.traceur, reveil=self.reveiller)
+        self.magasin = self.client.magasin  # Messages reçus + ensemble des non lus
         self.code_hello = "0x12345678"
-        self.messages_non_lus = []  # Liste des messages non lus
-        self.selected_message_id = None
-        self.sound_enabled = True  # État du son (par défaut activé)
+        self.selected_message_id = None  # Id (int) de l'entrée sélectionnée dans le magasin
+        self._donnees_serie = False
+        self.ouverture = None  # Ouverture des ports en cours (Future annulable)
+        self.relais = None     # Relais vers les stations pairs, démarré à la connexion
+
+        # Mises à jour d'affichage regroupées: l'état modifié est noté puis
+        # appliqué au plus une fois par INTERVALLE_UI_MS
+        self._ui_sale = set()
+        self._ui_planifie = False
+        self._dernier_rendu = 0.0
+        self._suivre_journal = True
+        self._evincees = 0
+        self.ui_evenements = 0  # Modifications d'état notées
+        self.ui_rendus = 0      # Rendus effectivement appliqués
+
+        self.client.abonner('message', self.on_message)
+        self.client.abonner('repetition', self.on_repetition)
+        self.client.abonner('stats', self.update_stats)
+        self.client.abonner('son', lambda actif: self.update_sound_button())
+        self.client.abonner('perte', self.recepteur_perdu)
+        self.client.abonner('reprise', lambda recepteur, duree: self.update_status())
+        self.client.abonner('connexion', self.connexion_terminee)
 
 
         # Couleurs
@@ -58,40 +89,58 @@ class RFIDRecepteurMonitor:
         # Logo
         self.load_logo()
 
-        # Configuration pour le scrolling
+        # Configuration pour le scrolling: en-tête et connexion d'abord, le reste
+        # après le premier rendu (terminer_interface)
+        self.recherche_active = False
+        self.interface_complete = False
         self.setup_scrollable_container()
-
-    def load_logo(self):
-        """Charge le logo WAVE-CONNECT agrandi"""
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        apres_premier_affichage(self.root, self.terminer_interface)
+
+    def terminer_interface(self):
+        """Journal, statistiques et actions, puis rechargement de l'historique"""
+        self.setup_ui_suite()
+        # Journal sur disque: rechargement des dernières alertes puis écritures en tâche de fond
+        self.charger_persistance()
+        self.surveiller_serie()
+        self.demarrer_metriques()
+        self.interface_complete = True
+
+    def demarrer_metriques(self):
+        """Point d'accès /metrics si WAVE_METRIQUES est définie (port, ou 1 pour le port par défaut)"""
         try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            
-            # Essaie plusieurs noms de logos
-            logo_files = ["WAVE-CONNECT.png", "logo.png", "WAVE.png"]
-            logo_found = False
-
-            for logo_name in logo_files:
-                logo_path = os.path.join(script_dir, logo_name)
-                if os.path.exists(logo_path):
-                    img_wave = Image.open(logo_path)
-                    # Préserve le ratio en limitant à 120x80 max
-                    img_wave.thumbnail((120, 80), Image.Resampling.LANCZOS)
-                    self.wave_image = ImageTk.PhotoImage(img_wave)
-                    logo_found = True
-                    print(f"Logo chargé: {logo_name}")
-                    break
-
-            if not logo_found:
-                # Logo par défaut agrandi
-                img_wave = Image.new('RGB', (120, 80), color='#007aff')
-                self.wave_image = ImageTk.PhotoImage(img_wave)
-                print("Logo par défaut utilisé (fichier image non trouvé)")
-                
+            port = port_environnement(PORT_RECEPTEUR)
+            if port is not None:
+                self.client.demarrer_metriques(port)
+                print(f"Métriques: http://localhost:{port}/metrics")
+        except (OSError, ValueError) as e:
+            print(f"Métriques indisponibles: {e}")
+
+    def charger_persistance(self):
+        """Ouvre le journal persistant et recharge les dernières entrées"""
+        try:
+            self.client.charger_historique()
         except Exception as e:
-            # Logo par défaut en cas d'erreur
-            img_wave = Image.new('RGB', (120, 80), color='#007aff')
-            self.wave_image = ImageTk.PhotoImage(img_wave)
-            print(f"Erreur chargement logo: {e} - Logo par défaut utilisé")
+            print(f"Journal persistant indisponible: {e}")
+            return
+        self.journal.voir_fin()
+
+    def on_close(self):
+        """Écrit les dernières alertes sur disque avant de quitter"""
+        self.arreter_relais()
+        self.client.arreter_metriques()
+        self.client.fermer()
+        self.traceur.fermer()
+        self.root.destroy()
+
+    def load_logo(self):
+        """Charge le logo WAVE-CONNECT agrandi (copie réduite en cache, ratio conservé, 120x80 max)"""
+        noms, taille = LOGO_RECEPTEUR
+        self.wave_image, logo_name = charger_logo(noms, taille, '#007aff')
+        if logo_name is not None:
+            print(f"Logo chargé: {logo_name}")
+        else:
+            print("Logo par défaut utilisé (fichier image non trouvé)")
 
     def setup_scrollable_container(self):
         """Configure un container scrollable pour toute l'interface"""
@@ -185,10 +234,6 @@ class RFIDRecepteurMonitor:
         style.configure('HeaderTitle.TLabel', background=self.colors['blue'], foreground='#ffffff', font=('Segoe UI', 22, 'bold'))
         style.configure('Muted.TLabel', background=self.colors['card'], foreground=self.colors['text_dim'])
         style.configure('Strong.TLabel', background=self.colors['card'], foreground=self.colors['text'], font=('Segoe UI', 11, 'bold'))
-        style.configure('Treeview', background='#ffffff', fieldbackground='#ffffff', foreground=self.colors['text'], rowheight=32, bordercolor=self.colors['border'], borderwidth=1, font=('SF Pro Text', 11))
-        style.configure('Treeview.Heading', background=self.colors['accent'], foreground='white', font=('SF Pro Display', 12, 'bold'), relief='flat')
-        style.map('Treeview', background=[('selected', '#e3f2fd')])
-        style.map('Treeview.Heading', background=[('active', self.colors['accent'])])
 
         # En-tête épuré style Apple avec logo agrandi - maintenant dans le frame scrollable
         header = tk.Frame(self.scrollable_frame, bg=self.colors['header'], height=140)
@@ -287,13 +332,13 @@ class RFIDRecepteurMonitor:
         port_frame = tk.Frame(conn_frame, bg=self.colors['secondary_section'])
         port_frame.pack(fill=tk.X, pady=(10, 0))
         
-        tk.Label(port_frame, text="Port COM", 
+        tk.Label(port_frame, text="Port(s) COM  (ex. Étage 1=COM8, Étage 2=COM9)", 
                 font=('SF Pro Text', 11), 
                 fg=self.colors['text_dim'], bg=self.colors['secondary_section']).pack(anchor='w')
         
         self.port_entry = tk.Entry(port_frame, font=('SF Mono', 12), 
                                   bg='#ffffff', fg=self.colors['text'], 
-                                  width=10, relief='flat', bd=1,
+                                  width=24, relief='flat', bd=1,
                                   highlightthickness=2, highlightcolor=self.colors['accent'])
         self.port_entry.insert(0, "COM8")
         self.port_entry.pack(anchor='w', pady=(8, 0))
@@ -306,6 +351,29 @@ class RFIDRecepteurMonitor:
                                     cursor='hand2')
         self.connect_btn.pack(anchor='w', pady=(12, 0))
 
+        # Mode binaire compact (négocié à la connexion, texte si non supporté)
+        self.binary_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(port_frame, text="Mode binaire compact",
+                       variable=self.binary_var,
+                       font=('SF Pro Text', 10),
+                       fg=self.colors['text_dim'], bg=self.colors['secondary_section'],
+                       activebackground=self.colors['secondary_section']).pack(anchor='w', pady=(8, 0))
+
+        # Relais vers d'autres stations (wave_relais), facultatif
+        tk.Label(port_frame, text="Stations pairs (ex. poste-b, 10.0.0.12:7900)",
+                font=('SF Pro Text', 11),
+                fg=self.colors['text_dim'], bg=self.colors['secondary_section']).pack(anchor='w', pady=(10, 0))
+        self.pairs_entry = tk.Entry(port_frame, font=('SF Mono', 12),
+                                   bg='#ffffff', fg=self.colors['text'],
+                                   width=24, relief='flat', bd=1,
+                                   highlightthickness=2, highlightcolor=self.colors['accent'])
+        self.pairs_entry.pack(anchor='w', pady=(8, 0))
+        self.controls_frame = controls_frame
+
+    def setup_ui_suite(self):
+        """Partie construite après le premier rendu: statistiques, actions, latence et journal"""
+        controls_frame = self.controls_frame
+
         # Statistiques épurées
         stats_frame = tk.Frame(controls_frame, bg=self.colors['secondary_section'])
         stats_frame.pack(fill=tk.X, pady=(25, 0))
@@ -315,13 +383,21 @@ class RFIDRecepteurMonitor:
                 fg=self.colors['text'], bg=self.colors['secondary_section']).pack(anchor='w')
 
         self.stats_label = tk.Label(stats_frame,
-                                   text=f"Messages reçus: {self.autorisations_recues}\nAlertes actives: 0\nNon reconnus: {self.codes_non_reconnus}",
+                                   text=f"Messages reçus: {self.client.messages_recus}\nAlertes actives: 0\nNon reconnus: {self.client.codes_non_reconnus}",
                                    font=('SF Pro Text', 11),
                                    fg=self.colors['text_dim'],
                                    bg=self.colors['secondary_section'],
                                    justify='left')
         self.stats_label.pack(anchor='w', pady=(8, 0))
 
+        # Instrumentation du regroupement des rafraîchissements
+        self.ui_label = tk.Label(stats_frame, text="",
+                                 font=('SF Pro Text', 9),
+                                 fg=self.colors['text_dim'],
+                                 bg=self.colors['secondary_section'],
+                                 justify='left')
+        self.ui_label.pack(anchor='w', pady=(4, 0))
+
         # Section Actions
         actions_frame = tk.Frame(controls_frame, bg=self.colors['secondary_section'])
         actions_frame.pack(fill=tk.X, pady=(25, 0))
@@ -350,6 +426,26 @@ class RFIDRecepteurMonitor:
                                   width=20)
         self.sound_btn.pack(anchor='w', pady=(10, 0))
 
+        # Section Latence (carte RFID -> ligne affichée)
+        latence_frame = tk.Frame(controls_frame, bg=self.colors['secondary_section'])
+        latence_frame.pack(fill=tk.X, pady=(25, 0))
+
+        tk.Label(latence_frame, text="Latence",
+                font=('SF Pro Display', 14, 'bold'),
+                fg=self.colors['text'], bg=self.colors['secondary_section']).pack(anchor='w')
+
+        self.latence_label = tk.Label(latence_frame, text="Aucun message tracé",
+                                      font=('SF Pro Text', 10),
+                                      fg=self.colors['text_dim'],
+                                      bg=self.colors['secondary_section'],
+                                      justify='left')
+        self.latence_label.pack(anchor='w', pady=(8, 0))
+
+        tk.Button(latence_frame, text="Exporter les latences",
+                  font=('SF Pro Text', 10), bg=self.colors['text_dim'], fg='white',
+                  relief='flat', bd=0, padx=15, pady=6, cursor='hand2',
+                  command=self.export_latences).pack(anchor='w', pady=(8, 0))
+
         # Console de debug supprimée
 
         # Carte principale: Journal des messages
@@ -384,24 +480,15 @@ class RFIDRecepteurMonitor:
                              cursor='hand2')
         clear_btn.pack(side=tk.RIGHT, padx=25, pady=10)
 
-        # Tableau épuré dans la section principale
-        columns = ('statut', 'heure', 'message')
-        self.journal = ttk.Treeview(main_section, columns=columns, show='headings', height=16)
-        self.journal.heading('statut', text='🔔')
-        self.journal.heading('heure', text='Heure')
-        self.journal.heading('message', text='Message')
-        self.journal.column('statut', width=50, anchor='center')
-        self.journal.column('heure', width=100, anchor='center')
-        self.journal.column('message', width=550, anchor='w')
+        self.create_search_bar(main_section)
+
+        # Liste virtualisée: tout l'historique reste dans le magasin, seules les
+        # lignes visibles existent en widgets (avec sa propre barre de défilement)
+        self.journal = JournalVirtuel(main_section, self.magasin, self.colors, hauteur=16)
         self.journal.pack(fill=tk.BOTH, expand=True, padx=25, pady=(0, 20))
 
         # Binding pour la sélection
-        self.journal.bind('<<TreeviewSelect>>', self.on_message_select)
-
-        # Barre de défilement verticale épurée
-        vsb = ttk.Scrollbar(self.journal.master, orient='vertical', command=self.journal.yview)
-        self.journal.configure(yscrollcommand=vsb.set)
-        vsb.place(in_=self.journal, relx=1.0, rely=0, relheight=1.0, anchor='ne')
+        self.journal.bind('<<JournalSelect>>', self.on_message_select)
 
         # Info de pied épurée
         footer = tk.Label(main_section, text="🚨 Alerte active • ✅ Alerte arrêtée • Sélectionnez un message et cliquez \"STOP ALERTE\" pour éteindre la LED clignotante",
@@ -409,266 +496,330 @@ class RFIDRecepteurMonitor:
                          bg=self.colors['main_section'])
         footer.pack(anchor='w', padx=25, pady=(0, 20))
 
+    def create_search_bar(self, parent):
+        """Recherche plein texte dans l'historique sur disque, filtrable par heure de réception"""
+        barre = tk.Frame(parent, bg=self.colors['main_section'])
+        barre.pack(fill=tk.X, padx=25, pady=(15, 10))
+
+        champ = dict(font=('SF Pro Text', 11), bg='#ffffff', fg=self.colors['text'],
+                     relief='flat', bd=1, highlightthickness=2, highlightcolor=self.colors['accent'])
+        self.search_var = tk.StringVar()
+        self.search_from_var = tk.StringVar()
+        self.search_to_var = tk.StringVar()
+
+        tk.Label(barre, text="🔍", font=('SF Pro Text', 12),
+                 bg=self.colors['main_section']).pack(side=tk.LEFT)
+        recherche_entry = tk.Entry(barre, textvariable=self.search_var, width=22, **champ)
+        recherche_entry.pack(side=tk.LEFT, padx=(5, 10), ipady=3)
+        for texte, variable in (("Depuis", self.search_from_var), ("Jusqu'à", self.search_to_var)):
+            tk.Label(barre, text=texte, font=('SF Pro Text', 10), fg=self.colors['text_dim'],
+                     bg=self.colors['main_section']).pack(side=tk.LEFT)
+            entry = tk.Entry(barre, textvariable=variable, width=12, **champ)
+            entry.pack(side=tk.LEFT, padx=(5, 10), ipady=3)
+            entry.bind('<Return>', lambda e: self.search_history())
+        recherche_entry.bind('<Return>', lambda e: self.search_history())
+
+        tk.Button(barre, text="Rechercher", font=('SF Pro Text', 10), bg=self.colors['accent'], fg='white',
+                  relief='flat', bd=0, padx=10, pady=4, cursor='hand2',
+                  command=self.search_history).pack(side=tk.LEFT)
+        tk.Button(barre, text="Tout afficher", font=('SF Pro Text', 10), bg=self.colors['text_dim'], fg='white',
+                  relief='flat', bd=0, padx=10, pady=4, cursor='hand2',
+                  command=self.quitter_recherche).pack(side=tk.LEFT, padx=(5, 0))
+
+        self.search_status = tk.Label(barre, text="", font=('SF Pro Text', 10),
+                                      fg=self.colors['text_dim'], bg=self.colors['main_section'])
+        self.search_status.pack(side=tk.LEFT, padx=(10, 0))
+
+    def search_history(self):
+        """Affiche dans le journal les messages correspondant à la recherche"""
+        if self.client.persistance is None:
+            self.search_status.configure(text="Historique sur disque indisponible")
+            return
+        try:
+            depuis = horodatage_saisie(self.search_from_var.get())
+            jusqu_a = horodatage_saisie(self.search_to_var.get())
+        except ValueError as e:
+            self.search_status.configure(text=str(e))
+            return
+        texte = self.search_var.get()
+        if not texte.strip() and depuis is None and jusqu_a is None:
+            self.quitter_recherche()
+            return
+
+        debut = time.perf_counter()
+        lignes = self.client.persistance.rechercher(texte, depuis, jusqu_a)
+        duree_ms = (time.perf_counter() - debut) * 1000
+        self.recherche_active = True
+        self.journal.changer_source(ResultatsRecherche(lignes, self.magasin))
+        self.on_message_select(None)
+        self.search_status.configure(text=f"{len(lignes)} résultat(s) • {duree_ms:.0f} ms")
+
+    def quitter_recherche(self):
+        """Revient au journal en direct"""
+        if self.recherche_active:
+            self.recherche_active = False
+            self.journal.changer_source(self.magasin)
+            self.on_message_select(None)
+        self.search_status.configure(text="")
+
+
     def update_clock(self):
         try:
             now = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
             self.clock_label.configure(text=now)
+            # Nouvelles étapes écrites par l'émetteur ou par ce récepteur
+            self.update_latences()
+            # Trame radio restée sans suite (même délai que le firmware)
+            self.client.verifier_timeouts()
         except Exception:
             pass
         finally:
             self.root.after(1000, self.update_clock)
 
     def toggle_connection(self):
-        if not self.connected:
-            port = self.port_entry.get()
-            try:
-                self.serial_connection = serial.Serial(
-                    port=port,
-                    baudrate=115200,
-                    timeout=0.1
-                )
-
-                self.connected = True
-                self.connect_btn.configure(text="Déconnecter", bg=self.colors['danger'])
-                self.status.configure(text="● En ligne - Surveillance d'accès", fg=self.colors['success'])
-
-                # Activer le bouton son quand connecté
-                self.sound_btn.configure(state=tk.NORMAL)
-
-                self.log(f"Surveillance d'accès activée sur {port}", 'success')
-
-                threading.Thread(target=self.read_serial, daemon=True).start()
-
-            except Exception as e:
-                error_msg = str(e)
-                if "PermissionError" in error_msg or "Accès refusé" in error_msg:
-                    user_msg = f"PORT {port} OCCUPÉ\n\n• Fermez l'Arduino IDE (moniteur série)\n• Ou changez de port COM\n• Ou redémarrez l'ESP8266"
-                    self.log(f"Port {port} occupé - Fermez l'Arduino IDE", 'error')
-                elif "could not open port" in error_msg:
-                    user_msg = f"PORT {port} INTROUVABLE\n\n• Vérifiez que l'ESP8266 est connecté\n• Essayez COM3, COM4, COM7...\n• Redémarrez l'ESP8266"
-                    self.log(f"Port {port} introuvable - Vérifiez la connexion", 'error')
-                else:
-                    user_msg = f"ERREUR DE CONNEXION\n\n{error_msg}\n\n• Vérifiez le port COM\n• Redémarrez l'ESP8266"
-                    self.log(f"Erreur connexion: {error_msg}", 'error')
-
-                messagebox.showerror("Erreur de connexion", user_msg)
+        if self.ouverture is not None:
+            # Clic pendant l'ouverture: abandon (sauf si le résultat est déjà en file)
+            if self.ouverture.cancel():
+                self.ouverture = None
+                self.connect_btn.configure(text="Connecter", bg=self.colors['blue'])
+                self.status.configure(text="● Hors ligne", fg=self.colors['danger'])
+        elif not self.client.connecte:
+            self.connecter()
         else:
-            if self.serial_connection:
-                self.serial_connection.close()
-
-            self.connected = False
+            self.deconnecter()
+
+    def message_erreur_port(self, port, error_msg):
+        """Message utilisateur pour un port qui n'a pas pu être ouvert"""
+        if "PermissionError" in error_msg or "Accès refusé" in error_msg:
+            self.log(f"Port {port} occupé - Fermez l'Arduino IDE", 'error')
+            return (f"PORT {port} OCCUPÉ\n\n• Fermez l'Arduino IDE (moniteur série)\n• Ou changez de port COM\n"
+                    f"• Ou partagez la carte avec wave_courtier.py et saisissez socket://127.0.0.1:7800\n"
+                    f"• Ou redémarrez l'ESP8266")
+        elif "could not open port" in error_msg:
+            self.log(f"Port {port} introuvable - Vérifiez la connexion", 'error')
+            return f"PORT {port} INTROUVABLE\n\n• Vérifiez que l'ESP8266 est connecté\n• Essayez COM3, COM4, COM7...\n• Redémarrez l'ESP8266"
+        elif error_msg.startswith("NOM EN DOUBLE"):
+            return error_msg
+        else:
+            self.log(f"Erreur connexion: {error_msg}", 'error')
+            return f"ERREUR DE CONNEXION\n\n{error_msg}\n\n• Vérifiez le port COM\n• Redémarrez l'ESP8266"
+
+    def connecter(self):
+        """Ouvre tous les ports saisis en tâche de fond; la suite est dans connexion_terminee"""
+        self.ouverture = self.client.demarrer_connexion(self.port_entry.get(), self.binary_var.get())
+        self.connect_btn.configure(text="Annuler", bg=self.colors['warning'])
+        self.status.configure(text="● Connexion...", fg=self.colors['warning'])
+
+    def connexion_terminee(self, erreurs):
+        """Ports ouverts ou en erreur; les ports en erreur sont signalés sans bloquer les autres"""
+        self.ouverture = None
+        if not self.client.connecte:
             self.connect_btn.configure(text="Connecter", bg=self.colors['blue'])
             self.status.configure(text="● Hors ligne", fg=self.colors['danger'])
+        if erreurs:
+            titre = "Erreur de connexion" if not self.client.connecte else "Récepteurs non connectés"
+            messagebox.showerror(titre, "\n\n".join(self.message_erreur_port(port, erreur)
+                                                     for port, erreur in erreurs))
+        if not self.client.connecte:
+            return
 
-            # Désactiver le bouton son quand déconnecté
-            self.sound_btn.configure(state=tk.DISABLED)
+        self.connect_btn.configure(text="Déconnecter", bg=self.colors['danger'])
+        self.update_status()
+        self.demarrer_relais()
 
-            self.log("Surveillance d'accès désactivée", 'warning')
+        # Activer le bouton son quand connecté
+        self.sound_btn.configure(state=tk.NORMAL)
 
-    def read_serial(self):
-        while self.connected and self.serial_connection:
-            try:
-                if self.serial_connection.in_waiting > 0:
-                    line = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
-                    if line:
-                        self.root.after(0, lambda l=line: self.process_line(l))
-                else:
-                    time.sleep(0.01)
-            except Exception as e:
-                self.root.after(0, lambda: self.log(f"Erreur lecture: {str(e)}", 'error'))
-                break
-
-    def process_line(self, line):
-        if not line:
+    def demarrer_relais(self):
+        """Relie le journal aux stations pairs saisies, s'il y en a"""
+        pairs = analyser_pairs(self.pairs_entry.get())
+        if self.relais is not None or not pairs:
             return
-
-        current_time = datetime.now()
-
-        # Signal détecté
-        if "Signal détecté" in line:
-            self.log("Signal 433MHz détecté", 'signal')
-
-        # Code brut reçu
-        elif "Code brut reçu :" in line:
-            code = line.split("Code brut reçu :")[1].strip()
-            self.log(f"Code reçu: {code}", 'info')
-
-        # Détails du signal
-        elif "Longueur :" in line:
-            longueur = line.split("Longueur :")[1].strip()
-            self.log(f"Longueur: {longueur}", 'info')
-
-        elif "Protocole :" in line:
-            protocole = line.split("Protocole :")[1].strip()
-            self.log(f"Protocole: {protocole}", 'info')
-
-        # Code valide détecté
-        elif "Code valide détecté" in line:
-            self.log("Code valide (32 bits)", 'success')
-
-        # Message personnalisé reçu avec émojis ✅
-        elif "✅ MESSAGE PERSONNALISÉ REÇU:" in line:
-            # Extrait le message entre les guillemets simples
-            match = re.search(r"✅ MESSAGE PERSONNALISÉ REÇU: '([^']*)'", line)
-            if match:
-                message_recu = match.group(1)
-                if message_recu:  # Seulement si le message n'est pas vide
-                    self.display_access_status(f"✅ {message_recu}", "MESSAGE REÇU", current_time, True)
-                    # Ajoute uniquement le texte du message au journal
-                    self.journal_message(message_recu)
-                    self.autorisations_recues += 1
-                    self.update_stats()
-                    self.log(f"✅ MESSAGE REÇU: '{message_recu}'", 'success')
-                else:
-                    # Message vide détecté
-                    self.display_access_status("⚠️ MESSAGE VIDE", "ERREUR RÉCEPTION", current_time, False)
-                    self.codes_non_reconnus += 1
-                    self.update_stats()
-                    self.log("⚠️ Message vide reçu - Problème de décodage", 'error')
-
-        # Alerte arrêtée par l'ESP
-        elif "✅ ALERTE ARRÊTÉE - LED ÉTEINTE" in line:
-            self.log("✅ ESP confirme: Alerte arrêtée - LED éteinte", 'success')
-
-        # Message lu par l'ESP
-        elif "📄 Message lu:" in line:
-            # Extrait le message lu
-            message_match = re.search(r"📄 Message lu: '([^']*)'", line)
-            if message_match:
-                message_lu = message_match.group(1)
-                self.log(f"📖 Message lu confirmé: '{message_lu}'", 'success')
-            else:
-                self.log("📖 Message marqué comme lu", 'success')
-
-        # Nouvelle alerte activée
-        elif "🚨 NOUVELLE ALERTE ACTIVÉE - LED CLIGNOTANTE" in line:
-            self.log("🚨 Nouvelle alerte activée sur l'ESP - LED clignote", 'warning')
-
-        # Commande reçue par l'ESP
-        elif "📝 Commande reçue:" in line:
-            cmd_match = re.search(r"📝 Commande reçue: '([^']*)'", line)
-            if cmd_match:
-                commande = cmd_match.group(1)
-                self.log(f"📝 ESP a reçu la commande: '{commande}'", 'info')
-
-        # Son activé par l'ESP
-        elif "🔊 SON ACTIVÉ" in line:
-            self.sound_enabled = True
-            self.update_sound_button()
-            self.log("🔊 ESP confirme: Son activé", 'success')
-
-        # Son désactivé par l'ESP
-        elif "🔇 SON DÉSACTIVÉ" in line:
-            self.sound_enabled = False
-            self.update_sound_button()
-            self.log("🔇 ESP confirme: Son désactivé", 'info')
-
-        # Début de message avec nouveau format
-        elif "DEBUG: Début de message - Longueur attendue:" in line:
-            longueur = line.split("Longueur attendue:")[1].strip()
-            self.log(f"📡 Début réception - {longueur} caractères attendus", 'info')
-
-        # Paquets de message avec debug amélioré
-        elif "DEBUG: Paquet" in line and "reçu:" in line:
-            paquet_match = re.search(r"DEBUG: Paquet (\d+) reçu: (0x[0-9A-F]+)", line)
-            if paquet_match:
-                num_paquet = paquet_match.group(1)
-                code_hex = paquet_match.group(2)
-                self.log(f"📦 Paquet {num_paquet}: {code_hex}", 'info')
-
-        # Buffer actuel avec progression
-        elif "Buffer actuel:" in line:
-            match = re.search(r"Buffer actuel: '([^']*)' \((\d+)/(\d+) chars\)", line)
-            if match:
-                buffer_actuel = match.group(1)
-                current_len = match.group(2)
-                total_len = match.group(3)
-                if buffer_actuel:  # Ne log que si non vide
-                    progress = f"({current_len}/{total_len})"
-                    self.log(f"🔄 Assemblage: '{buffer_actuel}' {progress}", 'info')
-
-        # Carte autorisée détectée
-        elif "✅ CARTE AUTORISÉE DÉTECTÉE" in line:
-            self.log("✅ Accès accordé - Carte RFID autorisée", 'success')
-
-        # Signal hors séquence (nouveau format debug)
-        elif "DEBUG: Signal hors séquence:" in line:
-            code_match = re.search(r"Signal hors séquence: (0x[0-9A-F]+)", line)
-            if code_match:
-                code_hex = code_match.group(1)
-                self.display_access_status(f"⚠️ {code_hex[:8]}", "HORS SÉQUENCE", current_time, False)
-                self.codes_non_reconnus += 1
-                self.update_stats()
-                self.log(f"⚠️ Signal hors séquence: {code_hex}", 'warning')
-
-        # Buffer réinitialisé
-        elif "DEBUG: Buffer réinitialisé" in line:
-            self.log("🔄 Buffer de réception réinitialisé", 'info')
-
-
-
-
-        # Signal rejeté
-        elif "Signal rejeté" in line:
-            self.log("Signal rejeté (bruit/format invalide)", 'error')
-
-        # Bruit détecté
-        elif "Code = 0" in line:
-            self.log("Bruit radio détecté", 'warning')
-
-        # Longueur incorrecte
-        elif "Longueur incorrecte" in line:
-            details = line.split("Longueur incorrecte :")[1].strip() if ":" in line else ""
-            self.log(f"Format incorrect: {details}", 'warning')
-
-        # Messages de debug
-        elif line.startswith("DEBUG:"):
-            debug_msg = line[6:].strip()
-            if "prêt" in debug_msg.lower():
-                self.log(debug_msg, 'info')
-            else:
-                self.log(debug_msg, 'normal')
-
-        # Autres messages
+        relais = Relais(pairs=pairs)
+        relais.relier(self.client)
+        try:
+            relais.demarrer()
+        except OSError as e:
+            messagebox.showerror("Relais indisponible",
+                                 f"Le relais n'a pas pu écouter le port {relais.port}:\n{e}")
+            return
+        self.relais = relais
+        self.marquer_sale('stats')
+
+    def arreter_relais(self):
+        if self.relais is not None:
+            self.relais.arreter()
+            self.relais = None
+
+    def deconnecter(self):
+        self.arreter_relais()
+        self.client.deconnecter()
+        self.connect_btn.configure(text="Connecter", bg=self.colors['blue'])
+        self.status.configure(text="● Hors ligne", fg=self.colors['danger'])
+
+        # Désactiver le bouton son quand déconnecté
+        self.sound_btn.configure(state=tk.DISABLED)
+
+    def update_status(self):
+        recepteurs = self.client.recepteurs
+        actifs = self.client.nb_actifs()
+        if not actifs:
+            # Récepteurs relancés en tâche de fond (wave_supervision)
+            texte = "● Liaison perdue - Reconnexion..."
+        elif len(recepteurs) <= 1:
+            texte = "● En ligne - Surveillance d'accès"
+        else:
+            texte = f"● En ligne - {actifs}/{len(recepteurs)} récepteurs"
+        if not actifs:
+            couleur = self.colors['danger']
         else:
-            self.log(line, 'normal')
+            couleur = self.colors['success'] if actifs == len(recepteurs) else self.colors['warning']
+        self.status.configure(text=texte, fg=couleur)
 
-    def display_access_status(self, message, type_signal, timestamp, is_authorized):
-        """Affiche le statut d'accès principal"""
-        self.dernier_statut = message
-        # Le statut est maintenant affiché dans le journal des messages
-        # Plus besoin d'affichage séparé
+    def recepteur_perdu(self, recepteur, erreur):
+        self.update_status()
 
-    def journal_message(self, message_text):
-        """Ajoute uniquement le message reçu dans le journal avec l'heure système"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+    def reveiller(self):
+        """Appelé par la boucle série: note seulement la file non vide (aucun appel Tk hors du thread Tk)"""
+        self._donnees_serie = True
+
+    def surveiller_serie(self):
+        """Vide la file du client toutes les INTERVALLE_VIDAGE_MS (thread Tk)"""
+        try:
+            if self._donnees_serie:
+                # Remis à False avant de vider: un lot déposé entre-temps sera vu au tour suivant
+                self._donnees_serie = False
+                self.client.traiter_en_attente()
+        finally:
+            self.root.after(INTERVALLE_VIDAGE_MS, self.surveiller_serie)
+
+    def on_message(self, entree, evincee):
+        """Nouveau message dans le magasin: affichage au prochain tick"""
+        if self.recherche_active:
+            # Une nouvelle alerte ne doit pas rester cachée derrière des résultats
+            self.quitter_recherche()
+        if 'journal' not in self._ui_sale:
+            # La vue suit les nouveaux messages seulement si l'opérateur n'a pas
+            # remonté l'historique (état relevé avant le premier ajout du lot)
+            self._suivre_journal = self.journal.a_la_fin(0 if evincee is not None else 1)
+        if evincee is not None:
+            self._evincees += 1
+        self._lignes_a_tracer.append((entree.texte, entree.source))
+        self.marquer_sale('journal')
+
+    def on_repetition(self, entree):
+        """Alerte répétée regroupée sur sa ligne: compteur et statut redessinés au prochain tick"""
+        if self.recherche_active:
+            self.quitter_recherche()
+        if entree.id == self.selected_message_id:
+            # Ligne sélectionnée réactivée: elle peut de nouveau être arrêtée
+            self.stop_alert_btn.configure(state=tk.NORMAL, bg=self.colors['danger'],
+                                          text="🔴 STOP ALERTE")
+        self.marquer_sale('lignes')
+        self.marquer_sale('stats')
+
+    def marquer_sale(self, cle):
+        """Note une partie de l'affichage à mettre à jour au prochain tick"""
+        self._ui_sale.add(cle)
+        self.ui_evenements += 1
+        if not self._ui_planifie:
+            self._ui_planifie = True
+            # Rendu immédiat après une période calme, sinon au tick suivant
+            ecoule_ms = (time.monotonic() - self._dernier_rendu) * 1000
+            self.root.after(max(0, int(INTERVALLE_UI_MS - ecoule_ms)), self.appliquer_ui)
+
+    def appliquer_ui(self):
+        """Applique en une fois toutes les modifications notées depuis le dernier rendu"""
+        self._ui_planifie = False
+        sale, self._ui_sale = self._ui_sale, set()
+        self._dernier_rendu = time.monotonic()
+        self.ui_rendus += 1
         try:
-            # Ajouter avec statut "alerte active"
-            item_id = self.journal.insert('', tk.END, values=('🚨', timestamp, message_text))
-            self.messages_non_lus.append(item_id)
-
-            # Configurer l'emoji pour les messages en alerte
-            self.journal.set(item_id, 'statut', '🚨')  # Alerte active
-
-            if len(self.journal.get_children()) > 500:
-                first = self.journal.get_children()[0]
-                # Retirer de la liste des non lus si supprimé
-                if first in self.messages_non_lus:
-                    self.messages_non_lus.remove(first)
-                self.journal.delete(first)
-
-            last = self.journal.get_children()
-            if last:
-                self.journal.see(last[-1])
+            if 'journal' in sale:
+                evincees, self._evincees = self._evincees, 0
+                self.journal.nouvelle_entree(self._suivre_journal, evincees)
+                if self._lignes_a_tracer:
+                    # after_idle passe après le redessin Tk: la ligne est alors à l'écran
+                    lignes, self._lignes_a_tracer = self._lignes_a_tracer, []
+                    self.root.after_idle(lambda: self.noter_lignes_affichees(lignes))
+            elif 'lignes' in sale:
+                self.journal.rafraichir()
+            if 'stats' in sale:
+                self.appliquer_stats()
+            if 'son' in sale:
+                self.appliquer_bouton_son()
+            regroupes = self.ui_evenements - self.ui_rendus
+            self.ui_label.configure(
+                text=f"Affichage: {self.ui_evenements} mises à jour, {self.ui_rendus} rendus ({regroupes} regroupées)")
         except Exception:
             pass
 
+    def noter_lignes_affichees(self, lignes):
+        for texte, source in lignes:
+            self.traceur.noter(wave_traces.LIGNE_AFFICHEE, texte, source)
+
+    def update_latences(self):
+        """Relit les traces (émetteur + récepteur) et affiche les percentiles"""
+        if not self.correlateur.lire():
+            return
+        resume = self.correlateur.resume()
+        lignes = []
+        for nom, _, _ in wave_traces.SEGMENTS:
+            stats = resume[nom]
+            if stats['n']:
+                lignes.append(f"{nom} (n={stats['n']})\n"
+                              f"   p50 {wave_traces.formater_ms(stats['p50'])} • "
+                              f"p95 {wave_traces.formater_ms(stats['p95'])} • "
+                              f"p99 {wave_traces.formater_ms(stats['p99'])}")
+        self.latence_label.configure(text="\n".join(lignes) or "Aucun message tracé")
+
+    def export_latences(self):
+        from tkinter import filedialog  # Rarement utilisé: pas au démarrage
+        self.correlateur.lire()
+        chemin = filedialog.asksaveasfilename(title="Exporter les latences", defaultextension=".json",
+                                              initialfile="wave_latences.json",
+                                              filetypes=[("JSON", "*.json")])
+        if not chemin:
+            return
+        try:
+            nombre = self.correlateur.exporter(chemin)
+            messagebox.showinfo("Latences exportées", f"{nombre} messages tracés\n{chemin}")
+        except OSError as e:
+            messagebox.showerror("Export impossible", str(e))
 
     def update_stats(self):
-        """Met à jour les statistiques"""
-        alertes_actives = len(self.messages_non_lus)
-        self.stats_label.configure(
-            text=f"Messages reçus: {self.autorisations_recues}\nAlertes actives: {alertes_actives}\nNon reconnus: {self.codes_non_reconnus}")
+        """Met à jour les statistiques (au prochain tick d'affichage)"""
+        self.marquer_sale('stats')
+
+    def appliquer_stats(self):
+        client = self.client
+        alertes_actives = self.magasin.nb_non_lus
+        texte = f"Messages reçus: {client.messages_recus}\nAlertes actives: {alertes_actives}\nNon reconnus: {client.codes_non_reconnus}"
+        if len(client.recepteurs) > 1:
+            # Détail par récepteur sous le total
+            for recepteur in client.recepteurs.values():
+                etat = "" if recepteur.actif else " (reconnexion...)"
+                texte += (f"\n• {recepteur.nom}{etat}: {recepteur.messages_recus} reçus, "
+                          f"{recepteur.codes_non_reconnus} non reconnus")
+        trames_fec, paquets, reparees, irrecuperables = client.stats_fec()
+        if trames_fec:
+            texte += (f"\nParité: {reparees} trames réparées ({paquets} paquets), "
+                      f"{irrecuperables} irrécupérables")
+        compressees, octets, paquets = client.stats_compression()
+        if compressees:
+            texte += f"\nCompression: {compressees} messages, {octets} octets et {paquets} paquets économisés"
+        hors_ligne = [recepteur for recepteur in client.recepteurs.values()
+                      if recepteur.pannes or recepteur.perdue_depuis is not None]
+        if hors_ligne:
+            texte += "\nHors ligne: " + ", ".join(
+                f"{recepteur.nom} {recepteur.indisponibilite():.0f} s ({len(recepteur.pannes)} reprises)"
+                for recepteur in hors_ligne)
+        if client.messages_regroupes:
+            texte += f"\nRépétitions regroupées: {client.messages_regroupes}"
+        if self.relais is not None:
+            texte += (f"\nRelais: {client.messages_relayes} relayés, "
+                      f"{self.relais.pairs_connectes()}/{len(self.relais.pairs)} stations connectées")
+        self.stats_label.configure(text=texte)
 
     def log(self, message, msg_type='normal'):
         """Log interne (console UI supprimée)"""
@@ -682,7 +833,7 @@ class RFIDRecepteurMonitor:
             if selection:
                 self.selected_message_id = selection[0]
                 # Vérifier si le message est non lu (alerte active)
-                if self.selected_message_id in self.messages_non_lus:
+                if self.magasin.est_non_lu(self.selected_message_id):
                     self.stop_alert_btn.configure(state=tk.NORMAL, bg=self.colors['danger'],
                                                  text="🔴 STOP ALERTE")
                 else:
@@ -697,65 +848,41 @@ class RFIDRecepteurMonitor:
 
     def mark_message_read(self):
         """Marque le message sélectionné comme lu et envoie la commande stopalert à l'ESP"""
-        if not self.selected_message_id or self.selected_message_id not in self.messages_non_lus:
+        if self.selected_message_id is None:
             return
 
         try:
-            # Envoyer la commande stopalert à l'ESP
-            if self.connected and self.serial_connection:
-                self.serial_connection.write(b"stopalert\n")
-                self.log("Commande 'stopalert' envoyée à l'ESP", 'info')
-
-            # Marquer le message comme lu visuellement
-            self.journal.set(self.selected_message_id, 'statut', '✅')  # Alerte arrêtée
-
-            # Retirer de la liste des non lus
-            if self.selected_message_id in self.messages_non_lus:
-                self.messages_non_lus.remove(self.selected_message_id)
-
-            # Mettre à jour les statistiques
-            self.update_stats()
+            # stopalert à l'ESP qui a reçu le message, puis retrait des non lus
+            if not self.client.arreter_alerte(self.selected_message_id):
+                return
+            self.journal.rafraichir()  # Statut ✅ si la ligne est visible
 
             # Changer l'état du bouton
             self.stop_alert_btn.configure(state=tk.DISABLED, bg=self.colors['text_dim'],
                                         text="✅ ALERTE ARRÊTÉE")
 
-            # Récupérer le texte du message pour affichage
-            message_values = self.journal.item(self.selected_message_id)['values']
-            if len(message_values) >= 3:
-                message_text = message_values[2]
-                self.log(f"🔴 Arrêt de l'alerte demandé pour: '{message_text}'", 'info')
-
         except Exception as e:
             self.log(f"Erreur lors de l'arrêt de l'alerte: {str(e)}", 'error')
 
     def toggle_sound(self):
         """Active/désactive le son des alertes sur l'ESP"""
-        if not self.connected or not self.serial_connection:
+        if not self.client.connecte:
             self.log("Erreur: Non connecté à l'ESP", 'error')
             return
 
         try:
-            if self.sound_enabled:
-                # Bouton affichait SON ON -> envoyer soundoff et passer à OFF
-                self.serial_connection.write(b"soundoff\n")
-                self.log("Commande 'soundoff' envoyée à l'ESP", 'info')
-                self.sound_enabled = False
-                self.update_sound_button()
-            else:
-                # Bouton affichait SON OFF -> envoyer soundon et passer à ON
-                self.serial_connection.write(b"soundon\n")
-                self.log("Commande 'soundon' envoyée à l'ESP", 'info')
-                self.sound_enabled = True
-                self.update_sound_button()
-
+            # Bouton affichait SON ON -> soundoff, SON OFF -> soundon
+            self.client.regler_son(not self.client.son_actif)
         except Exception as e:
             self.log(f"Erreur lors du toggle du son: {str(e)}", 'error')
 
     def update_sound_button(self):
-        """Met à jour l'affichage du bouton son selon l'état actuel"""
+        """Met à jour l'affichage du bouton son selon l'état actuel (au prochain tick)"""
+        self.marquer_sale('son')
+
+    def appliquer_bouton_son(self):
         try:
-            if self.sound_enabled:
+            if self.client.son_actif:
                 self.sound_btn.configure(text="🔊 SON ON", bg=self.colors['success'])
             else:
                 self.sound_btn.configure(text="🔇 SON OFF", bg=self.colors['warning'])
@@ -766,21 +893,22 @@ class RFIDRecepteurMonitor:
         """Efface la console"""
         # Efface le journal
         try:
-            for iid in self.journal.get_children():
-                self.journal.delete(iid)
-            # Vider la liste des messages non lus
-            self.messages_non_lus.clear()
+            # Vider le magasin et les messages non lus; la vue ne recycle que ses lignes visibles
+            self.client.vider_journal()
+            self._ui_sale.discard('journal')
+            self._evincees = 0
+            self.recherche_active = False
+            self.journal.changer_source(self.magasin)
+            self.journal.vider()
             self.selected_message_id = None
             self.stop_alert_btn.configure(state=tk.DISABLED, bg=self.colors['text_dim'],
                                         text="🔴 STOP ALERTE")
             # Réinitialiser le bouton son aussi
             self.sound_btn.configure(state=tk.DISABLED)
-            # Mettre à jour les stats
-            self.update_stats()
         except Exception:
             pass
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = RFIDRecepteurMonitor(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
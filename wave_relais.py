@@ -0,0 +1,307 @@
+"""Relais entre stations réceptrices: un journal d'alertes commun sur le réseau local
+
+    python wave_client_recepteur.py "Étage 1=COM8" --station "Poste A" --pairs "10.0.0.12:7900"
+
+Chaque alerte assemblée par une station est publiée, avec sa station, sa carte
+d'origine et son heure de réception, à toutes les stations pairs (lignes JSON
+sur TCP, port PORT_RELAIS). Chaque pair a sa file d'envoi: une alerte n'en sort
+que quand le pair l'a acquittée. Tant qu'un pair est injoignable, ses alertes
+s'accumulent (EN_ATTENTE_MAX, les plus anciennes abandonnées au-delà) et sont
+rejouées dans l'ordre à la reconnexion, relancée avec une attente doublée
+(RELANCE_INITIALE à RELANCE_MAX, comme les cartes).
+
+Une alerte répétée et regroupée sur sa ligne (wave_journal) est publiée de
+nouveau avec le même identifiant et son nombre de réceptions: les pairs
+mettent à jour leur ligne au lieu d'en ajouter une.
+
+Chaque station envoie ses propres alertes et ne retransmet pas celles des
+autres: toutes les stations du journal commun se listent mutuellement comme
+pairs. Une alerte reçue mais dont l'acquittement s'est perdu dans une coupure
+est renvoyée à la reconnexion: ces doublons sont écartés par l'identifiant de
+message, unique par station et par session.
+
+Tout tourne dans la boucle série partagée (wave_serie); le journal local est
+alimenté par la file du client (ClientRecepteur.transmettre).
+"""
+import asyncio
+import collections
+import itertools
+import json
+import os
+import socket
+import time
+
+from wave_serie import boucle_serie
+from wave_supervision import RELANCE_INITIALE, RELANCE_MAX
+
+PORT_RELAIS = 7900
+EN_ATTENTE_MAX = 10000    # Alertes gardées par pair injoignable
+IDS_MEMORISES = 100000    # Identifiants déjà vus retenus pour écarter les doublons
+RETARDS_MEMORISES = 10000 # Retards de réception gardés pour les percentiles
+DELAI_CONNEXION = 5.0     # Connexion et présentation d'un pair
+LOT_ENVOI = 256           # Alertes écrites entre deux attentes du tampon TCP
+
+
+def analyser_pairs(saisie):
+    """'10.0.0.12:7900, poste-b' -> [('10.0.0.12', 7900), ('poste-b', PORT_RELAIS)]"""
+    pairs = []
+    for morceau in saisie.split(','):
+        morceau = morceau.strip()
+        if not morceau:
+            continue
+        hote, _, port = morceau.rpartition(':')
+        if not hote:
+            hote, port = port, ""
+        pairs.append((hote, int(port) if port else PORT_RELAIS))
+    return pairs
+
+
+def encoder(objet):
+    return json.dumps(objet, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n"
+
+
+class Pair:
+    """Station à qui ce relais envoie ses alertes, avec sa file d'alertes non acquittées"""
+
+    def __init__(self, hote, port):
+        self.hote = hote
+        self.port = port
+        self.station = None   # Nom annoncé par le pair à la connexion
+        self.connecte = False
+        self.erreur = ""
+        self.en_attente = collections.deque()  # (numéro, alerte) dans l'ordre d'envoi
+        self.envoyees = 0     # Alertes en tête de file déjà écrites sur la connexion en cours
+        self.numeros = itertools.count(1)
+        self.nouvelles = asyncio.Event()
+        self.tache = None
+        self.acquittees = 0
+        self.abandonnees = 0  # Évincées de la file pleine sans avoir été acquittées
+        self.coupures = 0
+        self.perdu_depuis = None
+
+    @property
+    def adresse(self):
+        return f"{self.hote}:{self.port}"
+
+    def deposer(self, alerte):
+        if len(self.en_attente) >= EN_ATTENTE_MAX:
+            self.en_attente.popleft()
+            self.abandonnees += 1
+            self.envoyees = max(0, self.envoyees - 1)
+        self.en_attente.append((next(self.numeros), alerte))
+        self.nouvelles.set()
+
+    def acquitter(self, numero):
+        """Retire les alertes jusqu'au numéro acquitté (acquittements cumulatifs)"""
+        while self.en_attente and self.en_attente[0][0] <= numero:
+            self.en_attente.popleft()
+            self.envoyees = max(0, self.envoyees - 1)
+            self.acquittees += 1
+
+
+class Relais:
+    """Publie les alertes locales aux pairs et livre celles des autres stations
+
+    `livrer(alerte)` est appelé depuis la boucle série pour chaque alerte
+    distante reçue pour la première fois: dictionnaire id, station, source,
+    recu_a (epoch), texte, occurrences et vu_a (dernière réception). Une
+    répétition garde l'id de l'alerte et augmente `occurrences`.
+    """
+
+    def __init__(self, station=None, pairs=(), port=PORT_RELAIS, livrer=None):
+        self.station = station or socket.gethostname()
+        self.port = port
+        self.livrer = livrer
+        self.boucle = boucle_serie()
+        self.session = os.urandom(4).hex()  # Les ids du journal local repartent de 1 sans historique
+        self.pairs = [Pair(hote, port_pair) for hote, port_pair in pairs]
+        self.serveur = None
+        self.actif = False
+        self.connexions = {}  # Écrivain -> nom des stations qui nous envoient leurs alertes
+
+        self.vus = set()
+        self.ordre_vus = collections.deque()
+        self.publiees = 0
+        self.recues = 0
+        self.doublons = 0
+        self.retards = collections.deque(maxlen=RETARDS_MEMORISES)  # Secondes, réception ici - réception d'origine
+
+    # ----- Depuis les autres threads -----
+
+    def demarrer(self):
+        """Écoute le port du relais et contacte les pairs (OSError si le port est pris)"""
+        self.boucle.executer(self._demarrer())
+
+    def arreter(self):
+        """Ferme le relais; retourne un concurrent.futures.Future"""
+        self.actif = False
+        return self.boucle.soumettre(self._arreter())
+
+    def publier(self, texte, source, recu_a, id_local, occurrences=1, vu_a=None):
+        """Diffuse une alerte du journal local (ou sa répétition) à tous les pairs"""
+        alerte = {'id': f"{self.station}/{self.session}/{id_local}", 'station': self.station,
+                  'source': source, 'recu_a': recu_a, 'texte': texte,
+                  'occurrences': occurrences, 'vu_a': recu_a if vu_a is None else vu_a}
+        self.boucle.appeler(self._publier, alerte)
+
+    def relier(self, client):
+        """Publie les messages d'un ClientRecepteur et ajoute à son journal ceux des pairs (avant demarrer)"""
+        def message_local(entree, evincee=None):
+            if self.actif and not entree.station:
+                self.publier(entree.texte, entree.source, entree.recu_a, entree.id, entree.occurrences, entree.vu_a)
+        client.abonner('message', message_local)
+        client.abonner('repetition', message_local)
+        self.livrer = lambda alerte: client.transmettre(
+            client.journal_distant, alerte['texte'], alerte['source'], alerte['station'], alerte['recu_a'],
+            alerte['id'], alerte.get('occurrences', 1), alerte.get('vu_a'))
+
+    # ----- Boucle série -----
+
+    async def _demarrer(self):
+        self.serveur = await asyncio.start_server(self._servir, None, self.port)
+        self.actif = True
+        for pair in self.pairs:
+            pair.tache = asyncio.get_running_loop().create_task(self._alimenter(pair))
+
+    async def _arreter(self):
+        if self.serveur is not None:
+            self.serveur.close()
+        for ecrivain in list(self.connexions):
+            ecrivain.close()  # Leur lecture finit d'elle-même
+        taches = [pair.tache for pair in self.pairs if pair.tache is not None]
+        for tache in taches:
+            tache.cancel()
+        await asyncio.gather(*taches, return_exceptions=True)
+
+    def _memoriser(self, id_):
+        """Vrai si l'id est nouveau; les plus anciens sont oubliés au-delà de IDS_MEMORISES"""
+        if id_ in self.vus:
+            return False
+        self.vus.add(id_)
+        self.ordre_vus.append(id_)
+        if len(self.ordre_vus) > IDS_MEMORISES:
+            self.vus.discard(self.ordre_vus.popleft())
+        return True
+
+    def _publier(self, alerte):
+        self.publiees += 1
+        for pair in self.pairs:
+            pair.deposer(alerte)
+
+    def _recevoir(self, alerte):
+        # Une répétition réutilise l'id de l'alerte: c'est le couple qui est unique
+        if not self._memoriser((alerte['id'], alerte.get('occurrences', 1))):
+            self.doublons += 1
+            return
+        self.recues += 1
+        self.retards.append(time.time() - alerte.get('vu_a', alerte['recu_a']))
+        if self.livrer is not None:
+            self.livrer(alerte)
+
+    async def _servir(self, lecteur, ecrivain):
+        """Un pair qui nous envoie ses alertes: chacune est acquittée après traitement"""
+        try:
+            bonjour = json.loads(await asyncio.wait_for(lecteur.readline(), DELAI_CONNEXION))
+            self.connexions[ecrivain] = bonjour['station']
+            ecrivain.write(encoder({'station': self.station}))
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne.endswith(b"\n") or ecrivain.is_closing():
+                    break  # Pair arrêté ou coupé: il rejouera ce qui n'est pas acquitté
+                alerte = json.loads(ligne)
+                numero = alerte.pop('n')
+                self._recevoir(alerte)
+                ecrivain.write(encoder({'ack': numero}))
+        except (OSError, ValueError, KeyError, asyncio.TimeoutError):
+            pass  # Connexion ou ligne invalide: le pair se reconnectera
+        finally:
+            self.connexions.pop(ecrivain, None)
+            ecrivain.close()
+
+    async def _alimenter(self, pair):
+        """Connexion sortante vers un pair, relancée tant que le relais tourne"""
+        attente = RELANCE_INITIALE
+        while True:
+            try:
+                lecteur, ecrivain = await asyncio.wait_for(
+                    asyncio.open_connection(pair.hote, pair.port), DELAI_CONNEXION)
+            except (OSError, asyncio.TimeoutError) as e:
+                pair.erreur = str(e) or type(e).__name__
+            else:
+                try:
+                    await self._envoyer(pair, lecteur, ecrivain)
+                except (OSError, ValueError, KeyError, asyncio.TimeoutError) as e:
+                    pair.erreur = str(e) or type(e).__name__
+                finally:
+                    ecrivain.close()
+                if pair.connecte:
+                    pair.connecte = False
+                    pair.coupures += 1
+                    attente = RELANCE_INITIALE
+            if pair.perdu_depuis is None:
+                pair.perdu_depuis = time.monotonic()
+            await asyncio.sleep(attente)
+            attente = min(attente * 2, RELANCE_MAX)
+
+    async def _envoyer(self, pair, lecteur, ecrivain):
+        ecrivain.write(encoder({'station': self.station}))
+        bonjour = json.loads(await asyncio.wait_for(lecteur.readline(), DELAI_CONNEXION))
+        pair.station = bonjour['station']
+        pair.connecte = True
+        pair.erreur = ""
+        pair.perdu_depuis = None
+        pair.envoyees = 0  # Tout ce qui n'est pas acquitté est rejoué, dans l'ordre
+        acquittements = asyncio.get_running_loop().create_task(self._lire_acquittements(pair, lecteur))
+        try:
+            while True:
+                pair.nouvelles.clear()
+                if acquittements.done():
+                    acquittements.result()
+                    return
+                if ecrivain.is_closing():
+                    raise ConnectionResetError("connexion perdue")
+                lot = 0
+                while pair.envoyees < len(pair.en_attente) and lot < LOT_ENVOI:
+                    numero, alerte = pair.en_attente[pair.envoyees]
+                    ecrivain.write(encoder({**alerte, 'n': numero}))
+                    pair.envoyees += 1
+                    lot += 1
+                if lot:
+                    await ecrivain.drain()
+                else:
+                    await pair.nouvelles.wait()
+        finally:
+            acquittements.cancel()
+
+    async def _lire_acquittements(self, pair, lecteur):
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne.endswith(b"\n"):
+                    raise ConnectionResetError("connexion fermée par la station")
+                pair.acquitter(json.loads(ligne)['ack'])
+        finally:
+            pair.nouvelles.set()  # Réveille l'envoi pour qu'il constate la fin
+
+    # ----- Statistiques -----
+
+    def pairs_connectes(self):
+        return sum(pair.connecte for pair in self.pairs)
+
+    def resume(self):
+        lignes = [f"Relais '{self.station}' (port {self.port}): {self.publiees} publiées, "
+                  f"{self.recues} reçues, {self.doublons} doublons écartés",
+                  f"  Reçoit de: {', '.join(sorted(self.connexions.values())) or 'aucune station'}"]
+        maintenant = time.monotonic()
+        for pair in self.pairs:
+            nom = f"{pair.station or '?'} ({pair.adresse})"
+            if pair.connecte:
+                etat = "connecté"
+            elif pair.perdu_depuis is not None:
+                etat = f"injoignable depuis {maintenant - pair.perdu_depuis:.0f} s ({pair.erreur})"
+            else:
+                etat = "connexion..."
+            lignes.append(f"  {nom}: {etat}, {len(pair.en_attente)} en attente, "
+                          f"{pair.acquittees} acquittées, {pair.abandonnees} abandonnées, "
+                          f"{pair.coupures} coupures")
+        return "\n".join(lignes)
@@ -0,0 +1,112 @@
+"""Boucle asyncio partagée qui possède tous les ports série du processus
+
+Un seul thread de fond fait tourner la boucle: ouverture, lecture, écriture et
+fermeture des ports y sont des coroutines, annulables. Les appels de pyserial
+qui peuvent bloquer (ouverture d'un port COM, écriture sur une carte qui ne lit
+plus, fermeture) passent par l'exécuteur de la boucle avec un délai maximal:
+une carte figée ne retient jamais les autres.
+
+Les résultats repartent vers l'interface par une seule file thread-safe, celle
+du client (ClientRecepteur / ClientEmetteur.transmettre). Le thread Tk la vide
+en la scrutant toutes les INTERVALLE_VIDAGE_MS: aucun appel Tk n'est fait
+depuis un autre thread.
+"""
+import asyncio
+import threading
+
+TIMEOUT_OUVERTURE = 5.0     # Port COM fantôme (pilote USB bloqué)
+TIMEOUT_ECRITURE = 1.0      # Une carte bloquée ne retient pas la diffusion plus longtemps
+INTERVALLE_VIDAGE_MS = 10   # Scrutation de la file des clients par le thread Tk
+
+
+class BoucleSerie:
+    """Boucle asyncio dans un thread démon; les autres threads lui soumettent des coroutines"""
+
+    def __init__(self):
+        self.boucle = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._executer, daemon=True, name='boucle-serie')
+        self.thread.start()
+
+    def _executer(self):
+        asyncio.set_event_loop(self.boucle)
+        self.boucle.run_forever()
+
+    def soumettre(self, coroutine, liberer=None):
+        """Planifie `coroutine`; retourne un concurrent.futures.Future (cancel() l'annule)
+
+        cancel() peut arriver quand la coroutine vient de finir: son résultat
+        est alors perdu pour l'appelant. Avec `liberer`, il lui est passé dans
+        le thread de la boucle (par exemple pour refermer les ports ouverts).
+        """
+        if liberer is None:
+            return asyncio.run_coroutine_threadsafe(coroutine, self.boucle)
+        verrou = threading.Lock()
+        fin = []  # Résultat de la coroutine, une fois terminée
+
+        async def garder():
+            resultat = await coroutine
+            with verrou:
+                annule = futur.cancelled()
+                if not annule:
+                    fin.append(resultat)  # Libéré par annulation() si cancel() arrive encore
+            if annule:
+                liberer(resultat)
+            return resultat
+
+        def annulation(futur):
+            with verrou:
+                if futur.cancelled() and fin:
+                    self.appeler(liberer, fin.pop())
+
+        with verrou:  # garder() peut finir avant le retour de run_coroutine_threadsafe
+            futur = asyncio.run_coroutine_threadsafe(garder(), self.boucle)
+        futur.add_done_callback(annulation)
+        return futur
+
+    def executer(self, coroutine, timeout=None):
+        """Attend le résultat de `coroutine` (jamais depuis le thread de la boucle: blocage)"""
+        if threading.current_thread() is self.thread:
+            coroutine.close()
+            raise RuntimeError("attente d'une coroutine depuis la boucle série")
+        return self.soumettre(coroutine).result(timeout)
+
+    def appeler(self, fonction, *args):
+        """Appelle `fonction` dans le thread de la boucle"""
+        self.boucle.call_soon_threadsafe(fonction, *args)
+
+
+_boucle = None
+_verrou = threading.Lock()
+
+
+def boucle_serie():
+    """La boucle partagée, démarrée au premier appel"""
+    global _boucle
+    with _verrou:
+        if _boucle is None:
+            _boucle = BoucleSerie()
+        return _boucle
+
+
+async def bloquant(fonction, *args, timeout=None, liberer=None, executeur=None):
+    """Exécute un appel bloquant de pyserial dans l'exécuteur, avec délai et annulation
+
+    Le thread de l'exécuteur ne peut pas être interrompu: si l'attente est
+    annulée ou dépasse `timeout`, `liberer(resultat)` est appelé quand l'appel
+    finit malgré tout (par exemple pour refermer un port ouvert trop tard).
+    `executeur` remplace celui de la boucle (lectures qui occupent un thread).
+    """
+    appel = asyncio.get_running_loop().run_in_executor(executeur, fonction, *args)
+    try:
+        return await asyncio.wait_for(asyncio.shield(appel), timeout)
+    except BaseException:
+        appel.add_done_callback(lambda fin: _abandonner(fin, liberer))
+        raise
+
+
+def _abandonner(appel, liberer):
+    # exception() marque aussi l'erreur comme lue (pas d'avertissement de la boucle)
+    if appel.cancelled() or appel.exception() is not None:
+        return
+    if liberer is not None:
+        liberer(appel.result())
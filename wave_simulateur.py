@@ -0,0 +1,475 @@
+"""Cartes ESP8266 simulées sur des paires pty (Linux/macOS), sans matériel
+
+Les simulateurs reproduisent la sortie série de recepteur.cpp et de
+transmetteur.cpp (mode texte détaillé ou compact, mode binaire) et répondent
+à leurs commandes. Le côté esclave du pty (`port`) s'ouvre comme un port COM:
+
+    sim = SimulateurRecepteur(perte=0.05, doublons=0.05, hors_sequence=0.1)
+    sim.demarrer()
+    client.connecter(sim.port)
+    sim.recevoir_message("EVACUATION BATIMENT A")
+
+Un SimulateurEmetteur relié à des récepteurs simulés leur « transmet » par
+radio les codes de sendCustomMessage au passage d'une carte autorisée.
+"""
+import os
+import pty
+import random
+import select
+import threading
+import time
+import tty
+
+import wave_binaire
+from wave_modeles import CODE_MODELE
+from wave_trames import (COMPRESSE, COPIES_MODELE, DELAI_COPIE_MODELE, SEQ_PARITE, charge_utile,
+                         encoder_donnees, encoder_message, nombre_paquets)
+
+UID_AUTORISE = (0xA3, 0x5F, 0x12, 0x9C)
+UID_REFUSE = (0x04, 0xB2, 0x77, 0x01)
+DELAI_DOUBLON = 0.2  # DUPLICATE_DELAY_MS de recepteur.cpp
+
+
+class PortSimule:
+    """Paire pty: `port` est ouvert par l'application, le simulateur utilise le côté maître"""
+
+    def __init__(self):
+        self.maitre, self._esclave = pty.openpty()
+        tty.setraw(self._esclave)  # Ni écho, ni conversion des fins de ligne
+        self.port = os.ttyname(self._esclave)
+
+    def ecrire(self, data):
+        # Écriture bloquante quand l'application ne lit plus: même contre-pression qu'un câble
+        vue = memoryview(data)
+        while vue:
+            vue = vue[os.write(self.maitre, vue):]
+
+    def lire(self, timeout):
+        """Octets écrits par l'application (b"" si rien avant `timeout`)"""
+        prets, _, _ = select.select([self.maitre], [], [], timeout)
+        if not prets:
+            return b""
+        try:
+            return os.read(self.maitre, 4096)
+        except OSError:
+            return b""
+
+    def fermer(self):
+        for fd in (self.maitre, self._esclave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class CarteSimulee:
+    """Boucle de commandes commune aux deux firmwares"""
+
+    def __init__(self, port=None):
+        self.port = port or PortSimule()
+        self.binaire = False
+        self.actif = False
+        self.thread = None
+        self.verrou = threading.RLock()  # État et sortie: commandes et radio arrivent de deux threads
+        self._tampon = b""
+
+    @property
+    def nom_port(self):
+        return self.port.port
+
+    def demarrer(self):
+        self.actif = True
+        self.thread = threading.Thread(target=self._boucle, daemon=True)
+        self.thread.start()
+        return self
+
+    def arreter(self):
+        self.actif = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.port.fermer()
+
+    def _boucle(self):
+        while self.actif:
+            data = self.port.lire(0.1)
+            if not data:
+                continue
+            self._tampon += data
+            *lignes, self._tampon = self._tampon.split(b"\n")
+            for ligne in lignes:
+                with self.verrou:
+                    self.commande(ligne.decode('utf-8', errors='replace').strip())
+
+    def sortie(self):
+        """Accumulateur de sortie: lignes texte (println) et trames binaires"""
+        return _Sortie(self)
+
+    def commande(self, commande):
+        raise NotImplementedError
+
+
+class _Sortie:
+    def __init__(self, carte):
+        self.carte = carte
+        self.morceaux = []
+
+    def ligne(self, texte=""):
+        self.morceaux.append(texte.encode('utf-8') + b"\r\n")
+
+    def trame(self, type_evt, donnees=b""):
+        self.morceaux.append(wave_binaire.encoder_trame(type_evt, bytes(donnees)[:wave_binaire.TAILLE_MAX_DONNEES]))
+
+    def envoyer(self):
+        if self.morceaux:
+            with self.carte.verrou:
+                self.carte.port.ecrire(b"".join(self.morceaux))
+            self.morceaux = []
+
+
+class SimulateurRecepteur(CarteSimulee):
+    """recepteur.cpp: processCode() et processTerminalCommand()
+
+    `perte`, `doublons` et `hors_sequence` sont des probabilités appliquées aux
+    codes radio reçus: code perdu, code reçu deux fois, code parasite inséré
+    avant la trame.
+    """
+
+    def __init__(self, port=None, verbeux=True, perte=0.0, doublons=0.0, hors_sequence=0.0, graine=None):
+        super().__init__(port)
+        self.verbeux = verbeux
+        self.perte = perte
+        self.doublons = doublons
+        self.hors_sequence = hors_sequence
+        self.alea = random.Random(graine)
+
+        self.son_actif = True
+        self.alerte_active = False
+        self.dernier_message = ""
+        self.reception = False
+        self.longueur_attendue = 0
+        self.tampon_message = ""
+        self.compresse = False
+        self.octets_compresses = 0
+        self.dernier_code_modele = (0, 0.0)  # Déduplication des paquets (DUPLICATE_DELAY_MS)
+        self.dernier_modele = (0, 0.0)  # Copie d'un modèle déjà annoncé (TEMPLATE_DUPLICATE_MS)
+
+        self.codes_recus = 0
+        self.codes_perdus = 0
+
+    def recevoir_message(self, texte, groupe_fec=0, compression=False):
+        """Le message `texte` arrive par radio (avec les perturbations configurées)"""
+        self.recevoir_codes(encoder_message(texte, groupe_fec, compression))
+
+    def recevoir_codes(self, codes):
+        with self.verrou:
+            self._recevoir_codes(codes)
+
+    def _recevoir_codes(self, codes):
+        radio = []
+        if self.hors_sequence and not self.reception and self.alea.random() < self.hors_sequence:
+            # Parasite hors trame: octet de poids fort ni 0xFF, ni 0xFE, ni numéro de paquet
+            radio.append(self.alea.randrange(0x10, 0xFE) << 24 | self.alea.getrandbits(24))
+        for code in codes:
+            if self.perte and self.alea.random() < self.perte:
+                self.codes_perdus += 1
+                continue
+            radio.append(code)
+            if self.doublons and self.alea.random() < self.doublons:
+                radio.append(code)
+        sortie = self.sortie()
+        for code in radio:
+            self._traiter_code(code, sortie)
+        sortie.envoyer()
+
+    def _traiter_code(self, code, sortie):
+        if code >> 24 == CODE_MODELE:
+            # Copie immédiate d'un code modèle: écartée par la déduplication des paquets
+            maintenant = time.monotonic()
+            dernier, instant = self.dernier_code_modele
+            if code == dernier and maintenant - instant < DELAI_DOUBLON:
+                return
+            self.dernier_code_modele = (code, maintenant)
+        self.codes_recus += 1
+        if self.binaire:
+            sortie.trame(wave_binaire.TYPE_CODE, code.to_bytes(4, 'big'))
+        else:
+            sortie.ligne(f"RX:{code:X}")
+
+        octets = code.to_bytes(4, 'big')
+        if octets[0] == CODE_MODELE:
+            # Message modèle complet en un code; une trame en cours continue
+            maintenant = time.monotonic()
+            dernier, instant = self.dernier_modele
+            self.dernier_modele = (code, maintenant)
+            if code == dernier and maintenant - instant < DELAI_COPIE_MODELE:
+                return  # Copie arrivée après DUPLICATE_DELAY_MS: RX émis, pas de nouvelle annonce
+            tampon = self.tampon_message
+            self.tampon_message = f"MODELE {octets[1]}"
+            parametre = "".join(chr(octet) for octet in octets[2:] if 32 <= octet <= 126)
+            if parametre:
+                self.tampon_message += f" {parametre}"
+            self._annoncer(sortie)
+            self.tampon_message = tampon
+            return
+
+        if octets[0] == 0xFF:
+            self.longueur_attendue = code & 0xFF
+            self.tampon_message = ""
+            self.reception = True
+            self.compresse = bool(octets[1] & COMPRESSE)
+            self.octets_compresses = 0
+            if self.verbeux:
+                sortie.ligne(f"DEBUG: Début de message - Longueur attendue: {self.longueur_attendue}")
+            return
+
+        if octets[0] == 0xFE:
+            if self.reception:
+                if self.compresse:
+                    self.tampon_message = f"MESSAGE COMPRESSE ({self.octets_compresses} octets)"
+                self._annoncer(sortie)
+            self._reinitialiser(sortie)
+            return
+
+        if self.reception and octets[0] >= SEQ_PARITE:
+            return  # Parité: réservée à la correction côté PC
+
+        if self.reception:
+            if self.verbeux:
+                sortie.ligne(f"DEBUG: Paquet {octets[0] + 1} reçu: 0x{code:X}")
+            if self.compresse:
+                self.octets_compresses = min(self.octets_compresses + 3, self.longueur_attendue)
+                return
+            # Comme le firmware: un paquet en double est ajouté une seconde fois
+            for octet in octets[1:]:
+                if octet and len(self.tampon_message) < self.longueur_attendue and 32 <= octet <= 126:
+                    self.tampon_message += chr(octet)
+            if self.verbeux:
+                sortie.ligne(f"  Buffer actuel: '{self.tampon_message}' "
+                             f"({len(self.tampon_message)}/{self.longueur_attendue} chars)")
+            return
+
+        if self.binaire:
+            sortie.trame(wave_binaire.TYPE_HORS_SEQUENCE, code.to_bytes(4, 'big'))
+            return
+        sortie.ligne(f"DEBUG: Signal hors séquence: 0x{code:X} (byte0=0x{octets[0]:X})")
+
+    def _annoncer(self, sortie):
+        """Alerte activée avec le message du tampon (announceMessage)"""
+        self.alerte_active = True
+        self.dernier_message = self.tampon_message
+        if self.binaire:
+            sortie.trame(wave_binaire.TYPE_MESSAGE, self.tampon_message.encode())
+            return
+        sortie.ligne(f"✅ MESSAGE PERSONNALISÉ REÇU: '{self.tampon_message}' "
+                     f"({len(self.tampon_message)} caractères)")
+        sortie.ligne("🚨 ALERTE NUCLÉAIRE ACTIVÉE !")
+        sortie.ligne("💡 LED: Clignotante")
+        if self.son_actif:
+            sortie.ligne("🔊 SON: Alerte nucléaire continue")
+        else:
+            sortie.ligne("🔇 SON: Désactivé (alerte silencieuse)")
+        sortie.ligne("💡 Tapez 'stopalert' dans le terminal pour arrêter l'alerte")
+
+    def _reinitialiser(self, sortie):
+        self.tampon_message = ""
+        self.longueur_attendue = 0
+        self.reception = False
+        self.compresse = False
+        if not self.binaire:
+            sortie.ligne("DEBUG: Buffer réinitialisé")
+
+    def commande(self, commande):
+        commande = commande.lower()
+        if not commande:
+            return
+        sortie = self.sortie()
+        sortie.ligne(f"📝 Commande reçue: '{commande}'")
+        if commande == "soundon":
+            self.son_actif = True
+            if self.binaire:
+                sortie.trame(wave_binaire.TYPE_SON, b"\x01")
+            else:
+                sortie.ligne("🔊 SON ACTIVÉ - Les alertes sonores sont maintenant actives")
+        elif commande == "soundoff":
+            self.son_actif = False
+            if self.binaire:
+                sortie.trame(wave_binaire.TYPE_SON, b"\x00")
+            else:
+                sortie.ligne("🔇 SON DÉSACTIVÉ - Les alertes sont maintenant silencieuses")
+                sortie.ligne("💡 La LED continuera à clignoter lors des alertes")
+        elif commande == "stopalert":
+            if self.alerte_active:
+                self.alerte_active = False
+                if self.binaire:
+                    sortie.trame(wave_binaire.TYPE_ALERTE_ARRETEE, self.dernier_message.encode())
+                else:
+                    sortie.ligne("✅ ALERTE ARRÊTÉE - LED + SON ÉTEINTS")
+                    sortie.ligne(f"📄 Message lu: '{self.dernier_message}'")
+            else:
+                sortie.ligne("⚠️ Aucune alerte active à arrêter")
+        elif commande == "debugon":
+            self.verbeux = True
+            sortie.ligne("🐞 DEBUG DÉTAILLÉ ACTIVÉ")
+        elif commande == "debugoff":
+            self.verbeux = False
+            sortie.ligne("🐞 DEBUG DÉTAILLÉ DÉSACTIVÉ - Codes RX: uniquement")
+        elif commande == "binon":
+            # Réponse texte d'abord: le PC bascule son décodeur en la lisant
+            sortie.ligne(f"{wave_binaire.REPONSE_ACTIVE} 1")
+            self.binaire = True
+            self.verbeux = False
+        elif commande == "binoff":
+            self.binaire = False
+            sortie.ligne(wave_binaire.REPONSE_DESACTIVE)
+        else:
+            sortie.ligne(f"❌ Commande inconnue: '{commande}'")
+            sortie.ligne("💡 Tapez 'help' pour voir les commandes disponibles")
+        sortie.envoyer()
+
+
+class SimulateurEmetteur(CarteSimulee):
+    """transmetteur.cpp: commandes MSG:/MSGZ:/FEC:/binon et passage d'une carte RFID
+
+    `cadence` multiplie les pauses radio du firmware (100 ms après le code de
+    début, 50 ms par paquet); 0 transmet instantanément.
+    """
+
+    def __init__(self, port=None, recepteurs=(), cadence=1.0):
+        super().__init__(port)
+        self.recepteurs = list(recepteurs)
+        self.cadence = cadence
+        self.message = "ALERTE"
+        self.charge = None  # Forme compressée reçue par MSGZ: (émise à la place du texte)
+        self.modele = None  # Code modèle reçu par TPL: (émis seul à la place de la trame)
+        self.groupe_fec = 0
+
+    def commande(self, commande):
+        sortie = self.sortie()
+        if commande == "binon":
+            sortie.ligne(f"{wave_binaire.REPONSE_ACTIVE} 1")
+            self.binaire = True
+        elif commande == "binoff":
+            self.binaire = False
+            sortie.ligne(wave_binaire.REPONSE_DESACTIVE)
+        elif commande.startswith("FEC:"):
+            try:
+                self.groupe_fec = max(0, min(16, int(commande[4:])))
+            except ValueError:
+                self.groupe_fec = 0
+            if not self.binaire:
+                sortie.ligne(f"INFO: Parité: 1 paquet pour {self.groupe_fec} paquets de données")
+        elif commande.startswith("MSG:") and len(commande) > 4:
+            message = commande[4:]
+            if len(message) > 50:
+                message = message[:50]
+                sortie.ligne("INFO: Message limité à 50 caractères")
+            self.message = message
+            self.charge = None
+            self.modele = None
+            if self.binaire:
+                sortie.trame(wave_binaire.TYPE_MESSAGE_DEFINI, message.encode())
+            else:
+                sortie.ligne(f"INFO: Nouveau message défini: '{message}'")
+                sortie.ligne("INFO: Scannez une carte autorisée pour l'envoyer")
+        elif commande.startswith("TPL:"):
+            try:
+                code = int(commande[4:], 16)
+            except ValueError:
+                code = 0
+            if code >> 24 == CODE_MODELE:
+                self.modele = code
+                if not self.binaire:
+                    sortie.ligne(f"INFO: Message modèle: code 0x{code:X}")
+        elif commande.startswith("MSGZ:"):
+            try:
+                charge = bytes.fromhex(commande[5:])
+            except ValueError:
+                charge = b""
+            if 0 < len(charge) <= 64:
+                self.charge = charge
+                if not self.binaire:
+                    sortie.ligne(f"INFO: Message compressé: {len(charge)} octets au lieu de {len(self.message)}")
+        sortie.envoyer()
+
+    def presenter_carte(self, autorisee=True):
+        """Passage d'une carte RFID (autorisée ou non) devant le lecteur"""
+        uid = UID_AUTORISE if autorisee else UID_REFUSE
+        sortie = self.sortie()
+        if not self.binaire:
+            sortie.ligne("DEBUG: Carte détectée !")
+            sortie.ligne("UID scanné : " + "".join(f" {octet:02X}" for octet in uid))
+            sortie.ligne("DEBUG: Vérification de l'UID...")
+        if not autorisee:
+            if self.binaire:
+                sortie.trame(wave_binaire.TYPE_CARTE_REFUSEE, uid)
+            else:
+                sortie.ligne("DEBUG: Aucun UID correspondant trouvé")
+                sortie.ligne("DEBUG: UID NON AUTORISÉ - Aucune transmission")
+                sortie.ligne("DEBUG: Communication RFID fermée")
+            sortie.envoyer()
+            return
+        if self.binaire:
+            sortie.trame(wave_binaire.TYPE_CARTE_AUTORISEE, uid)
+        else:
+            sortie.ligne("DEBUG: UID correspond à la carte 1")
+            sortie.ligne(f"DEBUG: UID AUTORISÉ - Envoi de '{self.message}'")
+        sortie.envoyer()
+        self._transmettre(self.message)
+
+    def _transmettre(self, message):
+        if self.modele is not None:
+            self._transmettre_modele(message)
+            return
+        if self.charge is not None:
+            donnees, compresse = self.charge, True
+        else:
+            donnees, compresse = charge_utile(message)
+        codes = encoder_donnees(donnees, self.groupe_fec, compresse)
+        paquets = nombre_paquets(len(donnees))
+        parites = len(codes) - 2 - paquets
+        sortie = self.sortie()
+        if not self.binaire:
+            sortie.ligne(f"DEBUG: Envoi du message personnalisé: '{message}' ({len(message)} caractères)")
+            if compresse:
+                sortie.ligne(f"DEBUG: Charge utile compressée: {len(donnees)} octets")
+        for rang, code in enumerate(codes):
+            if not self.binaire:
+                if rang == 0:
+                    sortie.ligne(f"DEBUG: Envoi code de début: 0x{code:X}")
+                elif rang <= paquets:
+                    sortie.ligne(f"DEBUG: Paquet {rang}/{paquets} - Code: 0x{code:X}")
+                elif rang <= paquets + parites:
+                    sortie.ligne(f"DEBUG: Parité {rang - paquets}/{parites} - Code: 0x{code:X}")
+                else:
+                    sortie.ligne(f"DEBUG: Envoi code de fin: 0x{code:X}")
+            sortie.envoyer()
+            for recepteur in self.recepteurs:
+                recepteur.recevoir_codes([code])
+            if self.cadence and rang < len(codes) - 1:
+                time.sleep((0.1 if rang == 0 else 0.05) * self.cadence)
+        if self.binaire:
+            sortie.trame(wave_binaire.TYPE_TRANSMISSION_OK, bytes((len(codes),)))
+        else:
+            sortie.ligne("DEBUG: Transmission terminée avec succès !")
+            sortie.ligne("DEBUG: Communication RFID fermée")
+        sortie.envoyer()
+
+    def _transmettre_modele(self, message):
+        """sendTemplateCode: le code modèle seul, répété"""
+        sortie = self.sortie()
+        if not self.binaire:
+            sortie.ligne(f"DEBUG: Envoi du message personnalisé: '{message}' ({len(message)} caractères)")
+        for copie in range(COPIES_MODELE):
+            if not self.binaire:
+                sortie.ligne(f"DEBUG: Code modèle {copie + 1}/{COPIES_MODELE} - Code: 0x{self.modele:X}")
+            sortie.envoyer()
+            for recepteur in self.recepteurs:
+                recepteur.recevoir_codes([self.modele])
+            if self.cadence and copie < COPIES_MODELE - 1:
+                time.sleep(0.05 * self.cadence)
+        if self.binaire:
+            sortie.trame(wave_binaire.TYPE_TRANSMISSION_OK, bytes((COPIES_MODELE,)))
+        else:
+            sortie.ligne("DEBUG: Transmission terminée avec succès !")
+            sortie.ligne("DEBUG: Communication RFID fermée")
+        sortie.envoyer()
@@ -0,0 +1,130 @@
+"""Reconnexion automatique des cartes perdues (câble USB débranché, carte redémarrée)
+
+Chaque carte est identifiée à la connexion par son périphérique USB (VID/PID
+et numéro de série, via serial.tools.list_ports) et non par son nom de port:
+une carte rebranchée qui revient en COM9 au lieu de COM8 est retrouvée. Sans
+identité USB (pty de test, port série natif, courtier socket://), le nom
+d'origine sert.
+
+Une carte perdue est relancée dans la boucle série: nouvel essai après une
+attente doublée à chaque échec (RELANCE_INITIALE à RELANCE_MAX), ou dès que
+son périphérique réapparaît dans la liste des ports. La durée de chaque panne
+est notée sur la carte.
+"""
+import asyncio
+import os
+import time
+
+from serial.tools import list_ports
+
+from wave_serie import TIMEOUT_OUVERTURE, bloquant
+
+RELANCE_INITIALE = 1.0    # Secondes avant le deuxième essai, doublées à chaque échec
+RELANCE_MAX = 30.0
+PERIODE_DETECTION = 1.0   # Relecture de la liste des ports pendant une panne
+
+
+def identite_usb(info):
+    """(VID, PID, numéro de série) d'un port USB, ou None"""
+    if info.vid is None:
+        return None
+    return (info.vid, info.pid, info.serial_number)
+
+
+def identifier(ports):
+    """Identité USB de chaque nom de port (None si inconnue); appel bloquant"""
+    identites = {info.device: identite_usb(info) for info in list_ports.comports()}
+    return {port: identites.get(port) for port in ports}
+
+
+def chercher(identite, port, exclus=()):
+    """Nom de port actuel du périphérique, ou None s'il est absent; appel bloquant
+
+    À VID/PID égaux sans numéro de série, le port d'origine est préféré; `exclus`
+    écarte les ports déjà utilisés par d'autres cartes.
+    """
+    if "://" in port:
+        return port  # Courtier (wave_courtier): rien à lister, l'ouverture dira s'il répond
+    infos = list_ports.comports()
+    if identite is None:
+        if any(info.device == port for info in infos) or os.path.exists(port):
+            return port
+        return None
+    candidats = [info.device for info in infos
+                 if identite_usb(info) == identite and info.device not in exclus]
+    if port in candidats:
+        return port
+    return candidats[0] if candidats else None
+
+
+class SuperviseurPorts:
+    """Relance les cartes perdues d'un LecteurMultiPort (thread de la boucle série)
+
+    `signaler_reprise(carte, duree)` est appelé depuis la boucle quand une
+    carte relit son port, `duree` étant la panne en secondes.
+    """
+
+    def __init__(self, lecteur, signaler_reprise, initialisation=None):
+        self.lecteur = lecteur
+        self.signaler_reprise = signaler_reprise
+        self.initialisation = initialisation  # Réécrit à chaque reprise (mode binaire)
+        self.relances = {}  # carte -> tâche de relance
+
+    async def identifier(self):
+        cartes = self.lecteur.cartes
+        identites = await bloquant(identifier, [carte.port for carte in cartes])
+        for carte in cartes:
+            carte.identite = identites[carte.port]
+
+    def carte_perdue(self, carte):
+        carte.perdue_depuis = time.monotonic()
+        if carte not in self.relances:
+            self.relances[carte] = asyncio.get_running_loop().create_task(self._relancer(carte))
+
+    def arreter(self):
+        for tache in self.relances.values():
+            tache.cancel()
+        self.relances = {}
+
+    def ports_occupes(self, carte):
+        return {autre.port for autre in self.lecteur.cartes if autre is not carte and autre.actif}
+
+    async def _relancer(self, carte):
+        try:
+            await carte.fermer_async()
+            attente = RELANCE_INITIALE
+            prochain_essai = time.monotonic() + attente
+            present = True  # Seule une réapparition avance l'essai
+            while True:
+                await asyncio.sleep(PERIODE_DETECTION)
+                port = await bloquant(chercher, carte.identite, carte.port, self.ports_occupes(carte))
+                apparu = port is not None and not present
+                present = port is not None
+                if port is None or (not apparu and time.monotonic() < prochain_essai):
+                    continue
+                carte.tentatives_reprise += 1
+                try:
+                    connexion = await bloquant(carte.connexion_serie, port, carte.connexion.baudrate,
+                                               timeout=TIMEOUT_OUVERTURE, liberer=lambda c: c.close())
+                except Exception as e:
+                    carte.erreur = str(e) or type(e).__name__
+                    attente = min(attente * 2, RELANCE_MAX)
+                    prochain_essai = time.monotonic() + attente
+                    continue
+                await self._reprendre(carte, port, connexion)
+                return
+        finally:
+            if self.relances.get(carte) is asyncio.current_task():
+                del self.relances[carte]
+
+    async def _reprendre(self, carte, port, connexion):
+        duree = time.monotonic() - carte.perdue_depuis
+        carte.pannes.append((time.time() - duree, duree))
+        carte.perdue_depuis = None
+        self.lecteur.reprendre(carte, port, connexion)
+        if self.initialisation is not None:
+            try:
+                await carte.ecrire_async(self.initialisation)
+            except Exception:
+                pass  # Nouvelle perte: signalée par la lecture
+        self.signaler_reprise(carte, duree)
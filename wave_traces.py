@@ -0,0 +1,202 @@
+"""Traçage de latence de bout en bout: passage de carte -> ligne affichée au récepteur
+
+Émetteur et récepteur ajoutent leurs étapes, horodatées en temps monotone de
+l'hôte, à un même fichier JSONL (une ligne par étape). Le corrélateur relit
+ce fichier, regroupe les étapes d'un même message (par son texte, dans une
+fenêtre de temps) et calcule les percentiles de chaque segment.
+"""
+import bisect
+import json
+import math
+import os
+import time
+from collections import deque
+
+from wave_persistance import chemin_par_defaut
+
+# Étapes, dans l'ordre du trajet d'une alerte
+MSG_ENVOYE = 'msg_envoye'              # Émetteur: MSG: écrit sur le port
+UID_AUTORISE = 'uid_autorise'          # Émetteur: "UID AUTORISÉ"
+TRANSMISSION_OK = 'transmission_ok'    # Émetteur: "Transmission terminée"
+PREMIER_PAQUET = 'premier_paquet'      # Récepteur: premier code de la trame
+MESSAGE_ASSEMBLE = 'message_assemble'  # Récepteur: message complet
+LIGNE_AFFICHEE = 'ligne_affichee'      # Récepteur: ligne dessinée dans le journal
+ETAPES = (MSG_ENVOYE, UID_AUTORISE, TRANSMISSION_OK, PREMIER_PAQUET, MESSAGE_ASSEMBLE, LIGNE_AFFICHEE)
+
+SEGMENTS = (
+    ("Carte → fin émission", UID_AUTORISE, TRANSMISSION_OK),
+    ("Carte → 1er paquet", UID_AUTORISE, PREMIER_PAQUET),
+    ("1er paquet → assemblé", PREMIER_PAQUET, MESSAGE_ASSEMBLE),
+    ("Assemblé → affiché", MESSAGE_ASSEMBLE, LIGNE_AFFICHEE),
+    ("Carte → affichage", UID_AUTORISE, LIGNE_AFFICHEE),
+    ("Envoi MSG → affichage", MSG_ENVOYE, LIGNE_AFFICHEE),
+)
+SEGMENT_PRINCIPAL = "Carte → affichage"
+
+FENETRE_CORRELATION = 120.0  # Secondes max entre deux étapes d'un même message
+HISTOGRAMME_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)  # Bornes hautes des classes
+CLASSES_HISTOGRAMME = tuple(f"<={borne}" for borne in HISTOGRAMME_MS) + (f">{HISTOGRAMME_MS[-1]}",)
+NB_TRACES = 10000
+TAILLE_MAX_FICHIER = 5 * 1024 * 1024  # Au-delà, le fichier est renommé en .1 à l'ouverture
+
+
+def chemin_traces():
+    """Fichier partagé par l'émetteur et le récepteur lancés depuis le même dossier"""
+    return chemin_par_defaut("wave_traces.jsonl")
+
+
+class TraceurLatence:
+    """Ajoute les étapes d'un processus au fichier de traces (thread Tk)"""
+
+    def __init__(self, chemin=None, processus=""):
+        self.chemin = chemin or chemin_traces()
+        self.processus = processus
+        self.fichier = None
+        try:
+            if os.path.getsize(self.chemin) > TAILLE_MAX_FICHIER:
+                os.replace(self.chemin, self.chemin + ".1")
+        except OSError:
+            pass  # Absent, ou ouvert par l'autre application (Windows): on continue d'ajouter
+        try:
+            self.fichier = open(self.chemin, 'a', encoding='utf-8')
+        except OSError as e:
+            print(f"Traces de latence indisponibles: {e}")
+
+    def noter(self, etape, texte, source="", t=None):
+        if self.fichier is None:
+            return
+        evenement = {'t': time.monotonic() if t is None else t, 'etape': etape,
+                     'texte': texte, 'source': source, 'proc': self.processus}
+        try:
+            # Une ligne complète par écriture: les deux processus peuvent ajouter en même temps
+            self.fichier.write(json.dumps(evenement, ensure_ascii=False) + "\n")
+            self.fichier.flush()
+        except OSError:
+            pass
+
+    def fermer(self):
+        if self.fichier is not None:
+            self.fichier.close()
+            self.fichier = None
+
+
+def percentile(valeurs_triees, p):
+    """Percentile au rang le plus proche sur une liste déjà triée"""
+    if not valeurs_triees:
+        return None
+    rang = max(1, math.ceil(p / 100 * len(valeurs_triees)))
+    return valeurs_triees[rang - 1]
+
+
+class TraceMessage:
+    __slots__ = ('texte', 'etapes', 'sources', 'derniere')
+
+    def __init__(self, texte):
+        self.texte = texte
+        self.etapes = {}   # étape -> t (première occurrence)
+        self.sources = {}  # étape -> carte
+        self.derniere = 0.0
+
+
+class CorrelateurTraces:
+    """Relit le fichier de traces au fil de l'eau et regroupe les étapes par message"""
+
+    def __init__(self, chemin=None, fenetre=FENETRE_CORRELATION):
+        self.chemin = chemin or chemin_traces()
+        self.fenetre = fenetre
+        self.traces = deque(maxlen=NB_TRACES)
+        self.ouvertes = {}  # texte -> trace en cours
+        self.position = 0
+        self.reste = ""
+
+    def lire(self):
+        """Intègre les étapes ajoutées depuis la dernière lecture; retourne leur nombre"""
+        try:
+            if os.path.getsize(self.chemin) < self.position:
+                # Fichier renommé par TraceurLatence: reprise au début du nouveau
+                self.position = 0
+                self.reste = ""
+            with open(self.chemin, 'r', encoding='utf-8') as fichier:
+                fichier.seek(self.position)
+                donnees = fichier.read()
+                self.position = fichier.tell()
+        except OSError:
+            return 0
+        lignes = (self.reste + donnees).split("\n")
+        self.reste = lignes.pop()  # Ligne en cours d'écriture par l'autre processus
+        nombre = 0
+        for ligne in lignes:
+            try:
+                evenement = json.loads(ligne)
+            except ValueError:
+                continue
+            self.ajouter(evenement['etape'], evenement['texte'], evenement['t'], evenement.get('source', ""))
+            nombre += 1
+        return nombre
+
+    def ajouter(self, etape, texte, t, source=""):
+        trace = self.ouvertes.get(texte)
+        # abs(): le temps monotone repart de zéro au redémarrage de la machine
+        perimee = trace is None or abs(t - trace.derniere) > self.fenetre
+        if etape == MSG_ENVOYE:
+            # Diffusion à un groupe: les envois simultanés appartiennent au même message
+            nouvelle = perimee or len(trace.etapes) > 1 or MSG_ENVOYE not in trace.etapes
+        else:
+            # Une étape déjà vue ouvre un nouveau message (nouvel envoi du même texte)
+            nouvelle = perimee or (etape in trace.etapes and etape != LIGNE_AFFICHEE)
+        if nouvelle:
+            trace = TraceMessage(texte)
+            self.traces.append(trace)
+            self.ouvertes[texte] = trace
+        if etape not in trace.etapes:
+            trace.etapes[etape] = t
+            trace.sources[etape] = source
+        trace.derniere = max(trace.derniere, t)
+
+    def latences(self):
+        """{segment: liste triée des durées en secondes}"""
+        resultats = {}
+        for nom, debut, fin in SEGMENTS:
+            valeurs = [trace.etapes[fin] - trace.etapes[debut] for trace in self.traces
+                       if debut in trace.etapes and fin in trace.etapes
+                       and trace.etapes[fin] >= trace.etapes[debut]]
+            resultats[nom] = sorted(valeurs)
+        return resultats
+
+    def resume(self):
+        """{segment: {n, p50, p95, p99, histogramme}} (durées en ms)"""
+        resume = {}
+        for nom, valeurs in self.latences().items():
+            ms = [v * 1000 for v in valeurs]
+            comptes = [0] * (len(HISTOGRAMME_MS) + 1)
+            for valeur in ms:
+                comptes[bisect.bisect_left(HISTOGRAMME_MS, valeur)] += 1
+            histogramme = dict(zip(CLASSES_HISTOGRAMME, comptes))
+            resume[nom] = {'n': len(ms), 'p50': percentile(ms, 50), 'p95': percentile(ms, 95),
+                           'p99': percentile(ms, 99), 'histogramme': histogramme}
+        return resume
+
+    def exporter(self, chemin):
+        """Écrit le résumé et le détail des messages tracés (JSON)"""
+        donnees = {
+            'genere_le': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'latences_ms': self.resume(),
+            'messages': [
+                {'texte': trace.texte,
+                 'etapes_ms': {etape: round((t - min(trace.etapes.values())) * 1000, 1)
+                               for etape, t in sorted(trace.etapes.items(), key=lambda item: item[1])},
+                 'sources': trace.sources}
+                for trace in self.traces
+            ],
+        }
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            json.dump(donnees, fichier, ensure_ascii=False, indent=2)
+        return len(self.traces)
+
+
+def formater_ms(valeur):
+    if valeur is None:
+        return "-"
+    if valeur < 1000:
+        return f"{valeur:.0f} ms"
+    return f"{valeur / 1000:.2f} s"
@@ -0,0 +1,342 @@
+"""Décodage côté PC des trames 433MHz de sendCustomMessage (transmetteur.cpp)
+
+Format radio (codes de 32 bits):
+    0xFFGG00LL          code de début, LL = longueur du message en octets,
+                        GG = taille des groupes de parité (0: sans correction),
+                        bit 0x80 de GG: message compressé (wave_compression)
+    0xSSAABBCC          paquet SS (0, 1, 2...) portant les octets AA BB CC
+    0xPPXXXXXX          paquet de parité PP = 0x80 + groupe (XOR des paquets du groupe)
+    0xFE000000          code de fin
+    0xFDIIAABB          message standard en un code, hors trame (wave_modeles)
+
+Correction d'erreurs: avec G paquets par groupe, les n paquets de données
+sont répartis en entrelacé sur ceil(n / G) groupes (paquet i -> groupe
+i % nombre de groupes), chacun suivi de sa parité après les données. Un
+paquet perdu par groupe est reconstitué; une rafale de pertes consécutives
+touche des groupes différents.
+"""
+import time
+
+from wave_compression import compresser, decompresser
+from wave_modeles import CODE_MODELE, annonce_firmware, decoder_modele, encoder_modele, reconnaitre
+
+CODE_DEBUT = 0xFF000000
+CODE_FIN = 0xFE000000
+OCTETS_PAR_PAQUET = 3
+SEQ_PARITE = 0x80  # Numéros de séquence des paquets de parité (0x80 + groupe)
+GROUPE_FEC = 4     # Paquets de données par parité proposé par défaut (25% de codes en plus)
+COMPRESSE = 0x80   # Drapeau de l'octet GG du code de début
+COPIES_MODELE = 2  # Émissions d'un code modèle (la copie n'est utile qu'en cas de perte)
+DELAI_COPIE_MODELE = 1.0  # Secondes pendant lesquelles un code modèle identique est une copie
+TIMEOUT_TRAME = 10.0  # Identique au timeout du buffer dans recepteur.cpp
+
+
+def nombre_paquets(longueur):
+    """Nombre de paquets de données pour un message de `longueur` octets"""
+    return (longueur + OCTETS_PAR_PAQUET - 1) // OCTETS_PAR_PAQUET
+
+
+def nombre_groupes(paquets, groupe_fec):
+    """Nombre de paquets de parité pour `paquets` paquets de données"""
+    return (paquets + groupe_fec - 1) // groupe_fec if groupe_fec else 0
+
+
+def charge_utile(texte, compression=False):
+    """(octets émis, compressé) pour `texte`; le texte brut si la compression ne gagne aucun paquet"""
+    brut = texte.encode('ascii', errors='replace')[:0xFF]
+    if compression:
+        donnees = compresser(texte)
+        if donnees is not None and nombre_paquets(len(donnees)) < nombre_paquets(len(brut)):
+            return donnees, True
+    return brut, False
+
+
+def encoder_message(texte, groupe_fec=0, compression=False):
+    """Encode un message comme le fait sendCustomMessage (liste de codes 32 bits)
+
+    Avec `compression`, un message conforme à un modèle devient un code modèle.
+    """
+    if compression:
+        modele = reconnaitre(texte)
+        if modele is not None:
+            return [encoder_modele(*modele)] * COPIES_MODELE
+    donnees, compresse = charge_utile(texte, compression)
+    return encoder_donnees(donnees, groupe_fec, compresse)
+
+
+def encoder_donnees(donnees, groupe_fec=0, compresse=False):
+    """Codes 32 bits d'une charge utile déjà préparée (texte brut ou compressé)"""
+    drapeaux = (groupe_fec & 0x7F) | (COMPRESSE if compresse else 0)
+    codes = [CODE_DEBUT | drapeaux << 16 | len(donnees)]
+    paquets = nombre_paquets(len(donnees))
+    for seq in range(paquets):
+        code = (seq & 0xFF) << 24
+        for i, octet in enumerate(donnees[seq * 3:seq * 3 + 3]):
+            code |= octet << (16 - i * 8)
+        codes.append(code)
+    groupes = nombre_groupes(paquets, groupe_fec)
+    for groupe in range(groupes):
+        parite = 0
+        for seq in range(groupe, paquets, groupes):
+            parite ^= codes[1 + seq] & 0xFFFFFF
+        codes.append((SEQ_PARITE + groupe) << 24 | parite)
+    codes.append(CODE_FIN)
+    return codes
+
+
+class MessageTrame:
+    """Résultat du réassemblage d'une trame (complète ou non)"""
+    __slots__ = ('texte', 'longueur', 'paquets_recus', 'paquets_attendus',
+                 'lacunes', 'doublons', 'complet', 'raison', 'debut', 'fin', 'recuperes', 'compresse',
+                 'modele')
+
+    def __init__(self, texte, longueur, paquets_recus, paquets_attendus,
+                 lacunes, doublons, complet, raison, debut, fin, recuperes=(), compresse=False,
+                 modele=None):
+        self.texte = texte
+        self.longueur = longueur
+        self.paquets_recus = paquets_recus
+        self.paquets_attendus = paquets_attendus
+        self.lacunes = lacunes
+        self.doublons = doublons
+        self.complet = complet
+        self.raison = raison
+        self.debut = debut
+        self.fin = fin
+        self.recuperes = list(recuperes)  # Paquets reconstitués par la parité
+        self.compresse = compresse        # `longueur` compte alors les octets compressés
+        self.modele = modele              # Numéro du modèle pour un code modèle
+
+    def __repr__(self):
+        etat = "complet" if self.complet else f"incomplet ({self.raison}, lacunes={self.lacunes})"
+        return f"MessageTrame({self.texte!r}, {self.paquets_recus}/{self.paquets_attendus}, {etat})"
+
+
+class DecodeurTrames:
+    """Réassemblage incrémental des codes reçus, avec déduplication par séquence
+
+    pousser() rend le message dès que le dernier paquet attendu arrive, sans
+    attendre le code de fin. Une trame interrompue (nouveau début, fin avec
+    paquets manquants ou timeout) est rendue avec complet=False et ses lacunes.
+    Avec correction d'erreurs, un paquet manquant est reconstitué dès que la
+    parité de son groupe et les autres paquets du groupe sont arrivés.
+    """
+
+    def __init__(self, timeout=TIMEOUT_TRAME, horloge=time.monotonic):
+        self.timeout = timeout
+        self.horloge = horloge
+
+        # Trame en cours
+        self.en_cours = False
+        self.livre = False
+        self.longueur = 0
+        self.attendus = 0
+        self.paquets = {}
+        self.doublons = 0
+        self.groupes = 0      # Paquets de parité annoncés (0: sans correction)
+        self.parites = {}     # groupe -> XOR des 3 octets
+        self.recuperes = []
+        self.compresse = False
+        self.debut = 0.0
+        self.dernier_code = 0.0
+
+        # Compteurs cumulés
+        self.messages_complets = 0
+        self.messages_incomplets = 0
+        self.hors_sequence = 0
+        self.doublons_total = 0
+        self.timeouts = 0
+        self.trames_fec = 0            # Trames annonçant des paquets de parité
+        self.paquets_recuperes = 0
+        self.trames_recuperees = 0     # Complètes grâce à la parité
+        self.trames_irrecuperables = 0  # Incomplètes malgré la parité
+        self.trames_compressees = 0
+        self.octets_economises = 0     # Texte livré moins octets reçus (trames compressées complètes)
+        self.paquets_economises = 0
+        self.modeles_recus = 0
+        self.modeles_inconnus = 0
+        self.dernier_modele = (0, 0.0)  # (code, instant) pour écarter la copie
+
+    def lacunes(self):
+        """Numéros de séquence encore manquants dans la trame en cours"""
+        if not self.en_cours:
+            return []
+        return [seq for seq in range(self.attendus) if seq not in self.paquets]
+
+    def pousser(self, code, maintenant=None):
+        """Traite un code 32 bits; retourne un MessageTrame ou None"""
+        if maintenant is None:
+            maintenant = self.horloge()
+        octet0 = (code >> 24) & 0xFF
+
+        if octet0 == CODE_MODELE:
+            # Message complet en un code, indépendant de la trame éventuellement en cours
+            return self._modele(code, maintenant)
+
+        if octet0 == 0xFF:
+            abandon = self._abandonner('interrompu', maintenant)
+            drapeaux = (code >> 16) & 0xFF
+            self._demarrer(code & 0xFF, maintenant, drapeaux & 0x7F, bool(drapeaux & COMPRESSE))
+            return abandon
+
+        expire = self.verifier_timeout(maintenant)
+        if expire is not None:
+            # Le code courant arrive après expiration: il est hors séquence
+            self.hors_sequence += 1
+            return expire
+
+        if octet0 == 0xFE:
+            if not self.en_cours:
+                return None
+            if self.livre or not self.lacunes():
+                message = None if self.livre else self._terminer(True, 'fin', maintenant)
+                self._reinitialiser()
+                return message
+            return self._abandonner('fin', maintenant)
+
+        if self.en_cours and self.groupes and SEQ_PARITE <= octet0 < SEQ_PARITE + self.groupes:
+            return self._parite(octet0 - SEQ_PARITE, code & 0xFFFFFF, maintenant)
+
+        if not self.en_cours or self.livre or octet0 >= self.attendus:
+            self.hors_sequence += 1
+            return None
+
+        self.dernier_code = maintenant
+        if octet0 in self.paquets:
+            self.doublons += 1
+            self.doublons_total += 1
+            return None
+        self.paquets[octet0] = ((code >> 16) & 0xFF, (code >> 8) & 0xFF, code & 0xFF)
+        if self.groupes:
+            # Parité arrivée avant ce paquet: il ne reste peut-être qu'un trou dans le groupe
+            self._reparer(octet0 % self.groupes)
+        return self._livrer_si_complet(maintenant)
+
+    def _modele(self, code, maintenant):
+        dernier_code, instant = self.dernier_modele
+        self.dernier_modele = (code, maintenant)
+        if code == dernier_code and maintenant - instant < DELAI_COPIE_MODELE:
+            self.doublons_total += 1
+            return None
+        modele, numero, parametre = decoder_modele(code)
+        if modele is None:
+            # Modèle ajouté côté émetteur seulement: rien à développer
+            self.modeles_inconnus += 1
+            self.messages_incomplets += 1
+            return MessageTrame(annonce_firmware(code), 0, 1, 1, [], 0, False,
+                                'modèle inconnu', maintenant, maintenant, modele=numero)
+        self.modeles_recus += 1
+        self.messages_complets += 1
+        texte = modele.developper(parametre)
+        return MessageTrame(texte, len(texte), 1, 1, [], 0, True, 'modele',
+                            maintenant, maintenant, modele=numero)
+
+    def _parite(self, groupe, valeur, maintenant):
+        self.dernier_code = maintenant
+        if self.livre:
+            return None  # Toutes les données sont déjà là
+        if groupe in self.parites:
+            self.doublons += 1
+            self.doublons_total += 1
+            return None
+        self.parites[groupe] = valeur
+        self._reparer(groupe)
+        return self._livrer_si_complet(maintenant)
+
+    def _reparer(self, groupe):
+        """Reconstitue le paquet manquant du groupe s'il est le seul et que la parité est connue"""
+        if groupe not in self.parites:
+            return
+        membres = range(groupe, self.attendus, self.groupes)
+        manquants = [seq for seq in membres if seq not in self.paquets]
+        if len(manquants) != 1:
+            return
+        valeur = self.parites[groupe]
+        for seq in membres:
+            if seq in self.paquets:
+                a, b, c = self.paquets[seq]
+                valeur ^= a << 16 | b << 8 | c
+        self.paquets[manquants[0]] = ((valeur >> 16) & 0xFF, (valeur >> 8) & 0xFF, valeur & 0xFF)
+        self.recuperes.append(manquants[0])
+        self.paquets_recuperes += 1
+
+    def _livrer_si_complet(self, maintenant):
+        if len(self.paquets) < self.attendus:
+            return None
+        # Dernier paquet (reçu ou reconstitué): livraison immédiate, le code de fin sera ignoré
+        self.livre = True
+        if self.recuperes:
+            self.trames_recuperees += 1
+        return self._terminer(True, 'complet', maintenant)
+
+    def verifier_timeout(self, maintenant=None):
+        """Abandonne la trame en cours si aucun code n'est arrivé depuis `timeout`"""
+        if maintenant is None:
+            maintenant = self.horloge()
+        if self.en_cours and maintenant - self.dernier_code > self.timeout:
+            self.timeouts += 1
+            return self._abandonner('timeout', maintenant)
+        return None
+
+    def _demarrer(self, longueur, maintenant, groupe_fec=0, compresse=False):
+        self._reinitialiser()
+        self.en_cours = True
+        self.compresse = compresse
+        if compresse:
+            self.trames_compressees += 1
+        self.longueur = longueur
+        self.attendus = nombre_paquets(longueur)
+        self.groupes = nombre_groupes(self.attendus, groupe_fec)
+        if self.groupes:
+            self.trames_fec += 1
+        self.debut = maintenant
+        self.dernier_code = maintenant
+
+    def _reinitialiser(self):
+        self.en_cours = False
+        self.livre = False
+        self.paquets = {}
+        self.doublons = 0
+        self.groupes = 0
+        self.parites = {}
+        self.recuperes = []
+        self.compresse = False
+
+    def _abandonner(self, raison, maintenant):
+        if not self.en_cours or self.livre:
+            self._reinitialiser()
+            return None
+        message = self._terminer(False, raison, maintenant)
+        self._reinitialiser()
+        return message
+
+    def _terminer(self, complet, raison, maintenant):
+        if self.compresse:
+            # Octets bruts jusqu'au premier paquet manquant: le reste n'est pas décodable
+            octets = bytearray()
+            for seq in range(self.attendus):
+                if seq not in self.paquets:
+                    break
+                octets.extend(self.paquets[seq])
+            texte = decompresser(octets[:self.longueur])
+        else:
+            # Même filtrage que le firmware: ASCII imprimable, tronqué à la longueur annoncée
+            octets = bytearray()
+            for seq in range(self.attendus):
+                for octet in self.paquets.get(seq, ()):
+                    if 32 <= octet <= 126:
+                        octets.append(octet)
+            texte = octets[:self.longueur].decode('ascii')
+
+        if complet:
+            self.messages_complets += 1
+            if self.compresse:
+                self.octets_economises += len(texte) - self.longueur
+                self.paquets_economises += nombre_paquets(len(texte)) - self.attendus
+        else:
+            self.messages_incomplets += 1
+            if self.groupes:
+                self.trames_irrecuperables += 1
+        return MessageTrame(texte, self.longueur, len(self.paquets), self.attendus,
+                            self.lacunes(), self.doublons, complet, raison,
+                            self.debut, maintenant, self.recuperes, self.compresse)
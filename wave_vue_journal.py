@@ -0,0 +1,195 @@
+"""Vue virtualisée du journal: seules les lignes visibles existent en widgets"""
+import tkinter as tk
+from tkinter import ttk
+
+HAUTEUR_LIGNE = 32
+
+
+class JournalVirtuel(tk.Frame):
+    """Liste à défilement sur un MagasinMessages, avec recyclage des lignes
+
+    Un petit pool de lignes (autant que la hauteur en affiche) est réaffecté
+    aux entrées de la fenêtre visible à chaque défilement. Émet <<JournalSelect>>
+    quand la sélection change; selection() retourne un tuple d'ids comme
+    ttk.Treeview.selection().
+    """
+
+    def __init__(self, master, magasin, colors, hauteur=16, **kwargs):
+        super().__init__(master, bg=colors['card'], **kwargs)
+        self.magasin = magasin
+        self.colors = colors
+        self.premier = 0          # Index (dans le magasin) de la première ligne affichée
+        self.nb_visibles = hauteur
+        self.selection_id = None
+        self.lignes = []          # Pool de lignes recyclées: (frame, statut, heure, source, message)
+        self.contenu = []         # Dernier contenu affiché par ligne, évite les configure inutiles
+
+        # En-tête façon Treeview
+        entete = tk.Frame(self, bg=colors['accent'], height=HAUTEUR_LIGNE)
+        entete.pack(fill=tk.X)
+        entete.pack_propagate(False)
+        for texte, largeur in (('🔔', 4), ('Heure', 10), ('Source', 12)):
+            tk.Label(entete, text=texte, width=largeur, font=('SF Pro Display', 12, 'bold'),
+                     fg='white', bg=colors['accent']).pack(side=tk.LEFT)
+        tk.Label(entete, text='Message', anchor='w', font=('SF Pro Display', 12, 'bold'),
+                 fg='white', bg=colors['accent']).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+
+        corps = tk.Frame(self, bg=colors['card'])
+        corps.pack(fill=tk.BOTH, expand=True)
+
+        self.scrollbar = ttk.Scrollbar(corps, orient='vertical', command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.zone = tk.Frame(corps, bg=colors['card'], height=hauteur * HAUTEUR_LIGNE)
+        self.zone.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.zone.pack_propagate(False)
+        self.zone.bind('<Configure>', self.on_resize)
+        self._bind_molette(self.zone)
+
+        self._ajuster_pool(hauteur)
+        self.rafraichir()
+
+    # ----- Pool de lignes -----
+
+    def _ajuster_pool(self, nb):
+        while len(self.lignes) < nb:
+            index = len(self.lignes)
+            frame = tk.Frame(self.zone, bg=self.colors['card'], height=HAUTEUR_LIGNE)
+            frame.pack(fill=tk.X)
+            frame.pack_propagate(False)
+            statut = tk.Label(frame, width=4, font=('SF Pro Text', 11), bg=self.colors['card'])
+            statut.pack(side=tk.LEFT)
+            heure = tk.Label(frame, width=10, font=('SF Pro Text', 11),
+                             fg=self.colors['text'], bg=self.colors['card'])
+            heure.pack(side=tk.LEFT)
+            source = tk.Label(frame, width=12, anchor='w', font=('SF Pro Text', 10),
+                              fg=self.colors['text_dim'], bg=self.colors['card'])
+            source.pack(side=tk.LEFT)
+            message = tk.Label(frame, anchor='w', font=('SF Pro Text', 11),
+                               fg=self.colors['text'], bg=self.colors['card'])
+            message.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+            for widget in (frame, statut, heure, source, message):
+                widget.bind('<Button-1>', lambda e, i=index: self.on_click(i))
+                self._bind_molette(widget)
+            self.lignes.append((frame, statut, heure, source, message))
+            self.contenu.append(None)
+        self.nb_visibles = nb
+
+    def _bind_molette(self, widget):
+        # "break" empêche le bind_all de la fenêtre de faire défiler toute l'interface
+        widget.bind('<MouseWheel>', self.on_mousewheel)
+        widget.bind('<Button-4>', self.on_mousewheel)
+        widget.bind('<Button-5>', self.on_mousewheel)
+
+    def on_resize(self, event):
+        nb = max(1, event.height // HAUTEUR_LIGNE)
+        if nb != self.nb_visibles:
+            self._ajuster_pool(nb)
+            self._borner()
+            self.rafraichir()
+
+    # ----- Rendu -----
+
+    def _borner(self):
+        maximum = max(0, len(self.magasin) - self.nb_visibles)
+        self.premier = min(max(0, self.premier), maximum)
+
+    def rafraichir(self):
+        """Réaffecte les lignes visibles aux entrées de la fenêtre courante"""
+        total = len(self.magasin)
+        for i, (frame, statut, heure, source, message) in enumerate(self.lignes):
+            index = self.premier + i
+            if i < self.nb_visibles and index < total:
+                entree = self.magasin[index]
+                selectionne = entree.id == self.selection_id
+                etat = (entree.id, entree.statut, selectionne, entree.occurrences)
+                if self.contenu[i] != etat:
+                    fond = '#e3f2fd' if selectionne else self.colors['card']
+                    frame.configure(bg=fond)
+                    statut.configure(text=entree.statut, bg=fond)
+                    heure.configure(text=entree.heure, bg=fond)
+                    source.configure(text=entree.source, bg=fond)
+                    message.configure(text=entree.libelle, bg=fond)
+                    self.contenu[i] = etat
+            elif self.contenu[i] is not None:
+                fond = self.colors['card']
+                frame.configure(bg=fond)
+                statut.configure(text='', bg=fond)
+                heure.configure(text='', bg=fond)
+                source.configure(text='', bg=fond)
+                message.configure(text='', bg=fond)
+                self.contenu[i] = None
+
+        if total:
+            self.scrollbar.set(self.premier / total, min(1.0, (self.premier + self.nb_visibles) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def a_la_fin(self, ajouts=0):
+        """Dernière ligne visible, sans compter les `ajouts` pas encore affichés"""
+        return self.premier + self.nb_visibles >= len(self.magasin) - ajouts
+
+    def voir_fin(self):
+        self.premier = len(self.magasin)
+        self._borner()
+        self.rafraichir()
+
+    def nouvelle_entree(self, suivre, evincees=0):
+        """À appeler après un ou plusieurs ajouts au magasin; `suivre` garde la dernière ligne visible"""
+        if suivre:
+            self.voir_fin()
+            return
+        if evincees:
+            # Chaque éviction décale les index d'un cran: rester sur les mêmes entrées
+            self.premier -= evincees
+        self._borner()
+        self.rafraichir()
+
+    # ----- Défilement -----
+
+    def yview(self, *args):
+        total = len(self.magasin)
+        if not args or not total:
+            return
+        if args[0] == 'moveto':
+            self.premier = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            pas = self.nb_visibles if args[2] == 'pages' else 1
+            self.premier += int(args[1]) * pas
+        self._borner()
+        self.rafraichir()
+
+    def on_mousewheel(self, event):
+        if event.delta:
+            self.yview('scroll', int(-1 * (event.delta / 120)) * 3, 'units')
+        elif event.num == 4:
+            self.yview('scroll', -3, 'units')
+        elif event.num == 5:
+            self.yview('scroll', 3, 'units')
+        return "break"
+
+    # ----- Sélection -----
+
+    def on_click(self, ligne):
+        index = self.premier + ligne
+        if index >= len(self.magasin):
+            return
+        self.selection_id = self.magasin[index].id
+        self.rafraichir()
+        self.event_generate('<<JournalSelect>>')
+
+    def selection(self):
+        if self.selection_id is not None and self.selection_id in self.magasin:
+            return (self.selection_id,)
+        return ()
+
+    def changer_source(self, source):
+        """Affiche une autre séquence d'entrées (résultats de recherche ou magasin)"""
+        self.magasin = source
+        self.selection_id = None
+        self.voir_fin()
+
+    def vider(self):
+        self.premier = 0
+        self.selection_id = None
+        self.rafraichir()